@@ -0,0 +1,196 @@
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Placar ao vivo: cada worker mantém um hub com as filas dos espectadores conectados (SSE ou
+# WebSocket), separadas por edição. As alterações são publicadas no backend de pub/sub: sem
+# AO_VIVO_URL (ou CACHE_URL) a entrega é direta ao hub do próprio processo; com um Redis, todos os
+# workers assinam o mesmo canal e cada um repassa as mensagens aos seus espectadores.
+
+TAMANHO_FILA = int(os.getenv("AO_VIVO_TAMANHO_FILA", "100"))
+# Intervalo (em segundos) dos comentários de keepalive do SSE, para proxies não fecharem a conexão
+INTERVALO_KEEPALIVE = float(os.getenv("AO_VIVO_KEEPALIVE", "15"))
+# Espera (em segundos) antes de reconectar ao Redis: dobra a cada falha seguida, até o máximo
+ESPERA_RECONEXAO = float(os.getenv("AO_VIVO_ESPERA_RECONEXAO", "0.5"))
+ESPERA_RECONEXAO_MAXIMA = float(os.getenv("AO_VIVO_ESPERA_RECONEXAO_MAXIMA", "30"))
+
+logger = logging.getLogger("gerencia.ao_vivo")
+
+class HubAoVivo:
+    def __init__(self, tamanho_fila: int = TAMANHO_FILA):
+        self.tamanho_fila = tamanho_fila
+        self._filas = {}
+        self._loop = None
+
+    def assinar(self, id_edicao: int) -> asyncio.Queue:
+        # Chamado no event loop do servidor
+        self._loop = asyncio.get_running_loop()
+        fila = asyncio.Queue(maxsize=self.tamanho_fila)
+        self._filas.setdefault(id_edicao, set()).add(fila)
+        return fila
+
+    def cancelar(self, id_edicao: int, fila: asyncio.Queue):
+        filas = self._filas.get(id_edicao)
+        if filas is not None:
+            filas.discard(fila)
+            if not filas:
+                del self._filas[id_edicao]
+
+    def total_assinantes(self, id_edicao: int) -> int:
+        return len(self._filas.get(id_edicao, ()))
+
+    def entregar(self, id_edicao: int, mensagem: dict):
+        # Pode ser chamado de qualquer thread (rotas síncronas, ouvinte do Redis): as filas só são
+        # tocadas dentro do event loop
+        loop = self._loop
+        if loop is None or loop.is_closed() or id_edicao not in self._filas:
+            return
+        try:
+            em_loop = asyncio.get_running_loop() is loop
+        except RuntimeError:
+            em_loop = False
+        if em_loop:
+            self._enfileirar(id_edicao, mensagem)
+        else:
+            loop.call_soon_threadsafe(self._enfileirar, id_edicao, mensagem)
+
+    def _enfileirar(self, id_edicao: int, mensagem: dict):
+        for fila in list(self._filas.get(id_edicao, ())):
+            if fila.full():
+                # Espectador lento: descarta a mensagem mais antiga em vez de travar os demais
+                fila.get_nowait()
+            fila.put_nowait(mensagem)
+
+class PubSubLocal:
+    def __init__(self, hub: HubAoVivo):
+        self.hub = hub
+
+    def iniciar(self):
+        pass
+
+    def publicar(self, id_edicao: int, mensagem: dict):
+        self.hub.entregar(id_edicao, mensagem)
+
+class PubSubRedis:
+    # Aceita qualquer cliente com a interface do redis-py (publish e pubsub com psubscribe/listen)
+    def __init__(self, cliente, hub: HubAoVivo, prefixo: str = "gerencia:ao_vivo:"):
+        self.cliente = cliente
+        self.hub = hub
+        self.prefixo = prefixo
+        self._ouvinte = None
+        self._lock = threading.Lock()
+
+    def publicar(self, id_edicao: int, mensagem: dict):
+        self.iniciar()
+        self.cliente.publish(f"{self.prefixo}{id_edicao}", json.dumps(mensagem))
+
+    def iniciar(self):
+        # Uma thread por processo repassa ao hub local o que qualquer worker publicou
+        with self._lock:
+            if self._ouvinte is None:
+                self._ouvinte = threading.Thread(target=self._ouvir, name="ao-vivo-pubsub", daemon=True)
+                self._ouvinte.start()
+
+    def _ouvir(self):
+        # Se a conexão cair, o listen() levanta exceção: assina de novo em vez de encerrar a thread,
+        # que ficaria registrada em _ouvinte e nunca seria recriada
+        espera = ESPERA_RECONEXAO
+        while True:
+            assinatura = None
+            try:
+                assinatura = self.cliente.pubsub()
+                assinatura.psubscribe(f"{self.prefixo}*")
+                espera = ESPERA_RECONEXAO
+                for item in assinatura.listen():
+                    if item.get("type") == "pmessage":
+                        self.despachar(item["channel"], item["data"])
+            except Exception as e:
+                logger.warning("Assinatura do placar ao vivo interrompida (%s); reconectando em %.1f s", e, espera)
+            if assinatura is not None:
+                try:
+                    assinatura.close()
+                except Exception:
+                    pass
+            time.sleep(espera)
+            espera = min(espera * 2, ESPERA_RECONEXAO_MAXIMA)
+
+    def despachar(self, canal, dados):
+        if isinstance(canal, bytes):
+            canal = canal.decode()
+        id_edicao = int(canal[len(self.prefixo):])
+        self.hub.entregar(id_edicao, json.loads(dados))
+
+def criar_backend(hub: HubAoVivo, url: str = None):
+    url = url or os.getenv("AO_VIVO_URL") or os.getenv("CACHE_URL")
+    if url and url.startswith(("redis://", "rediss://", "unix://")):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("AO_VIVO_URL aponta para um servidor Redis, mas o pacote 'redis' não está instalado.")
+        return PubSubRedis(redis.Redis.from_url(url), hub)
+    return PubSubLocal(hub)
+
+hub = HubAoVivo()
+backend = criar_backend(hub)
+
+def assinar(id_edicao: int) -> asyncio.Queue:
+    backend.iniciar()
+    return hub.assinar(id_edicao)
+
+def cancelar(id_edicao: int, fila: asyncio.Queue):
+    hub.cancelar(id_edicao, fila)
+
+def publicar(id_edicao: int, *mensagens: dict):
+    for mensagem in mensagens:
+        backend.publicar(id_edicao, mensagem)
+
+async def fluxo_sse(id_edicao: int, intervalo_keepalive: float = None):
+    # Eventos no formato text/event-stream; a fila é liberada quando o cliente desconecta
+    intervalo_keepalive = intervalo_keepalive or INTERVALO_KEEPALIVE
+    fila = assinar(id_edicao)
+    try:
+        yield "retry: 3000\n\n"
+        while True:
+            try:
+                mensagem = await asyncio.wait_for(fila.get(), timeout=intervalo_keepalive)
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+            yield f"event: {mensagem['tipo']}\ndata: {json.dumps(mensagem)}\n\n"
+    finally:
+        cancelar(id_edicao, fila)
+
+# --- Deltas publicados pelas rotas e serviços de partidas ---
+
+def delta_partida(partida) -> dict:
+    return {
+        "tipo": "partida",
+        "id_partida": partida.id_partida,
+        "status": partida.status,
+        "placar_casa": partida.placar_casa,
+        "placar_visitante": partida.placar_visitante,
+        "id_equipe_casa": partida.id_equipe_casa,
+        "id_equipe_visitante": partida.id_equipe_visitante,
+    }
+
+def delta_partida_removida(id_partida: int) -> dict:
+    return {"tipo": "partida_removida", "id_partida": id_partida}
+
+def delta_estatistica(estatistica, removida: bool = False) -> dict:
+    return {
+        "tipo": "estatistica",
+        "id_partida": estatistica.id_partida,
+        "id_estatistica": estatistica.id_estatistica,
+        "id_participante": estatistica.id_participante,
+        "gols": estatistica.gols,
+        "assistencias": estatistica.assistencias,
+        "cartoes_amarelos": estatistica.cartoes_amarelos,
+        "cartoes_vermelhos": estatistica.cartoes_vermelhos,
+        "removida": removida,
+    }
@@ -0,0 +1,116 @@
+import os
+import tempfile
+import uuid
+from pathlib import Path
+import anyio
+from dotenv import load_dotenv
+from fastapi import UploadFile
+
+load_dotenv()
+
+# Armazenamento dos arquivos enviados (fotos, documentos, atestados e súmulas). O upload é lido e
+# gravado em blocos, sem carregar o arquivo inteiro na memória e sem bloquear o event loop; o
+# limite de tamanho é conferido bloco a bloco e o tipo real do arquivo é identificado pelos
+# primeiros bytes (a extensão e o Content-Type são informados pelo cliente e não bastam).
+# Sem STORAGE_URL os arquivos vão para a pasta uploads/ servida pela própria API; com
+# STORAGE_URL=s3://bucket vão para um S3 ou serviço compatível (MinIO, por exemplo).
+
+TAMANHO_MAXIMO = int(float(os.getenv("UPLOAD_MAX_MB") or 10) * 1024 * 1024)
+TAMANHO_BLOCO = 64 * 1024
+# Acima disso o arquivo em trânsito para o S3 sai da memória para o disco
+LIMITE_EM_MEMORIA = 1024 * 1024
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+UPLOAD_DIR = BASE_DIR / "uploads"
+
+# Assinaturas (magic bytes) dos tipos aceitos
+ASSINATURAS = {
+    "jpg": (b"\xff\xd8\xff",),
+    "png": (b"\x89PNG\r\n\x1a\n",),
+    "pdf": (b"%PDF-",),
+}
+TIPOS_MIDIA = {"jpg": "image/jpeg", "png": "image/png", "pdf": "application/pdf"}
+
+class ArquivoMuitoGrande(ValueError):
+    pass
+
+def detectar_tipo(inicio: bytes):
+    for tipo, assinaturas in ASSINATURAS.items():
+        if inicio.startswith(assinaturas):
+            return tipo
+    return None
+
+class ArmazenamentoLocal:
+    def __init__(self, diretorio: Path = UPLOAD_DIR, prefixo: str = "uploads"):
+        self.diretorio = Path(diretorio)
+        self.prefixo = prefixo
+
+    async def gravar(self, chave: str, blocos, tipo_midia: str) -> str:
+        destino = anyio.Path(self.diretorio / chave)
+        await destino.parent.mkdir(parents=True, exist_ok=True)
+        # Grava com outro nome e só renomeia no fim: um upload recusado no meio não deixa arquivo pela metade
+        parcial = destino.with_name(destino.name + ".parcial")
+        try:
+            async with await anyio.open_file(parcial, "wb") as arquivo:
+                async for bloco in blocos:
+                    await arquivo.write(bloco)
+            await parcial.rename(destino)
+        except BaseException:
+            await parcial.unlink(missing_ok=True)
+            raise
+        return f"{self.prefixo}/{chave}"
+
+class ArmazenamentoS3:
+    # Aceita qualquer cliente com a interface do boto3 (upload_fileobj)
+    def __init__(self, cliente, bucket: str, url_publica: str):
+        self.cliente = cliente
+        self.bucket = bucket
+        self.url_publica = url_publica.rstrip("/")
+
+    async def gravar(self, chave: str, blocos, tipo_midia: str) -> str:
+        # O arquivo só é enviado depois de validado por inteiro; o upload_fileobj divide os
+        # arquivos grandes em partes (multipart) sozinho
+        with tempfile.SpooledTemporaryFile(max_size=LIMITE_EM_MEMORIA) as temporario:
+            async for bloco in blocos:
+                await anyio.to_thread.run_sync(temporario.write, bloco)
+            temporario.seek(0)
+            await anyio.to_thread.run_sync(
+                lambda: self.cliente.upload_fileobj(temporario, self.bucket, chave, ExtraArgs={"ContentType": tipo_midia})
+            )
+        return f"{self.url_publica}/{chave}"
+
+def criar_backend(url: str = None):
+    url = url or os.getenv("STORAGE_URL")
+    if url and url.startswith("s3://"):
+        try:
+            import boto3
+        except ImportError:
+            raise RuntimeError("STORAGE_URL aponta para um S3, mas o pacote 'boto3' não está instalado.")
+        bucket = url[len("s3://"):].strip("/")
+        # Endpoint próprio para serviços compatíveis (MinIO); as credenciais vêm das variáveis AWS_* usuais
+        endpoint = os.getenv("STORAGE_S3_ENDPOINT") or None
+        url_publica = os.getenv("STORAGE_URL_PUBLICA") or f"{endpoint or 'https://s3.amazonaws.com'}/{bucket}"
+        return ArmazenamentoS3(boto3.client("s3", endpoint_url=endpoint), bucket, url_publica)
+    return ArmazenamentoLocal()
+
+backend = criar_backend()
+
+async def _blocos(arquivo: UploadFile, inicio: bytes, tamanho_maximo: int):
+    tamanho = len(inicio)
+    bloco = inicio
+    while bloco:
+        if tamanho > tamanho_maximo:
+            raise ArquivoMuitoGrande(f"O arquivo excede o tamanho máximo de {tamanho_maximo // (1024 * 1024)} MB.")
+        yield bloco
+        bloco = await arquivo.read(TAMANHO_BLOCO)
+        tamanho += len(bloco)
+
+async def salvar(arquivo: UploadFile, pasta: str, extensao: str, tamanho_maximo: int = None) -> str:
+    # extensao já validada pela rota ("jpg", "jpeg", "png" ou "pdf"); devolve o caminho ou a URL do arquivo
+    tipo = "jpg" if extensao == "jpeg" else extensao
+    inicio = await arquivo.read(TAMANHO_BLOCO)
+    if detectar_tipo(inicio) != tipo:
+        raise ValueError(f"O conteúdo do arquivo não corresponde a um arquivo {extensao.upper()}.")
+
+    chave = f"{pasta}/{uuid.uuid4()}.{extensao}"
+    return await backend.gravar(chave, _blocos(arquivo, inicio, tamanho_maximo or TAMANHO_MAXIMO), TIPOS_MIDIA[tipo])
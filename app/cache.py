@@ -0,0 +1,113 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Backends de cache chave -> dicionário (serializável em JSON) com expiração por item.
+# Com CACHE_URL apontando para um Redis (ou servidor compatível, como Valkey/KeyDB) o cache
+# é compartilhado entre os workers do uvicorn; sem ele, cada processo mantém o seu próprio
+# cache em memória e a invalidação só alcança o worker que a executou (o TTL limita o atraso
+# nos demais).
+
+class CacheMemoria:
+    def __init__(self, max_itens: int = 1024):
+        self.max_itens = max_itens
+        self._itens = OrderedDict()
+        self._lock = threading.Lock()
+
+    def obter(self, chave: str):
+        with self._lock:
+            item = self._itens.get(chave)
+            if item is None:
+                return None
+            valor, expira_em = item
+            if expira_em < time.monotonic():
+                del self._itens[chave]
+                return None
+            # Marca como usado recentemente (LRU)
+            self._itens.move_to_end(chave)
+            return valor
+
+    def gravar(self, chave: str, valor: dict, ttl: int):
+        with self._lock:
+            self._itens[chave] = (valor, time.monotonic() + ttl)
+            self._itens.move_to_end(chave)
+            while len(self._itens) > self.max_itens:
+                self._itens.popitem(last=False)
+
+    def remover(self, chave: str):
+        with self._lock:
+            self._itens.pop(chave, None)
+
+    def limpar(self):
+        with self._lock:
+            self._itens.clear()
+
+class CacheRedis:
+    # Aceita qualquer cliente com a interface do redis-py (get, set com ex=, delete, scan_iter)
+    def __init__(self, cliente, prefixo: str = "gerencia:"):
+        self.cliente = cliente
+        self.prefixo = prefixo
+
+    def obter(self, chave: str):
+        bruto = self.cliente.get(self.prefixo + chave)
+        if bruto is None:
+            return None
+        return json.loads(bruto)
+
+    def gravar(self, chave: str, valor: dict, ttl: int):
+        self.cliente.set(self.prefixo + chave, json.dumps(valor), ex=ttl)
+
+    def remover(self, chave: str):
+        self.cliente.delete(self.prefixo + chave)
+
+    def limpar(self):
+        for chave in self.cliente.scan_iter(match=self.prefixo + "*"):
+            self.cliente.delete(chave)
+
+def criar_backend(url: str = None):
+    url = url or os.getenv("CACHE_URL")
+    if url and url.startswith(("redis://", "rediss://", "unix://")):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("CACHE_URL aponta para um servidor Redis, mas o pacote 'redis' não está instalado.")
+        return CacheRedis(redis.Redis.from_url(url))
+    return CacheMemoria(max_itens=int(os.getenv("CACHE_MAX_ITENS", "1024")))
+
+backend = criar_backend()
+
+# --- Versões para invalidação das respostas públicas ---
+# As respostas das rotas /publico ficam no cache com as versões dos escopos de que dependem na
+# própria chave ("publico" para tudo, "edicao:<id>" e "partida:<id>" para os dados de uma edição).
+# Invalidar um escopo é só trocar a sua versão: as entradas antigas deixam de ser encontradas e
+# expiram pelo TTL. A versão é um valor novo a cada troca (e não um contador), para que a perda da
+# chave de versão (LRU, reinício do Redis) nunca traga de volta uma resposta antiga.
+
+ESCOPO_PUBLICO = "publico"
+VERSAO_TTL = 7 * 24 * 3600
+
+def _nova_versao():
+    return os.urandom(6).hex()
+
+def versao_escopo(escopo: str):
+    chave = f"versao:{escopo}"
+    versao = backend.obter(chave)
+    if versao is None:
+        versao = {"v": _nova_versao()}
+        backend.gravar(chave, versao, VERSAO_TTL)
+    return versao["v"]
+
+def invalidar_escopo(*escopos: str):
+    for escopo in escopos:
+        backend.gravar(f"versao:{escopo}", {"v": _nova_versao()}, VERSAO_TTL)
+
+def invalidar_publico():
+    invalidar_escopo(ESCOPO_PUBLICO)
+
+def invalidar_edicao(id_edicao: int, *ids_partidas: int):
+    invalidar_escopo(f"edicao:{id_edicao}", *(f"partida:{id_partida}" for id_partida in ids_partidas))
@@ -0,0 +1,69 @@
+from sqlalchemy.orm import selectinload
+import models
+
+# Perfis de carregamento: conjuntos de opções do SQLAlchemy que carregam, com um SELECT ... IN por
+# relacionamento, tudo o que um schema de resposta vai serializar. Sem eles cada relacionamento
+# "lazy" vira uma consulta por objeto (N+1). Uso: db.query(models.Partida).options(*PARTIDA_PUBLICA)
+
+def _participantes(caminho):
+    # Participante com o aluno (e as turmas em que ele está matriculado) ou o atleta
+    return (
+        caminho.selectinload(models.Participante.aluno)
+               .selectinload(models.Aluno.matriculas)
+               .selectinload(models.Matricula.turma)
+               .selectinload(models.Turma.modalidade),
+        caminho.selectinload(models.Participante.atleta),
+    )
+
+def _edicao(caminho):
+    return caminho.selectinload(models.Edicao.evento).selectinload(models.Evento.modalidades)
+
+# Nomes dos jogadores (routers/publico.py)
+PARTICIPANTE_NOME = (
+    selectinload(models.Participante.aluno),
+    selectinload(models.Participante.atleta),
+)
+
+# schemas.Aluno: matrículas com a turma e a modalidade
+ALUNO_COMPLETO = (
+    selectinload(models.Aluno.matriculas)
+        .selectinload(models.Matricula.turma)
+        .selectinload(models.Turma.modalidade),
+)
+
+# schemas.Equipe
+EQUIPE_COMPLETA = (
+    _edicao(selectinload(models.Equipe.edicao)),
+    *_participantes(selectinload(models.Equipe.participantes)),
+)
+
+# EquipePublica: equipe com o nome dos jogadores
+EQUIPE_PUBLICA = tuple(
+    selectinload(models.Equipe.participantes).options(opcao) for opcao in PARTICIPANTE_NOME
+)
+
+# PartidaPublica: local, árbitro e as duas equipes (só id e nome)
+PARTIDA_PUBLICA = (
+    selectinload(models.Partida.local),
+    selectinload(models.Partida.arbitro),
+    selectinload(models.Partida.equipe_casa),
+    selectinload(models.Partida.equipe_visitante),
+)
+
+# schemas.Partida: edição com evento, modalidade e as equipes completas
+PARTIDA_COMPLETA = (
+    _edicao(selectinload(models.Partida.edicao)),
+    selectinload(models.Partida.local),
+    selectinload(models.Partida.arbitro),
+    selectinload(models.Partida.modalidade),
+    *(selectinload(models.Partida.equipe_casa).options(opcao) for opcao in EQUIPE_COMPLETA),
+    *(selectinload(models.Partida.equipe_visitante).options(opcao) for opcao in EQUIPE_COMPLETA),
+)
+
+# EstatisticaPublica: estatística com o nome do jogador
+ESTATISTICA_PUBLICA = tuple(
+    selectinload(models.EstatisticaPartida.participante).options(opcao) for opcao in PARTICIPANTE_NOME
+)
+
+# schemas.EstatisticaPartidaResponse
+ESTATISTICA_COMPLETA = _participantes(selectinload(models.EstatisticaPartida.participante))
@@ -0,0 +1,40 @@
+from typing import Optional
+from sqlalchemy import exists
+import models
+
+# Escopo por linha: restringe no próprio SQL o que cada usuário pode ver. Coordenação e
+# administração veem tudo; o professor só vê as suas turmas e as matrículas e alunos delas.
+# As funções recebem a query e o id do professor (de professor_do_usuario) e devolvem a query
+# filtrada, então podem ser combinadas com qualquer outro filtro, ordenação ou paginação.
+
+# Professor sem cadastro de professor: nenhuma turma tem esse id, o escopo fica vazio
+SEM_TURMAS = 0
+
+def professor_do_usuario(usuario: models.Usuario) -> Optional[int]:
+    # None quando o usuário não tem restrição
+    if usuario.role != "professor":
+        return None
+    return usuario.professores.id_professor if usuario.professores else SEM_TURMAS
+
+def turmas_do_professor(query, id_professor: int):
+    return query.filter(models.Turma.id_professor == id_professor)
+
+def matriculas_do_professor(query, id_professor: int):
+    return query.filter(
+        exists().where(
+            models.Turma.id_turma == models.Matricula.id_turma,
+            models.Turma.id_professor == id_professor,
+        ).correlate(models.Matricula)
+    )
+
+def alunos_do_professor(query, id_professor: int, apenas_ativas: bool = False):
+    # EXISTS em vez de JOIN: o aluno com várias matrículas nas turmas do professor aparece uma vez
+    # só, sem DISTINCT, e a paginação por id continua usando a chave primária
+    condicoes = [
+        models.Matricula.id_aluno == models.Aluno.id_aluno,
+        models.Turma.id_turma == models.Matricula.id_turma,
+        models.Turma.id_professor == id_professor,
+    ]
+    if apenas_ativas:
+        condicoes.append(models.Matricula.ativo == True)
+    return query.filter(exists().where(*condicoes).correlate(models.Aluno))
@@ -1,18 +1,21 @@
 from fastapi import FastAPI, Depends
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from fastapi.staticfiles import StaticFiles
 from sqlalchemy.orm import Session
 from sqlalchemy import text
 from database import get_db, engine
+import armazenamento
+import metricas
 import models
+import security
 from routers import (
     modalidades, professores, turmas, alunos, 
     matriculas, presencas, arbitros, locais, 
     eventos, edicoes, auth, equipes, partidas, atletas,
-    publico
+    publico, busca, exportacoes
 )
 import os
-from pathlib import Path
 
 import time
 from sqlalchemy.exc import OperationalError
@@ -35,6 +38,7 @@ app = FastAPI(
     description="API para gerenciar escolinhas esportivas.",
     version="1.0.0"
 )
+app.router.route_class = metricas.RotaInstrumentada
 
 import os
 
@@ -47,16 +51,24 @@ else:
         "http://127.0.0.1:3000",
     ]
 
+# Respostas públicas já em cache saem antes do roteamento (adicionado antes do CORS para ficar por dentro dele)
+app.add_middleware(publico.CachePublicoMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=origins,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Cabeçalhos lidos pelo frontend: paginação por cursor, tempos da requisição e nome dos arquivos exportados
+    expose_headers=["X-Next-Cursor", "X-Total-Count", "Server-Timing", "Content-Disposition"],
 )
 
-BASE_DIR = Path(__file__).resolve().parent.parent
-UPLOAD_DIR = BASE_DIR / "uploads"
+# Server-Timing e histogramas por rota; adicionado por último para ser o middleware mais externo
+app.add_middleware(metricas.MetricasMiddleware)
+
+# Pasta do armazenamento local (armazenamento.py); com STORAGE_URL para um S3 só guarda os arquivos antigos
+UPLOAD_DIR = armazenamento.UPLOAD_DIR
 
 if not UPLOAD_DIR.exists():
     UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
@@ -78,6 +90,8 @@ app.include_router(equipes.router)
 app.include_router(partidas.router)
 app.include_router(atletas.router)
 app.include_router(publico.router)
+app.include_router(busca.router)
+app.include_router(exportacoes.router)
 
 @app.get("/", tags=["Root"])
 async def read_root():
@@ -87,9 +101,17 @@ async def read_root():
 async def health_check(db: Session = Depends(get_db)):
     try:
         db.execute(text("SELECT 1"))
-        return {"status": "ok", "database": "connected"}
+        return {"status": "ok", "database": "connected", "pool_bcrypt": security.metricas_pool_bcrypt()}
     except Exception as e:
-        return {"status": "error", "database": str(e)}
+        return {"status": "error", "database": str(e), "pool_bcrypt": security.metricas_pool_bcrypt()}
+
+@app.get("/metrics", tags=["Health"], response_class=PlainTextResponse)
+def exportar_metricas():
+    pool = security.metricas_pool_bcrypt()
+    return metricas.registro.exportar({
+        "bcrypt_pool_pendentes": ("Tarefas de hash de senha no pool (em execução ou na fila).", pool["pendentes"]),
+        "bcrypt_pool_na_fila": ("Tarefas de hash de senha aguardando um worker livre.", pool["na_fila"]),
+    })
 
 if __name__ == "__main__":  # pragma: no cover
     import uvicorn
@@ -0,0 +1,229 @@
+import functools
+import inspect
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from dotenv import load_dotenv
+from fastapi.routing import APIRoute
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+load_dotenv()
+
+# Instrumentação por requisição: número de comandos SQL, tempo no banco, tempo de serialização e
+# tempo total. Os valores vão no cabeçalho Server-Timing de cada resposta e nos histogramas por
+# rota expostos em /metrics (formato texto do Prometheus). Os histogramas são do processo: com
+# vários workers, o Prometheus soma as séries de cada um.
+
+# Comandos SQL mais lentos que isto (em ms) são registrados com a rota de origem; vazio desativa
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS") or 0)
+
+logger_consultas_lentas = logging.getLogger("gerencia.consultas_lentas")
+
+BUCKETS_DURACAO = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BUCKETS_CONSULTAS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+class Medicao:
+    __slots__ = ("scope", "consultas", "tempo_db", "tempo_serializacao", "fim_endpoint")
+
+    def __init__(self, scope: dict):
+        self.scope = scope
+        self.consultas = 0
+        self.tempo_db = 0.0
+        self.tempo_serializacao = 0.0
+        self.fim_endpoint = None
+
+    @property
+    def metodo(self) -> str:
+        return self.scope["method"]
+
+    @property
+    def rota(self) -> str:
+        # Modelo da rota (/alunos/{id_aluno}) e não o caminho, para não criar uma série por id.
+        # O roteador grava a rota no scope; respostas dadas antes dele informam "rota_metricas"
+        rota = self.scope.get("route")
+        return getattr(rota, "path", None) or self.scope.get("rota_metricas") or "nao_roteada"
+
+# O objeto é compartilhado com as threads do threadpool (o contexto é copiado, a referência é a mesma)
+_medicao_atual: ContextVar = ContextVar("medicao_atual", default=None)
+
+# --- Comandos SQL ---
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _antes_do_comando(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("inicio_comandos", []).append(time.perf_counter())
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _depois_do_comando(conn, cursor, statement, parameters, context, executemany):
+    inicios = conn.info.get("inicio_comandos")
+    if not inicios:
+        return
+    duracao = time.perf_counter() - inicios.pop()
+    medicao = _medicao_atual.get()
+    if medicao is not None:
+        medicao.consultas += 1
+        medicao.tempo_db += duracao
+    if SLOW_QUERY_MS and duracao * 1000 >= SLOW_QUERY_MS:
+        origem = f"{medicao.metodo} {medicao.rota}" if medicao is not None else "fora de requisição"
+        logger_consultas_lentas.warning("%.1f ms (%s): %s", duracao * 1000, origem, statement)
+
+# --- Rotas: separa o tempo da função da rota do tempo de serialização da resposta ---
+
+def _cronometrar(endpoint):
+    def marcar_fim():
+        medicao = _medicao_atual.get()
+        if medicao is not None:
+            medicao.fim_endpoint = time.perf_counter()
+
+    if inspect.iscoroutinefunction(endpoint):
+        @functools.wraps(endpoint)
+        async def endpoint_cronometrado(*args, **kwargs):
+            try:
+                return await endpoint(*args, **kwargs)
+            finally:
+                marcar_fim()
+    else:
+        @functools.wraps(endpoint)
+        def endpoint_cronometrado(*args, **kwargs):
+            try:
+                return endpoint(*args, **kwargs)
+            finally:
+                marcar_fim()
+    return endpoint_cronometrado
+
+class RotaInstrumentada(APIRoute):
+    # route_class dos APIRouter: o tempo entre o fim da função da rota e a resposta pronta é a
+    # validação/serialização do response_model (inclui os carregamentos "lazy" disparados por ela)
+    def __init__(self, path: str, endpoint, **kwargs):
+        super().__init__(path, _cronometrar(endpoint), **kwargs)
+
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+
+        async def handler_instrumentado(request):
+            resposta = await handler(request)
+            medicao = _medicao_atual.get()
+            if medicao is not None and medicao.fim_endpoint is not None:
+                medicao.tempo_serializacao += time.perf_counter() - medicao.fim_endpoint
+                medicao.fim_endpoint = None
+            return resposta
+        return handler_instrumentado
+
+# --- Histogramas ---
+
+class Histograma:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.contagens = [0] * (len(buckets) + 1)
+        self.soma = 0.0
+        self.total = 0
+
+    def observar(self, valor: float):
+        self.contagens[bisect_left(self.buckets, valor)] += 1
+        self.soma += valor
+        self.total += 1
+
+def _escapar(valor) -> str:
+    return str(valor).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+class RegistroMetricas:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requisicoes = {}
+        self.duracao = {}
+        self.consultas = {}
+        self.tempo_db = {}
+        self.tempo_serializacao = {}
+
+    def registrar(self, medicao: Medicao, status: int, duracao: float):
+        rotulos = (medicao.metodo, medicao.rota)
+        with self._lock:
+            chave_status = (*rotulos, str(status))
+            self.requisicoes[chave_status] = self.requisicoes.get(chave_status, 0) + 1
+            self.duracao.setdefault(rotulos, Histograma(BUCKETS_DURACAO)).observar(duracao)
+            self.consultas.setdefault(rotulos, Histograma(BUCKETS_CONSULTAS)).observar(medicao.consultas)
+            self.tempo_db[rotulos] = self.tempo_db.get(rotulos, 0.0) + medicao.tempo_db
+            self.tempo_serializacao[rotulos] = self.tempo_serializacao.get(rotulos, 0.0) + medicao.tempo_serializacao
+
+    def limpar(self):
+        with self._lock:
+            for series in (self.requisicoes, self.duracao, self.consultas, self.tempo_db, self.tempo_serializacao):
+                series.clear()
+
+    def exportar(self, extras: dict = None) -> str:
+        def rotulos(metodo, rota, **outros):
+            pares = {"metodo": metodo, "rota": rota, **outros}
+            return ",".join(f'{k}="{_escapar(v)}"' for k, v in pares.items())
+
+        def histograma(nome, ajuda, series):
+            linhas.append(f"# HELP {nome} {ajuda}")
+            linhas.append(f"# TYPE {nome} histogram")
+            for (metodo, rota), h in sorted(series.items()):
+                acumulado = 0
+                for limite, contagem in zip((*h.buckets, "+Inf"), h.contagens):
+                    acumulado += contagem
+                    linhas.append(f"{nome}_bucket{{{rotulos(metodo, rota, le=limite)}}} {acumulado}")
+                linhas.append(f"{nome}_sum{{{rotulos(metodo, rota)}}} {h.soma}")
+                linhas.append(f"{nome}_count{{{rotulos(metodo, rota)}}} {h.total}")
+
+        def contador(nome, ajuda, series):
+            linhas.append(f"# HELP {nome} {ajuda}")
+            linhas.append(f"# TYPE {nome} counter")
+            for (metodo, rota, *status), valor in sorted(series.items()):
+                outros = {"status": status[0]} if status else {}
+                linhas.append(f"{nome}{{{rotulos(metodo, rota, **outros)}}} {valor}")
+
+        linhas = []
+        with self._lock:
+            contador("http_requisicoes_total", "Requisições atendidas por rota e status.", self.requisicoes)
+            histograma("http_requisicao_duracao_segundos", "Tempo total da requisição, incluindo o envio do corpo.", self.duracao)
+            histograma("http_requisicao_consultas_sql", "Comandos SQL executados por requisição.", self.consultas)
+            contador("http_requisicao_banco_segundos_total", "Tempo gasto em comandos SQL.", self.tempo_db)
+            contador("http_requisicao_serializacao_segundos_total", "Tempo gasto validando e serializando as respostas.", self.tempo_serializacao)
+        for nome, (ajuda, valor) in (extras or {}).items():
+            linhas.append(f"# HELP {nome} {ajuda}")
+            linhas.append(f"# TYPE {nome} gauge")
+            linhas.append(f"{nome} {valor}")
+        return "\n".join(linhas) + "\n"
+
+registro = RegistroMetricas()
+
+# --- Middleware ---
+
+class MetricasMiddleware:
+    # Deve ser o middleware mais externo, para medir também o CORS e o cache público
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        medicao = Medicao(scope)
+        token = _medicao_atual.set(medicao)
+        inicio = time.perf_counter()
+        status = 500
+
+        async def enviar(mensagem):
+            nonlocal status
+            if mensagem["type"] == "http.response.start":
+                status = mensagem["status"]
+                total = time.perf_counter() - inicio
+                server_timing = (
+                    f'db;dur={medicao.tempo_db * 1000:.1f};desc="{medicao.consultas} consultas", '
+                    f"serializacao;dur={medicao.tempo_serializacao * 1000:.1f}, "
+                    f"total;dur={total * 1000:.1f}"
+                )
+                mensagem.setdefault("headers", [])
+                mensagem["headers"] = [*mensagem["headers"], (b"server-timing", server_timing.encode("latin-1"))]
+            await send(mensagem)
+
+        try:
+            await self.app(scope, receive, enviar)
+        finally:
+            _medicao_atual.reset(token)
+            registro.registrar(medicao, status, time.perf_counter() - inicio)
@@ -9,12 +9,15 @@ from sqlalchemy import (
     Text,
     ForeignKey,
     Enum,
+    Index,
+    UniqueConstraint,
     TIMESTAMP,
 )
 from datetime import date
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, validates
 from sqlalchemy.sql import func
 from database import Base
+from utils import normalizar_texto
 
 modalidades_evento = Table(
     "modalidades_evento",
@@ -116,6 +119,8 @@ class Atleta(Base):
         nullable=False,
     )
     nome_completo = Column(String(500), nullable=False)
+    # nome_completo sem acentos, em minúsculas e com espaços simples, mantido pelo ORM
+    nome_normalizado = Column(String(500), nullable=True)
     data_nascimento = Column(Date, nullable=False)
     documento_pessoal = Column(String(50), nullable=False)
     contato = Column(String(20), nullable=True)
@@ -124,6 +129,15 @@ class Atleta(Base):
 
     participante = relationship("Participante", back_populates="atleta")
 
+    __table_args__ = (
+        Index("ix_atletas_nome_normalizado_nascimento", "nome_normalizado", "data_nascimento"),
+    )
+
+    @validates("nome_completo")
+    def _normalizar_nome(self, chave, nome):
+        self.nome_normalizado = normalizar_texto(nome)
+        return nome
+
 class Aluno(Base):
     __tablename__ = "alunos"
 
@@ -135,6 +149,8 @@ class Aluno(Base):
         nullable=False,
     )
     nome_completo = Column(String(500), nullable=False)
+    # nome_completo sem acentos, em minúsculas e com espaços simples, mantido pelo ORM
+    nome_normalizado = Column(String(500), nullable=True)
     data_nascimento = Column(Date, nullable=False)
     escola = Column(String(100), nullable=False)
     serie_ano = Column(String(50), nullable=False)
@@ -152,6 +168,16 @@ class Aluno(Base):
     participante = relationship("Participante", back_populates="aluno")
     matriculas = relationship("Matricula", back_populates="aluno", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        # Detecção de duplicados no cadastro: mesmo nome (sem acentos e maiúsculas) e nascimento
+        Index("ix_alunos_nome_normalizado_nascimento", "nome_normalizado", "data_nascimento"),
+    )
+
+    @validates("nome_completo")
+    def _normalizar_nome(self, chave, nome):
+        self.nome_normalizado = normalizar_texto(nome)
+        return nome
+
 class Matricula(Base):
     __tablename__ = "matriculas"
 
@@ -176,6 +202,28 @@ class Presenca(Base):
 
     matricula = relationship("Matricula", back_populates="presencas")
 
+    __table_args__ = (
+        UniqueConstraint("id_matricula", "data_aula", name="uq_presencas_matricula_data"),
+        # Cobre as estatísticas por período sem ler a tabela
+        Index("ix_presencas_data_matricula_status", "data_aula", "id_matricula", "status"),
+    )
+
+class ResumoPresencaMensal(Base):
+    # Contagens por matrícula e mês, mantidas pelo serviço de presenças na mesma transação da chamada
+    __tablename__ = "resumo_presencas_mensal"
+
+    id_matricula = Column(Integer, ForeignKey("matriculas.id_matricula"), primary_key=True)
+    ano = Column(Integer, primary_key=True)
+    mes = Column(Integer, primary_key=True)
+    presentes = Column(Integer, nullable=False, default=0)
+    ausentes = Column(Integer, nullable=False, default=0)
+    justificados = Column(Integer, nullable=False, default=0)
+    total = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        Index("ix_resumo_presencas_periodo", "ano", "mes"),
+    )
+
 class Local(Base):
     __tablename__ = "locais"
 
@@ -254,6 +302,11 @@ class Partida(Base):
     status = Column(Enum("Agendada", "Em Andamento", "Finalizada", "Cancelada"), default="Agendada")
     sumula_arquivo = Column(String(500), nullable=True)
     observacoes = Column(Text, nullable=True)
+    # Vagas de mata-mata preenchidas pela classificação de um grupo (ex.: 1º do Grupo A)
+    origem_casa_grupo = Column(String(50), nullable=True)
+    origem_casa_posicao = Column(Integer, nullable=True)
+    origem_visitante_grupo = Column(String(50), nullable=True)
+    origem_visitante_posicao = Column(Integer, nullable=True)
 
     edicao = relationship("Edicao", back_populates="partidas")
     local = relationship("Local")
@@ -264,6 +317,70 @@ class Partida(Base):
     proxima_partida = relationship("Partida", remote_side=[id_partida])
     estatisticas = relationship("EstatisticaPartida", back_populates="partida", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        Index("ix_partidas_data_local", "part_data", "id_local"),
+        Index("ix_partidas_data_arbitro", "part_data", "id_arbitro"),
+        Index("ix_partidas_data_equipe_casa", "part_data", "id_equipe_casa"),
+        Index("ix_partidas_data_equipe_visitante", "part_data", "id_equipe_visitante"),
+        Index("ix_partidas_edicao_modalidade", "id_edicao", "id_modalidade"),
+    )
+
+class Classificacao(Base):
+    # Tabela de classificação materializada, mantida pelo serviço de classificação
+    # a cada partida que entra ou sai do status "Finalizada"
+    __tablename__ = "classificacao"
+
+    id_edicao = Column(Integer, ForeignKey("edicoes.id_edicao", ondelete="CASCADE"), primary_key=True)
+    id_modalidade = Column(Integer, ForeignKey("modalidades.id_modalidade"), primary_key=True)
+    # Vazio quando a equipe não pertence a um grupo (pontos corridos)
+    grupo = Column(String(50), primary_key=True, default="")
+    id_equipe = Column(Integer, ForeignKey("equipes.id_equipe", ondelete="CASCADE"), primary_key=True)
+    jogos = Column(Integer, nullable=False, default=0)
+    vitorias = Column(Integer, nullable=False, default=0)
+    empates = Column(Integer, nullable=False, default=0)
+    derrotas = Column(Integer, nullable=False, default=0)
+    gols_pro = Column(Integer, nullable=False, default=0)
+    gols_contra = Column(Integer, nullable=False, default=0)
+    saldo = Column(Integer, nullable=False, default=0)
+    pontos = Column(Integer, nullable=False, default=0)
+
+    equipe = relationship("Equipe")
+
+    __table_args__ = (
+        # Filtra pela edição, modalidade e grupo e cobre os critérios de desempate
+        Index("ix_classificacao_ordem", "id_edicao", "id_modalidade", "grupo", "pontos", "vitorias", "saldo", "gols_pro"),
+    )
+
+class DisciplinaParticipante(Base):
+    # Acumuladores de cartões por participante e edição, mantidos a cada estatística gravada,
+    # para consultar a suspensão sem somar o histórico
+    __tablename__ = "disciplina_participantes"
+
+    id_edicao = Column(Integer, ForeignKey("edicoes.id_edicao", ondelete="CASCADE"), primary_key=True)
+    id_participante = Column(Integer, ForeignKey("participantes.id_participante", ondelete="CASCADE"), primary_key=True)
+    cartoes_amarelos = Column(Integer, nullable=False, default=0)
+    cartoes_vermelhos = Column(Integer, nullable=False, default=0)
+    suspensoes_cumpridas = Column(Integer, nullable=False, default=0)
+    id_ultima_partida_cumprida = Column(Integer, nullable=True)
+    # Última partida em que recebeu cartão: com ela e a última cumprida, uma partida posterior às
+    # duas é respondida só pelos acumuladores, sem refazer o histórico
+    id_ultima_partida_cartao = Column(Integer, nullable=True)
+
+class TermoBusca(Base):
+    # Índice invertido da busca (/busca): uma linha por palavra normalizada do nome de cada aluno,
+    # atleta e professor, mantido por services/busca.py a cada flush. A chave primária começa pelo
+    # termo, então a busca por prefixo é uma varredura de intervalo já na ordem do ranking
+    __tablename__ = "termos_busca"
+
+    termo = Column(String(100), primary_key=True)
+    tipo = Column(Enum("aluno", "atleta", "professor"), primary_key=True)
+    id_entidade = Column(Integer, primary_key=True)
+
+    __table_args__ = (
+        # Atualização do índice e filtro das demais palavras da busca, por entidade
+        Index("ix_termos_busca_entidade", "tipo", "id_entidade", "termo"),
+    )
+
 class EstatisticaPartida(Base):
     __tablename__ = "estatisticas_partida"
 
@@ -276,4 +393,10 @@ class EstatisticaPartida(Base):
     assistencias = Column(Integer, default=0, nullable=False)
 
     partida = relationship("Partida", back_populates="estatisticas")
-    participante = relationship("Participante")
\ No newline at end of file
+    participante = relationship("Participante")
+
+    __table_args__ = (
+        # Cobre os rankings da edição: junção por partida e soma por participante sem ler a tabela
+        Index("ix_estatisticas_partida_participante", "id_partida", "id_participante",
+              "gols", "assistencias", "cartoes_amarelos", "cartoes_vermelhos"),
+    )
\ No newline at end of file
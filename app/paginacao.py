@@ -0,0 +1,54 @@
+import base64
+import json
+from fastapi import Response
+
+# Paginação por cursor (keyset): a próxima página começa depois da chave do último item
+# (WHERE id > :ultimo ORDER BY id LIMIT n), usando o índice da chave primária, em vez de
+# OFFSET, que faz o banco ler e descartar todas as linhas anteriores. skip/limit continuam
+# aceitos para compatibilidade.
+
+class Pagina(list):
+    # Lista de resultados com o cursor da próxima página (None na última) e o total, quando pedido
+    def __init__(self, itens, proximo_cursor: str = None, total: int = None):
+        super().__init__(itens)
+        self.proximo_cursor = proximo_cursor
+        self.total = total
+
+def codificar_cursor(valor) -> str:
+    return base64.urlsafe_b64encode(json.dumps(valor).encode()).decode().rstrip("=")
+
+def decodificar_cursor(cursor: str):
+    try:
+        valor = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except ValueError:
+        valor = None
+    if not isinstance(valor, int) or isinstance(valor, bool):
+        raise ValueError("Cursor de paginação inválido.")
+    return valor
+
+def paginar(query, coluna, skip: int = 0, limit: int = 100, cursor: str = None, incluir_total: bool = False):
+    # O total só é calculado quando pedido: é a única consulta que percorre a tabela inteira
+    total = query.order_by(None).count() if incluir_total else None
+
+    # Página vazia pedida: sem consulta e sem cursor (um cursor aqui repetiria a mesma página)
+    if limit <= 0:
+        return Pagina([], None, total)
+
+    if cursor is not None:
+        query = query.filter(coluna > decodificar_cursor(cursor)).order_by(coluna)
+    else:
+        query = query.order_by(coluna).offset(skip)
+
+    # Um item a mais indica se existe próxima página
+    itens = query.limit(limit + 1).all()
+    proximo_cursor = None
+    if len(itens) > limit:
+        itens = itens[:limit]
+        proximo_cursor = codificar_cursor(getattr(itens[-1], coluna.key))
+    return Pagina(itens, proximo_cursor, total)
+
+def aplicar_cabecalhos(response: Response, pagina):
+    if getattr(pagina, "proximo_cursor", None):
+        response.headers["X-Next-Cursor"] = pagina.proximo_cursor
+    if getattr(pagina, "total", None) is not None:
+        response.headers["X-Total-Count"] = str(pagina.total)
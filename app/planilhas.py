@@ -0,0 +1,81 @@
+import csv
+import io
+import itertools
+import tempfile
+from datetime import date, time
+from fastapi.responses import StreamingResponse
+
+# Respostas de download em CSV ou XLSX a partir de um gerador de linhas (services/exportacao.py).
+# O CSV é enviado em blocos à medida que as linhas chegam do banco. O XLSX (um zip) só fica pronto
+# no fim: é escrito em modo write_only num arquivo temporário, que passa para o disco acima de
+# alguns MB, e então enviado em blocos; nos dois casos a memória não cresce com o número de linhas.
+
+LINHAS_POR_BLOCO = 500
+TAMANHO_BLOCO = 64 * 1024
+# Acima disso o XLSX temporário sai da memória para o disco
+LIMITE_XLSX_EM_MEMORIA = 8 * 1024 * 1024
+
+TIPOS_MIDIA = {
+    "csv": "text/csv; charset=utf-8",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+def _celula_csv(valor):
+    # Formatos do Excel em português
+    if valor is None:
+        return ""
+    if isinstance(valor, bool):
+        return "Sim" if valor else "Não"
+    if isinstance(valor, date):
+        return valor.strftime("%d/%m/%Y")
+    if isinstance(valor, time):
+        return valor.strftime("%H:%M")
+    return valor
+
+def _csv(cabecalho, linhas):
+    buffer = io.StringIO()
+    # ";" e BOM: o Excel configurado em português abre o arquivo direto, com os acentos corretos
+    escritor = csv.writer(buffer, delimiter=";", lineterminator="\r\n")
+    buffer.write("﻿")
+    escritor.writerow(cabecalho)
+    for n, linha in enumerate(linhas, start=1):
+        escritor.writerow([_celula_csv(valor) for valor in linha])
+        if n % LINHAS_POR_BLOCO == 0:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode("utf-8")
+
+def _xlsx(cabecalho, linhas, titulo: str):
+    from openpyxl import Workbook
+
+    pasta = Workbook(write_only=True)
+    planilha = pasta.create_sheet(titulo[:31])
+    planilha.append(list(cabecalho))
+    for linha in linhas:
+        planilha.append(list(linha))
+
+    with tempfile.SpooledTemporaryFile(max_size=LIMITE_XLSX_EM_MEMORIA) as arquivo:
+        pasta.save(arquivo)
+        arquivo.seek(0)
+        while bloco := arquivo.read(TAMANHO_BLOCO):
+            yield bloco
+
+def resposta_planilha(nome_arquivo: str, cabecalho, linhas, formato: str = "csv") -> StreamingResponse:
+    if formato == "xlsx":
+        try:
+            import openpyxl  # noqa: F401
+        except ImportError:
+            raise ValueError("A exportação em XLSX requer o pacote 'openpyxl'. Use formato=csv ou instale o pacote.")
+
+    # Executar a consulta e as validações do gerador antes de iniciar a resposta: um ValueError
+    # ainda pode virar 400 em vez de um download interrompido
+    primeira = next(linhas, None)
+    linhas = itertools.chain([primeira], linhas) if primeira is not None else iter(())
+
+    corpo = _xlsx(cabecalho, linhas, nome_arquivo) if formato == "xlsx" else _csv(cabecalho, linhas)
+    return StreamingResponse(
+        corpo,
+        media_type=TIPOS_MIDIA[formato],
+        headers={"Content-Disposition": f'attachment; filename="{nome_arquivo}.{formato}"'},
+    )
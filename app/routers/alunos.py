@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form
+from fastapi import APIRouter, Depends, HTTPException, Response, status, UploadFile, File, Form
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from datetime import date
@@ -7,19 +7,20 @@ import schemas
 import models
 from services import alunos as servico_alunos
 from services import turmas as servico_turmas
+from services import importacao as servico_importacao
 from security import check_coordenador_role, get_current_active_user
-import shutil
-import uuid
-from pathlib import Path
+import anyio
+import armazenamento
+from metricas import RotaInstrumentada
+import escopo
+import paginacao
 
 router = APIRouter(
     prefix="/alunos",
     tags=["Alunos"],
+    route_class=RotaInstrumentada,
 )
 
-BASE_DIR = Path(__file__).resolve().parent.parent.parent
-UPLOAD_DIR = BASE_DIR / "uploads"
-
 def salvar_arquivo(file: UploadFile, subpasta: str) -> str:
     if not file or not file.filename:
         return None
@@ -35,16 +36,13 @@ def salvar_arquivo(file: UploadFile, subpasta: str) -> str:
     if file.content_type not in {"image/jpeg", "image/png", "application/pdf", "image/jpg"}:
         raise HTTPException(status_code=400, detail="Tipo de arquivo (MIME type) não permitido. Use apenas imagens (JPG/PNG) ou documentos PDF.")
 
-    diretorio = UPLOAD_DIR / subpasta
-    diretorio.mkdir(parents=True, exist_ok=True)
-
-    nome_arquivo = f"{uuid.uuid4()}.{extensao}"
-    caminho_arquivo = diretorio / nome_arquivo
-
-    with open(caminho_arquivo, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
-    
-    return f"uploads/{subpasta}/{nome_arquivo}"
+    # A rota é síncrona (roda no threadpool); a gravação em blocos roda no event loop
+    try:
+        return anyio.from_thread.run(armazenamento.salvar, file, subpasta, extensao)
+    except armazenamento.ArquivoMuitoGrande as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 @router.post("/", summary="Cadastrar um novo aluno", response_model=schemas.Aluno, status_code=status.HTTP_201_CREATED)
 def criar_aluno(
@@ -107,25 +105,38 @@ def criar_aluno(
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+@router.post("/importar", summary="Importar alunos de uma planilha CSV ou XLSX", response_model=schemas.ResultadoImportacao, status_code=status.HTTP_200_OK)
+def importar_alunos(
+    arquivo: UploadFile = File(...),
+    simular: bool = Form(False),
+    db: Session = Depends(get_db),
+    current_user: models.Usuario = Depends(check_coordenador_role)
+):
+    try:
+        linhas = servico_importacao.ler_planilha(arquivo.file, arquivo.filename)
+        return servico_importacao.importar_alunos(db=db, linhas=linhas, simular=simular)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 @router.get("/", summary="Listar todos os alunos", response_model=List[schemas.Aluno], status_code=status.HTTP_200_OK)
 def listar_alunos(
+    response: Response,
     skip: int = 0, 
     limit: int = 100, 
+    cursor: Optional[str] = None,
+    incluir_total: bool = False,
     db: Session = Depends(get_db),
     current_user: models.Usuario = Depends(get_current_active_user)
 ):
-    if current_user.role == "professor":
-        if not current_user.professores:
-            return []
-        
-        alunos = db.query(models.Aluno).join(models.Matricula).join(models.Turma).filter(
-            models.Turma.id_professor == current_user.professores.id_professor,
-            models.Matricula.ativo == True
-        ).distinct().offset(skip).limit(limit).all()
-        
-        return alunos
-
-    return servico_alunos.listar_alunos(db=db, skip=skip, limit=limit)
+    try:
+        pagina = servico_alunos.listar_alunos(
+            db=db, skip=skip, limit=limit, cursor=cursor, incluir_total=incluir_total,
+            id_professor=escopo.professor_do_usuario(current_user)
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    paginacao.aplicar_cabecalhos(response, pagina)
+    return pagina
 
 @router.get("/{id_aluno}", summary="Obter um aluno por ID", response_model=schemas.Aluno, status_code=status.HTTP_200_OK)
 def listar_aluno(
@@ -137,82 +148,64 @@ def listar_aluno(
     if not db_aluno:
         raise HTTPException(status_code=404, detail="Aluno não encontrado.")
 
-    if current_user.role == "professor":
-        tem_permissao = False
-        if current_user.professores:
-             for matricula in db_aluno.matriculas:
-                 if matricula.turma.id_professor == current_user.professores.id_professor:
-                     tem_permissao = True
-                     break
-        
-        if not tem_permissao:
-            raise HTTPException(status_code=403, detail="Acesso negado: Aluno não pertence a nenhuma de suas turmas.")
+    id_professor = escopo.professor_do_usuario(current_user)
+    if id_professor is not None and not servico_alunos.aluno_do_professor(db=db, id_aluno=id_aluno, id_professor=id_professor):
+        raise HTTPException(status_code=403, detail="Acesso negado: Aluno não pertence a nenhuma de suas turmas.")
 
     return db_aluno
 
+def _responder_busca(response: Response, buscar, **kwargs):
+    try:
+        pagina = buscar(**kwargs)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    paginacao.aplicar_cabecalhos(response, pagina)
+    return pagina
+
 @router.get("/buscar/nome/{nome}", summary="Buscar alunos por nome", response_model=List[schemas.Aluno], status_code=status.HTTP_200_OK)
 def buscar_alunos_por_nome(
     nome: str,
+    response: Response,
     skip: int = 0, 
     limit: int = 100, 
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db),
     current_user: models.Usuario = Depends(get_current_active_user)
 ):
-    alunos = servico_alunos.listar_alunos_nome(db=db, nome=nome)
-    
-    if current_user.role == "professor":
-         if not current_user.professores:
-            return []
-         
-         ids_turmas_prof = [t.id_turma for t in servico_turmas.listar_turmas_professor(db=db, id_professor=current_user.professores.id_professor)]
-         
-         alunos_filtrados = []
-         for aluno in alunos:
-             for matricula in aluno.matriculas:
-                 if matricula.id_turma in ids_turmas_prof:
-                     alunos_filtrados.append(aluno)
-                     break
-         return alunos_filtrados
-
-    return alunos
+    return _responder_busca(
+        response, servico_alunos.listar_alunos_nome, db=db, nome=nome, skip=skip, limit=limit, cursor=cursor,
+        id_professor=escopo.professor_do_usuario(current_user)
+    )
 
 @router.get("/buscar/escola/{escola}", summary="Buscar alunos por escola", response_model=List[schemas.Aluno], status_code=status.HTTP_200_OK)
 def buscar_alunos_por_escola(
     escola: str,
+    response: Response,
     skip: int = 0, 
     limit: int = 100, 
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db),
     current_user: models.Usuario = Depends(get_current_active_user)
 ):
-    alunos = servico_alunos.listar_alunos_escola(db=db, escola=escola)
-    
-    if current_user.role == "professor":
-         if not current_user.professores:
-            return []
-         ids_turmas_prof = [t.id_turma for t in servico_turmas.listar_turmas_professor(db=db, id_professor=current_user.professores.id_professor)]
-         alunos_filtrados = [aluno for aluno in alunos if any(m.id_turma in ids_turmas_prof for m in aluno.matriculas)]
-         return alunos_filtrados
-
-    return alunos
+    return _responder_busca(
+        response, servico_alunos.listar_alunos_escola, db=db, escola=escola, skip=skip, limit=limit, cursor=cursor,
+        id_professor=escopo.professor_do_usuario(current_user)
+    )
 
 @router.get("/buscar/serie/{serie_ano}", summary="Buscar alunos por série/ano", response_model=List[schemas.Aluno], status_code=status.HTTP_200_OK)
 def buscar_alunos_por_serie(
     serie_ano: str,
+    response: Response,
     skip: int = 0, 
     limit: int = 100, 
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db),
     current_user: models.Usuario = Depends(get_current_active_user)
 ):
-    alunos = servico_alunos.listar_alunos_serie(db=db, serie_ano=serie_ano)
-    
-    if current_user.role == "professor":
-         if not current_user.professores:
-            return []
-         ids_turmas_prof = [t.id_turma for t in servico_turmas.listar_turmas_professor(db=db, id_professor=current_user.professores.id_professor)]
-         alunos_filtrados = [aluno for aluno in alunos if any(m.id_turma in ids_turmas_prof for m in aluno.matriculas)]
-         return alunos_filtrados
-
-    return alunos
+    return _responder_busca(
+        response, servico_alunos.listar_alunos_serie, db=db, serie_ano=serie_ano, skip=skip, limit=limit, cursor=cursor,
+        id_professor=escopo.professor_do_usuario(current_user)
+    )
 
 @router.put("/{id_aluno}", summary="Atualizar um aluno existente", response_model=schemas.Aluno, status_code=status.HTTP_200_OK)
 def atualizar_aluno(
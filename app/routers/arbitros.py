@@ -1,15 +1,18 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from database import get_db
 import schemas
 import models
 from services import arbitros as service_arbitros
 from security import check_coordenador_role, get_current_active_user
+from metricas import RotaInstrumentada
+import paginacao
 
 router = APIRouter(
     prefix="/arbitros",
-    tags=["Árbitros"]
+    tags=["Árbitros"],
+    route_class=RotaInstrumentada
 )
 
 @router.post("/", summary="Criar um novo árbitro", response_model=schemas.Arbitro, status_code=status.HTTP_201_CREATED)
@@ -22,12 +25,20 @@ def criar_arbitro(
 
 @router.get("/", summary="Listar todos os árbitros", response_model=List[schemas.Arbitro], status_code=status.HTTP_200_OK)
 def listar_arbitros(
+    response: Response,
     skip: int = 0, 
     limit: int = 100, 
+    cursor: Optional[str] = None,
+    incluir_total: bool = False,
     db: Session = Depends(get_db),
     current_user: models.Usuario = Depends(get_current_active_user)
 ):
-    return service_arbitros.listar_arbitros(db=db, skip=skip, limit=limit)
+    try:
+        pagina = service_arbitros.listar_arbitros(db=db, skip=skip, limit=limit, cursor=cursor, incluir_total=incluir_total)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    paginacao.aplicar_cabecalhos(response, pagina)
+    return pagina
 
 @router.get("/{id_arbitro}", summary="Obter um árbitro por ID", response_model=schemas.Arbitro, status_code=status.HTTP_200_OK)
 def listar_arbitro(
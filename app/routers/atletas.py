@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form
+from fastapi import APIRouter, Depends, HTTPException, Response, status, UploadFile, File, Form
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from datetime import date
@@ -8,18 +8,17 @@ import models
 from services import atletas as service_atletas
 from services import equipes as service_equipes
 from security import check_coordenador_role, get_current_active_user
-import shutil
-import uuid
-from pathlib import Path
+import anyio
+import armazenamento
+from metricas import RotaInstrumentada
+import paginacao
 
 router = APIRouter(
     prefix="/atletas",
     tags=["Atletas Externos"],
+    route_class=RotaInstrumentada,
 )
 
-BASE_DIR = Path(__file__).resolve().parent.parent.parent
-UPLOAD_DIR = BASE_DIR / "uploads"
-
 def salvar_foto_atleta(file: UploadFile) -> Optional[str]:
     if not file or not file.filename:
         return None
@@ -35,16 +34,13 @@ def salvar_foto_atleta(file: UploadFile) -> Optional[str]:
     if file.content_type not in {"image/jpeg", "image/png", "image/jpg"}:
         raise HTTPException(status_code=400, detail="Tipo de arquivo não permitido. Use apenas imagens (JPG/PNG) para fotos.")
 
-    diretorio = UPLOAD_DIR / "atletas"
-    diretorio.mkdir(parents=True, exist_ok=True)
-
-    nome_arquivo = f"{uuid.uuid4()}.{extensao}"
-    caminho_arquivo = diretorio / nome_arquivo
-
-    with open(caminho_arquivo, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
-    
-    return f"uploads/atletas/{nome_arquivo}"
+    # A rota é síncrona (roda no threadpool); a gravação em blocos roda no event loop
+    try:
+        return anyio.from_thread.run(armazenamento.salvar, file, "atletas", extensao)
+    except armazenamento.ArquivoMuitoGrande as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 @router.post("/equipe/{id_equipe}", summary="Cadastrar atleta e vincular a uma equipe", response_model=schemas.Atleta)
 def cadastrar_atleta_na_equipe(
@@ -84,12 +80,20 @@ def cadastrar_atleta_na_equipe(
 
 @router.get("/", response_model=List[schemas.Atleta])
 def listar_atletas(
+    response: Response,
     skip: int = 0, 
     limit: int = 100, 
+    cursor: Optional[str] = None,
+    incluir_total: bool = False,
     db: Session = Depends(get_db),
     current_user: models.Usuario = Depends(get_current_active_user)
 ):
-    return service_atletas.listar_atletas(db, skip=skip, limit=limit)
+    try:
+        pagina = service_atletas.listar_atletas(db, skip=skip, limit=limit, cursor=cursor, incluir_total=incluir_total)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    paginacao.aplicar_cabecalhos(response, pagina)
+    return pagina
 
 @router.get("/{id_atleta}", response_model=schemas.Atleta)
 def obter_atleta(
@@ -1,20 +1,23 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
 from database import get_db
 import models
 from security import (
     verify_password,
+    executar_no_pool_bcrypt,
+    aguardar_pool_bcrypt,
     create_access_token,
     create_refresh_token,
     ACCESS_TOKEN_EXPIRE_MINUTES,
     check_admin_role,
     check_coordenador_role,
     get_password_hash,
-    get_current_user
+    get_current_user,
+    invalidar_principal
 )
 from datetime import timedelta, datetime, timezone
-from typing import List
+from typing import List, Optional
 from schemas import (
     Token,
     UsuarioCreate,
@@ -23,16 +26,24 @@ from schemas import (
     ChangePassword,
     RefreshTokenRequest
 )
+from metricas import RotaInstrumentada
+import anyio
+import paginacao
 
 router = APIRouter(
     tags=["Autenticação"],
+    route_class=RotaInstrumentada,
 )
 
 @router.post("/token", response_model=Token)
 async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
-    user = db.query(models.Usuario).filter(models.Usuario.username == form_data.username).first()
-    
-    if not user or not verify_password(form_data.password, user.password_hash):
+    # A verificação da senha é aguardada no pool do bcrypt sem prender uma thread do threadpool
+    # durante o hash; as consultas ao banco, bloqueantes, rodam no threadpool
+    user = await anyio.to_thread.run_sync(
+        lambda: db.query(models.Usuario).filter(models.Usuario.username == form_data.username).first()
+    )
+
+    if not user or not await aguardar_pool_bcrypt(verify_password, form_data.password, user.password_hash):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Usuário ou senha incorretos",
@@ -42,7 +53,7 @@ async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(
     access_token = create_access_token(
         data={"sub": user.username}, expires_delta=access_token_expires
     )
-    refresh_token = create_refresh_token(db=db, id_usuario=user.id_usuario)
+    refresh_token = await anyio.to_thread.run_sync(create_refresh_token, db, user.id_usuario)
     return {"access_token": access_token, "token_type": "bearer", "refresh_token": refresh_token}
 
 @router.post("/refresh", response_model=Token)
@@ -87,15 +98,21 @@ def change_password(
     db: Session = Depends(get_db),
     current_user: models.Usuario = Depends(get_current_user)
 ):
-    if not verify_password(password_data.old_password, current_user.password_hash):
+    # O usuário autenticado vem do cache, sem o hash da senha: carregar o registro do banco
+    db_user = db.query(models.Usuario).filter(models.Usuario.id_usuario == current_user.id_usuario).first()
+    if not db_user:
+        raise HTTPException(status_code=404, detail="Usuário não encontrado.")
+
+    if not executar_no_pool_bcrypt(verify_password, password_data.old_password, db_user.password_hash):
         raise HTTPException(status_code=400, detail="Senha atual incorreta.")
 
     if password_data.new_password != password_data.confirm_password:
         raise HTTPException(status_code=400, detail="As novas senhas não conferem.")
-    current_user.password_hash = get_password_hash(password_data.new_password)
-    current_user.must_change_password = False
+    db_user.password_hash = executar_no_pool_bcrypt(get_password_hash, password_data.new_password)
+    db_user.must_change_password = False
     
     db.commit()
+    invalidar_principal(db_user.username)
     
     return {"message": "Senha alterada com sucesso."}
 
@@ -105,12 +122,19 @@ async def read_users_me(current_user: models.Usuario = Depends(get_current_user)
 
 @router.get("/users", response_model=List[UsuarioResponse])
 def read_users(
+    response: Response,
     skip: int = 0, 
     limit: int = 100, 
+    cursor: Optional[str] = None,
+    incluir_total: bool = False,
     db: Session = Depends(get_db), 
     current_user: models.Usuario = Depends(check_admin_role)
 ):
-    users = db.query(models.Usuario).offset(skip).limit(limit).all()
+    try:
+        users = paginacao.paginar(db.query(models.Usuario), models.Usuario.id_usuario, skip, limit, cursor, incluir_total)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    paginacao.aplicar_cabecalhos(response, users)
     return users
 
 @router.post("/register", response_model=UsuarioResponse, status_code=status.HTTP_201_CREATED)
@@ -130,7 +154,7 @@ def create_user(
     if db_user:
         raise HTTPException(status_code=400, detail="Nome de usuário já cadastrado.")
     
-    hashed_password = get_password_hash(user.password)
+    hashed_password = executar_no_pool_bcrypt(get_password_hash, user.password)
     new_user = models.Usuario(
         username=user.username,
         password_hash=hashed_password,
@@ -162,6 +186,7 @@ def update_user_role(
 
     db_user.role = role_data.role
     db.commit()
+    invalidar_principal(db_user.username)
     db.refresh(db_user)
     return db_user
 
@@ -185,8 +210,10 @@ def delete_user(
         )
 
     try:
+        username = user_to_delete.username
         db.delete(user_to_delete)
         db.commit()
+        invalidar_principal(username)
     except Exception:
         db.rollback()
         raise HTTPException(status_code=400, detail="Não é possível excluir este usuário. Ele pode estar vinculado a um Professor ou outro registro.")
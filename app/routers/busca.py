@@ -0,0 +1,33 @@
+from fastapi import APIRouter, Depends, Query, status
+from sqlalchemy.orm import Session
+from typing import List, Optional
+from database import get_db
+import schemas
+import models
+import escopo
+from services import busca as servico_busca
+from security import get_current_active_user
+from metricas import RotaInstrumentada
+
+router = APIRouter(
+    prefix="/busca",
+    tags=["Busca"],
+    route_class=RotaInstrumentada
+)
+
+@router.get("/", summary="Buscar alunos, atletas e professores pelo nome", response_model=List[schemas.ResultadoBusca], status_code=status.HTTP_200_OK)
+def buscar(
+    q: str = Query(..., min_length=1, max_length=200),
+    tipo: Optional[List[schemas.TipoBuscaEnum]] = Query(None),
+    limite: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db),
+    current_user: models.Usuario = Depends(get_current_active_user)
+):
+    tipos = [t.value for t in tipo] if tipo else list(servico_busca.ENTIDADES)
+    # Professores só aparecem para quem pode listá-los (rotas de /professores)
+    if current_user.role not in ["admin", "coordenador"]:
+        tipos = [t for t in tipos if t != "professor"]
+    return servico_busca.buscar(
+        db=db, texto=q, limite=limite, tipos=tipos,
+        id_professor=escopo.professor_do_usuario(current_user)
+    )
@@ -1,16 +1,20 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from database import get_db
 import schemas
 import models
 from services import edicoes as edicao_service
 from services import eventos as evento_service
+from services import disciplina as disciplina_service
 from security import check_coordenador_role, get_current_active_user
+from metricas import RotaInstrumentada
+import paginacao
 
 router = APIRouter(
     prefix="/edicoes",
-    tags=["Edições"]
+    tags=["Edições"],
+    route_class=RotaInstrumentada
 )
 
 @router.post("/", summary="Criar uma nova edição", response_model=schemas.Edicao, status_code=status.HTTP_201_CREATED)
@@ -26,12 +30,20 @@ def criar_edicao(
 
 @router.get("/", summary="Listar todas as edições", response_model=List[schemas.Edicao], status_code=status.HTTP_200_OK)
 def listar_edicoes(
+    response: Response,
     skip: int = 0, 
     limit: int = 10, 
+    cursor: Optional[str] = None,
+    incluir_total: bool = False,
     db: Session = Depends(get_db),
     current_user: models.Usuario = Depends(get_current_active_user)
 ):
-    return edicao_service.listar_edicoes(db=db, skip=skip, limit=limit)
+    try:
+        pagina = edicao_service.listar_edicoes(db=db, skip=skip, limit=limit, cursor=cursor, incluir_total=incluir_total)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    paginacao.aplicar_cabecalhos(response, pagina)
+    return pagina
 
 @router.get("/{edicao_id}", summary="Obter uma edição por ID", response_model=schemas.Edicao, status_code=status.HTTP_200_OK)
 def listar_edicao(
@@ -94,8 +106,29 @@ def gerar_confrontos(
             db=db,
             edicao_id=edicao_id,
             id_modalidade=req.id_modalidade,
-            part_hora=req.part_hora
+            part_hora=req.part_hora,
+            distribuir_recursos=req.distribuir_recursos,
+            hora_limite=req.hora_limite
         )
         return {"message": f"{len(partidas)} partidas geradas com sucesso."}
     except ValueError as e:
-        raise HTTPException(status_code=400, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/{edicao_id}/disciplina", summary="Cartões acumulados e suspensões dos participantes da edição", response_model=List[schemas.SituacaoDisciplinar])
+def listar_disciplina(
+    edicao_id: int,
+    apenas_suspensos: bool = False,
+    db: Session = Depends(get_db),
+    current_user: models.Usuario = Depends(get_current_active_user)
+):
+    return disciplina_service.listar_disciplina(db=db, id_edicao=edicao_id, apenas_suspensos=apenas_suspensos)
+
+@router.get("/{edicao_id}/disciplina/{id_participante}", summary="Situação disciplinar de um participante na edição", response_model=schemas.SituacaoDisciplinar)
+def obter_disciplina(
+    edicao_id: int,
+    id_participante: int,
+    db: Session = Depends(get_db),
+    current_user: models.Usuario = Depends(get_current_active_user)
+):
+    linha = disciplina_service.obter_disciplina(db=db, id_edicao=edicao_id, id_participante=id_participante)
+    return disciplina_service.situacao(linha, id_edicao=edicao_id, id_participante=id_participante)
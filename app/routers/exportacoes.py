@@ -0,0 +1,94 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+from typing import Optional
+from datetime import date
+from database import get_db
+import schemas
+import models
+import planilhas
+from services import exportacao as servico_exportacao
+from services import turmas as servico_turmas
+from services import edicoes as servico_edicoes
+from security import check_coordenador_role
+from metricas import RotaInstrumentada
+
+router = APIRouter(
+    prefix="/exportacoes",
+    tags=["Exportações"],
+    route_class=RotaInstrumentada,
+)
+
+def _responder(nome_arquivo: str, cabecalho, linhas, formato: schemas.FormatoExportacaoEnum):
+    try:
+        return planilhas.resposta_planilha(nome_arquivo, cabecalho, linhas, formato.value)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def _checar_turma(db: Session, id_turma: Optional[int]):
+    if id_turma is not None and not servico_turmas.listar_turma_id(db=db, id_turma=id_turma):
+        raise HTTPException(status_code=404, detail="Turma não encontrada.")
+
+def _checar_edicao(db: Session, id_edicao: int):
+    if not servico_edicoes.listar_edicao_id(db=db, edicao_id=id_edicao):
+        raise HTTPException(status_code=404, detail="Edição não encontrada.")
+
+@router.get("/turmas/{id_turma}/alunos", summary="Exportar os alunos de uma turma")
+def exportar_alunos_turma(
+    id_turma: int,
+    apenas_ativas: bool = True,
+    formato: schemas.FormatoExportacaoEnum = schemas.FormatoExportacaoEnum.csv,
+    db: Session = Depends(get_db),
+    current_user: models.Usuario = Depends(check_coordenador_role)
+):
+    _checar_turma(db, id_turma)
+    linhas = servico_exportacao.exportar_alunos_turma(db=db, id_turma=id_turma, apenas_ativas=apenas_ativas)
+    return _responder(f"alunos_turma_{id_turma}", servico_exportacao.CABECALHO_ALUNOS, linhas, formato)
+
+@router.get("/presencas", summary="Exportar folhas de chamada")
+def exportar_presencas(
+    id_turma: Optional[int] = None,
+    data_inicio: Optional[date] = None,
+    data_fim: Optional[date] = None,
+    formato: schemas.FormatoExportacaoEnum = schemas.FormatoExportacaoEnum.csv,
+    db: Session = Depends(get_db),
+    current_user: models.Usuario = Depends(check_coordenador_role)
+):
+    _checar_turma(db, id_turma)
+    linhas = servico_exportacao.exportar_presencas(db=db, id_turma=id_turma, data_inicio=data_inicio, data_fim=data_fim)
+    nome = f"presencas_turma_{id_turma}" if id_turma is not None else "presencas"
+    return _responder(nome, servico_exportacao.CABECALHO_PRESENCAS, linhas, formato)
+
+@router.get("/matriculas", summary="Exportar matrículas")
+def exportar_matriculas(
+    id_turma: Optional[int] = None,
+    apenas_ativas: bool = False,
+    formato: schemas.FormatoExportacaoEnum = schemas.FormatoExportacaoEnum.csv,
+    db: Session = Depends(get_db),
+    current_user: models.Usuario = Depends(check_coordenador_role)
+):
+    _checar_turma(db, id_turma)
+    linhas = servico_exportacao.exportar_matriculas(db=db, id_turma=id_turma, apenas_ativas=apenas_ativas)
+    nome = f"matriculas_turma_{id_turma}" if id_turma is not None else "matriculas"
+    return _responder(nome, servico_exportacao.CABECALHO_MATRICULAS, linhas, formato)
+
+@router.get("/edicoes/{id_edicao}/partidas", summary="Exportar os jogos e placares de uma edição")
+def exportar_partidas_edicao(
+    id_edicao: int,
+    formato: schemas.FormatoExportacaoEnum = schemas.FormatoExportacaoEnum.csv,
+    db: Session = Depends(get_db),
+    current_user: models.Usuario = Depends(check_coordenador_role)
+):
+    _checar_edicao(db, id_edicao)
+    linhas = servico_exportacao.exportar_partidas_edicao(db=db, id_edicao=id_edicao)
+    return _responder(f"partidas_edicao_{id_edicao}", servico_exportacao.CABECALHO_PARTIDAS, linhas, formato)
+
+@router.get("/edicoes/{id_edicao}/classificacao", summary="Exportar a classificação de uma edição")
+def exportar_classificacao_edicao(
+    id_edicao: int,
+    formato: schemas.FormatoExportacaoEnum = schemas.FormatoExportacaoEnum.csv,
+    db: Session = Depends(get_db),
+    current_user: models.Usuario = Depends(check_coordenador_role)
+):
+    _checar_edicao(db, id_edicao)
+    linhas = servico_exportacao.exportar_classificacao_edicao(db=db, id_edicao=id_edicao)
+    return _responder(f"classificacao_edicao_{id_edicao}", servico_exportacao.CABECALHO_CLASSIFICACAO, linhas, formato)
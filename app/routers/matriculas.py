@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from database import get_db
@@ -8,10 +8,14 @@ from services import alunos as servico_alunos
 from services import turmas as servico_turmas
 from services import matriculas as servico_matriculas
 from security import check_coordenador_role, get_current_active_user
+from metricas import RotaInstrumentada
+import escopo
+import paginacao
 
 router = APIRouter(
     prefix="/matriculas",
     tags=["Matrículas"],
+    route_class=RotaInstrumentada,
 )
 
 @router.post("/", summary="Criar uma nova matrícula", response_model=schemas.Matricula, status_code=status.HTTP_201_CREATED)
@@ -40,42 +44,36 @@ def realizar_matricula(
 
 @router.get("/", summary="Listar todas as matrículas", response_model=List[schemas.Matricula], status_code=status.HTTP_200_OK)
 def listar_matriculas(
+    response: Response,
     skip: int = 0, 
     limit: int = 100, 
+    cursor: Optional[str] = None,
+    incluir_total: bool = False,
     turma_id: Optional[int] = None, 
     aluno_id: Optional[int] = None, 
     db: Session = Depends(get_db),
     current_user: models.Usuario = Depends(get_current_active_user)
 ):
-    if current_user.role == "professor":
-        if not current_user.professores:
-            return []
-        
-        ids_turmas_prof = [t.id_turma for t in servico_turmas.listar_turmas_professor(db=db, id_professor=current_user.professores.id_professor)]
-        
-        if turma_id:
-            if turma_id not in ids_turmas_prof:
-                raise HTTPException(status_code=403, detail="Acesso negado: Essa turma não é sua.")
-        
-        todas_matriculas = []
-        if turma_id:
-            todas_matriculas = servico_matriculas.listar_matriculas_turma(db=db, id_turma=turma_id)
-        elif aluno_id:
-            matriculas_aluno = servico_matriculas.listar_matriculas_aluno(db=db, id_aluno=aluno_id)
-            todas_matriculas = [m for m in matriculas_aluno if m.id_turma in ids_turmas_prof]
-        else:
-            raw_matriculas = servico_matriculas.listar_matriculas(db=db, skip=skip, limit=limit)
-            todas_matriculas = [m for m in raw_matriculas if m.id_turma in ids_turmas_prof]
-            
-        return todas_matriculas
+    id_professor = escopo.professor_do_usuario(current_user)
 
     if turma_id:
+        if id_professor is not None:
+            turma = servico_turmas.listar_turma_id(db=db, id_turma=turma_id)
+            if not turma or turma.id_professor != id_professor:
+                raise HTTPException(status_code=403, detail="Acesso negado: Essa turma não é sua.")
         return servico_matriculas.listar_matriculas_turma(db=db, id_turma=turma_id)
     
     if aluno_id:
-        return servico_matriculas.listar_matriculas_aluno(db=db, id_aluno=aluno_id)
+        return servico_matriculas.listar_matriculas_aluno(db=db, id_aluno=aluno_id, id_professor=id_professor)
     
-    return servico_matriculas.listar_matriculas(db=db, skip=skip, limit=limit)
+    try:
+        pagina = servico_matriculas.listar_matriculas(
+            db=db, skip=skip, limit=limit, cursor=cursor, incluir_total=incluir_total, id_professor=id_professor
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    paginacao.aplicar_cabecalhos(response, pagina)
+    return pagina
 
 @router.delete("/{id_matricula}", summary="Cancelar uma matrícula", status_code=status.HTTP_204_NO_CONTENT)
 def cancelar_matricula(
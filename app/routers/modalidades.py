@@ -1,15 +1,18 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from database import get_db
 import schemas
 import models
 from services import modalidades as servico_modalidades
 from security import check_coordenador_role, get_current_active_user
+from metricas import RotaInstrumentada
+import paginacao
 
 router = APIRouter(
     prefix="/modalidades",
     tags=["Modalidades"],
+    route_class=RotaInstrumentada,
 )
 
 @router.post("/", summary="Criar uma nova modalidade", response_model=schemas.Modalidade, status_code=status.HTTP_201_CREATED)
@@ -26,12 +29,20 @@ def criar_modalidade(
 
 @router.get("/", summary="Listar todas as modalidades", response_model=List[schemas.Modalidade], status_code=status.HTTP_200_OK)
 def listar_modalidades(
+    response: Response,
     skip: int = 0, 
     limit: int = 100, 
+    cursor: Optional[str] = None,
+    incluir_total: bool = False,
     db: Session = Depends(get_db),
     current_user: models.Usuario = Depends(get_current_active_user)
 ):
-    return servico_modalidades.listar_modalidades(db=db, skip=skip, limit=limit)
+    try:
+        pagina = servico_modalidades.listar_modalidades(db=db, skip=skip, limit=limit, cursor=cursor, incluir_total=incluir_total)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    paginacao.aplicar_cabecalhos(response, pagina)
+    return pagina
 
 @router.get("/{id_modalidade}", summary="Obter uma modalidade por ID", response_model=schemas.Modalidade, status_code=status.HTTP_200_OK)
 def listar_modalidade(
@@ -2,14 +2,19 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from typing import List
 from database import get_db
+import ao_vivo
+import cache
 import schemas
 import models
 from services import partidas as service_partidas
+from services import disciplina as service_disciplina
 from security import check_coordenador_role, get_current_active_user
+from metricas import RotaInstrumentada
 
 router = APIRouter(
     prefix="/partidas",
-    tags=["Partidas"]
+    tags=["Partidas"],
+    route_class=RotaInstrumentada
 )
 
 @router.post("/", summary="Criar (agendar) uma partida", response_model=schemas.Partida, status_code=status.HTTP_201_CREATED)
@@ -58,8 +63,8 @@ def excluir_partida(
     return None
 
 import os
-import uuid
 from fastapi import UploadFile, File
+import armazenamento
 
 @router.post("/{id_partida}/sumula", summary="Fazer upload da súmula da partida")
 async def upload_sumula(
@@ -83,25 +88,21 @@ async def upload_sumula(
     if file.content_type not in allowed_content_types:
         raise HTTPException(status_code=400, detail="MIME-type inválido. Apenas imagens (JPEG, PNG) ou PDF são permitidos.")
 
-    # 3. Salvar arquivo
-    import pathlib
-    base_dir = pathlib.Path(__file__).resolve().parent.parent.parent
-    upload_dir = base_dir / "uploads" / "sumulas"
-    upload_dir.mkdir(parents=True, exist_ok=True)
-
-    unique_filename = f"{uuid.uuid4()}{ext}"
-    file_path = upload_dir / unique_filename
-
+    # 3. Salvar arquivo em blocos, conferindo tamanho e conteúdo
     try:
-        content = await file.read()
-        with open(file_path, "wb") as f:
-            f.write(content)
+        caminho = await armazenamento.salvar(file, "sumulas", ext.lstrip("."))
+    except armazenamento.ArquivoMuitoGrande as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro ao salvar arquivo: {str(e)}")
 
     # 4. Atualizar banco
-    db_partida.sumula_arquivo = f"/uploads/sumulas/{unique_filename}"
+    # No disco local o caminho é relativo à API (/uploads/...); no S3 é a URL do objeto
+    db_partida.sumula_arquivo = caminho if "://" in caminho else f"/{caminho}"
     db.commit()
+    cache.invalidar_edicao(db_partida.id_edicao, id_partida)
     db.refresh(db_partida)
 
     return {"sumula_arquivo": db_partida.sumula_arquivo}
@@ -116,7 +117,7 @@ def listar_estatisticas_partida(
     db_partida = service_partidas.listar_partida(db=db, id_partida=id_partida)
     if not db_partida:
         raise HTTPException(status_code=404, detail="Partida não encontrada.")
-    return db_partida.estatisticas
+    return service_partidas.listar_estatisticas_partida(db=db, id_partida=id_partida)
 
 
 @router.post("/{id_partida}/estatisticas", summary="Registrar estatística de um jogador na partida", response_model=schemas.EstatisticaPartidaResponse, status_code=status.HTTP_201_CREATED)
@@ -168,14 +169,26 @@ def criar_estatistica_partida(
             detail="Já existem estatísticas registradas para este participante nesta partida. Use a rota de atualização (PUT)."
         )
 
-    # 5. Criar registro
+    # 5. Verificar suspensão pelos cartões recebidos antes desta partida
+    if service_disciplina.suspenso_na_partida(db, db_partida, stat.id_participante):
+        raise HTTPException(
+            status_code=400,
+            detail="O participante está suspenso por acúmulo de cartões e não pode atuar nesta partida."
+        )
+
+    # 6. Criar registro e acumular os cartões
     db_stat = models.EstatisticaPartida(
         id_partida=id_partida,
         **stat.model_dump()
     )
     db.add(db_stat)
+    service_disciplina.registrar_estatistica(
+        db, db_partida, stat.id_participante, stat.cartoes_amarelos or 0, stat.cartoes_vermelhos or 0, presenca=1
+    )
     db.commit()
+    cache.invalidar_edicao(db_partida.id_edicao, id_partida)
     db.refresh(db_stat)
+    ao_vivo.publicar(db_partida.id_edicao, ao_vivo.delta_estatistica(db_stat))
     return db_stat
 
 
@@ -194,12 +207,31 @@ def atualizar_estatistica_partida(
     if not db_stat:
         raise HTTPException(status_code=404, detail="Estatística não encontrada para esta partida.")
 
-    # Atualizar campos
+    db_partida = db_stat.partida
+    id_edicao = db_partida.id_edicao
+    anterior = (db_stat.id_participante, db_stat.cartoes_amarelos or 0, db_stat.cartoes_vermelhos or 0)
+
+    # A estatística passou para outro participante: ele também não pode estar suspenso nesta partida
+    if stat.id_participante != anterior[0] and service_disciplina.suspenso_na_partida(db, db_partida, stat.id_participante):
+        raise HTTPException(
+            status_code=400,
+            detail="O participante está suspenso por acúmulo de cartões e não pode atuar nesta partida."
+        )
+
+    # Atualizar campos e ajustar os cartões e suspensões de quem foi afetado
     for key, val in stat.model_dump().items():
         setattr(db_stat, key, val)
+    amarelos, vermelhos = db_stat.cartoes_amarelos or 0, db_stat.cartoes_vermelhos or 0
+    if db_stat.id_participante == anterior[0]:
+        service_disciplina.registrar_estatistica(db, db_partida, anterior[0], amarelos - anterior[1], vermelhos - anterior[2])
+    else:
+        service_disciplina.registrar_estatistica(db, db_partida, anterior[0], -anterior[1], -anterior[2], presenca=-1)
+        service_disciplina.registrar_estatistica(db, db_partida, db_stat.id_participante, amarelos, vermelhos, presenca=1)
 
     db.commit()
+    cache.invalidar_edicao(id_edicao, id_partida)
     db.refresh(db_stat)
+    ao_vivo.publicar(id_edicao, ao_vivo.delta_estatistica(db_stat))
     return db_stat
 
 
@@ -217,7 +249,15 @@ def deletar_estatistica_partida(
     if not db_stat:
         raise HTTPException(status_code=404, detail="Estatística não encontrada para esta partida.")
 
+    db_partida = db_stat.partida
+    id_edicao = db_partida.id_edicao
+    delta = ao_vivo.delta_estatistica(db_stat, removida=True)
     db.delete(db_stat)
+    service_disciplina.registrar_estatistica(
+        db, db_partida, db_stat.id_participante, -(db_stat.cartoes_amarelos or 0), -(db_stat.cartoes_vermelhos or 0), presenca=-1
+    )
     db.commit()
+    cache.invalidar_edicao(id_edicao, id_partida)
+    ao_vivo.publicar(id_edicao, delta)
     return None
 
@@ -1,16 +1,20 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+import json
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from datetime import date
 from database import get_db
 import schemas
 import models
 from services import presencas as servico_presencas
 from security import get_current_active_user
+from metricas import RotaInstrumentada
 
 router = APIRouter(
     prefix="/presencas",
     tags=["Presenças"],
+    route_class=RotaInstrumentada,
 )
 
 @router.post("/lote", summary="Registrar presenças em lote", response_model=List[schemas.Presenca], status_code=status.HTTP_201_CREATED)
@@ -24,6 +28,14 @@ def registrar_presenca_lote(
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+@router.post("/sincronizar", summary="Sincronizar várias chamadas de uma vez", response_model=schemas.ResultadoSincronizacao)
+def sincronizar_presencas(
+    dados: schemas.SincronizacaoPresencas,
+    db: Session = Depends(get_db),
+    current_user: models.Usuario = Depends(get_current_active_user)
+):
+    return servico_presencas.sincronizar_presencas(db=db, sincronizacao=dados)
+
 @router.get("/turma/{id_turma}/data/{data_aula}", summary="Listar presenças de uma turma em uma data", response_model=List[schemas.Presenca])
 def listar_presencas_turma_data(
     id_turma: int,
@@ -31,4 +43,34 @@ def listar_presencas_turma_data(
     db: Session = Depends(get_db),
     current_user: models.Usuario = Depends(get_current_active_user)
 ):
-    return servico_presencas.listar_presencas_turma_data(db=db, id_turma=id_turma, data_aula=data_aula)
\ No newline at end of file
+    return servico_presencas.listar_presencas_turma_data(db=db, id_turma=id_turma, data_aula=data_aula)
+
+@router.get("/estatisticas", summary="Estatísticas de frequência agrupadas (NDJSON)")
+def estatisticas_presencas(
+    agrupar_por: List[schemas.AgrupamentoPresencaEnum] = Query([schemas.AgrupamentoPresencaEnum.turma]),
+    data_inicio: Optional[date] = None,
+    data_fim: Optional[date] = None,
+    id_turma: Optional[int] = None,
+    id_aluno: Optional[int] = None,
+    id_modalidade: Optional[int] = None,
+    db: Session = Depends(get_db),
+    current_user: models.Usuario = Depends(get_current_active_user)
+):
+    linhas = servico_presencas.estatisticas_presencas(
+        db=db, agrupar_por=[a.value for a in agrupar_por], data_inicio=data_inicio, data_fim=data_fim,
+        id_turma=id_turma, id_aluno=id_aluno, id_modalidade=id_modalidade
+    )
+    # Validar os parâmetros e executar a consulta antes de iniciar a resposta
+    try:
+        primeira = next(linhas, None)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    def gerar():
+        if primeira is None:
+            return
+        yield json.dumps(primeira, ensure_ascii=False) + "\n"
+        for linha in linhas:
+            yield json.dumps(linha, ensure_ascii=False) + "\n"
+
+    return StreamingResponse(gerar(), media_type="application/x-ndjson")
@@ -1,16 +1,19 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from database import get_db
 import schemas
 import models
 from services import professores as servico_professores
 from security import check_coordenador_role, get_current_active_user
 from utils import validar_cpf
+from metricas import RotaInstrumentada
+import paginacao
 
 router = APIRouter(
     prefix="/professores",
     tags=["Professores"],
+    route_class=RotaInstrumentada,
 )
 
 @router.post("/", summary="Criar um novo professor", response_model=schemas.ProfessorCreatedResponse, status_code=status.HTTP_201_CREATED)
@@ -42,12 +45,20 @@ def criar_professor(
 
 @router.get("/", summary="Listar todos os professores", response_model=List[schemas.Professor], status_code=status.HTTP_200_OK)
 def listar_professores(
+    response: Response,
     skip: int = 0, 
     limit: int = 100, 
+    cursor: Optional[str] = None,
+    incluir_total: bool = False,
     db: Session = Depends(get_db),
     current_user: models.Usuario = Depends(check_coordenador_role)
 ):
-    return servico_professores.listar_professores(db=db, skip=skip, limit=limit)
+    try:
+        pagina = servico_professores.listar_professores(db=db, skip=skip, limit=limit, cursor=cursor, incluir_total=incluir_total)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    paginacao.aplicar_cabecalhos(response, pagina)
+    return pagina
 
 @router.get("/{id_professor}", summary="Obter um professor por ID", response_model=schemas.Professor, status_code=status.HTTP_200_OK)
 def listar_professor(
@@ -1,15 +1,28 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+import asyncio
+import hashlib
+import os
+import re
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, WebSocket, status
+from fastapi.responses import StreamingResponse
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from datetime import date, time
-from pydantic import BaseModel
+from pydantic import BaseModel, TypeAdapter
 from database import get_db
+import ao_vivo
+import cache
+import carregamento
 import models
 import schemas
+from services import classificacao as servico_classificacao
+from services import estatisticas as servico_estatisticas
+from metricas import RotaInstrumentada
 
 router = APIRouter(
     prefix="/publico",
-    tags=["Público"]
+    tags=["Público"],
+    route_class=RotaInstrumentada
 )
 
 # --- PUBLIC PYDANTIC SCHEMAS ---
@@ -85,6 +98,10 @@ class PartidaPublica(BaseModel):
     status: str
     sumula_arquivo: Optional[str]
     observacoes: Optional[str]
+    origem_casa_grupo: Optional[str] = None
+    origem_casa_posicao: Optional[int] = None
+    origem_visitante_grupo: Optional[str] = None
+    origem_visitante_posicao: Optional[int] = None
     local: Optional[LocalPublico]
     arbitro: Optional[ArbitroPublico]
     equipe_casa: Optional[EquipeSimplesPublica]
@@ -102,73 +119,144 @@ class EstatisticaPublica(BaseModel):
     assistencias: int
     nome_jogador: str
 
+class ClassificacaoPublica(BaseModel):
+    posicao: int
+    id_modalidade: int
+    grupo: Optional[str]
+    id_equipe: int
+    nome: str
+    jogos: int
+    vitorias: int
+    empates: int
+    derrotas: int
+    gols_pro: int
+    gols_contra: int
+    saldo: int
+    pontos: int
+
+class ItemRankingPublico(BaseModel):
+    id_participante: int
+    nome_jogador: str
+    total: int
+    jogos: int
+
+class RankingPublico(BaseModel):
+    criterio: str
+    itens: List[ItemRankingPublico]
+    proximo_cursor: Optional[str] = None
+
+# --- CACHE DAS RESPOSTAS ---
+
+# Tempo (em segundos) que uma resposta fica no cache do servidor; 0 desativa o cache (ETag continua)
+PUBLICO_CACHE_TTL = int(os.getenv("PUBLICO_CACHE_TTL", "60"))
+# max-age enviado aos navegadores/CDN: curto, pois o placar muda durante as partidas
+PUBLICO_CACHE_MAX_AGE = int(os.getenv("PUBLICO_CACHE_MAX_AGE", "5"))
+
+_adaptadores = {}
+_ROTA_EDICAO = re.compile(r"^/publico/edicoes/(\d+)/")
+_ROTA_PARTIDA = re.compile(r"^/publico/partidas/(\d+)/")
+
+def _serializar(modelo, dados) -> str:
+    adaptador = _adaptadores.get(modelo)
+    if adaptador is None:
+        adaptador = _adaptadores[modelo] = TypeAdapter(modelo)
+    return adaptador.dump_json(adaptador.validate_python(dados, from_attributes=True)).decode()
+
+def _escopos(caminho: str):
+    # Escopos de invalidação de que a resposta depende, além do escopo "publico" comum a todas
+    escopos = [cache.ESCOPO_PUBLICO]
+    for padrao, prefixo in ((_ROTA_EDICAO, "edicao"), (_ROTA_PARTIDA, "partida")):
+        encontrado = padrao.match(caminho)
+        if encontrado:
+            escopos.append(f"{prefixo}:{encontrado.group(1)}")
+    return escopos
+
+def _chave(request: Request) -> str:
+    # Caminho, parâmetros e a versão atual de cada escopo: trocar uma versão invalida todas as chaves dela
+    versoes = ":".join(cache.versao_escopo(escopo) for escopo in _escopos(request.url.path))
+    parametros = "&".join(f"{k}={v}" for k, v in sorted(request.query_params.multi_items()))
+    return f"publico:{versoes}:{request.url.path}?{parametros}"
+
+def _etag_confere(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    etags = [valor.strip().removeprefix("W/") for valor in if_none_match.split(",")]
+    return "*" in etags or etag in etags
+
+def _responder(request: Request, item: dict):
+    cabecalhos = {"ETag": item["etag"], "Cache-Control": f"public, max-age={PUBLICO_CACHE_MAX_AGE}"}
+    # 304 quando o cliente já tem esta versão
+    if _etag_confere(request.headers.get("if-none-match"), item["etag"]):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=cabecalhos)
+    return Response(content=item["corpo"], media_type="application/json", headers=cabecalhos)
+
+def _resposta_do_cache(request: Request):
+    item = cache.backend.obter(_chave(request))
+    return _responder(request, item) if item is not None else None
+
+def _responder_em_cache(request: Request, modelo, gerar):
+    chave = _chave(request) if PUBLICO_CACHE_TTL > 0 else None
+    item = cache.backend.obter(chave) if chave else None
+    if item is None:
+        # Falta: consultar o banco e guardar o JSON já serializado com o seu ETag
+        corpo = _serializar(modelo, gerar())
+        item = {"corpo": corpo, "etag": f'"{hashlib.sha1(corpo.encode()).hexdigest()}"'}
+        if chave:
+            cache.backend.gravar(chave, item, PUBLICO_CACHE_TTL)
+    return _responder(request, item)
+
+class CachePublicoMiddleware:
+    # Atalho para respostas públicas que já estão no cache: responde antes do roteamento, da sessão do
+    # banco e do threadpool das rotas síncronas. Nas faltas a requisição segue para a rota, que grava o cache.
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "GET" or PUBLICO_CACHE_TTL <= 0 or not scope["path"].startswith("/publico/"):
+            await self.app(scope, receive, send)
+            return
+        request = Request(scope)
+        if isinstance(cache.backend, cache.CacheMemoria):
+            resposta = _resposta_do_cache(request)
+        else:
+            # Backends compartilhados fazem E/S bloqueante
+            resposta = await run_in_threadpool(_resposta_do_cache, request)
+        if resposta is None:
+            await self.app(scope, receive, send)
+            return
+        scope["rota_metricas"] = "/publico (cache)"
+        await resposta(scope, receive, send)
+
 # --- ROUTE IMPLEMENTATIONS ---
 
 @router.get("/eventos", response_model=List[EventoPublico])
-def listar_eventos_publicos(db: Session = Depends(get_db)):
-    return db.query(models.Evento).all()
+def listar_eventos_publicos(request: Request, db: Session = Depends(get_db)):
+    return _responder_em_cache(request, List[EventoPublico], lambda: db.query(models.Evento).all())
 
 @router.get("/eventos/{id_evento}", response_model=EventoPublico)
-def obter_evento_publico(id_evento: int, db: Session = Depends(get_db)):
-    evento = db.query(models.Evento).filter(models.Evento.id_evento == id_evento).first()
-    if not evento:
-        raise HTTPException(status_code=404, detail="Evento não encontrado.")
-    return evento
+def obter_evento_publico(id_evento: int, request: Request, db: Session = Depends(get_db)):
+    def gerar():
+        evento = db.query(models.Evento).filter(models.Evento.id_evento == id_evento).first()
+        if not evento:
+            raise HTTPException(status_code=404, detail="Evento não encontrado.")
+        return evento
+    return _responder_em_cache(request, EventoPublico, gerar)
 
 @router.get("/edicoes", response_model=List[EdicaoPublica])
-def listar_edicoes_publicas(db: Session = Depends(get_db)):
-    return db.query(models.Edicao).all()
+def listar_edicoes_publicas(request: Request, db: Session = Depends(get_db)):
+    return _responder_em_cache(request, List[EdicaoPublica], lambda: db.query(models.Edicao).all())
 
-@router.get("/edicoes/{id_edicao}/equipes", response_model=List[EquipePublica])
-def listar_equipes_publicas(id_edicao: int, db: Session = Depends(get_db)):
-    from sqlalchemy.orm import selectinload
-    equipes = db.query(models.Equipe).filter(models.Equipe.id_edicao == id_edicao).options(
-        selectinload(models.Equipe.participantes).selectinload(models.Participante.aluno),
-        selectinload(models.Equipe.participantes).selectinload(models.Participante.atleta)
-    ).all()
-    
-    equipes_publicas = []
-    for eq in equipes:
-        jogadores = []
-        for part in eq.participantes:
-            nome = "Jogador Desconhecido"
-            if part.tipo == "aluno" and part.aluno:
-                nome = part.aluno.nome_completo
-            elif part.tipo == "atleta" and part.atleta:
-                nome = part.atleta.nome_completo
-            jogadores.append(JogadorPublico(id_participante=part.id_participante, nome_completo=nome))
-            
-        equipes_publicas.append(EquipePublica(
-            id_equipe=eq.id_equipe,
-            nome=eq.nome,
-            jogadores=jogadores
-        ))
-        
-    return equipes_publicas
+def _nome_participante(part):
+    if part:
+        if part.tipo == "aluno" and part.aluno:
+            return part.aluno.nome_completo
+        elif part.tipo == "atleta" and part.atleta:
+            return part.atleta.nome_completo
+    return "Jogador Desconhecido"
 
-@router.get("/edicoes/{id_edicao}/partidas", response_model=List[PartidaPublica])
-def listar_partidas_publicas(id_edicao: int, db: Session = Depends(get_db)):
-    return db.query(models.Partida).filter(models.Partida.id_edicao == id_edicao).all()
-
-@router.get("/partidas/{id_partida}/estatisticas", response_model=List[EstatisticaPublica])
-def listar_estatisticas_publicas(id_partida: int, db: Session = Depends(get_db)):
-    from sqlalchemy.orm import selectinload
-    stats = db.query(models.EstatisticaPartida).filter(models.EstatisticaPartida.id_partida == id_partida).options(
-        selectinload(models.EstatisticaPartida.participante).selectinload(models.Participante.aluno),
-        selectinload(models.EstatisticaPartida.participante).selectinload(models.Participante.atleta)
-    ).all()
-    
-    stats_publicas = []
-    for s in stats:
-        nome = "Jogador Desconhecido"
-        part = s.participante
-        if part:
-            if part.tipo == "aluno" and part.aluno:
-                nome = part.aluno.nome_completo
-            elif part.tipo == "atleta" and part.atleta:
-                nome = part.atleta.nome_completo
-                
-        stats_publicas.append(EstatisticaPublica(
+def _estatisticas_publicas(stats):
+    return [
+        EstatisticaPublica(
             id_estatistica=s.id_estatistica,
             id_partida=s.id_partida,
             id_participante=s.id_participante,
@@ -176,40 +264,94 @@ def listar_estatisticas_publicas(id_partida: int, db: Session = Depends(get_db))
             cartoes_amarelos=s.cartoes_amarelos,
             cartoes_vermelhos=s.cartoes_vermelhos,
             assistencias=s.assistencias,
-            nome_jogador=nome
-        ))
-        
-    return stats_publicas
+            nome_jogador=_nome_participante(s.participante)
+        )
+        for s in stats
+    ]
+
+@router.get("/edicoes/{id_edicao}/equipes", response_model=List[EquipePublica])
+def listar_equipes_publicas(id_edicao: int, request: Request, db: Session = Depends(get_db)):
+    def gerar():
+        equipes = db.query(models.Equipe).filter(models.Equipe.id_edicao == id_edicao).options(*carregamento.EQUIPE_PUBLICA).all()
+        return [
+            EquipePublica(
+                id_equipe=eq.id_equipe,
+                nome=eq.nome,
+                jogadores=[JogadorPublico(id_participante=part.id_participante, nome_completo=_nome_participante(part)) for part in eq.participantes]
+            )
+            for eq in equipes
+        ]
+    return _responder_em_cache(request, List[EquipePublica], gerar)
+
+@router.get("/edicoes/{id_edicao}/partidas", response_model=List[PartidaPublica])
+def listar_partidas_publicas(id_edicao: int, request: Request, db: Session = Depends(get_db)):
+    return _responder_em_cache(request, List[PartidaPublica],
+                               lambda: db.query(models.Partida).filter(models.Partida.id_edicao == id_edicao).options(*carregamento.PARTIDA_PUBLICA).all())
+
+@router.get("/edicoes/{id_edicao}/ao-vivo", summary="Placar ao vivo da edição (Server-Sent Events)")
+def acompanhar_edicao_ao_vivo(id_edicao: int):
+    # Deltas de placar/status e de estatísticas; o estado inicial vem de /edicoes/{id_edicao}/partidas
+    return StreamingResponse(
+        ao_vivo.fluxo_sse(id_edicao),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.websocket("/edicoes/{id_edicao}/ao-vivo/ws")
+async def acompanhar_edicao_ao_vivo_ws(websocket: WebSocket, id_edicao: int):
+    await websocket.accept()
+    fila = ao_vivo.assinar(id_edicao)
+
+    async def repassar():
+        await websocket.send_json({"tipo": "conectado", "id_edicao": id_edicao})
+        while True:
+            await websocket.send_json(await fila.get())
+
+    # O envio roda em paralelo à leitura, para a fila ser liberada assim que o cliente desconectar
+    envio = asyncio.create_task(repassar())
+    try:
+        while (await websocket.receive())["type"] != "websocket.disconnect":
+            pass
+    finally:
+        envio.cancel()
+        ao_vivo.cancelar(id_edicao, fila)
+
+@router.get("/edicoes/{id_edicao}/classificacao", response_model=List[ClassificacaoPublica])
+def listar_classificacao_publica(id_edicao: int, request: Request, id_modalidade: Optional[int] = None, grupo: Optional[str] = None, db: Session = Depends(get_db)):
+    return _responder_em_cache(request, List[ClassificacaoPublica],
+                               lambda: servico_classificacao.listar_classificacao(db, id_edicao, id_modalidade=id_modalidade, grupo=grupo))
+
+@router.get("/edicoes/{id_edicao}/ranking/{criterio}", response_model=RankingPublico)
+def obter_ranking_publico(
+    id_edicao: int,
+    criterio: schemas.CriterioRankingEnum,
+    request: Request,
+    limite: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = None,
+    id_modalidade: Optional[int] = None,
+    db: Session = Depends(get_db)
+):
+    def gerar():
+        try:
+            return servico_estatisticas.ranking_edicao(db, id_edicao, criterio.value, limite=limite, cursor=cursor, id_modalidade=id_modalidade)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    return _responder_em_cache(request, RankingPublico, gerar)
+
+@router.get("/partidas/{id_partida}/estatisticas", response_model=List[EstatisticaPublica])
+def listar_estatisticas_publicas(id_partida: int, request: Request, db: Session = Depends(get_db)):
+    def gerar():
+        stats = db.query(models.EstatisticaPartida).filter(models.EstatisticaPartida.id_partida == id_partida).options(
+            *carregamento.ESTATISTICA_PUBLICA
+        ).all()
+        return _estatisticas_publicas(stats)
+    return _responder_em_cache(request, List[EstatisticaPublica], gerar)
 
 @router.get("/edicoes/{id_edicao}/estatisticas", response_model=List[EstatisticaPublica])
-def listar_estatisticas_edicao_publicas(id_edicao: int, db: Session = Depends(get_db)):
-    from sqlalchemy.orm import selectinload
-    stats = db.query(models.EstatisticaPartida)\
-              .join(models.Partida)\
-              .filter(models.Partida.id_edicao == id_edicao).options(
-                  selectinload(models.EstatisticaPartida.participante).selectinload(models.Participante.aluno),
-                  selectinload(models.EstatisticaPartida.participante).selectinload(models.Participante.atleta)
-              ).all()
-              
-    stats_publicas = []
-    for s in stats:
-        nome = "Jogador Desconhecido"
-        part = s.participante
-        if part:
-            if part.tipo == "aluno" and part.aluno:
-                nome = part.aluno.nome_completo
-            elif part.tipo == "atleta" and part.atleta:
-                nome = part.atleta.nome_completo
-                
-        stats_publicas.append(EstatisticaPublica(
-            id_estatistica=s.id_estatistica,
-            id_partida=s.id_partida,
-            id_participante=s.id_participante,
-            gols=s.gols,
-            cartoes_amarelos=s.cartoes_amarelos,
-            cartoes_vermelhos=s.cartoes_vermelhos,
-            assistencias=s.assistencias,
-            nome_jogador=nome
-        ))
-        
-    return stats_publicas
+def listar_estatisticas_edicao_publicas(id_edicao: int, request: Request, db: Session = Depends(get_db)):
+    def gerar():
+        stats = db.query(models.EstatisticaPartida)\
+                  .join(models.Partida)\
+                  .filter(models.Partida.id_edicao == id_edicao).options(*carregamento.ESTATISTICA_PUBLICA).all()
+        return _estatisticas_publicas(stats)
+    return _responder_em_cache(request, List[EstatisticaPublica], gerar)
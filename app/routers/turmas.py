@@ -1,6 +1,6 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from database import get_db
 import schemas
 import models
@@ -8,10 +8,14 @@ from services import turmas as servico_turmas
 from services import professores as servico_professores
 from services import modalidades as servico_modalidades
 from security import check_coordenador_role, get_current_active_user
+from metricas import RotaInstrumentada
+import escopo
+import paginacao
 
 router = APIRouter(
     prefix="/turmas",
     tags=["Turmas"],
+    route_class=RotaInstrumentada,
 )
 
 @router.post("/", summary="Criar uma nova turma", response_model=schemas.Turma, status_code=status.HTTP_201_CREATED)
@@ -33,17 +37,23 @@ def criar_turma(
 
 @router.get("/", summary="Listar todas as turmas", response_model=List[schemas.Turma], status_code=status.HTTP_200_OK)
 def listar_turmas(
+    response: Response,
     skip: int = 0, 
     limit: int = 100, 
+    cursor: Optional[str] = None,
+    incluir_total: bool = False,
     db: Session = Depends(get_db),
     current_user: models.Usuario = Depends(get_current_active_user)
 ):
-    if current_user.role == "professor":
-        if not current_user.professores:
-            return []
-        return servico_turmas.listar_turmas_professor(db=db, id_professor=current_user.professores.id_professor)
-    
-    return servico_turmas.listar_turmas(db=db, skip=skip, limit=limit)
+    try:
+        pagina = servico_turmas.listar_turmas(
+            db=db, skip=skip, limit=limit, cursor=cursor, incluir_total=incluir_total,
+            id_professor=escopo.professor_do_usuario(current_user)
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    paginacao.aplicar_cabecalhos(response, pagina)
+    return pagina
 
 @router.get("/{id_turma}", summary="Obter uma turma por ID", response_model=schemas.Turma, status_code=status.HTTP_200_OK)
 def listar_turma(
@@ -93,12 +103,9 @@ def listar_turmas_modalidade(
     if not modalidade:
         raise HTTPException(status_code=404, detail="Modalidade não encontrada")
     
-    turmas = servico_turmas.listar_turmas_modalidade(db=db, id_modalidade=id_modalidade)
-
-    if current_user.role == "professor" and current_user.professores:
-        turmas = [t for t in turmas if t.id_professor == current_user.professores.id_professor]
-
-    return turmas
+    return servico_turmas.listar_turmas_modalidade(
+        db=db, id_modalidade=id_modalidade, id_professor=escopo.professor_do_usuario(current_user)
+    )
 
 @router.put("/{id_turma}", summary="Atualizar uma turma existente", response_model=schemas.Turma, status_code=status.HTTP_200_OK)
 def atualizar_turma(
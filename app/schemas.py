@@ -18,6 +18,16 @@ class statusPresencaEnum(str, Enum):
     Ausente = "Ausente"
     Justificado = "Justificado" 
 
+class AgrupamentoPresencaEnum(str, Enum):
+    turma = "turma"
+    aluno = "aluno"
+    modalidade = "modalidade"
+    mes = "mes"
+
+class FormatoExportacaoEnum(str, Enum):
+    csv = "csv"
+    xlsx = "xlsx"
+
 class DiaSemanaEnum(str, Enum):
     SEG = "SEG"
     TER = "TER"
@@ -222,6 +232,21 @@ class ListaPresenca(BaseModel):
     id_turma: int
     presencas: List[PresencaItem]
 
+class SincronizacaoPresencas(BaseModel):
+    folhas: List[ListaPresenca] = Field(..., max_length=500)
+
+class ResultadoFolhaPresenca(BaseModel):
+    id_turma: int
+    data_aula: date
+    sucesso: bool
+    erro: Optional[str] = None
+    presencas: List[Presenca] = []
+
+class ResultadoSincronizacao(BaseModel):
+    folhas: List[ResultadoFolhaPresenca]
+    total_gravadas: int
+    total_com_erro: int
+
 class LocalBase(BaseModel):
     loca_nome: str = Field(..., max_length=200)
     loca_descricao: Optional[str] = None
@@ -402,6 +427,10 @@ class Partida(PartidaBase):
     id_partida: int
     id_proxima_partida: Optional[int] = None
     fase: Optional[str] = None
+    origem_casa_grupo: Optional[str] = None
+    origem_casa_posicao: Optional[int] = None
+    origem_visitante_grupo: Optional[str] = None
+    origem_visitante_posicao: Optional[int] = None
     sumula_arquivo: Optional[str] = None
     edicao: Optional[Edicao] = None
     local: Optional[Local] = None
@@ -426,6 +455,9 @@ class TokenData(BaseModel):
 class GerarConfrontosRequest(BaseModel):
     id_modalidade: int
     part_hora: Optional[time] = None
+    # Distribui locais, árbitros e horários sem conflitos (part_hora passa a ser o primeiro horário do dia)
+    distribuir_recursos: bool = False
+    hora_limite: Optional[time] = None
 
 class EstatisticaPartidaBase(BaseModel):
     id_participante: int
@@ -437,6 +469,22 @@ class EstatisticaPartidaBase(BaseModel):
 class EstatisticaPartidaCreate(EstatisticaPartidaBase):
     pass
 
+class SituacaoDisciplinar(BaseModel):
+    id_edicao: int
+    id_participante: int
+    cartoes_amarelos: int
+    cartoes_vermelhos: int
+    suspensoes: int
+    suspensoes_cumpridas: int
+    jogos_a_cumprir: int
+    suspenso: bool
+
+class CriterioRankingEnum(str, Enum):
+    gols = "gols"
+    assistencias = "assistencias"
+    cartoes_amarelos = "cartoes_amarelos"
+    cartoes_vermelhos = "cartoes_vermelhos"
+
 class EstatisticaPartidaResponse(EstatisticaPartidaBase):
     id_estatistica: int
     id_partida: int
@@ -444,3 +492,23 @@ class EstatisticaPartidaResponse(EstatisticaPartidaBase):
     class Config:
         from_attributes = True
 
+
+class TipoBuscaEnum(str, Enum):
+    aluno = "aluno"
+    atleta = "atleta"
+    professor = "professor"
+
+class ResultadoBusca(BaseModel):
+    tipo: TipoBuscaEnum
+    id: int
+    nome: str
+
+class ErroImportacao(BaseModel):
+    linha: int
+    erro: str
+
+class ResultadoImportacao(BaseModel):
+    total_linhas: int
+    importados: int
+    simulacao: bool
+    erros: List[ErroImportacao]
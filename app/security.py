@@ -1,12 +1,17 @@
 from datetime import datetime, timedelta, timezone
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional
+import asyncio
+import threading
 from jose import JWTError, jwt
 import bcrypt
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
+import anyio
 from database import get_db
 import models
+import cache
 import os
 from dotenv import load_dotenv
 
@@ -23,6 +28,11 @@ if not SECRET_KEY or SECRET_KEY == "chave_secreta_para_desenvolvimento_local":
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
+# Tempo (em segundos) que o usuário autenticado fica em cache; 0 desativa o cache. Sem cache
+# compartilhado (CACHE_URL) a invalidação só alcança o worker que a executou, então o padrão é curto:
+# uma troca de papel ou senha, ou uma exclusão, vale nos demais workers em poucos segundos
+PRINCIPAL_CACHE_TTL = int(os.getenv("PRINCIPAL_CACHE_TTL", "60" if isinstance(cache.backend, cache.CacheRedis) else "5"))
+
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -32,6 +42,43 @@ def get_password_hash(password: str) -> str:
     hashed = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt())
     return hashed.decode('utf-8')
 
+# Pool dedicado ao bcrypt: cada hash/verificação leva ~200 ms de CPU, então o pool limita quantas
+# rodam ao mesmo tempo e tira esse trabalho do event loop (e do threadpool padrão do FastAPI)
+BCRYPT_MAX_WORKERS = int(os.getenv("BCRYPT_MAX_WORKERS", str(min(4, os.cpu_count() or 1))))
+_pool_bcrypt = ThreadPoolExecutor(max_workers=BCRYPT_MAX_WORKERS, thread_name_prefix="bcrypt")
+_pool_bcrypt_lock = threading.Lock()
+_pool_bcrypt_pendentes = 0
+
+def _executar_contando(funcao, *args):
+    global _pool_bcrypt_pendentes
+    try:
+        return funcao(*args)
+    finally:
+        with _pool_bcrypt_lock:
+            _pool_bcrypt_pendentes -= 1
+
+def _submeter_bcrypt(funcao, *args):
+    global _pool_bcrypt_pendentes
+    with _pool_bcrypt_lock:
+        _pool_bcrypt_pendentes += 1
+    return _pool_bcrypt.submit(_executar_contando, funcao, *args)
+
+def executar_no_pool_bcrypt(funcao, *args):
+    # Chamado pelas rotas síncronas: bloqueia apenas a thread da requisição até o pool executar a tarefa
+    return _submeter_bcrypt(funcao, *args).result()
+
+async def aguardar_pool_bcrypt(funcao, *args):
+    # Chamado pelas rotas async: aguarda o pool sem ocupar o event loop nem uma thread do threadpool
+    return await asyncio.wrap_future(_submeter_bcrypt(funcao, *args))
+
+def metricas_pool_bcrypt() -> dict:
+    pendentes = _pool_bcrypt_pendentes
+    return {
+        "max_workers": BCRYPT_MAX_WORKERS,
+        "pendentes": pendentes,
+        "na_fila": max(0, pendentes - BCRYPT_MAX_WORKERS)
+    }
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
     if expires_delta:
@@ -43,6 +90,63 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
+class ProfessorVinculado:
+    __slots__ = ("id_professor",)
+
+    def __init__(self, id_professor: int):
+        self.id_professor = id_professor
+
+class Principal:
+    # Dados do usuário autenticado guardados no cache (sem sessão do banco associada)
+    __slots__ = ("id_usuario", "username", "role", "must_change_password", "id_professor")
+
+    def __init__(self, id_usuario: int, username: str, role: str, must_change_password: bool, id_professor: Optional[int] = None):
+        self.id_usuario = id_usuario
+        self.username = username
+        self.role = role
+        self.must_change_password = must_change_password
+        self.id_professor = id_professor
+
+    @property
+    def professores(self):
+        # Mesmo formato de models.Usuario.professores usado pelos routers
+        return ProfessorVinculado(self.id_professor) if self.id_professor is not None else None
+
+    @classmethod
+    def de_usuario(cls, user: models.Usuario):
+        return cls(
+            id_usuario=user.id_usuario,
+            username=user.username,
+            role=user.role,
+            must_change_password=bool(user.must_change_password),
+            id_professor=user.professores.id_professor if user.professores else None
+        )
+
+    def como_dict(self):
+        return {atributo: getattr(self, atributo) for atributo in self.__slots__}
+
+def _chave_principal(username: str) -> str:
+    return f"principal:{username}"
+
+def obter_principal(db: Session, username: str) -> Optional[Principal]:
+    if PRINCIPAL_CACHE_TTL > 0:
+        dados = cache.backend.obter(_chave_principal(username))
+        if dados is not None:
+            return Principal(**dados)
+
+    user = db.query(models.Usuario).filter(models.Usuario.username == username).first()
+    if user is None:
+        return None
+
+    principal = Principal.de_usuario(user)
+    if PRINCIPAL_CACHE_TTL > 0:
+        cache.backend.gravar(_chave_principal(username), principal.como_dict(), PRINCIPAL_CACHE_TTL)
+    return principal
+
+def invalidar_principal(username: str):
+    # Deve ser chamado sempre que papel, senha, vínculo de professor ou existência do usuário mudarem
+    cache.backend.remover(_chave_principal(username))
+
 async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -57,10 +161,11 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = De
     except JWTError:
         raise credentials_exception
     
-    user = db.query(models.Usuario).filter(models.Usuario.username == username).first()
-    if user is None:
+    # Cache (Redis) e banco são chamadas bloqueantes: rodam no threadpool, fora do event loop
+    principal = await anyio.to_thread.run_sync(obter_principal, db, username)
+    if principal is None:
         raise credentials_exception
-    return user
+    return principal
 
 import uuid
 
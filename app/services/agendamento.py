@@ -0,0 +1,220 @@
+from bisect import bisect_left
+from datetime import date, time, timedelta
+
+# Núcleo de agendamento sem acesso ao banco: recebe listas de ids de equipes e devolve
+# um plano (lista de PartidaPlanejada) que o serviço de edições grava de uma vez só.
+
+FASES_MATA_MATA = ["Final", "Semifinal", "Quartas", "Oitavas"]
+
+class PartidaPlanejada:
+    __slots__ = ("rodada", "id_equipe_casa", "id_equipe_visitante", "part_data", "fase", "proxima", "observacoes",
+                 "id_local", "id_arbitro", "part_hora", "origem_casa", "origem_visitante")
+
+    def __init__(self, rodada, id_equipe_casa, id_equipe_visitante, part_data, fase, proxima=None, observacoes=None):
+        self.rodada = rodada
+        self.id_equipe_casa = id_equipe_casa
+        self.id_equipe_visitante = id_equipe_visitante
+        self.part_data = part_data
+        self.fase = fase
+        # Posição (no próprio plano) da partida que recebe o vencedor
+        self.proxima = proxima
+        self.observacoes = observacoes
+        # Preenchidos por alocar_recursos; quando vazios, o serviço usa os padrões da edição
+        self.id_local = None
+        self.id_arbitro = None
+        self.part_hora = None
+        # Vagas a preencher pela classificação de um grupo: (grupo, posição)
+        self.origem_casa = None
+        self.origem_visitante = None
+
+    def __repr__(self):
+        return f"PartidaPlanejada({self.fase!r}, {self.id_equipe_casa!r} x {self.id_equipe_visitante!r}, {self.part_data})"
+
+def planejar_round_robin(ids_equipes: list, data_inicio: date, prefixo_fase: str = "Rodada"):
+    # Método do círculo: a primeira equipe fica fixa e as demais giram uma posição por rodada
+    lista = list(ids_equipes)
+    if len(lista) % 2 != 0:
+        lista.append(None)
+
+    n = len(lista)
+    plano = []
+    for r in range(n - 1):
+        # Uma rodada por semana
+        data_rodada = data_inicio + timedelta(weeks=r)
+        for j in range(n // 2):
+            casa = lista[j]
+            visitante = lista[n - 1 - j]
+            if casa is not None and visitante is not None:
+                plano.append(PartidaPlanejada(r + 1, casa, visitante, data_rodada, f"{prefixo_fase} {r + 1}"))
+
+        # Rotacionar a lista
+        lista = [lista[0]] + [lista[-1]] + lista[1:-1]
+    return plano
+
+def planejar_mata_mata(ids_equipes: list, fase_inicial: str, data_inicio: date):
+    if fase_inicial not in FASES_MATA_MATA:
+        raise ValueError(f"Fase inicial inválida: {fase_inicial}")
+
+    idx_limite = FASES_MATA_MATA.index(fase_inicial)
+    max_equipes = 2 ** (idx_limite + 1)
+    if len(ids_equipes) > max_equipes:
+        raise ValueError(f"Quantidade de equipes ({len(ids_equipes)}) excede o limite máximo permitido para a fase inicial {fase_inicial} ({max_equipes} equipes).")
+
+    # Chaveamento montado da Final para a fase inicial.
+    # A fase de índice idx ocupa as posições [2**idx - 1, 2**(idx + 1) - 1) do plano,
+    # e a partida j dessa fase alimenta a partida j // 2 da fase anterior.
+    plano = []
+    for idx, fase in enumerate(FASES_MATA_MATA[:idx_limite + 1]):
+        rodada = idx_limite - idx + 1
+        data_fase = data_inicio + timedelta(weeks=idx_limite - idx)
+        for j in range(2 ** idx):
+            proxima = 2 ** (idx - 1) - 1 + j // 2 if idx > 0 else None
+            plano.append(PartidaPlanejada(rodada, None, None, data_fase, fase, proxima))
+
+    # Distribuir as equipes na fase inicial (posições sem equipe ficam a definir)
+    inicio_fase_inicial = 2 ** idx_limite - 1
+    for i, id_equipe in enumerate(ids_equipes):
+        partida = plano[inicio_fase_inicial + i // 2]
+        if i % 2 == 0:
+            partida.id_equipe_casa = id_equipe
+        else:
+            partida.id_equipe_visitante = id_equipe
+    return plano
+
+def planejar_grupos(grupos: dict, data_inicio: date):
+    # 1. Turno único dentro de cada grupo
+    plano = []
+    for g_nome, ids_equipes in grupos.items():
+        if len(ids_equipes) < 2:
+            continue
+        plano.extend(planejar_round_robin(ids_equipes, data_inicio, prefixo_fase=f"Grupo {g_nome} - Rodada"))
+
+    # 2. Cruzamento de mata-mata (Semifinal e Final) após a rodada mais longa
+    max_weeks = max([len(ids) - 1 if len(ids) % 2 == 0 else len(ids) for ids in grupos.values()] + [2])
+    data_semis = data_inicio + timedelta(weeks=max_weeks)
+    data_final = data_semis + timedelta(weeks=1)
+
+    idx_final = len(plano)
+    plano.append(PartidaPlanejada(max_weeks + 2, None, None, data_final, "Final",
+                                  observacoes="Vencedor Semifinal 1 vs Vencedor Semifinal 2"))
+
+    # Vagas das semifinais: 1º x 2º cruzados entre os dois primeiros grupos,
+    # ou 1º x 4º e 2º x 3º quando há um único grupo
+    nomes = sorted(grupos)
+    if len(nomes) >= 2:
+        vagas = [((nomes[0], 1), (nomes[1], 2)), ((nomes[1], 1), (nomes[0], 2))]
+    else:
+        vagas = [((nomes[0], 1), (nomes[0], 4)), ((nomes[0], 2), (nomes[0], 3))]
+    for origem_casa, origem_visitante in vagas:
+        semifinal = PartidaPlanejada(max_weeks + 1, None, None, data_semis, "Semifinal", idx_final)
+        semifinal.origem_casa = origem_casa
+        semifinal.origem_visitante = origem_visitante
+        plano.append(semifinal)
+    return plano
+
+def validar_plano(plano: list):
+    # Nenhuma equipe joga duas vezes no mesmo dia e nenhum confronto se repete
+    jogos_no_dia = set()
+    confrontos = set()
+    for p in plano:
+        if p.id_equipe_casa is None or p.id_equipe_visitante is None:
+            continue
+        if p.id_equipe_casa == p.id_equipe_visitante:
+            raise ValueError(f"Equipe {p.id_equipe_casa} escalada contra ela mesma em {p.fase}.")
+
+        for id_equipe in (p.id_equipe_casa, p.id_equipe_visitante):
+            if (id_equipe, p.part_data) in jogos_no_dia:
+                raise ValueError(f"Equipe {id_equipe} escalada duas vezes em {p.part_data}.")
+            jogos_no_dia.add((id_equipe, p.part_data))
+
+        par = frozenset((p.id_equipe_casa, p.id_equipe_visitante))
+        if par in confrontos:
+            raise ValueError(f"Confronto repetido entre as equipes {p.id_equipe_casa} e {p.id_equipe_visitante}.")
+        confrontos.add(par)
+
+def _minutos(hora: time):
+    return hora.hour * 60 + hora.minute
+
+class AgendaRecursos:
+    # Índice de intervalos ocupados (em minutos do dia) por recurso e data.
+    # Cada chave guarda uma lista ordenada de intervalos disjuntos: intervalos que se tocam
+    # ou se sobrepõem são fundidos, então basta olhar os vizinhos para testar um horário.
+    __slots__ = ("_ocupacoes",)
+
+    def __init__(self):
+        self._ocupacoes = {}
+
+    def livre(self, chave, inicio: int, fim: int) -> bool:
+        intervalos = self._ocupacoes.get(chave)
+        if not intervalos:
+            return True
+        pos = bisect_left(intervalos, (inicio, inicio))
+        if pos > 0 and intervalos[pos - 1][1] > inicio:
+            return False
+        if pos < len(intervalos) and intervalos[pos][0] < fim:
+            return False
+        return True
+
+    def reservar(self, chave, inicio: int, fim: int):
+        intervalos = self._ocupacoes.setdefault(chave, [])
+        pos = bisect_left(intervalos, (inicio, inicio))
+        if pos > 0 and intervalos[pos - 1][1] >= inicio:
+            pos -= 1
+        # Fundir com todos os intervalos alcançados pelo novo
+        fim_pos = pos
+        while fim_pos < len(intervalos) and intervalos[fim_pos][0] <= fim:
+            inicio = min(inicio, intervalos[fim_pos][0])
+            fim = max(fim, intervalos[fim_pos][1])
+            fim_pos += 1
+        intervalos[pos:fim_pos] = [(inicio, fim)]
+
+    def reservar_partida(self, part_data: date, part_hora: time, duracao_minutos: int, id_local=None, id_arbitro=None, id_equipe_casa=None, id_equipe_visitante=None):
+        inicio = _minutos(part_hora)
+        fim = inicio + duracao_minutos
+        for chave in (("local", id_local), ("arbitro", id_arbitro), ("equipe", id_equipe_casa), ("equipe", id_equipe_visitante)):
+            if chave[1] is not None:
+                self.reservar((chave[0], chave[1], part_data), inicio, fim)
+
+def alocar_recursos(plano: list, ids_locais: list, ids_arbitros: list, duracao_minutos: int,
+                    agenda: AgendaRecursos = None, hora_inicio: time = time(8, 0), hora_limite: time = time(22, 0)):
+    # Distribui local, árbitro e horário de cada partida do plano sem conflitos.
+    # Os horários candidatos formam uma grade de duracao_minutos a partir de hora_inicio;
+    # cada partida ocupa o primeiro horário em que suas equipes, um local e um árbitro estão livres.
+    if not ids_locais or not ids_arbitros:
+        raise ValueError("É necessário ter locais ativos e árbitros cadastrados para distribuir as partidas.")
+    agenda = agenda or AgendaRecursos()
+
+    duracao = duracao_minutos or 60
+    horarios = list(range(_minutos(hora_inicio), _minutos(hora_limite) - duracao + 1, duracao))
+    if not horarios:
+        raise ValueError("O intervalo de horários informado não comporta a duração de uma partida.")
+
+    # Horários (por data) em que todos os locais ou todos os árbitros já estão ocupados
+    lotados = set()
+
+    for p in sorted(plano, key=lambda x: x.part_data):
+        equipes = [id_eq for id_eq in (p.id_equipe_casa, p.id_equipe_visitante) if id_eq is not None]
+        alocada = False
+        for inicio in horarios:
+            if (p.part_data, inicio) in lotados:
+                continue
+            fim = inicio + duracao
+            if not all(agenda.livre(("equipe", id_eq, p.part_data), inicio, fim) for id_eq in equipes):
+                continue
+
+            id_local = next((l for l in ids_locais if agenda.livre(("local", l, p.part_data), inicio, fim)), None)
+            id_arbitro = next((a for a in ids_arbitros if agenda.livre(("arbitro", a, p.part_data), inicio, fim)), None)
+            if id_local is None or id_arbitro is None:
+                lotados.add((p.part_data, inicio))
+                continue
+
+            p.id_local = id_local
+            p.id_arbitro = id_arbitro
+            p.part_hora = time(inicio // 60, inicio % 60)
+            agenda.reservar_partida(p.part_data, p.part_hora, duracao, id_local, id_arbitro, *equipes)
+            alocada = True
+            break
+
+        if not alocada:
+            raise ValueError(f"Não há locais, árbitros ou horários livres suficientes para agendar todas as partidas de {p.part_data.strftime('%d/%m/%Y')}.")
+    return plano
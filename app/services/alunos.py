@@ -1,8 +1,14 @@
 from sqlalchemy.orm import Session
+import cache
+import carregamento
+import escopo
 import models
+import paginacao
 import schemas
+from utils import normalizar_texto
 from services import turmas as servico_turmas
 from services import matriculas as servico_matriculas
+from services import presencas as servico_presencas
 
 def criar_participante(db: Session, tipo: str):
     db_participante = models.Participante(tipo=tipo)
@@ -11,9 +17,9 @@ def criar_participante(db: Session, tipo: str):
     return db_participante
 
 def cadastrar_aluno(db: Session, aluno: schemas.AlunoCreate, foto: str = None, documento: str = None, atestado: str = None):
-    # Verificar se já existe aluno com mesmo nome e data de nascimento
+    # Verificar se já existe aluno com mesmo nome e data de nascimento (ignorando acentos, maiúsculas e espaços)
     aluno_existente = db.query(models.Aluno).filter(
-        models.Aluno.nome_completo == aluno.nome_completo,
+        models.Aluno.nome_normalizado == normalizar_texto(aluno.nome_completo),
         models.Aluno.data_nascimento == aluno.data_nascimento
     ).first()
     
@@ -79,8 +85,15 @@ def cadastrar_aluno(db: Session, aluno: schemas.AlunoCreate, foto: str = None, d
 def listar_aluno(db: Session, id_aluno: int):
     return db.query(models.Aluno).filter(models.Aluno.id_aluno == id_aluno).first()
 
-def listar_alunos(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(models.Aluno).offset(skip).limit(limit).all()
+def listar_alunos(db: Session, skip: int = 0, limit: int = 100, cursor: str = None, incluir_total: bool = False, id_professor: int = None):
+    query = db.query(models.Aluno).options(*carregamento.ALUNO_COMPLETO)
+    if id_professor is not None:
+        query = escopo.alunos_do_professor(query, id_professor, apenas_ativas=True)
+    return paginacao.paginar(query, models.Aluno.id_aluno, skip, limit, cursor, incluir_total)
+
+def aluno_do_professor(db: Session, id_aluno: int, id_professor: int) -> bool:
+    query = db.query(models.Aluno.id_aluno).filter(models.Aluno.id_aluno == id_aluno)
+    return escopo.alunos_do_professor(query, id_professor).first() is not None
 
 def listar_alunos_por_turma(db: Session, id_turma: int):
     return db.query(models.Aluno).join(models.Matricula).filter(
@@ -88,14 +101,21 @@ def listar_alunos_por_turma(db: Session, id_turma: int):
         models.Matricula.ativo == True
     ).all()
 
-def listar_alunos_nome(db: Session, nome: str):
-    return db.query(models.Aluno).filter(models.Aluno.nome_completo.ilike(f"%{nome}%")).all()
+def _buscar_alunos(db: Session, filtro, skip: int, limit: int, cursor: str, id_professor: int):
+    query = db.query(models.Aluno).filter(filtro).options(*carregamento.ALUNO_COMPLETO)
+    if id_professor is not None:
+        query = escopo.alunos_do_professor(query, id_professor)
+    return paginacao.paginar(query, models.Aluno.id_aluno, skip, limit, cursor)
+
+def listar_alunos_nome(db: Session, nome: str, skip: int = 0, limit: int = 100, cursor: str = None, id_professor: int = None):
+    # Trecho do nome sem diferenciar acentos e maiúsculas; a busca por prefixo indexada é a de /busca
+    return _buscar_alunos(db, models.Aluno.nome_normalizado.contains(normalizar_texto(nome)), skip, limit, cursor, id_professor)
 
-def listar_alunos_escola(db: Session, escola: str):
-    return db.query(models.Aluno).filter(models.Aluno.escola.ilike(f"%{escola}%")).all()
+def listar_alunos_escola(db: Session, escola: str, skip: int = 0, limit: int = 100, cursor: str = None, id_professor: int = None):
+    return _buscar_alunos(db, models.Aluno.escola.ilike(f"%{escola}%"), skip, limit, cursor, id_professor)
 
-def listar_alunos_serie(db: Session, serie_ano: str):
-    return db.query(models.Aluno).filter(models.Aluno.serie_ano.ilike(f"%{serie_ano}%")).all()
+def listar_alunos_serie(db: Session, serie_ano: str, skip: int = 0, limit: int = 100, cursor: str = None, id_professor: int = None):
+    return _buscar_alunos(db, models.Aluno.serie_ano.ilike(f"%{serie_ano}%"), skip, limit, cursor, id_professor)
 
 def atualizar_aluno(
     db: Session, 
@@ -123,6 +143,7 @@ def atualizar_aluno(
         db_aluno.atestado_medico = atestado
 
     db.commit()
+    cache.invalidar_publico()
     db.refresh(db_aluno)
     return db_aluno
 
@@ -137,6 +158,7 @@ def excluir_aluno(db: Session, id_aluno: int):
         # 2. Deletar Presenças do aluno (via matrículas)
         if ids_matriculas:
             db.query(models.Presenca).filter(models.Presenca.id_matricula.in_(ids_matriculas)).delete(synchronize_session=False)
+            servico_presencas.remover_resumo_mensal(db, ids_matriculas)
             
             # 3. Deletar Matrículas
             db.query(models.Matricula).filter(models.Matricula.id_aluno == id_aluno).delete(synchronize_session=False)
@@ -159,5 +181,6 @@ def excluir_aluno(db: Session, id_aluno: int):
             db.delete(db_participante)
 
         db.commit()
+        cache.invalidar_publico()
         return True
     return False
\ No newline at end of file
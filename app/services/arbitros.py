@@ -1,5 +1,7 @@
 from sqlalchemy.orm import Session
+import cache
 import models
+import paginacao
 import schemas
 
 def criar_arbitro(db: Session, arbitro: schemas.ArbitroCreate):
@@ -13,8 +15,8 @@ def criar_arbitro(db: Session, arbitro: schemas.ArbitroCreate):
     db.refresh(db_arbitro)
     return db_arbitro
 
-def listar_arbitros(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(models.Arbitro).offset(skip).limit(limit).all()
+def listar_arbitros(db: Session, skip: int = 0, limit: int = 100, cursor: str = None, incluir_total: bool = False):
+    return paginacao.paginar(db.query(models.Arbitro), models.Arbitro.id_arbitro, skip, limit, cursor, incluir_total)
 
 def listar_arbitro_id(db: Session, id_arbitro: int):
     return db.query(models.Arbitro).filter(models.Arbitro.id_arbitro == id_arbitro).first()
@@ -29,6 +31,7 @@ def atualizar_arbitro(db: Session, id_arbitro: int, arbitro_atualizado: schemas.
         setattr(db_arbitro, chave, valor)
     
     db.commit()
+    cache.invalidar_publico()
     db.refresh(db_arbitro)
     return db_arbitro
 
@@ -38,5 +41,6 @@ def excluir_arbitro(db: Session, id_arbitro: int):
     if db_arbitro:
         db.delete(db_arbitro)
         db.commit()
+        cache.invalidar_publico()
         return True
     return False
@@ -1,5 +1,7 @@
 from sqlalchemy.orm import Session
+import cache
 import models
+import paginacao
 import schemas
 from services import equipes as service_equipes
 
@@ -40,8 +42,8 @@ def criar_atleta_equipe(db: Session, atleta: schemas.AtletaCreate, id_equipe: in
     
     return db_atleta
 
-def listar_atletas(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(models.Atleta).offset(skip).limit(limit).all()
+def listar_atletas(db: Session, skip: int = 0, limit: int = 100, cursor: str = None, incluir_total: bool = False):
+    return paginacao.paginar(db.query(models.Atleta), models.Atleta.id_atleta, skip, limit, cursor, incluir_total)
 
 def listar_atleta(db: Session, id_atleta: int):
     return db.query(models.Atleta).filter(models.Atleta.id_atleta == id_atleta).first()
@@ -55,6 +57,7 @@ def atualizar_atleta(db: Session, id_atleta: int, atleta_atualizado: schemas.Atl
         setattr(db_atleta, chave, valor)
     
     db.commit()
+    cache.invalidar_publico()
     db.refresh(db_atleta)
     return db_atleta
 
@@ -80,5 +83,6 @@ def excluir_atleta(db: Session, id_atleta: int):
             db.delete(db_participante)
             
         db.commit()
+        cache.invalidar_publico()
         return True
     return False
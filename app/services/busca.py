@@ -0,0 +1,146 @@
+from sqlalchemy import delete, event, exists, func, inspect, insert, or_, select
+from sqlalchemy.orm import Session, aliased
+import models
+from utils import normalizar_texto
+
+# Busca de pessoas por nome (alunos, atletas e professores) sobre o índice invertido
+# models.TermoBusca: cada palavra digitada casa com as palavras do nome que começam com ela,
+# sem acento e sem diferenciar maiúsculas. Cada palavra é um intervalo do índice
+# (termo >= "jo" AND termo < "jp"), e não um ILIKE '%jo%' que lê a tabela inteira.
+
+# tipo -> (modelo, chave, coluna do nome)
+ENTIDADES = {
+    "aluno": (models.Aluno, models.Aluno.id_aluno, models.Aluno.nome_completo),
+    "atleta": (models.Atleta, models.Atleta.id_atleta, models.Atleta.nome_completo),
+    "professor": (models.Professor, models.Professor.id_professor, models.Professor.nome),
+}
+_TIPO_POR_MODELO = {modelo: (tipo, chave.key, coluna.key) for tipo, (modelo, chave, coluna) in ENTIDADES.items()}
+
+TAMANHO_TERMO = models.TermoBusca.termo.type.length
+LOTE_REINDEXACAO = 5000
+
+def termos(nome: str) -> set:
+    return {palavra[:TAMANHO_TERMO] for palavra in normalizar_texto(nome).split()}
+
+def _linhas(tipo: str, id_entidade: int, nome: str) -> list:
+    return [{"termo": termo, "tipo": tipo, "id_entidade": id_entidade} for termo in termos(nome)]
+
+def _sucessor(prefixo: str) -> str:
+    # Menor texto maior que todos os que começam com o prefixo (os termos só têm [a-z0-9])
+    return prefixo[:-1] + chr(ord(prefixo[-1]) + 1)
+
+# --- Manutenção do índice ---
+
+@event.listens_for(Session, "after_flush")
+def _atualizar_indice(session, contexto):
+    # Depois do flush as chaves das entidades novas já existem; o índice é gravado na mesma transação
+    remover = {}
+    inserir = []
+    for obj in session.new:
+        dados = _TIPO_POR_MODELO.get(type(obj))
+        if dados:
+            tipo, chave, coluna = dados
+            inserir += _linhas(tipo, getattr(obj, chave), getattr(obj, coluna))
+    for obj in session.dirty:
+        dados = _TIPO_POR_MODELO.get(type(obj))
+        if dados and inspect(obj).attrs[dados[2]].history.has_changes():
+            tipo, chave, coluna = dados
+            remover.setdefault(tipo, []).append(getattr(obj, chave))
+            inserir += _linhas(tipo, getattr(obj, chave), getattr(obj, coluna))
+    for obj in session.deleted:
+        dados = _TIPO_POR_MODELO.get(type(obj))
+        if dados:
+            remover.setdefault(dados[0], []).append(getattr(obj, dados[1]))
+
+    if not remover and not inserir:
+        return
+    conexao = session.connection()
+    tabela = models.TermoBusca.__table__
+    for tipo, ids in remover.items():
+        conexao.execute(delete(tabela).where(tabela.c.tipo == tipo, tabela.c.id_entidade.in_(ids)))
+    if inserir:
+        conexao.execute(insert(tabela), inserir)
+
+def indexar_em_lote(db: Session, tipo: str, pares) -> int:
+    # Para cargas com INSERT em lote, que não passam pelo flush do ORM: pares (id, nome)
+    linhas = [linha for id_entidade, nome in pares for linha in _linhas(tipo, id_entidade, nome)]
+    if linhas:
+        db.execute(insert(models.TermoBusca.__table__), linhas)
+    return len(linhas)
+
+def reconstruir_indice(db: Session) -> int:
+    # Recria o índice a partir das tabelas (dados anteriores à busca ou cargas feitas direto no banco)
+    tabela = models.TermoBusca.__table__
+    db.execute(delete(tabela))
+    total = 0
+    for tipo, (modelo, chave, coluna) in ENTIDADES.items():
+        lote = []
+        for id_entidade, nome in db.execute(select(chave, coluna).execution_options(yield_per=LOTE_REINDEXACAO)):
+            lote += _linhas(tipo, id_entidade, nome)
+            if len(lote) >= LOTE_REINDEXACAO:
+                db.execute(insert(tabela), lote)
+                total += len(lote)
+                lote = []
+        if lote:
+            db.execute(insert(tabela), lote)
+            total += len(lote)
+    db.commit()
+    return total
+
+# --- Busca ---
+
+def buscar(db: Session, texto: str, limite: int = 20, tipos: list = None, id_professor: int = None) -> list:
+    # Cortadas no mesmo tamanho dos termos do índice, senão uma palavra longa nunca casa
+    palavras = [palavra[:TAMANHO_TERMO] for palavra in normalizar_texto(texto).split()]
+    if not palavras:
+        return []
+
+    # A palavra mais longa (em geral a mais seletiva) percorre o índice em ordem; as demais só
+    # confirmam cada candidato pelo índice por entidade. Com o LIMIT a varredura para cedo, e a
+    # ordem do índice já é o ranking: a palavra exata vem antes das que só começam com ela
+    guia = max(palavras, key=len)
+    palavras.remove(guia)
+
+    termo = models.TermoBusca
+    query = db.query(termo.tipo, termo.id_entidade).filter(termo.termo >= guia, termo.termo < _sucessor(guia))
+    for palavra in palavras:
+        outro = aliased(models.TermoBusca)
+        query = query.filter(
+            exists().where(
+                outro.tipo == termo.tipo,
+                outro.id_entidade == termo.id_entidade,
+                outro.termo >= palavra,
+                outro.termo < _sucessor(palavra),
+            )
+        )
+
+    if id_professor is not None:
+        # Mesmo escopo das rotas de alunos: o professor só vê os alunos das suas turmas
+        query = query.filter(or_(
+            termo.tipo != "aluno",
+            exists().where(
+                models.Matricula.id_aluno == termo.id_entidade,
+                models.Turma.id_turma == models.Matricula.id_turma,
+                models.Turma.id_professor == id_professor,
+            ),
+        ))
+    if tipos is not None:
+        query = query.filter(termo.tipo.in_(list(tipos)))
+
+    # Uma entidade aparece uma vez por palavra do nome que casa com a guia: agrupa no SQL e
+    # ordena pela melhor posição de cada uma, para o LIMIT contar entidades e não termos
+    encontrados = [
+        (tipo, id_entidade) for tipo, id_entidade in query.group_by(termo.tipo, termo.id_entidade)
+        .order_by(func.min(termo.termo), termo.tipo, termo.id_entidade).limit(limite)
+    ]
+
+    nomes = {}
+    for tipo in {tipo for tipo, _ in encontrados}:
+        modelo, chave, coluna = ENTIDADES[tipo]
+        ids = [id_entidade for t, id_entidade in encontrados if t == tipo]
+        nomes.update(((tipo, id_entidade), nome) for id_entidade, nome in db.query(chave, coluna).filter(chave.in_(ids)))
+
+    return [
+        {"tipo": tipo, "id": id_entidade, "nome": nomes[(tipo, id_entidade)]}
+        for tipo, id_entidade in encontrados if (tipo, id_entidade) in nomes
+    ]
@@ -0,0 +1,290 @@
+from itertools import groupby
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+import models
+from services.agendamento import FASES_MATA_MATA
+
+PONTOS_VITORIA = 3
+PONTOS_EMPATE = 1
+
+def resultado_partida(partida):
+    # Campos que definem a contribuição da partida para a classificação, ou None quando ela não conta:
+    # só partidas finalizadas, com as duas equipes definidas e fora do chaveamento de mata-mata
+    if partida.status != "Finalizada" or partida.id_equipe_casa is None or partida.id_equipe_visitante is None:
+        return None
+    if partida.fase in FASES_MATA_MATA or partida.id_proxima_partida is not None:
+        return None
+    return (partida.id_edicao, partida.id_modalidade, partida.id_equipe_casa, partida.id_equipe_visitante,
+            partida.placar_casa or 0, partida.placar_visitante or 0)
+
+def _somar(linha: models.Classificacao, gols_pro: int, gols_contra: int, sinal: int):
+    linha.jogos += sinal
+    linha.gols_pro += sinal * gols_pro
+    linha.gols_contra += sinal * gols_contra
+    linha.saldo = linha.gols_pro - linha.gols_contra
+    if gols_pro > gols_contra:
+        linha.vitorias += sinal
+        linha.pontos += sinal * PONTOS_VITORIA
+    elif gols_pro == gols_contra:
+        linha.empates += sinal
+        linha.pontos += sinal * PONTOS_EMPATE
+    else:
+        linha.derrotas += sinal
+
+def _nova_linha(id_edicao: int, id_modalidade: int, grupo: str, id_equipe: int):
+    return models.Classificacao(
+        id_edicao=id_edicao, id_modalidade=id_modalidade, grupo=grupo, id_equipe=id_equipe,
+        jogos=0, vitorias=0, empates=0, derrotas=0, gols_pro=0, gols_contra=0, saldo=0, pontos=0
+    )
+
+def _aplicar(db: Session, resultado: tuple, sinal: int):
+    id_edicao, id_modalidade, id_casa, id_visitante, gols_casa, gols_visitante = resultado
+
+    # 1. Grupo de cada equipe e tipo da edição em uma única consulta
+    equipes = {
+        id_equipe: (grupo, tipo)
+        for id_equipe, grupo, tipo in db.query(
+            models.Equipe.id_equipe, models.Equipe.grupo, models.Edicao.tipo_competicao
+        ).join(models.Edicao, models.Equipe.id_edicao == models.Edicao.id_edicao).filter(
+            models.Equipe.id_equipe.in_([id_casa, id_visitante])
+        ).all()
+    }
+
+    # 2. Somar (ou subtrair) o resultado na linha de cada equipe
+    for id_equipe, gols_pro, gols_contra in ((id_casa, gols_casa, gols_visitante), (id_visitante, gols_visitante, gols_casa)):
+        if id_equipe not in equipes or equipes[id_equipe][1] == "Mata-Mata":
+            continue
+        grupo = equipes[id_equipe][0] or ""
+        linha = db.get(models.Classificacao, (id_edicao, id_modalidade, grupo, id_equipe))
+        if linha is None:
+            if sinal < 0:
+                # Nada a desfazer: a tabela não tinha este resultado (recalcular_classificacao corrige)
+                continue
+            linha = _nova_linha(id_edicao, id_modalidade, grupo, id_equipe)
+            db.add(linha)
+        _somar(linha, gols_pro, gols_contra, sinal)
+        if linha.jogos <= 0:
+            db.delete(linha)
+    db.flush()
+
+def atualizar_por_partida(db: Session, resultado_anterior, resultado_atual):
+    # Chamado pelo serviço de partidas, dentro da mesma transação, com os resultados de antes e depois da alteração
+    if resultado_anterior == resultado_atual:
+        return
+    if resultado_anterior:
+        _aplicar(db, resultado_anterior, -1)
+    if resultado_atual:
+        _aplicar(db, resultado_atual, 1)
+
+def recalcular_classificacao(db: Session, id_edicao: int):
+    # Reconstrói a tabela da edição a partir das partidas (equipe mudou de grupo, carga inicial, correções)
+    db.query(models.Classificacao).filter(models.Classificacao.id_edicao == id_edicao).delete(synchronize_session=False)
+
+    edicao = db.query(models.Edicao).filter(models.Edicao.id_edicao == id_edicao).first()
+    if not edicao or edicao.tipo_competicao == "Mata-Mata":
+        db.flush()
+        return 0
+
+    grupos = dict(db.query(models.Equipe.id_equipe, models.Equipe.grupo).filter(models.Equipe.id_edicao == id_edicao).all())
+    partidas = db.query(models.Partida).filter(
+        models.Partida.id_edicao == id_edicao,
+        models.Partida.status == "Finalizada"
+    ).all()
+
+    linhas = {}
+    for partida in partidas:
+        resultado = resultado_partida(partida)
+        if not resultado:
+            continue
+        _, id_modalidade, id_casa, id_visitante, gols_casa, gols_visitante = resultado
+        for id_equipe, gols_pro, gols_contra in ((id_casa, gols_casa, gols_visitante), (id_visitante, gols_visitante, gols_casa)):
+            if id_equipe not in grupos:
+                continue
+            chave = (id_modalidade, grupos[id_equipe] or "", id_equipe)
+            if chave not in linhas:
+                linhas[chave] = _nova_linha(id_edicao, *chave)
+            _somar(linhas[chave], gols_pro, gols_contra, 1)
+
+    db.add_all(linhas.values())
+    db.flush()
+    return len(linhas)
+
+def remover_classificacao(db: Session, id_edicao: int = None, id_equipe: int = None):
+    query = db.query(models.Classificacao)
+    if id_edicao is not None:
+        query = query.filter(models.Classificacao.id_edicao == id_edicao)
+    if id_equipe is not None:
+        query = query.filter(models.Classificacao.id_equipe == id_equipe)
+    query.delete(synchronize_session=False)
+
+def listar_classificacao(db: Session, id_edicao: int, id_modalidade: int = None, grupo: str = None):
+    # Uma única consulta pelo índice (edição, modalidade, grupo, critérios de desempate)
+    query = db.query(models.Classificacao, models.Equipe.nome).join(
+        models.Equipe, models.Classificacao.id_equipe == models.Equipe.id_equipe
+    ).filter(models.Classificacao.id_edicao == id_edicao)
+    if id_modalidade is not None:
+        query = query.filter(models.Classificacao.id_modalidade == id_modalidade)
+    if grupo is not None:
+        query = query.filter(models.Classificacao.grupo == grupo)
+
+    # Mesmos critérios da promoção ao mata-mata (ordenar_grupo): pontos e saldo pelo índice; só as
+    # equipes que continuam empatadas vão para o confronto direto
+    query = query.order_by(
+        models.Classificacao.id_modalidade,
+        models.Classificacao.grupo,
+        models.Classificacao.pontos.desc(),
+        models.Classificacao.saldo.desc(),
+        models.Classificacao.gols_pro.desc(),
+        models.Classificacao.id_equipe
+    )
+    empate = lambda item: (item[0].id_modalidade, item[0].grupo, item[0].pontos, item[0].saldo)
+    blocos = [list(bloco) for _, bloco in groupby(query.all(), key=empate)]
+    empatadas = {linha.id_equipe for bloco in blocos if len(bloco) > 1 for linha, _ in bloco}
+    jogos = _jogos_entre(db, id_edicao, empatadas) if empatadas else {}
+
+    linhas = []
+    for bloco in blocos:
+        if len(bloco) > 1:
+            por_equipe = {linha.id_equipe: (linha, nome) for linha, nome in bloco}
+            gols_pro = {id_equipe: linha.gols_pro for id_equipe, (linha, _) in por_equipe.items()}
+            bloco = [por_equipe[e] for e in _desempatar(list(por_equipe), jogos.get(bloco[0][0].id_modalidade, []), gols_pro)]
+        linhas.extend(bloco)
+
+    # Posição contada dentro de cada tabela (modalidade + grupo)
+    tabela = []
+    posicao = 0
+    tabela_atual = None
+    for linha, nome in linhas:
+        if (linha.id_modalidade, linha.grupo) != tabela_atual:
+            tabela_atual = (linha.id_modalidade, linha.grupo)
+            posicao = 0
+        posicao += 1
+        tabela.append({
+            "posicao": posicao,
+            "id_modalidade": linha.id_modalidade,
+            "grupo": linha.grupo or None,
+            "id_equipe": linha.id_equipe,
+            "nome": nome,
+            "jogos": linha.jogos,
+            "vitorias": linha.vitorias,
+            "empates": linha.empates,
+            "derrotas": linha.derrotas,
+            "gols_pro": linha.gols_pro,
+            "gols_contra": linha.gols_contra,
+            "saldo": linha.saldo,
+            "pontos": linha.pontos,
+        })
+    return tabela
+
+def _pontuar(equipes, partidas):
+    # [pontos, saldo, gols pró] de cada equipe, contando só os jogos entre as equipes informadas
+    linhas = {id_equipe: [0, 0, 0] for id_equipe in equipes}
+    for casa, visitante, gols_casa, gols_visitante in partidas:
+        if casa not in linhas or visitante not in linhas:
+            continue
+        for id_equipe, pro, contra in ((casa, gols_casa, gols_visitante), (visitante, gols_visitante, gols_casa)):
+            linha = linhas[id_equipe]
+            linha[0] += PONTOS_VITORIA if pro > contra else PONTOS_EMPATE if pro == contra else 0
+            linha[1] += pro - contra
+            linha[2] += pro
+    return linhas
+
+def _desempatar(empatadas: list, jogos: list, gols_pro: dict):
+    # Equipes empatadas em pontos e saldo: confronto direto (pontos e saldo só nos jogos entre elas),
+    # seguido de gols pró e, por fim, do id da equipe
+    direto = _pontuar(empatadas, jogos)
+    return sorted(empatadas, key=lambda e: (-direto[e][0], -direto[e][1], -gols_pro[e], e))
+
+def _jogos_entre(db: Session, id_edicao: int, ids_equipes: set):
+    # Jogos finalizados de fase de grupos/pontos corridos entre as equipes, por modalidade
+    jogos = {}
+    for j in db.query(
+        models.Partida.id_modalidade, models.Partida.id_equipe_casa, models.Partida.id_equipe_visitante,
+        models.Partida.placar_casa, models.Partida.placar_visitante, models.Partida.fase, models.Partida.id_proxima_partida
+    ).filter(
+        models.Partida.id_edicao == id_edicao,
+        models.Partida.status == "Finalizada",
+        models.Partida.id_equipe_casa.in_(list(ids_equipes)),
+        models.Partida.id_equipe_visitante.in_(list(ids_equipes))
+    ):
+        if j.fase in FASES_MATA_MATA or j.id_proxima_partida is not None:
+            continue
+        jogos.setdefault(j.id_modalidade, []).append((j.id_equipe_casa, j.id_equipe_visitante, j.placar_casa or 0, j.placar_visitante or 0))
+    return jogos
+
+def ordenar_grupo(ids_equipes: list, jogos: list):
+    # Ordena as equipes de um grupo a partir dos jogos finalizados [(casa, visitante, gols_casa, gols_visitante)].
+    # Critérios (os mesmos de listar_classificacao): pontos, saldo de gols e, entre as equipes ainda
+    # empatadas, o confronto direto, seguido de gols pró.
+    geral = _pontuar(ids_equipes, jogos)
+    criterio_geral = lambda e: (-geral[e][0], -geral[e][1])
+    gols_pro = {e: geral[e][2] for e in geral}
+
+    ordem = []
+    for _, empatadas in groupby(sorted(ids_equipes, key=criterio_geral), key=criterio_geral):
+        ordem.extend(_desempatar(list(empatadas), jogos, gols_pro))
+    return ordem
+
+def preencher_vagas_grupo(db: Session, partida, reaberta: bool = False):
+    # Chamado quando uma partida de grupo muda de resultado ou de status. Só calcula a classificação
+    # do grupo quando todos os seus jogos estão encerrados; aí preenche as vagas de mata-mata ligadas a ele.
+    # Devolve as partidas cujas equipes mudaram.
+    if partida.fase in FASES_MATA_MATA or partida.id_equipe_casa is None or partida.id_equipe_visitante is None:
+        return []
+
+    # 1. Grupo da partida: as duas equipes precisam ser do mesmo grupo
+    grupos = dict(db.query(models.Equipe.id_equipe, models.Equipe.grupo).filter(
+        models.Equipe.id_equipe.in_([partida.id_equipe_casa, partida.id_equipe_visitante])
+    ).all())
+    grupo = grupos.get(partida.id_equipe_casa)
+    if not grupo or grupos.get(partida.id_equipe_visitante) != grupo:
+        return []
+
+    # 2. Vagas que dependem deste grupo
+    vagas = db.query(models.Partida).filter(
+        models.Partida.id_edicao == partida.id_edicao,
+        models.Partida.id_modalidade == partida.id_modalidade,
+        or_(models.Partida.origem_casa_grupo == grupo, models.Partida.origem_visitante_grupo == grupo)
+    ).all()
+    if not vagas:
+        return []
+
+    # 3. Jogos do grupo
+    ids_grupo = [id_equipe for (id_equipe,) in db.query(models.Equipe.id_equipe).filter(
+        models.Equipe.id_edicao == partida.id_edicao,
+        models.Equipe.grupo == grupo
+    ).all()]
+    jogos = [j for j in db.query(
+        models.Partida.status, models.Partida.id_equipe_casa, models.Partida.id_equipe_visitante,
+        models.Partida.placar_casa, models.Partida.placar_visitante, models.Partida.fase, models.Partida.id_proxima_partida
+    ).filter(
+        models.Partida.id_edicao == partida.id_edicao,
+        models.Partida.id_modalidade == partida.id_modalidade,
+        models.Partida.id_equipe_casa.in_(ids_grupo),
+        models.Partida.id_equipe_visitante.in_(ids_grupo)
+    ).all() if j.fase not in FASES_MATA_MATA and j.id_proxima_partida is None]
+
+    completo = all(j.status in ("Finalizada", "Cancelada") for j in jogos)
+    if not completo and not reaberta:
+        return []
+    ordem = ordenar_grupo(ids_grupo, [
+        (j.id_equipe_casa, j.id_equipe_visitante, j.placar_casa or 0, j.placar_visitante or 0)
+        for j in jogos if j.status == "Finalizada"
+    ]) if completo else []
+
+    # 4. Preencher (ou, se o grupo foi reaberto, esvaziar) as vagas
+    alteradas = []
+    for vaga in vagas:
+        for lado in ("casa", "visitante"):
+            if getattr(vaga, f"origem_{lado}_grupo") != grupo:
+                continue
+            posicao = getattr(vaga, f"origem_{lado}_posicao")
+            classificada = ordem[posicao - 1] if posicao and posicao <= len(ordem) else None
+            if getattr(vaga, f"id_equipe_{lado}") == classificada:
+                continue
+            if vaga.status != "Agendada":
+                raise ValueError("Não é possível alterar a classificação do grupo pois o mata-mata já foi iniciado ou concluído.")
+            setattr(vaga, f"id_equipe_{lado}", classificada)
+            if vaga not in alteradas:
+                alteradas.append(vaga)
+    return alteradas
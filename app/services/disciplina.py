@@ -0,0 +1,304 @@
+import os
+from dotenv import load_dotenv
+from sqlalchemy import or_, tuple_
+from sqlalchemy.orm import Session
+import models
+
+load_dotenv()
+
+# Regras de suspensão: a cada AMARELOS_POR_SUSPENSAO cartões amarelos o participante cumpre um jogo;
+# cada cartão vermelho vale JOGOS_POR_VERMELHO jogos
+AMARELOS_POR_SUSPENSAO = int(os.getenv("AMARELOS_POR_SUSPENSAO", "3"))
+JOGOS_POR_VERMELHO = int(os.getenv("JOGOS_POR_VERMELHO", "1"))
+
+def suspensoes_geradas(linha: models.DisciplinaParticipante):
+    return linha.cartoes_amarelos // AMARELOS_POR_SUSPENSAO + linha.cartoes_vermelhos * JOGOS_POR_VERMELHO
+
+def jogos_a_cumprir(linha: models.DisciplinaParticipante):
+    if linha is None:
+        return 0
+    return max(0, suspensoes_geradas(linha) - linha.suspensoes_cumpridas)
+
+def obter_disciplina(db: Session, id_edicao: int, id_participante: int):
+    # Consulta pela chave primária: não depende do número de partidas do participante
+    return db.get(models.DisciplinaParticipante, (id_edicao, id_participante))
+
+def esta_suspenso(db: Session, id_edicao: int, id_participante: int):
+    return jogos_a_cumprir(obter_disciplina(db, id_edicao, id_participante)) > 0
+
+def _posicao(partida):
+    # Ordem das partidas na edição: data, hora e id (o mesmo critério do _replay)
+    return (partida.part_data, partida.part_hora, partida.id_partida)
+
+def _posicoes(db: Session, ids_partidas):
+    ids = [i for i in set(ids_partidas) if i is not None]
+    if not ids:
+        return {}
+    return {p.id_partida: _posicao(p) for p in db.query(
+        models.Partida.id_partida, models.Partida.part_data, models.Partida.part_hora
+    ).filter(models.Partida.id_partida.in_(ids))}
+
+def _depois_do_historico(linha, posicao, posicoes: dict, com_cartao_na_partida: bool = False):
+    # A partida vem depois da última suspensão cumprida e do último cartão do participante, então os
+    # acumuladores já são a situação dele nela. com_cartao_na_partida aceita a própria partida como a
+    # do último cartão (os cartões dela só contam para as seguintes)
+    cumprida = posicoes.get(linha.id_ultima_partida_cumprida)
+    cartao = posicoes.get(linha.id_ultima_partida_cartao)
+    if cumprida is not None and cumprida >= posicao:
+        return False
+    if cartao is not None and (cartao > posicao or (cartao == posicao and not com_cartao_na_partida)):
+        return False
+    return True
+
+def _equipes_do_participante(db: Session, id_edicao: int, id_participante: int):
+    return [id_equipe for (id_equipe,) in db.query(models.equipes_participantes.c.id_equipe).join(
+        models.Equipe, models.Equipe.id_equipe == models.equipes_participantes.c.id_equipe
+    ).filter(
+        models.Equipe.id_edicao == id_edicao,
+        models.equipes_participantes.c.id_participante == id_participante
+    )]
+
+def _finalizadas_depois(db: Session, partida, ids_equipes):
+    # Partidas finalizadas das equipes marcadas depois da partida, pelo índice (data, equipe)
+    if not ids_equipes:
+        return []
+    return db.query(models.Partida.id_equipe_casa, models.Partida.id_equipe_visitante).filter(
+        models.Partida.id_edicao == partida.id_edicao,
+        models.Partida.status == "Finalizada",
+        models.Partida.part_data >= partida.part_data,
+        tuple_(models.Partida.part_data, models.Partida.part_hora, models.Partida.id_partida) > _posicao(partida),
+        or_(models.Partida.id_equipe_casa.in_(list(ids_equipes)), models.Partida.id_equipe_visitante.in_(list(ids_equipes)))
+    ).all()
+
+def suspenso_na_partida(db: Session, partida, id_participante: int):
+    # Situação do participante naquela partida, e não a atual da edição: a súmula de um jogo
+    # anterior ao que gerou a suspensão continua podendo ser lançada. Para uma partida posterior
+    # ao último cartão e à última suspensão cumprida basta a linha de acumuladores; só as
+    # anteriores refazem o histórico do participante
+    linha = obter_disciplina(db, partida.id_edicao, id_participante)
+    if linha is None or suspensoes_geradas(linha) == 0:
+        return False
+    posicoes = _posicoes(db, [linha.id_ultima_partida_cumprida, linha.id_ultima_partida_cartao])
+    if _depois_do_historico(linha, _posicao(partida), posicoes):
+        return jogos_a_cumprir(linha) > 0
+    partidas, equipes, cartoes = _dados_replay(db, partida.id_edicao, [id_participante], [partida.id_partida])
+    pendentes_antes = _replay(partidas, equipes.get(id_participante, set()), cartoes.get(id_participante, {}))[5]
+    return pendentes_antes.get(partida.id_partida, 0) > 0
+
+def situacao(linha: models.DisciplinaParticipante, id_edicao: int = None, id_participante: int = None):
+    if linha is None:
+        return {"id_edicao": id_edicao, "id_participante": id_participante, "cartoes_amarelos": 0, "cartoes_vermelhos": 0,
+                "suspensoes": 0, "suspensoes_cumpridas": 0, "jogos_a_cumprir": 0, "suspenso": False}
+    a_cumprir = jogos_a_cumprir(linha)
+    return {
+        "id_edicao": linha.id_edicao,
+        "id_participante": linha.id_participante,
+        "cartoes_amarelos": linha.cartoes_amarelos,
+        "cartoes_vermelhos": linha.cartoes_vermelhos,
+        "suspensoes": suspensoes_geradas(linha),
+        "suspensoes_cumpridas": linha.suspensoes_cumpridas,
+        "jogos_a_cumprir": a_cumprir,
+        "suspenso": a_cumprir > 0,
+    }
+
+def _replay(partidas: list, equipes: set, cartoes: dict):
+    # Percorre as partidas da edição em ordem de data e devolve (amarelos, vermelhos, cumpridas,
+    # última partida cumprida, última partida com cartão, jogos pendentes antes de cada partida). Uma suspensão é cumprida numa
+    # partida finalizada de uma das equipes do participante em que ele não tem estatística; os
+    # cartões de uma partida só geram suspensão para as seguintes
+    amarelos = vermelhos = cumpridas = pendentes = 0
+    ultima = ultima_cartao = None
+    pendentes_antes = {}
+    for partida in partidas:
+        pendentes_antes[partida.id_partida] = pendentes
+        atuou = partida.id_partida in cartoes
+        da_equipe = partida.id_equipe_casa in equipes or partida.id_equipe_visitante in equipes
+        if pendentes and partida.status == "Finalizada" and da_equipe and not atuou:
+            pendentes -= 1
+            cumpridas += 1
+            ultima = partida.id_partida
+        if atuou:
+            geradas_antes = amarelos // AMARELOS_POR_SUSPENSAO + vermelhos * JOGOS_POR_VERMELHO
+            amarelos += cartoes[partida.id_partida][0]
+            vermelhos += cartoes[partida.id_partida][1]
+            pendentes += amarelos // AMARELOS_POR_SUSPENSAO + vermelhos * JOGOS_POR_VERMELHO - geradas_antes
+            if any(cartoes[partida.id_partida]):
+                ultima_cartao = partida.id_partida
+    return amarelos, vermelhos, cumpridas, ultima, ultima_cartao, pendentes_antes
+
+def _dados_replay(db: Session, id_edicao: int, ids_participantes: list, ids_partidas_extras=()):
+    # Três consultas para qualquer número de participantes: estatísticas, equipes e partidas
+    cartoes = {}
+    for id_participante, id_partida, amarelos, vermelhos in db.query(
+        models.EstatisticaPartida.id_participante, models.EstatisticaPartida.id_partida,
+        models.EstatisticaPartida.cartoes_amarelos, models.EstatisticaPartida.cartoes_vermelhos
+    ).join(models.Partida, models.Partida.id_partida == models.EstatisticaPartida.id_partida).filter(
+        models.Partida.id_edicao == id_edicao,
+        models.EstatisticaPartida.id_participante.in_(ids_participantes)
+    ):
+        cartoes.setdefault(id_participante, {})[id_partida] = (amarelos or 0, vermelhos or 0)
+
+    equipes = {}
+    for id_participante, id_equipe in db.query(
+        models.equipes_participantes.c.id_participante, models.equipes_participantes.c.id_equipe
+    ).join(models.Equipe, models.Equipe.id_equipe == models.equipes_participantes.c.id_equipe).filter(
+        models.Equipe.id_edicao == id_edicao,
+        models.equipes_participantes.c.id_participante.in_(ids_participantes)
+    ):
+        equipes.setdefault(id_participante, set()).add(id_equipe)
+
+    todas_equipes = set().union(*equipes.values()) if equipes else set()
+    ids_partidas = {id_partida for por_partida in cartoes.values() for id_partida in por_partida} | set(ids_partidas_extras)
+    partidas = db.query(
+        models.Partida.id_partida, models.Partida.status, models.Partida.id_equipe_casa, models.Partida.id_equipe_visitante
+    ).filter(
+        models.Partida.id_edicao == id_edicao,
+        or_(
+            models.Partida.id_equipe_casa.in_(list(todas_equipes)),
+            models.Partida.id_equipe_visitante.in_(list(todas_equipes)),
+            models.Partida.id_partida.in_(list(ids_partidas)),
+        )
+    ).order_by(models.Partida.part_data, models.Partida.part_hora, models.Partida.id_partida).all()
+    return partidas, equipes, cartoes
+
+def recalcular_participantes(db: Session, id_edicao: int, ids_participantes):
+    # Refaz cartões e suspensões cumpridas a partir das partidas e estatísticas, na transação corrente.
+    # Usado quando a mudança cai no meio do histórico (súmula lançada fora de ordem, partida reaberta,
+    # remarcada ou excluída); as mudanças no fim dele só ajustam os acumuladores
+    ids_participantes = list(set(ids_participantes))
+    if not ids_participantes:
+        return
+    db.flush()
+    partidas, equipes, cartoes = _dados_replay(db, id_edicao, ids_participantes)
+    existentes = {l.id_participante: l for l in db.query(models.DisciplinaParticipante).filter(
+        models.DisciplinaParticipante.id_edicao == id_edicao,
+        models.DisciplinaParticipante.id_participante.in_(ids_participantes)
+    )}
+    for id_participante in ids_participantes:
+        amarelos, vermelhos, cumpridas, ultima, ultima_cartao, _ = _replay(partidas, equipes.get(id_participante, set()), cartoes.get(id_participante, {}))
+        linha = existentes.get(id_participante)
+        if linha is None:
+            if not amarelos and not vermelhos:
+                continue
+            linha = models.DisciplinaParticipante(id_edicao=id_edicao, id_participante=id_participante)
+            db.add(linha)
+        linha.cartoes_amarelos = amarelos
+        linha.cartoes_vermelhos = vermelhos
+        linha.suspensoes_cumpridas = cumpridas
+        linha.id_ultima_partida_cumprida = ultima
+        linha.id_ultima_partida_cartao = ultima_cartao
+
+def registrar_estatistica(db: Session, partida, id_participante: int, delta_amarelos: int, delta_vermelhos: int, presenca: int = 0):
+    # Estatística criada (presenca=1), corrigida (0) ou removida (-1), na transação corrente. No fim
+    # do histórico do participante, sem partida finalizada das suas equipes depois desta, só os
+    # acumuladores mudam; nos demais casos o histórico dele é refeito
+    linha = obter_disciplina(db, partida.id_edicao, id_participante)
+    if linha is None and delta_amarelos <= 0 and delta_vermelhos <= 0:
+        return
+    rapido = not (presenca < 0 and partida.status == "Finalizada" and linha is not None)
+    if rapido and linha is not None:
+        posicoes = _posicoes(db, [linha.id_ultima_partida_cumprida, linha.id_ultima_partida_cartao])
+        rapido = _depois_do_historico(linha, _posicao(partida), posicoes, com_cartao_na_partida=True)
+    if rapido and (delta_amarelos or delta_vermelhos):
+        rapido = not _finalizadas_depois(db, partida, _equipes_do_participante(db, partida.id_edicao, id_participante))
+    if not rapido:
+        recalcular_participantes(db, partida.id_edicao, [id_participante])
+        return
+
+    if linha is None:
+        linha = models.DisciplinaParticipante(id_edicao=partida.id_edicao, id_participante=id_participante,
+                                              cartoes_amarelos=0, cartoes_vermelhos=0, suspensoes_cumpridas=0)
+        db.add(linha)
+    linha.cartoes_amarelos += delta_amarelos
+    linha.cartoes_vermelhos += delta_vermelhos
+    if delta_amarelos > 0 or delta_vermelhos > 0:
+        linha.id_ultima_partida_cartao = partida.id_partida
+
+def registrar_finalizacao(db: Session, partida):
+    # Partida que passou a "Finalizada" sem mudar de data: quem tem suspensão pendente, é de uma das
+    # equipes e não atuou cumpre um jogo. Participantes cujo histórico tem algo depois desta partida
+    # (súmula fora de ordem) têm o histórico refeito
+    ids_equipes = [e for e in (partida.id_equipe_casa, partida.id_equipe_visitante) if e is not None]
+    if not ids_equipes:
+        return
+    db.flush()
+    linhas = db.query(models.DisciplinaParticipante).join(
+        models.equipes_participantes,
+        models.equipes_participantes.c.id_participante == models.DisciplinaParticipante.id_participante
+    ).filter(
+        models.DisciplinaParticipante.id_edicao == partida.id_edicao,
+        models.equipes_participantes.c.id_equipe.in_(ids_equipes)
+    ).distinct().all()
+    if not linhas:
+        return
+
+    ids_participantes = [l.id_participante for l in linhas]
+    atuaram = {id_participante for (id_participante,) in db.query(models.EstatisticaPartida.id_participante).filter(
+        models.EstatisticaPartida.id_partida == partida.id_partida,
+        models.EstatisticaPartida.id_participante.in_(ids_participantes)
+    )}
+    equipes = {}
+    for id_participante, id_equipe in db.query(
+        models.equipes_participantes.c.id_participante, models.equipes_participantes.c.id_equipe
+    ).join(models.Equipe, models.Equipe.id_equipe == models.equipes_participantes.c.id_equipe).filter(
+        models.Equipe.id_edicao == partida.id_edicao,
+        models.equipes_participantes.c.id_participante.in_(ids_participantes)
+    ):
+        equipes.setdefault(id_participante, set()).add(id_equipe)
+    depois = _finalizadas_depois(db, partida, set().union(*equipes.values()))
+    posicoes = _posicoes(db, [i for l in linhas for i in (l.id_ultima_partida_cumprida, l.id_ultima_partida_cartao)])
+    posicao = _posicao(partida)
+
+    lentos = []
+    for linha in linhas:
+        if linha.id_participante in atuaram:
+            # Quem atuou não cumpre suspensão nesta partida, qualquer que seja a ordem
+            continue
+        equipes_linha = equipes.get(linha.id_participante, set())
+        if any(casa in equipes_linha or visitante in equipes_linha for casa, visitante in depois) or \
+                not _depois_do_historico(linha, posicao, posicoes):
+            lentos.append(linha.id_participante)
+        elif jogos_a_cumprir(linha) > 0:
+            linha.suspensoes_cumpridas += 1
+            linha.id_ultima_partida_cumprida = partida.id_partida
+    recalcular_participantes(db, partida.id_edicao, lentos)
+
+def recalcular_equipes(db: Session, id_edicao: int, ids_equipes):
+    # Participantes das equipes que têm cartões na edição (só eles podem estar suspensos)
+    ids_equipes = [e for e in set(ids_equipes) if e is not None]
+    if not ids_equipes:
+        return
+    db.flush()
+    ids = [id_participante for (id_participante,) in db.query(models.DisciplinaParticipante.id_participante).join(
+        models.equipes_participantes,
+        models.equipes_participantes.c.id_participante == models.DisciplinaParticipante.id_participante
+    ).filter(
+        models.DisciplinaParticipante.id_edicao == id_edicao,
+        models.equipes_participantes.c.id_equipe.in_(ids_equipes)
+    ).distinct()]
+    recalcular_participantes(db, id_edicao, ids)
+
+def listar_disciplina(db: Session, id_edicao: int, apenas_suspensos: bool = False):
+    linhas = db.query(models.DisciplinaParticipante).filter(
+        models.DisciplinaParticipante.id_edicao == id_edicao
+    ).order_by(models.DisciplinaParticipante.id_participante).all()
+    situacoes = [situacao(l) for l in linhas]
+    if apenas_suspensos:
+        situacoes = [s for s in situacoes if s["suspenso"]]
+    return situacoes
+
+def recalcular_disciplina(db: Session, id_edicao: int):
+    # Refaz os acumuladores da edição inteira a partir das estatísticas e da ordem das partidas
+    ids = {id_participante for (id_participante,) in db.query(models.EstatisticaPartida.id_participante).join(
+        models.Partida, models.Partida.id_partida == models.EstatisticaPartida.id_partida
+    ).filter(models.Partida.id_edicao == id_edicao).distinct()}
+    ids |= {id_participante for (id_participante,) in db.query(models.DisciplinaParticipante.id_participante).filter(
+        models.DisciplinaParticipante.id_edicao == id_edicao
+    )}
+    recalcular_participantes(db, id_edicao, ids)
+    db.flush()
+
+def remover_disciplina(db: Session, id_edicao: int):
+    db.query(models.DisciplinaParticipante).filter(
+        models.DisciplinaParticipante.id_edicao == id_edicao
+    ).delete(synchronize_session=False)
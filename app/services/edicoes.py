@@ -1,21 +1,28 @@
+from sqlalchemy import func, insert, update
 from sqlalchemy.orm import Session
-from datetime import date, time, timedelta
+from datetime import date, time
+import cache
 import models
+import paginacao
 import schemas
+from services import agendamento as servico_agendamento
+from services import classificacao as servico_classificacao
+from services import disciplina as servico_disciplina
 
 def criar_edicao(db: Session, edicao: schemas.EdicaoCreate):
     db_edicao = models.Edicao(**edicao.model_dump())
 
     db.add(db_edicao)
     db.commit()
+    cache.invalidar_publico()
     db.refresh(db_edicao)
     return db_edicao
 
 def listar_edicao_id(db: Session, edicao_id: int):
     return db.query(models.Edicao).filter(models.Edicao.id_edicao == edicao_id).first()
 
-def listar_edicoes(db: Session, skip: int = 0, limit: int = 10):
-    return db.query(models.Edicao).offset(skip).limit(limit).all()
+def listar_edicoes(db: Session, skip: int = 0, limit: int = 10, cursor: str = None, incluir_total: bool = False):
+    return paginacao.paginar(db.query(models.Edicao), models.Edicao.id_edicao, skip, limit, cursor, incluir_total)
 
 def atualizar_edicao(db: Session, edicao_id: int, edicao_atualizada: schemas.EdicaoCreate):
     db_edicao = listar_edicao_id(db, edicao_id)
@@ -28,6 +35,7 @@ def atualizar_edicao(db: Session, edicao_id: int, edicao_atualizada: schemas.Edi
         setattr(db_edicao, key, value)
 
     db.commit()
+    cache.invalidar_publico()
     db.refresh(db_edicao)
     return db_edicao
 
@@ -35,8 +43,11 @@ def excluir_edicao(db: Session, id_edicao: int):
     db_edicao = listar_edicao_id(db, id_edicao)
 
     if db_edicao:
+        servico_classificacao.remover_classificacao(db, id_edicao=id_edicao)
+        servico_disciplina.remover_disciplina(db, id_edicao)
         db.delete(db_edicao)
         db.commit()
+        cache.invalidar_publico()
         return True
     return False
 
@@ -61,9 +72,104 @@ def clonar_equipes(db: Session, id_edicao_origem: int, id_edicao_destino: int):
         novas_equipes.append(nova_equipe)
     
     db.commit()
+    cache.invalidar_edicao(id_edicao_destino)
     return novas_equipes
 
-def gerar_confrontos_pontos_corridos(db: Session, edicao_id: int, id_modalidade: int, data_inicio: date, part_hora: time = None):
+def _inserir_partidas_em_lote(db: Session, linhas: list, edicao_id: int, id_modalidade: int):
+    # Um único INSERT em lote (executemany, que o PyMySQL reescreve como um INSERT multi-linha).
+    # render_nulls mantém as colunas nulas (ex.: equipes a definir) no mesmo lote.
+    # Os ids voltam em um único SELECT: as partidas anteriores da modalidade já foram removidas
+    # e os ids autoincrementais seguem a ordem das linhas. (RETURNING ordenado não serve aqui:
+    # o MySQL não suporta e o SQLite o executa linha a linha.)
+    db.execute(insert(models.Partida).execution_options(render_nulls=True), linhas)
+    return db.query(models.Partida).filter(
+        models.Partida.id_edicao == edicao_id,
+        models.Partida.id_modalidade == id_modalidade
+    ).order_by(models.Partida.id_partida).all()
+
+def _distribuir_recursos(db: Session, plano: list, id_modalidade: int, part_hora: time = None, hora_limite: time = None):
+    # 1. Recursos disponíveis e duração da modalidade
+    ids_locais = [id_local for (id_local,) in db.query(models.Local.id_local).filter(models.Local.ativo == True).order_by(models.Local.id_local)]
+    ids_arbitros = [id_arbitro for (id_arbitro,) in db.query(models.Arbitro.id_arbitro).order_by(models.Arbitro.id_arbitro)]
+    duracao = db.query(models.Modalidade.duracao_minutos).filter(models.Modalidade.id_modalidade == id_modalidade).scalar() or 60
+
+    # 2. Carregar de uma vez as partidas já marcadas nas datas do plano (qualquer edição)
+    agenda = servico_agendamento.AgendaRecursos()
+    ocupadas = db.query(
+        models.Partida.part_data,
+        models.Partida.part_hora,
+        func.coalesce(models.Modalidade.duracao_minutos, 60),
+        models.Partida.id_local,
+        models.Partida.id_arbitro,
+        models.Partida.id_equipe_casa,
+        models.Partida.id_equipe_visitante
+    ).outerjoin(models.Modalidade, models.Partida.id_modalidade == models.Modalidade.id_modalidade).filter(
+        models.Partida.part_data.in_({p.part_data for p in plano}),
+        models.Partida.status != "Cancelada"
+    )
+    for linha in ocupadas:
+        agenda.reservar_partida(*linha)
+
+    # 3. Alocar local, árbitro e horário de cada partida em memória
+    servico_agendamento.alocar_recursos(
+        plano, ids_locais, ids_arbitros, duracao, agenda,
+        hora_inicio=part_hora or time(8, 0),
+        hora_limite=hora_limite or time(22, 0)
+    )
+
+def _gravar_plano(db: Session, plano: list, edicao_id: int, id_modalidade: int, id_local: int, id_arbitro: int, part_hora: time = None,
+                  distribuir_recursos: bool = False, hora_limite: time = None):
+    default_time = part_hora or time(14, 0)
+    if distribuir_recursos:
+        _distribuir_recursos(db, plano, id_modalidade, part_hora, hora_limite)
+
+    # 1. Inserir o plano inteiro de uma vez
+    linhas = [{
+        "id_edicao": edicao_id,
+        "id_local": p.id_local or id_local,
+        "id_arbitro": p.id_arbitro or id_arbitro,
+        "id_modalidade": id_modalidade,
+        "id_equipe_casa": p.id_equipe_casa,
+        "id_equipe_visitante": p.id_equipe_visitante,
+        "fase": p.fase,
+        "part_data": p.part_data,
+        "part_hora": p.part_hora or default_time,
+        "status": "Agendada",
+        "observacoes": p.observacoes,
+        "origem_casa_grupo": p.origem_casa[0] if p.origem_casa else None,
+        "origem_casa_posicao": p.origem_casa[1] if p.origem_casa else None,
+        "origem_visitante_grupo": p.origem_visitante[0] if p.origem_visitante else None,
+        "origem_visitante_posicao": p.origem_visitante[1] if p.origem_visitante else None
+    } for p in plano]
+    partidas = _inserir_partidas_em_lote(db, linhas, edicao_id, id_modalidade)
+
+    # 2. Ligar id_proxima_partida em um único UPDATE em lote
+    ligacoes = [
+        {"id_partida": partidas[i].id_partida, "id_proxima_partida": partidas[p.proxima].id_partida}
+        for i, p in enumerate(plano) if p.proxima is not None
+    ]
+    if ligacoes:
+        db.execute(update(models.Partida), ligacoes)
+
+    db.commit()
+    cache.invalidar_edicao(edicao_id)
+    return partidas
+
+def _remover_partidas_geradas(db: Session, edicao_id: int, id_modalidade: int):
+    # Verificar se existem partidas ativas/finalizadas
+    partidas_existentes = db.query(models.Partida).filter(
+        models.Partida.id_edicao == edicao_id,
+        models.Partida.id_modalidade == id_modalidade
+    ).all()
+    if any(p.status in ["Em Andamento", "Finalizada"] for p in partidas_existentes):
+        raise ValueError("Não é possível gerar novos confrontos porque já existem partidas em andamento ou finalizadas.")
+    
+    # Deletar partidas anteriores da mesma modalidade e edição
+    for p in partidas_existentes:
+        db.delete(p)
+    db.flush()
+
+def gerar_confrontos_pontos_corridos(db: Session, edicao_id: int, id_modalidade: int, data_inicio: date, part_hora: time = None, distribuir_recursos: bool = False, hora_limite: time = None):
     # 1. Obter a edição
     edicao = db.query(models.Edicao).filter(models.Edicao.id_edicao == edicao_id).first()
     if not edicao:
@@ -82,81 +188,26 @@ def gerar_confrontos_pontos_corridos(db: Session, edicao_id: int, id_modalidade:
     if not arbitro:
         raise ValueError("Nenhum árbitro cadastrado. Cadastre um árbitro antes de gerar as rodadas.")
     
-    # 4. Verificar se existem partidas ativas/finalizadas
-    partidas_existentes = db.query(models.Partida).filter(
-        models.Partida.id_edicao == edicao_id,
-        models.Partida.id_modalidade == id_modalidade
-    ).all()
-    if any(p.status in ["Em Andamento", "Finalizada"] for p in partidas_existentes):
-        raise ValueError("Não é possível gerar novos confrontos porque já existem partidas em andamento ou finalizadas.")
-    
-    # Deletar partidas anteriores da mesma modalidade e edição
-    for p in partidas_existentes:
-        db.delete(p)
-    db.flush()
+    # 4. Remover partidas agendadas anteriormente
+    _remover_partidas_geradas(db, edicao_id, id_modalidade)
     
     # 5. Algoritmo de Round Robin
-    lista_equipes = list(equipes)
-    if len(lista_equipes) % 2 != 0:
-        lista_equipes.append(None)
-    
-    n = len(lista_equipes)
-    rodadas = n - 1
-    jogos_por_rodada = n // 2
-    
-    default_time = part_hora or time(14, 0)
-    
-    partidas_geradas = []
-    
-    for r in range(rodadas):
-        # Uma rodada por semana
-        data_rodada = data_inicio + timedelta(weeks=r)
-        
-        for j in range(jogos_por_rodada):
-            casa = lista_equipes[j]
-            visitante = lista_equipes[n - 1 - j]
-            
-            if casa is not None and visitante is not None:
-                nova_partida = models.Partida(
-                    id_edicao=edicao_id,
-                    id_local=local.id_local,
-                    id_arbitro=arbitro.id_arbitro,
-                    id_modalidade=id_modalidade,
-                    id_equipe_casa=casa.id_equipe,
-                    id_equipe_visitante=visitante.id_equipe,
-                    fase=f"Rodada {r + 1}",
-                    part_data=data_rodada,
-                    part_hora=default_time,
-                    status="Agendada"
-                )
-                db.add(nova_partida)
-                partidas_geradas.append(nova_partida)
-        
-        # Rotacionar a lista
-        lista_equipes = [lista_equipes[0]] + [lista_equipes[-1]] + lista_equipes[1:-1]
-        
-    db.commit()
-    return partidas_geradas
+    plano = servico_agendamento.planejar_round_robin([eq.id_equipe for eq in equipes], data_inicio)
+    return _gravar_plano(db, plano, edicao_id, id_modalidade, local.id_local, arbitro.id_arbitro, part_hora,
+                        distribuir_recursos, hora_limite)
 
-def gerar_confrontos_mata_mata(db: Session, edicao_id: int, id_modalidade: int, fase_inicial: str, data_inicio: date, part_hora: time = None):
+def gerar_confrontos_mata_mata(db: Session, edicao_id: int, id_modalidade: int, fase_inicial: str, data_inicio: date, part_hora: time = None, distribuir_recursos: bool = False, hora_limite: time = None):
     # 1. Obter a edição
     edicao = db.query(models.Edicao).filter(models.Edicao.id_edicao == edicao_id).first()
     if not edicao:
         raise ValueError("Edição não encontrada.")
     
-    # 2. Obter equipes
+    # 2. Obter equipes e montar o chaveamento (valida a fase inicial e o limite de equipes)
     equipes = db.query(models.Equipe).filter(models.Equipe.id_edicao == edicao_id).all()
     if not equipes:
         raise ValueError("É necessário ter equipes registradas para gerar o chaveamento.")
     
-    fases_possiveis = ["Final", "Semifinal", "Quartas", "Oitavas"]
-    if fase_inicial not in fases_possiveis:
-        raise ValueError(f"Fase inicial inválida: {fase_inicial}")
-    
-    idx_limite = fases_possiveis.index(fase_inicial)
-    max_equipes = 2 ** (idx_limite + 1)
-    if len(equipes) > max_equipes:
-        raise ValueError(f"Quantidade de equipes ({len(equipes)}) excede o limite máximo permitido para a fase inicial {fase_inicial} ({max_equipes} equipes).")
+    plano = servico_agendamento.planejar_mata_mata([eq.id_equipe for eq in equipes], fase_inicial, data_inicio)
     
     # 3. Obter local e árbitro padrões
     local = db.query(models.Local).filter(models.Local.ativo == True).first()
@@ -166,80 +217,14 @@ def gerar_confrontos_mata_mata(db: Session, edicao_id: int, id_modalidade: int,
     if not arbitro:
         raise ValueError("Nenhum árbitro cadastrado. Cadastre um árbitro antes de gerar o chaveamento.")
     
-    # 4. Verificar se existem partidas ativas/finalizadas
-    partidas_existentes = db.query(models.Partida).filter(
-        models.Partida.id_edicao == edicao_id,
-        models.Partida.id_modalidade == id_modalidade
-    ).all()
-    if any(p.status in ["Em Andamento", "Finalizada"] for p in partidas_existentes):
-        raise ValueError("Não é possível gerar novos confrontos porque já existem partidas em andamento ou finalizadas.")
+    # 4. Remover partidas agendadas anteriormente
+    _remover_partidas_geradas(db, edicao_id, id_modalidade)
     
-    # Deletar partidas anteriores da mesma modalidade e edição
-    for p in partidas_existentes:
-        db.delete(p)
-    db.flush()
-    
-    # 5. Mapear as fases
-    fases_possiveis = ["Final", "Semifinal", "Quartas", "Oitavas"]
-    if fase_inicial not in fases_possiveis:  # pragma: no cover
-        raise ValueError(f"Fase inicial inválida: {fase_inicial}")
-    
-    idx_limite = fases_possiveis.index(fase_inicial)
-    fases_a_gerar = fases_possiveis[:idx_limite + 1] # e.g., ["Final", "Semifinal", "Quartas"]
-    
-    default_time = part_hora or time(14, 0)
-    partidas_por_fase = {}
-    
-    # Gerar de trás para frente (Final -> Semifinal -> ...)
-    for idx, fase in enumerate(fases_a_gerar):
-        num_partidas = 2 ** idx
-        semanas_distancia = idx_limite - idx
-        data_fase = data_inicio + timedelta(weeks=semanas_distancia)
-        
-        partidas_fase = []
-        for j in range(num_partidas):
-            id_proxima = None
-            if fase != "Final":
-                fase_seguinte = fases_a_gerar[idx - 1]
-                partida_seguinte = partidas_por_fase[fase_seguinte][j // 2]
-                id_proxima = partida_seguinte.id_partida
-                
-            nova_partida = models.Partida(
-                id_edicao=edicao_id,
-                id_local=local.id_local,
-                id_arbitro=arbitro.id_arbitro,
-                id_modalidade=id_modalidade,
-                id_proxima_partida=id_proxima,
-                fase=fase,
-                part_data=data_fase,
-                part_hora=default_time,
-                status="Agendada"
-            )
-            db.add(nova_partida)
-            db.flush() # Gerar ID
-            partidas_fase.append(nova_partida)
-            
-        partidas_por_fase[fase] = partidas_fase
-        
-    # 6. Distribuir as equipes na fase inicial
-    partidas_iniciais = partidas_por_fase[fase_inicial]
-    for i, partida in enumerate(partidas_iniciais):
-        idx_casa = 2 * i
-        idx_visitante = 2 * i + 1
-        
-        if idx_casa < len(equipes):
-            partida.id_equipe_casa = equipes[idx_casa].id_equipe
-        if idx_visitante < len(equipes):
-            partida.id_equipe_visitante = equipes[idx_visitante].id_equipe
-            
-    db.commit()
-    
-    todas_partidas = []
-    for p_list in partidas_por_fase.values():
-        todas_partidas.extend(p_list)
-    return todas_partidas
+    # 5. Gravar o chaveamento inteiro e ligar as fases
+    return _gravar_plano(db, plano, edicao_id, id_modalidade, local.id_local, arbitro.id_arbitro, part_hora,
+                        distribuir_recursos, hora_limite)
 
-def gerar_confrontos_grupos(db: Session, edicao_id: int, id_modalidade: int, part_hora: time = None):
+def gerar_confrontos_grupos(db: Session, edicao_id: int, id_modalidade: int, part_hora: time = None, distribuir_recursos: bool = False, hora_limite: time = None):
     # 1. Obter a edição
     edicao = db.query(models.Edicao).filter(models.Edicao.id_edicao == edicao_id).first()
     if not edicao:
@@ -258,18 +243,8 @@ def gerar_confrontos_grupos(db: Session, edicao_id: int, id_modalidade: int, par
     if not arbitro:
         raise ValueError("Nenhum árbitro cadastrado. Cadastre um árbitro antes de gerar as rodadas.")
     
-    # 4. Verificar se existem partidas ativas/finalizadas
-    partidas_existentes = db.query(models.Partida).filter(
-        models.Partida.id_edicao == edicao_id,
-        models.Partida.id_modalidade == id_modalidade
-    ).all()
-    if any(p.status in ["Em Andamento", "Finalizada"] for p in partidas_existentes):
-        raise ValueError("Não é possível gerar novos confrontos porque já existem partidas em andamento ou finalizadas.")
-    
-    # Deletar partidas anteriores da mesma modalidade e edição
-    for p in partidas_existentes:
-        db.delete(p)
-    db.flush()
+    # 4. Remover partidas agendadas anteriormente
+    _remover_partidas_geradas(db, edicao_id, id_modalidade)
     
     # 5. Distribuir equipes em grupos caso nenhuma possua grupo
     if all(eq.grupo is None for eq in equipes):
@@ -279,112 +254,17 @@ def gerar_confrontos_grupos(db: Session, edicao_id: int, id_modalidade: int, par
             eq.grupo = "A" if idx < mid else "B"
         db.flush()
         
-    # Agrupar equipes por grupo
+    # Agrupar ids de equipes por grupo
     grupos = {}
     for eq in equipes:
-        g_nome = eq.grupo or "A"
-        if g_nome not in grupos:
-            grupos[g_nome] = []
-        grupos[g_nome].append(eq)
-        
-    default_time = part_hora or time(14, 0)
-    partidas_geradas = []
-    
-    # 6. Gerar rodadas para cada grupo
-    for g_nome, lista_eqs in grupos.items():
-        if len(lista_eqs) < 2:
-            continue
-            
-        lista_rot = list(lista_eqs)
-        if len(lista_rot) % 2 != 0:
-            lista_rot.append(None)
-            
-        n = len(lista_rot)
-        rodadas = n - 1
-        jogos_por_rodada = n // 2
-        
-        for r in range(rodadas):
-            data_rodada = edicao.data_inicio + timedelta(weeks=r)
-            for j in range(jogos_por_rodada):
-                casa = lista_rot[j]
-                visitante = lista_rot[n - 1 - j]
-                
-                if casa is not None and visitante is not None:
-                    nova_partida = models.Partida(
-                        id_edicao=edicao_id,
-                        id_local=local.id_local,
-                        id_arbitro=arbitro.id_arbitro,
-                        id_modalidade=id_modalidade,
-                        id_equipe_casa=casa.id_equipe,
-                        id_equipe_visitante=visitante.id_equipe,
-                        fase=f"Grupo {g_nome} - Rodada {r + 1}",
-                        part_data=data_rodada,
-                        part_hora=default_time,
-                        status="Agendada"
-                    )
-                    db.add(nova_partida)
-                    partidas_geradas.append(nova_partida)
-            
-            # Rotacionar
-            lista_rot = [lista_rot[0]] + [lista_rot[-1]] + lista_rot[1:-1]
-            
-    # 7. Gerar cruzamento de mata-mata (Semifinal e Final)
-    max_weeks = max([len(eqs) - 1 if len(eqs) % 2 == 0 else len(eqs) for eqs in grupos.values()] + [2])
-    data_semis = edicao.data_inicio + timedelta(weeks=max_weeks)
-    data_final = data_semis + timedelta(weeks=1)
-    
-    # Grande Final
-    final_match = models.Partida(
-        id_edicao=edicao_id,
-        id_local=local.id_local,
-        id_arbitro=arbitro.id_arbitro,
-        id_modalidade=id_modalidade,
-        id_equipe_casa=None,
-        id_equipe_visitante=None,
-        fase="Final",
-        part_data=data_final,
-        part_hora=default_time,
-        status="Agendada",
-        observacoes="Vencedor Semifinal 1 vs Vencedor Semifinal 2"
-    )
-    db.add(final_match)
-    db.flush()
-    partidas_geradas.append(final_match)
+        grupos.setdefault(eq.grupo or "A", []).append(eq.id_equipe)
     
-    # Semifinal 1: 1º Grupo A vs 2º Grupo B
-    semi1 = models.Partida(
-        id_edicao=edicao_id,
-        id_local=local.id_local,
-        id_arbitro=arbitro.id_arbitro,
-        id_modalidade=id_modalidade,
-        id_proxima_partida=final_match.id_partida,
-        fase="Semifinal",
-        part_data=data_semis,
-        part_hora=default_time,
-        status="Agendada",
-        observacoes="1º Grupo A vs 2º Grupo B"
-    )
-    # Semifinal 2: 1º Grupo B vs 2º Grupo A
-    semi2 = models.Partida(
-        id_edicao=edicao_id,
-        id_local=local.id_local,
-        id_arbitro=arbitro.id_arbitro,
-        id_modalidade=id_modalidade,
-        id_proxima_partida=final_match.id_partida,
-        fase="Semifinal",
-        part_data=data_semis,
-        part_hora=default_time,
-        status="Agendada",
-        observacoes="1º Grupo B vs 2º Grupo A"
-    )
-    db.add_all([semi1, semi2])
-    db.flush()
-    partidas_geradas.extend([semi1, semi2])
-    
-    db.commit()
-    return partidas_geradas
+    # 6. Rodadas de cada grupo seguidas do cruzamento (Semifinal e Final)
+    plano = servico_agendamento.planejar_grupos(grupos, edicao.data_inicio)
+    return _gravar_plano(db, plano, edicao_id, id_modalidade, local.id_local, arbitro.id_arbitro, part_hora,
+                        distribuir_recursos, hora_limite)
 
-def gerar_confrontos_edicao(db: Session, edicao_id: int, id_modalidade: int, part_hora: time = None):
+def gerar_confrontos_edicao(db: Session, edicao_id: int, id_modalidade: int, part_hora: time = None, distribuir_recursos: bool = False, hora_limite: time = None):
     edicao = db.query(models.Edicao).filter(models.Edicao.id_edicao == edicao_id).first()
     if not edicao:
         raise ValueError("Edição não encontrada.")
@@ -395,7 +275,9 @@ def gerar_confrontos_edicao(db: Session, edicao_id: int, id_modalidade: int, par
             edicao_id=edicao_id,
             id_modalidade=id_modalidade,
             data_inicio=edicao.data_inicio,
-            part_hora=part_hora
+            part_hora=part_hora,
+            distribuir_recursos=distribuir_recursos,
+            hora_limite=hora_limite
         )
     elif edicao.tipo_competicao == "Mata-Mata":
         if not edicao.fase_inicial:
@@ -406,14 +288,18 @@ def gerar_confrontos_edicao(db: Session, edicao_id: int, id_modalidade: int, par
             id_modalidade=id_modalidade,
             fase_inicial=edicao.fase_inicial,
             data_inicio=edicao.data_inicio,
-            part_hora=part_hora
+            part_hora=part_hora,
+            distribuir_recursos=distribuir_recursos,
+            hora_limite=hora_limite
         )
     elif edicao.tipo_competicao == "Grupos":
         return gerar_confrontos_grupos(
             db=db,
             edicao_id=edicao_id,
             id_modalidade=id_modalidade,
-            part_hora=part_hora
+            part_hora=part_hora,
+            distribuir_recursos=distribuir_recursos,
+            hora_limite=hora_limite
         )
     else:
         raise ValueError(f"Geração automática de confrontos não implementada para o tipo de competição: {edicao.tipo_competicao}")
\ No newline at end of file
@@ -1,6 +1,10 @@
 from sqlalchemy.orm import Session
+import cache
+import carregamento
 import models
+import paginacao
 import schemas
+from services import classificacao as servico_classificacao
 
 def criar_equipe(db: Session, equipe: schemas.EquipeCreate):
     db_equipe = models.Equipe(
@@ -9,14 +13,15 @@ def criar_equipe(db: Session, equipe: schemas.EquipeCreate):
     )
     db.add(db_equipe)
     db.commit()
+    cache.invalidar_edicao(equipe.id_edicao)
     db_equipe = db.query(models.Equipe).filter(models.Equipe.id_equipe == db_equipe.id_equipe).first()
     return db_equipe
 
-def listar_equipes(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(models.Equipe).offset(skip).limit(limit).all()
+def listar_equipes(db: Session, skip: int = 0, limit: int = 100, cursor: str = None, incluir_total: bool = False):
+    return paginacao.paginar(db.query(models.Equipe).options(*carregamento.EQUIPE_COMPLETA), models.Equipe.id_equipe, skip, limit, cursor, incluir_total)
 
 def listar_equipes_edicao(db: Session, id_edicao: int):
-    return db.query(models.Equipe).filter(models.Equipe.id_edicao == id_edicao).all()
+    return db.query(models.Equipe).filter(models.Equipe.id_edicao == id_edicao).options(*carregamento.EQUIPE_COMPLETA).all()
 
 def listar_equipe(db: Session, id_equipe: int):
     return db.query(models.Equipe).filter(models.Equipe.id_equipe == id_equipe).first()
@@ -26,18 +31,29 @@ def atualizar_equipe(db: Session, id_equipe: int, equipe_atualizada: schemas.Equ
     if not db_equipe:
         return None
     
-    for chave, valor in equipe_atualizada.model_dump(exclude_unset=True).items():
+    dados = equipe_atualizada.model_dump(exclude_unset=True)
+    mudou_grupo = "grupo" in dados and dados["grupo"] != db_equipe.grupo
+    for chave, valor in dados.items():
         setattr(db_equipe, chave, valor)
+
+    # A linha da equipe na classificação é indexada pelo grupo
+    if mudou_grupo:
+        db.flush()
+        servico_classificacao.recalcular_classificacao(db, db_equipe.id_edicao)
     
     db.commit()
+    cache.invalidar_edicao(db_equipe.id_edicao)
     db.refresh(db_equipe)
     return db_equipe
 
 def excluir_equipe(db: Session, id_equipe: int):
     db_equipe = listar_equipe(db, id_equipe)
     if db_equipe:
+        id_edicao = db_equipe.id_edicao
+        servico_classificacao.remover_classificacao(db, id_equipe=id_equipe)
         db.delete(db_equipe)
         db.commit()
+        cache.invalidar_edicao(id_edicao)
         return True
     return False
 
@@ -51,4 +67,5 @@ def adicionar_participante_equipe(db: Session, id_equipe: int, id_participante:
     if db_participante not in db_equipe.participantes:
         db_equipe.participantes.append(db_participante)
         db.commit()
+        cache.invalidar_edicao(db_equipe.id_edicao)
     return True
@@ -0,0 +1,53 @@
+from sqlalchemy import and_, func, literal, or_
+from sqlalchemy.orm import Session
+import models
+
+def _ler_cursor(cursor: str):
+    # Cursor no formato "total:id_participante" da última linha da página anterior
+    try:
+        total, id_participante = cursor.split(":")
+        return int(total), int(id_participante)
+    except ValueError:
+        raise ValueError("Cursor de paginação inválido.")
+
+def ranking_edicao(db: Session, id_edicao: int, criterio: str, limite: int = 10, cursor: str = None, id_modalidade: int = None):
+    # Top-K de um critério (gols, assistências, cartões) somado por participante, com o nome resolvido
+    # na mesma consulta. A ordem é total decrescente e id crescente; a paginação continua a partir do
+    # cursor (keyset) em vez de OFFSET, então as páginas seguintes custam o mesmo que a primeira.
+    if criterio not in ("gols", "assistencias", "cartoes_amarelos", "cartoes_vermelhos"):
+        raise ValueError(f"Critério de ranking inválido: {criterio}")
+    coluna = getattr(models.EstatisticaPartida, criterio)
+
+    id_participante = models.EstatisticaPartida.id_participante
+    total = func.sum(coluna)
+    nome = func.coalesce(models.Aluno.nome_completo, models.Atleta.nome_completo, literal("Jogador Desconhecido"))
+
+    query = db.query(
+        id_participante.label("id_participante"),
+        nome.label("nome_jogador"),
+        total.label("total"),
+        func.count(models.EstatisticaPartida.id_partida).label("jogos")
+    ).select_from(models.Partida).join(
+        models.EstatisticaPartida, models.EstatisticaPartida.id_partida == models.Partida.id_partida
+    ).outerjoin(
+        models.Aluno, models.Aluno.id_participante == id_participante
+    ).outerjoin(
+        models.Atleta, models.Atleta.id_participante == id_participante
+    ).filter(models.Partida.id_edicao == id_edicao)
+    if id_modalidade is not None:
+        query = query.filter(models.Partida.id_modalidade == id_modalidade)
+
+    query = query.group_by(id_participante, models.Aluno.nome_completo, models.Atleta.nome_completo).having(total > 0)
+    if cursor:
+        total_anterior, id_anterior = _ler_cursor(cursor)
+        query = query.having(or_(total < total_anterior, and_(total == total_anterior, id_participante > id_anterior)))
+
+    linhas = query.order_by(total.desc(), id_participante).limit(limite + 1).all()
+
+    # Uma linha a mais indica se existe próxima página
+    itens = [linha._asdict() for linha in linhas[:limite]]
+    proximo_cursor = None
+    if len(linhas) > limite:
+        ultimo = itens[-1]
+        proximo_cursor = f"{ultimo['total']}:{ultimo['id_participante']}"
+    return {"criterio": criterio, "itens": itens, "proximo_cursor": proximo_cursor}
@@ -1,5 +1,7 @@
 from sqlalchemy.orm import Session
+import cache
 import models
+import paginacao
 import schemas
 
 
@@ -32,14 +34,15 @@ def criar_evento(db: Session, evento: schemas.EventoCreate):
     db.add(db_edicao)
     
     db.commit()
+    cache.invalidar_publico()
     db.refresh(db_evento)
     return db_evento
 
 def listar_evento(db: Session, id_evento: int):
     return db.query(models.Evento).filter(models.Evento.id_evento == id_evento).first()
 
-def listar_eventos(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(models.Evento).offset(skip).limit(limit).all()
+def listar_eventos(db: Session, skip: int = 0, limit: int = 100, cursor: str = None, incluir_total: bool = False):
+    return paginacao.paginar(db.query(models.Evento), models.Evento.id_evento, skip, limit, cursor, incluir_total)
 
 def atualizar_evento(db: Session, id_evento: int, evento_atualizado: schemas.EventoUpdate):
     db_evento = listar_evento(db, id_evento)
@@ -57,6 +60,7 @@ def atualizar_evento(db: Session, id_evento: int, evento_atualizado: schemas.Eve
         db_evento.modalidades = modalidades
 
     db.commit()
+    cache.invalidar_publico()
     db.refresh(db_evento)
     return db_evento
 
@@ -66,5 +70,6 @@ def excluir_evento(db: Session, id_evento: int):
     if db_evento:
         db.delete(db_evento)
         db.commit()
+        cache.invalidar_publico()
         return True
     return False
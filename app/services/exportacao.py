@@ -0,0 +1,113 @@
+from datetime import date
+from sqlalchemy.orm import Session, aliased
+import models
+from services import classificacao as servico_classificacao
+
+# Exportação de listas para planilha: cada função é um gerador de tuplas na ordem de um cabeçalho
+# fixo. As consultas selecionam só colunas (sem montar objetos do ORM) e são lidas com yield_per,
+# que no MySQL usa um cursor do lado do servidor: a memória fica constante qualquer que seja o
+# tamanho da tabela, e a primeira linha pode ser enviada antes de a consulta terminar.
+
+LOTE = 1000
+
+# Os títulos dos alunos são os aceitos pela importação (services/importacao.py), inclusive a turma em
+# "IDs Turmas": a planilha exportada pode ser corrigida e importada de volta em outro cadastro
+CABECALHO_ALUNOS = (
+    "ID Aluno", "Nome Completo", "Data de Nascimento", "Escola", "Série/Ano", "Nome da Mãe", "Nome do Pai",
+    "Telefone 1", "Telefone 2", "Endereço", "Recomendações Médicas", "IDs Turmas", "Data da Matrícula", "Matrícula Ativa",
+)
+CABECALHO_PRESENCAS = ("Data da Aula", "ID Turma", "Turma", "ID Aluno", "Aluno", "Status", "Observação")
+CABECALHO_MATRICULAS = (
+    "ID Matrícula", "Data da Matrícula", "Ativa", "ID Aluno", "Aluno", "ID Turma", "Turma", "Modalidade", "Professor",
+)
+CABECALHO_PARTIDAS = (
+    "ID Partida", "Modalidade", "Fase", "Data", "Hora", "Local", "Equipe Casa", "Placar Casa",
+    "Placar Visitante", "Equipe Visitante", "Status",
+)
+CABECALHO_CLASSIFICACAO = (
+    "Modalidade", "Grupo", "Posição", "Equipe", "Jogos", "Vitórias", "Empates", "Derrotas",
+    "Gols Pró", "Gols Contra", "Saldo", "Pontos",
+)
+
+def exportar_alunos_turma(db: Session, id_turma: int, apenas_ativas: bool = True):
+    query = db.query(
+        models.Aluno.id_aluno, models.Aluno.nome_completo, models.Aluno.data_nascimento, models.Aluno.escola,
+        models.Aluno.serie_ano, models.Aluno.nome_mae, models.Aluno.nome_pai, models.Aluno.telefone_1,
+        models.Aluno.telefone_2, models.Aluno.endereco, models.Aluno.recomendacoes_medicas,
+        models.Matricula.id_turma, models.Matricula.data_matricula, models.Matricula.ativo,
+    ).join(models.Matricula, models.Matricula.id_aluno == models.Aluno.id_aluno).filter(models.Matricula.id_turma == id_turma)
+    if apenas_ativas:
+        query = query.filter(models.Matricula.ativo == True)
+
+    for linha in query.order_by(models.Aluno.nome_completo, models.Aluno.id_aluno).execution_options(yield_per=LOTE):
+        yield tuple(linha)
+
+def exportar_presencas(db: Session, id_turma: int = None, data_inicio: date = None, data_fim: date = None):
+    # Folha de chamada: uma linha por aluno e aula, agrupada por data e turma
+    if data_inicio and data_fim and data_inicio > data_fim:
+        raise ValueError("A data inicial não pode ser posterior à data final.")
+
+    query = db.query(
+        models.Presenca.data_aula, models.Turma.id_turma, models.Turma.descricao, models.Aluno.id_aluno,
+        models.Aluno.nome_completo, models.Presenca.status, models.Presenca.observacao,
+    ).join(models.Matricula, models.Presenca.id_matricula == models.Matricula.id_matricula).join(
+        models.Turma, models.Matricula.id_turma == models.Turma.id_turma
+    ).join(models.Aluno, models.Matricula.id_aluno == models.Aluno.id_aluno)
+
+    if id_turma is not None:
+        query = query.filter(models.Matricula.id_turma == id_turma)
+    if data_inicio:
+        query = query.filter(models.Presenca.data_aula >= data_inicio)
+    if data_fim:
+        query = query.filter(models.Presenca.data_aula <= data_fim)
+
+    query = query.order_by(models.Presenca.data_aula, models.Turma.id_turma, models.Aluno.nome_completo, models.Presenca.id_presenca)
+    for linha in query.execution_options(yield_per=LOTE):
+        yield tuple(linha)
+
+def exportar_matriculas(db: Session, id_turma: int = None, apenas_ativas: bool = False):
+    query = db.query(
+        models.Matricula.id_matricula, models.Matricula.data_matricula, models.Matricula.ativo, models.Aluno.id_aluno,
+        models.Aluno.nome_completo, models.Turma.id_turma, models.Turma.descricao, models.Modalidade.nome, models.Professor.nome,
+    ).join(models.Aluno, models.Matricula.id_aluno == models.Aluno.id_aluno).join(
+        models.Turma, models.Matricula.id_turma == models.Turma.id_turma
+    ).join(models.Modalidade, models.Turma.id_modalidade == models.Modalidade.id_modalidade).join(
+        models.Professor, models.Turma.id_professor == models.Professor.id_professor
+    )
+
+    if id_turma is not None:
+        query = query.filter(models.Matricula.id_turma == id_turma)
+    if apenas_ativas:
+        query = query.filter(models.Matricula.ativo == True)
+
+    for linha in query.order_by(models.Matricula.id_matricula).execution_options(yield_per=LOTE):
+        yield tuple(linha)
+
+def exportar_partidas_edicao(db: Session, id_edicao: int):
+    casa = aliased(models.Equipe)
+    visitante = aliased(models.Equipe)
+    # Outer join nas equipes: partidas de mata-mata ainda sem os classificados também saem
+    query = db.query(
+        models.Partida.id_partida, models.Modalidade.nome, models.Partida.fase, models.Partida.part_data,
+        models.Partida.part_hora, models.Local.loca_nome, casa.nome, models.Partida.placar_casa,
+        models.Partida.placar_visitante, visitante.nome, models.Partida.status,
+    ).join(models.Modalidade, models.Partida.id_modalidade == models.Modalidade.id_modalidade).join(
+        models.Local, models.Partida.id_local == models.Local.id_local
+    ).outerjoin(casa, models.Partida.id_equipe_casa == casa.id_equipe).outerjoin(
+        visitante, models.Partida.id_equipe_visitante == visitante.id_equipe
+    ).filter(models.Partida.id_edicao == id_edicao)
+
+    query = query.order_by(models.Partida.part_data, models.Partida.part_hora, models.Partida.id_partida)
+    for linha in query.execution_options(yield_per=LOTE):
+        yield tuple(linha)
+
+def exportar_classificacao_edicao(db: Session, id_edicao: int):
+    # A classificação já é uma tabela pequena (uma linha por equipe): reaproveita a ordenação e a
+    # posição calculadas pelo serviço
+    modalidades = dict(db.query(models.Modalidade.id_modalidade, models.Modalidade.nome))
+    for linha in servico_classificacao.listar_classificacao(db, id_edicao):
+        yield (
+            modalidades.get(linha["id_modalidade"]), linha["grupo"], linha["posicao"], linha["nome"],
+            linha["jogos"], linha["vitorias"], linha["empates"], linha["derrotas"],
+            linha["gols_pro"], linha["gols_contra"], linha["saldo"], linha["pontos"],
+        )
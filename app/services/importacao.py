@@ -0,0 +1,282 @@
+import csv
+import io
+import re
+from collections import namedtuple
+from datetime import date, datetime
+from pydantic import ValidationError
+from sqlalchemy import exists, func, insert
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session, selectinload
+import models
+import schemas
+from services import busca as servico_busca
+from services import turmas as servico_turmas
+from utils import normalizar_texto
+
+# Importação de alunos em massa a partir de uma planilha (CSV ou XLSX), lida linha a linha.
+# As linhas são validadas em lotes: as turmas e os alunos já cadastrados que o lote menciona são
+# carregados uma vez por lote em índices em memória, e os participantes, alunos e matrículas
+# válidos são gravados com INSERTs de várias linhas. Cada lote é confirmado ao final; as linhas
+# com problema não impedem as demais e voltam no relatório de erros.
+
+TAMANHO_LOTE = 500
+
+# Colunas aceitas (mesmos nomes dos campos de POST /alunos/); o cabeçalho é comparado sem acentos,
+# maiúsculas e espaços, então "Nome Completo" também vale
+CAMPOS_TEXTO = ("nome_completo", "escola", "serie_ano", "nome_mae", "nome_pai", "telefone_1", "telefone_2", "endereco", "recomendacoes_medicas")
+# Obrigatórios na tabela de alunos
+CAMPOS_OBRIGATORIOS = ("nome_completo", "data_nascimento", "escola", "serie_ano", "telefone_1", "endereco")
+# Títulos comuns em planilhas feitas à mão
+SINONIMOS = {
+    "nome": "nome_completo",
+    "data_de_nascimento": "data_nascimento",
+    "nascimento": "data_nascimento",
+    "serie": "serie_ano",
+    "nome_da_mae": "nome_mae",
+    "nome_do_pai": "nome_pai",
+    "telefone": "telefone_1",
+    "turmas": "ids_turmas",
+}
+FORMATOS_DATA = ("%Y-%m-%d", "%d/%m/%Y", "%d-%m-%Y")
+
+# Só o necessário para checar_conflito_agenda, sem objetos do ORM que expiram a cada commit
+TurmaAgenda = namedtuple("TurmaAgenda", "id_turma descricao dias_semana horario_inicio horario_fim")
+
+# --- Leitura ---
+
+def _coluna(titulo) -> str:
+    coluna = normalizar_texto(str(titulo or "")).replace(" ", "_")
+    return SINONIMOS.get(coluna, coluna)
+
+def _conferir_cabecalho(cabecalho: list):
+    faltando = [c for c in CAMPOS_OBRIGATORIOS if c not in cabecalho]
+    if faltando:
+        raise ValueError(f"Colunas obrigatórias ausentes na planilha: {', '.join(faltando)}.")
+
+def _linhas_csv(arquivo):
+    texto = io.TextIOWrapper(arquivo, encoding="utf-8-sig", newline="")
+    try:
+        primeira = texto.readline()
+        # Planilhas exportadas em português costumam usar ";" como separador
+        delimitador = ";" if primeira.count(";") > primeira.count(",") else ","
+        cabecalho = [_coluna(c) for c in next(csv.reader([primeira], delimiter=delimitador), [])]
+        _conferir_cabecalho(cabecalho)
+        for numero, valores in enumerate(csv.reader(texto, delimiter=delimitador), start=2):
+            if any(v.strip() for v in valores):
+                yield numero, dict(zip(cabecalho, valores))
+    except UnicodeDecodeError:
+        raise ValueError("O arquivo CSV deve estar codificado em UTF-8.")
+    finally:
+        # Devolve o arquivo sem fechá-lo (quem abriu é quem fecha)
+        texto.detach()
+
+def _linhas_xlsx(arquivo):
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ValueError("A importação de arquivos XLSX requer o pacote 'openpyxl'. Envie um CSV ou instale o pacote.")
+    # read_only lê a planilha em fluxo, sem carregar todas as células
+    pasta = load_workbook(arquivo, read_only=True, data_only=True)
+    try:
+        linhas = pasta.active.iter_rows(values_only=True)
+        cabecalho = [_coluna(c) for c in next(linhas, ())]
+        _conferir_cabecalho(cabecalho)
+        for numero, valores in enumerate(linhas, start=2):
+            if any(v not in (None, "") for v in valores):
+                yield numero, dict(zip(cabecalho, valores))
+    finally:
+        pasta.close()
+
+def ler_planilha(arquivo, nome_arquivo: str):
+    # Gerador de (número da linha na planilha, {coluna: valor})
+    extensao = (nome_arquivo or "").rsplit(".", 1)[-1].lower()
+    if extensao == "csv":
+        return _linhas_csv(arquivo)
+    if extensao == "xlsx":
+        return _linhas_xlsx(arquivo)
+    raise ValueError("Formato de arquivo não suportado. Envie uma planilha .csv ou .xlsx.")
+
+# --- Validação ---
+
+def _texto(valor):
+    if valor is None:
+        return None
+    if isinstance(valor, float) and valor.is_integer():
+        # Números digitados no Excel (telefones, série) chegam como float
+        valor = int(valor)
+    valor = str(valor).strip()
+    return valor or None
+
+def _data(valor) -> date:
+    if isinstance(valor, datetime):
+        return valor.date()
+    if isinstance(valor, date):
+        return valor
+    for formato in FORMATOS_DATA:
+        try:
+            return datetime.strptime(str(valor).strip(), formato).date()
+        except ValueError:
+            continue
+    raise ValueError(f"Data de nascimento inválida: '{valor}'. Use AAAA-MM-DD ou DD/MM/AAAA.")
+
+def _ids_turmas(valor) -> list:
+    texto = _texto(valor)
+    if not texto:
+        return []
+    try:
+        ids = [int(parte) for parte in re.split(r"[,;|\s]+", texto) if parte]
+    except ValueError:
+        raise ValueError("ids_turmas deve conter números separados por vírgula.")
+    return list(dict.fromkeys(ids))
+
+def _validar(dados: dict) -> schemas.AlunoCreate:
+    faltando = [c for c in CAMPOS_OBRIGATORIOS if not _texto(dados.get(c))]
+    if faltando:
+        raise ValueError(f"Campos obrigatórios em branco: {', '.join(faltando)}.")
+    ids_turmas = _ids_turmas(dados.get("ids_turmas"))
+    if not ids_turmas:
+        raise ValueError("Pelo menos uma turma deve ser selecionada (coluna ids_turmas).")
+    try:
+        return schemas.AlunoCreate(
+            **{c: _texto(dados.get(c)) for c in CAMPOS_TEXTO},
+            data_nascimento=_data(dados["data_nascimento"]),
+            ids_turmas=ids_turmas,
+        )
+    except ValidationError as e:
+        raise ValueError("; ".join(f"{'.'.join(map(str, erro['loc']))}: {erro['msg']}" for erro in e.errors()))
+
+def _carregar_turmas(db: Session, ids: set, turmas: dict):
+    # Uma consulta por lote para as turmas ainda não vistas, com os dias da semana
+    faltando = ids - turmas.keys()
+    if not faltando:
+        return
+    consulta = db.query(models.Turma).options(selectinload(models.Turma.dias)).filter(models.Turma.id_turma.in_(faltando))
+    for turma in consulta:
+        turmas[turma.id_turma] = TurmaAgenda(turma.id_turma, turma.descricao, turma.dias_semana, turma.horario_inicio, turma.horario_fim)
+
+def _conflito_turmas(aluno: schemas.AlunoCreate, turmas: dict):
+    # Mesma regra de cadastrar_aluno: as turmas escolhidas não podem se sobrepor
+    turmas_para_checar = []
+    for id_turma in aluno.ids_turmas:
+        turma_nova = turmas[id_turma]
+        if servico_turmas.checar_conflito_agenda(turma_nova.dias_semana, turma_nova.horario_inicio, turma_nova.horario_fim, turmas_para_checar):
+            return f"Conflito de horário detectado envolvendo a turma {turma_nova.descricao or turma_nova.id_turma}"
+        turmas_para_checar.append(turma_nova)
+    return None
+
+# --- Gravação ---
+
+def _inserir(db: Session, novos: list):
+    # 1. Participantes em um INSERT de várias linhas. Os ids voltam como os participantes de aluno
+    #    acima do maior id anterior que ainda não têm aluno nem atleta: os cadastrados por outras
+    #    requisições são confirmados já com o aluno/atleta, na mesma transação
+    ultimo = db.query(func.max(models.Participante.id_participante)).scalar() or 0
+    db.execute(insert(models.Participante), [{"tipo": "aluno"} for _ in novos])
+    ids_participantes = [id_participante for (id_participante,) in db.query(models.Participante.id_participante).filter(
+        models.Participante.id_participante > ultimo,
+        models.Participante.tipo == "aluno",
+        ~exists().where(models.Aluno.id_participante == models.Participante.id_participante),
+        ~exists().where(models.Atleta.id_participante == models.Participante.id_participante),
+    ).order_by(models.Participante.id_participante)]
+    if len(ids_participantes) != len(novos):
+        raise RuntimeError("Não foi possível identificar os participantes inseridos no lote.")
+
+    # 2. Alunos; nome_normalizado vai explícito porque o INSERT em lote não passa pelo ORM
+    db.execute(insert(models.Aluno).execution_options(render_nulls=True), [
+        {
+            "id_participante": id_participante,
+            **{c: getattr(aluno, c) for c in CAMPOS_TEXTO},
+            "nome_normalizado": nome_normalizado,
+            "data_nascimento": aluno.data_nascimento,
+            "ativo": True,
+        }
+        for id_participante, (aluno, nome_normalizado) in zip(ids_participantes, novos)
+    ])
+    # id_participante é único: os ids dos alunos voltam sem depender da ordem de inserção
+    ids_alunos = dict(db.query(models.Aluno.id_participante, models.Aluno.id_aluno).filter(
+        models.Aluno.id_participante.in_(ids_participantes)
+    ))
+
+    # 3. Matrículas e índice de busca
+    matriculas = [
+        {"id_aluno": ids_alunos[id_participante], "id_turma": id_turma}
+        for id_participante, (aluno, _) in zip(ids_participantes, novos)
+        for id_turma in aluno.ids_turmas
+    ]
+    db.execute(insert(models.Matricula), matriculas)
+    servico_busca.indexar_em_lote(db, "aluno", [
+        (ids_alunos[id_participante], aluno.nome_completo) for id_participante, (aluno, _) in zip(ids_participantes, novos)
+    ])
+
+def _processar_lote(db: Session, lote: list, turmas: dict, linhas_por_chave: dict, simular: bool, erros: list) -> int:
+    # 1. Validação de cada linha
+    validos = []
+    for numero, dados in lote:
+        try:
+            aluno = _validar(dados)
+        except ValueError as e:
+            erros.append({"linha": numero, "erro": str(e)})
+            continue
+        validos.append((numero, aluno, normalizar_texto(aluno.nome_completo)))
+
+    # 2. Índices do lote: turmas mencionadas e alunos já cadastrados com os mesmos nomes
+    _carregar_turmas(db, {id_turma for _, aluno, _ in validos for id_turma in aluno.ids_turmas}, turmas)
+    nomes = {nome for _, _, nome in validos}
+    existentes = set(
+        db.query(models.Aluno.nome_normalizado, models.Aluno.data_nascimento).filter(models.Aluno.nome_normalizado.in_(nomes))
+    ) if nomes else set()
+
+    # 3. Regras de cadastro contra os índices em memória
+    novos = []
+    for numero, aluno, nome in validos:
+        chave = (nome, aluno.data_nascimento)
+        inexistentes = [str(id_turma) for id_turma in aluno.ids_turmas if id_turma not in turmas]
+        if chave in existentes:
+            erro = "Já existe um aluno cadastrado com este nome e data de nascimento."
+        elif chave in linhas_por_chave:
+            erro = f"Aluno repetido na planilha (mesmo nome e data de nascimento da linha {linhas_por_chave[chave]})."
+        elif inexistentes:
+            erro = f"Turma(s) não encontrada(s): {', '.join(inexistentes)}."
+        else:
+            erro = _conflito_turmas(aluno, turmas)
+        if erro:
+            erros.append({"linha": numero, "erro": erro})
+            continue
+        linhas_por_chave[chave] = numero
+        novos.append((numero, aluno, nome))
+
+    if simular or not novos:
+        return len(novos)
+
+    # 4. Gravação do lote
+    try:
+        _inserir(db, [(aluno, nome) for _, aluno, nome in novos])
+        db.commit()
+    except (SQLAlchemyError, RuntimeError) as e:
+        # RuntimeError: _inserir não conseguiu associar os participantes inseridos (nada do lote fica gravado)
+        db.rollback()
+        motivo = str(e) if isinstance(e, RuntimeError) else e.__class__.__name__
+        erros.extend({"linha": numero, "erro": f"Erro ao gravar o lote: {motivo}"} for numero, _, _ in novos)
+        return 0
+    return len(novos)
+
+def importar_alunos(db: Session, linhas, tamanho_lote: int = TAMANHO_LOTE, simular: bool = False) -> dict:
+    # linhas: gerador de ler_planilha. Com simular=True só valida, sem gravar nada
+    turmas = {}
+    linhas_por_chave = {}
+    erros = []
+    total = 0
+    importados = 0
+
+    lote = []
+    for numero, dados in linhas:
+        total += 1
+        lote.append((numero, dados))
+        if len(lote) >= tamanho_lote:
+            importados += _processar_lote(db, lote, turmas, linhas_por_chave, simular, erros)
+            lote = []
+    if lote:
+        importados += _processar_lote(db, lote, turmas, linhas_por_chave, simular, erros)
+
+    erros.sort(key=lambda erro: erro["linha"])
+    return {"total_linhas": total, "importados": importados, "simulacao": simular, "erros": erros}
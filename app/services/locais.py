@@ -1,5 +1,7 @@
 from sqlalchemy.orm import Session
+import cache
 import models, schemas
+import paginacao
 
 def criar_local(db: Session, local: schemas.LocalCreate):
     db_local = models.Local(
@@ -12,8 +14,8 @@ def criar_local(db: Session, local: schemas.LocalCreate):
     db.refresh(db_local)
     return db_local
 
-def listar_locais(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(models.Local).offset(skip).limit(limit).all()
+def listar_locais(db: Session, skip: int = 0, limit: int = 100, cursor: str = None, incluir_total: bool = False):
+    return paginacao.paginar(db.query(models.Local), models.Local.id_local, skip, limit, cursor, incluir_total)
 
 def listar_local_id(db: Session, id_local: int):
     return db.query(models.Local).filter(models.Local.id_local == id_local).first()
@@ -28,6 +30,7 @@ def atualizar_local(db: Session, id_local: int, local_atualizado: schemas.LocalC
         setattr(db_local, chave, valor)
     
     db.commit()
+    cache.invalidar_publico()
     db.refresh(db_local)
     return db_local
 
@@ -37,5 +40,6 @@ def excluir_local(db: Session, id_local: int):
     if db_local:
         db.delete(db_local)
         db.commit()
+        cache.invalidar_publico()
         return True
     return False
\ No newline at end of file
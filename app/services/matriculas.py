@@ -1,5 +1,7 @@
 from sqlalchemy.orm import Session
+import escopo
 import models
+import paginacao
 import schemas
 from services import turmas as servico_turmas
 
@@ -38,8 +40,11 @@ def criar_matricula(db: Session, matricula: schemas.MatriculaCreate):
     db.refresh(db_matricula)
     return db_matricula
 
-def listar_matriculas(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(models.Matricula).offset(skip).limit(limit).all()
+def listar_matriculas(db: Session, skip: int = 0, limit: int = 100, cursor: str = None, incluir_total: bool = False, id_professor: int = None):
+    query = db.query(models.Matricula)
+    if id_professor is not None:
+        query = escopo.matriculas_do_professor(query, id_professor)
+    return paginacao.paginar(query, models.Matricula.id_matricula, skip, limit, cursor, incluir_total)
 
 def listar_matriculas_turma(db: Session, id_turma: int):
     return db.query(models.Matricula).filter(
@@ -47,11 +52,14 @@ def listar_matriculas_turma(db: Session, id_turma: int):
         models.Matricula.ativo == True
     ).all()
 
-def listar_matriculas_aluno(db: Session, id_aluno: int):
-    return db.query(models.Matricula).filter(
+def listar_matriculas_aluno(db: Session, id_aluno: int, id_professor: int = None):
+    query = db.query(models.Matricula).filter(
         models.Matricula.id_aluno == id_aluno,
         models.Matricula.ativo == True
-    ).all()
+    )
+    if id_professor is not None:
+        query = escopo.matriculas_do_professor(query, id_professor)
+    return query.all()
 
 def verificar_matricula(db: Session, id_aluno: int, id_turma: int):
     return db.query(models.Matricula).filter(
@@ -1,5 +1,7 @@
 from sqlalchemy.orm import Session
+import cache
 import models
+import paginacao
 import schemas
 
 def criar_modalidade(db: Session, modalidade: schemas.ModalidadeCreate):
@@ -19,8 +21,8 @@ def listar_modalidade(db: Session, id_modalidade: int):
 def listar_modalidade_nome(db: Session, nome: str):
     return db.query(models.Modalidade).filter(models.Modalidade.nome == nome).first()
 
-def listar_modalidades(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(models.Modalidade).offset(skip).limit(limit).all()
+def listar_modalidades(db: Session, skip: int = 0, limit: int = 100, cursor: str = None, incluir_total: bool = False):
+    return paginacao.paginar(db.query(models.Modalidade), models.Modalidade.id_modalidade, skip, limit, cursor, incluir_total)
 
 def atualizar_modalidade(db: Session, id_modalidade: int, modalidade_atualizada: schemas.ModalidadeUpdate):
     db_modalidade = listar_modalidade(db, id_modalidade)
@@ -34,6 +36,7 @@ def atualizar_modalidade(db: Session, id_modalidade: int, modalidade_atualizada:
         setattr(db_modalidade, key, value)
 
     db.commit()
+    cache.invalidar_publico()
     db.refresh(db_modalidade)
     return db_modalidade
 
@@ -48,4 +51,5 @@ def excluir_modalidade(db: Session, id_modalidade: int):
 
     db.delete(db_modalidade)
     db.commit()
+    cache.invalidar_publico()
     return db_modalidade
\ No newline at end of file
@@ -1,7 +1,32 @@
+from sqlalchemy import Integer, and_, case, false, func, literal, or_, select
+from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.orm import Session
-from datetime import date, time, datetime, timedelta
+from sqlalchemy.sql.functions import FunctionElement
+from datetime import date, time
+import ao_vivo
+import cache
+import carregamento
 import models
 import schemas
+from services import classificacao as servico_classificacao
+from services import disciplina as servico_disciplina
+
+class minutos_do_dia(FunctionElement):
+    # Converte uma coluna TIME em minutos desde 00:00 para comparar intervalos no banco
+    type = Integer()
+    name = "minutos_do_dia"
+    inherit_cache = True
+
+@compiles(minutos_do_dia)
+def _minutos_do_dia_padrao(element, compiler, **kw):
+    coluna = compiler.process(element.clauses, **kw)
+    return f"(EXTRACT(HOUR FROM {coluna}) * 60 + EXTRACT(MINUTE FROM {coluna}))"
+
+@compiles(minutos_do_dia, "sqlite")
+def _minutos_do_dia_sqlite(element, compiler, **kw):
+    # O SQLite armazena TIME como texto 'HH:MM:SS.ffffff'
+    coluna = compiler.process(element.clauses, **kw)
+    return f"(CAST(substr({coluna}, 1, 2) AS INTEGER) * 60 + CAST(substr({coluna}, 4, 2) AS INTEGER))"
 
 def verificar_conflito_partida(
     db: Session, 
@@ -14,46 +39,57 @@ def verificar_conflito_partida(
     id_equipe_casa: int = None,
     id_equipe_visitante: int = None
 ):
-    # 1. Obter duração da modalidade
-    mod = db.query(models.Modalidade).filter(models.Modalidade.id_modalidade == id_modalidade).first()
-    duracao = mod.duracao_minutos if mod else 60
+    # 1. Intervalo da nova partida (a duração da modalidade é resolvida na própria consulta)
+    inicio_nova = hora.hour * 60 + hora.minute
+    duracao_nova = select(models.Modalidade.duracao_minutos).where(
+        models.Modalidade.id_modalidade == id_modalidade
+    ).scalar_subquery()
+    fim_nova = inicio_nova + func.coalesce(duracao_nova, 60)
+
+    # 2. Intervalo das partidas existentes, com a duração obtida por um único JOIN em modalidades
+    inicio_existente = minutos_do_dia(models.Partida.part_hora)
+    fim_existente = inicio_existente + func.coalesce(models.Modalidade.duracao_minutos, 60)
 
-    inicio_nova = datetime.combine(data, hora)
-    fim_nova = inicio_nova + timedelta(minutes=duracao)
+    # 3. Recursos disputados: local, árbitro e equipes
+    conflito_local = models.Partida.id_local == id_local
+    conflito_arbitro = models.Partida.id_arbitro == id_arbitro
+    equipes_novas = [e for e in (id_equipe_casa, id_equipe_visitante) if e is not None]
+    ramos = [conflito_local, conflito_arbitro]
+    if equipes_novas:
+        ramos += [
+            models.Partida.id_equipe_casa.in_(equipes_novas),
+            models.Partida.id_equipe_visitante.in_(equipes_novas)
+        ]
+        conflito_equipes = or_(*ramos[2:])
+    else:
+        conflito_equipes = false()
 
-    # 2. Buscar todas as partidas da mesma data que não estejam canceladas
-    partidas_dia = db.query(models.Partida).filter(
-        models.Partida.part_data == data,
-        models.Partida.status != "Cancelada"
+    # 4. Teste de sobreposição feito no banco. A data é repetida em cada ramo do OR
+    # para que cada um use seu índice (part_data, recurso) em vez de varrer o dia inteiro.
+    mesma_data = models.Partida.part_data == data
+    consulta = select(
+        func.max(case((conflito_local, 1), else_=0)),
+        func.max(case((conflito_arbitro, 1), else_=0)),
+        func.max(case((conflito_equipes, 1), else_=0)),
+    ).select_from(models.Partida).outerjoin(
+        models.Modalidade, models.Modalidade.id_modalidade == models.Partida.id_modalidade
+    ).where(
+        or_(*[and_(mesma_data, ramo) for ramo in ramos]),
+        models.Partida.status != "Cancelada",
+        inicio_existente < fim_nova,
+        literal(inicio_nova) < fim_existente
     )
     if id_partida_ignorar:
-        partidas_dia = partidas_dia.filter(models.Partida.id_partida != id_partida_ignorar)
+        consulta = consulta.where(models.Partida.id_partida != id_partida_ignorar)
 
-    partidas_list = partidas_dia.all()
+    tem_local, tem_arbitro, tem_equipes = db.execute(consulta).one()
 
-    for partida in partidas_list:
-        # Obter duração da partida existente
-        mod_existente = db.query(models.Modalidade).filter(models.Modalidade.id_modalidade == partida.id_modalidade).first()
-        duracao_existente = mod_existente.duracao_minutos if mod_existente else 60
-
-        inicio_existente = datetime.combine(partida.part_data, partida.part_hora)
-        fim_existente = inicio_existente + timedelta(minutes=duracao_existente)
-
-        # Verificar sobreposição de horários (Overlap)
-        if (inicio_existente < fim_nova) and (inicio_nova < fim_existente):
-            # Conflito de Local
-            if partida.id_local == id_local:
-                return "O local já possui uma partida agendada com sobreposição de horário."
-            
-            # Conflito de Árbitro
-            if partida.id_arbitro == id_arbitro:
-                return "O árbitro já possui uma partida agendada com sobreposição de horário."
-            
-            # Conflito de Equipes
-            equipes_novas = {id_equipe_casa, id_equipe_visitante} - {None}
-            equipes_existentes = {partida.id_equipe_casa, partida.id_equipe_visitante} - {None}
-            if equipes_novas & equipes_existentes:
-                return "Uma das equipes participantes já possui uma partida agendada com sobreposição de horário."
+    if tem_local:
+        return "O local já possui uma partida agendada com sobreposição de horário."
+    if tem_arbitro:
+        return "O árbitro já possui uma partida agendada com sobreposição de horário."
+    if tem_equipes:
+        return "Uma das equipes participantes já possui uma partida agendada com sobreposição de horário."
 
     return None
 
@@ -111,15 +147,26 @@ def criar_partida(db: Session, partida: schemas.PartidaCreate):
 
     db_partida = models.Partida(**dados)
     db.add(db_partida)
+    servico_classificacao.atualizar_por_partida(db, None, servico_classificacao.resultado_partida(db_partida))
+    if db_partida.status == "Finalizada":
+        # Uma partida já finalizada também pode contar como jogo cumprido de suspensão
+        servico_disciplina.registrar_finalizacao(db, db_partida)
     db.commit()
+    cache.invalidar_edicao(db_partida.id_edicao)
     db.refresh(db_partida)
+    ao_vivo.publicar(db_partida.id_edicao, ao_vivo.delta_partida(db_partida))
     return db_partida
 
 def listar_partida(db: Session, id_partida: int):
     return db.query(models.Partida).filter(models.Partida.id_partida == id_partida).first()
 
 def listar_partidas_edicao(db: Session, id_edicao: int):
-    return db.query(models.Partida).filter(models.Partida.id_edicao == id_edicao).all()
+    return db.query(models.Partida).filter(models.Partida.id_edicao == id_edicao).options(*carregamento.PARTIDA_COMPLETA).all()
+
+def listar_estatisticas_partida(db: Session, id_partida: int):
+    return db.query(models.EstatisticaPartida).filter(
+        models.EstatisticaPartida.id_partida == id_partida
+    ).options(*carregamento.ESTATISTICA_COMPLETA).all()
 
 def atualizar_partida(db: Session, id_partida: int, partida_atualizada: schemas.PartidaUpdate):
     db_partida = listar_partida(db, id_partida)
@@ -152,13 +199,20 @@ def atualizar_partida(db: Session, id_partida: int, partida_atualizada: schemas.
         if erro:
             raise ValueError(erro)
 
+    resultado_anterior = servico_classificacao.resultado_partida(db_partida)
     status_anterior = db_partida.status
+    ordem_anterior = (db_partida.part_data, db_partida.part_hora, db_partida.id_equipe_casa, db_partida.id_equipe_visitante)
     placar_casa_anterior = db_partida.placar_casa
     placar_visitante_anterior = db_partida.placar_visitante
 
     for chave, valor in dados.items():
         setattr(db_partida, chave, valor)
 
+    # Partidas publicadas no placar ao vivo. Guardadas à medida que mudam: os flushes da
+    # classificação esvaziam o db.dirty antes do commit
+    alteradas = [db_partida]
+    proxima = None
+
     # Se a partida foi finalizada e tem próxima partida, promover o vencedor
     if db_partida.status == "Finalizada" and db_partida.id_proxima_partida:
         if db_partida.placar_casa == db_partida.placar_visitante:
@@ -208,14 +262,50 @@ def atualizar_partida(db: Session, id_partida: int, partida_atualizada: schemas.
             elif proxima.id_equipe_visitante == vencedor_antigo_id:
                 proxima.id_equipe_visitante = None
 
+    if proxima is not None and db.is_modified(proxima):
+        alteradas.append(proxima)
+
+    # Atualizar a classificação quando a partida entra ou sai de "Finalizada" (ou muda de placar)
+    resultado_atual = servico_classificacao.resultado_partida(db_partida)
+    servico_classificacao.atualizar_por_partida(db, resultado_anterior, resultado_atual)
+
+    # Encerrar (ou reabrir) um jogo de grupo pode definir as equipes das vagas de mata-mata
+    if resultado_anterior != resultado_atual or status_anterior != db_partida.status:
+        encerrados = ("Finalizada", "Cancelada")
+        reaberta = status_anterior in encerrados and db_partida.status not in encerrados
+        alteradas += servico_classificacao.preencher_vagas_grupo(db, db_partida, reaberta=reaberta)
+
+    # Suspensões cumpridas dependem das partidas finalizadas e da ordem delas. Finalizar sem remarcar
+    # só ajusta os acumuladores; reabrir ou remarcar refaz o histórico dos jogadores das equipes
+    ordem_atual = (db_partida.part_data, db_partida.part_hora, db_partida.id_equipe_casa, db_partida.id_equipe_visitante)
+    finalizada = (status_anterior == "Finalizada", db_partida.status == "Finalizada")
+    if finalizada == (False, True) and ordem_atual == ordem_anterior:
+        servico_disciplina.registrar_finalizacao(db, db_partida)
+    elif finalizada[0] != finalizada[1] or ordem_atual != ordem_anterior:
+        servico_disciplina.recalcular_equipes(db, db_partida.id_edicao, ordem_anterior[2:] + ordem_atual[2:])
+
     db.commit()
+    cache.invalidar_edicao(db_partida.id_edicao, id_partida)
+    # Deltas do placar ao vivo: a partida e as que ela alterou (vencedor promovido, vagas de grupo),
+    # com os valores confirmados
+    ao_vivo.publicar(db_partida.id_edicao, *[ao_vivo.delta_partida(p) for p in alteradas])
     db.refresh(db_partida)
     return db_partida
 
 def excluir_partida(db: Session, id_partida: int):
     db_partida = listar_partida(db, id_partida)
     if db_partida:
+        id_edicao = db_partida.id_edicao
+        servico_classificacao.atualizar_por_partida(db, servico_classificacao.resultado_partida(db_partida), None)
+        # As estatísticas saem junto com a partida: refazer os cartões de quem atuou e as
+        # suspensões dos jogadores das duas equipes
+        atuaram = [e.id_participante for e in db_partida.estatisticas]
+        equipes = [db_partida.id_equipe_casa, db_partida.id_equipe_visitante]
         db.delete(db_partida)
+        servico_disciplina.recalcular_participantes(db, id_edicao, atuaram)
+        servico_disciplina.recalcular_equipes(db, id_edicao, equipes)
         db.commit()
+        cache.invalidar_edicao(id_edicao, id_partida)
+        ao_vivo.publicar(id_edicao, ao_vivo.delta_partida_removida(id_partida))
         return True
     return False
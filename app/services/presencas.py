@@ -1,46 +1,143 @@
+from sqlalchemy import case, delete, extract, func, insert, select, update
+from sqlalchemy.dialects.mysql import insert as insert_mysql
+from sqlalchemy.dialects.sqlite import insert as insert_sqlite
 from sqlalchemy.orm import Session
+import calendar
 from datetime import date
 import models
 import schemas
 
-def registrar_presenca_lote(db: Session, lista_presenca: schemas.ListaPresenca):
-    # Obter todas as matrículas ativas da turma
-    matriculas_validas = db.query(models.Matricula).filter(
-        models.Matricula.id_turma == lista_presenca.id_turma,
-        models.Matricula.ativo == True
-    ).all()
-    ids_validos = {m.id_matricula for m in matriculas_validas}
+# Linhas por comando de upsert: mantém o INSERT multi-linha abaixo do max_allowed_packet do MySQL
+# e do limite de parâmetros do SQLite mesmo em sincronizações grandes
+TAMANHO_LOTE_UPSERT = 1000
 
-    registros = []
-    
-    for item in lista_presenca.presencas:
-        if item.id_matricula not in ids_validos:
-            raise ValueError(f"Matrícula ID {item.id_matricula} é inválida, inativa ou não pertence à turma {lista_presenca.id_turma}.")
-
-        presenca_existente = db.query(models.Presenca).filter(
-            models.Presenca.id_matricula == item.id_matricula,
-            models.Presenca.data_aula == lista_presenca.data_aula
-        ).first()
-
-        if presenca_existente:
-            presenca_existente.status = item.status
-            presenca_existente.observacao = item.observacao
-            registros.append(presenca_existente)
+def _upsert_presencas(db: Session, linhas: list):
+    # INSERT multi-linha que atualiza as presenças já lançadas (chave única matrícula + data)
+    dialeto = db.get_bind().dialect.name
+    if dialeto not in ("mysql", "sqlite"):
+        _upsert_presencas_generico(db, linhas)
+        return
+
+    for i in range(0, len(linhas), TAMANHO_LOTE_UPSERT):
+        if dialeto == "mysql":
+            stmt = insert_mysql(models.Presenca).values(linhas[i:i + TAMANHO_LOTE_UPSERT])
+            stmt = stmt.on_duplicate_key_update(status=stmt.inserted.status, observacao=stmt.inserted.observacao)
         else:
-            nova_presenca = models.Presenca(
-                id_matricula=item.id_matricula,
-                data_aula=lista_presenca.data_aula,
-                status=item.status,
-                observacao=item.observacao
+            stmt = insert_sqlite(models.Presenca).values(linhas[i:i + TAMANHO_LOTE_UPSERT])
+            stmt = stmt.on_conflict_do_update(
+                index_elements=["id_matricula", "data_aula"],
+                set_={"status": stmt.excluded.status, "observacao": stmt.excluded.observacao}
             )
-            db.add(nova_presenca)
-            registros.append(nova_presenca)
-    
+        db.execute(stmt)
+
+def _upsert_presencas_generico(db: Session, linhas: list):
+    # Sem upsert nativo: uma consulta para as existentes, um INSERT e um UPDATE em lote
+    existentes = {
+        (id_matricula, data_aula): id_presenca
+        for id_matricula, data_aula, id_presenca in db.query(
+            models.Presenca.id_matricula, models.Presenca.data_aula, models.Presenca.id_presenca
+        ).filter(
+            models.Presenca.id_matricula.in_({l["id_matricula"] for l in linhas}),
+            models.Presenca.data_aula.in_({l["data_aula"] for l in linhas})
+        ).all()
+    }
+
+    novas = [l for l in linhas if (l["id_matricula"], l["data_aula"]) not in existentes]
+    alteradas = [
+        {"id_presenca": existentes[(l["id_matricula"], l["data_aula"])], "status": l["status"], "observacao": l["observacao"]}
+        for l in linhas if (l["id_matricula"], l["data_aula"]) in existentes
+    ]
+    if novas:
+        db.execute(insert(models.Presenca), novas)
+    if alteradas:
+        db.execute(update(models.Presenca), alteradas)
+
+def _matriculas_validas(db: Session, ids_turmas: set):
+    # Pares (turma, matrícula) ativos de todas as turmas envolvidas, em uma única consulta
+    return set(db.query(models.Matricula.id_turma, models.Matricula.id_matricula).filter(
+        models.Matricula.id_turma.in_(ids_turmas),
+        models.Matricula.ativo == True
+    ).all())
+
+def _validar_folha(folha: schemas.ListaPresenca, validas: set):
+    # O último item de uma mesma matrícula prevalece
+    itens = {}
+    for item in folha.presencas:
+        if (folha.id_turma, item.id_matricula) not in validas:
+            raise ValueError(f"Matrícula ID {item.id_matricula} é inválida, inativa ou não pertence à turma {folha.id_turma}.")
+        itens[item.id_matricula] = item
+    return itens
+
+def _gravar_folhas(db: Session, folhas: list):
+    # Recebe [(folha, itens validados)] e grava tudo em uma transação;
+    # devolve as presenças gravadas indexadas por (matrícula, data)
+    linhas = {}
+    for folha, itens in folhas:
+        for item in itens.values():
+            linhas[(item.id_matricula, folha.data_aula)] = {
+                "id_matricula": item.id_matricula,
+                "data_aula": folha.data_aula,
+                "status": item.status.value,
+                "observacao": item.observacao
+            }
+    if not linhas:
+        return {}
+
+    _upsert_presencas(db, list(linhas.values()))
+    atualizar_resumo_mensal(db, {id_matricula for id_matricula, _ in linhas}, {data_aula for _, data_aula in linhas})
     db.commit()
-    for r in registros:
-        db.refresh(r)
-        
-    return registros
+
+    presencas = db.query(models.Presenca).filter(
+        models.Presenca.id_matricula.in_({id_matricula for id_matricula, _ in linhas}),
+        models.Presenca.data_aula.in_({data_aula for _, data_aula in linhas})
+    ).all()
+    return {(p.id_matricula, p.data_aula): p for p in presencas}
+
+def registrar_presenca_lote(db: Session, lista_presenca: schemas.ListaPresenca):
+    # 1. Validar os itens contra as matrículas ativas da turma
+    itens = _validar_folha(lista_presenca, _matriculas_validas(db, {lista_presenca.id_turma}))
+
+    # 2. Gravar a chamada inteira de uma vez
+    gravadas = _gravar_folhas(db, [(lista_presenca, itens)])
+
+    # 3. Montar a resposta na ordem da chamada
+    return [gravadas[(id_matricula, lista_presenca.data_aula)] for id_matricula in itens]
+
+def sincronizar_presencas(db: Session, sincronizacao: schemas.SincronizacaoPresencas):
+    # 1. Validar todas as folhas com uma única consulta de matrículas
+    validas = _matriculas_validas(db, {folha.id_turma for folha in sincronizacao.folhas})
+
+    # 2. Separar as folhas válidas; folhas com erro são reportadas e não bloqueiam as demais
+    aceitas = []
+    erros = {}
+    for i, folha in enumerate(sincronizacao.folhas):
+        try:
+            aceitas.append((folha, _validar_folha(folha, validas)))
+        except ValueError as e:
+            erros[i] = str(e)
+
+    # 3. Gravar todas as folhas válidas em uma única transação
+    gravadas = _gravar_folhas(db, aceitas)
+
+    # 4. Resultado por folha, na ordem recebida
+    itens_por_folha = iter(itens for _, itens in aceitas)
+    resultados = []
+    for i, folha in enumerate(sincronizacao.folhas):
+        if i in erros:
+            resultados.append(schemas.ResultadoFolhaPresenca(
+                id_turma=folha.id_turma, data_aula=folha.data_aula, sucesso=False, erro=erros[i]
+            ))
+            continue
+        itens = next(itens_por_folha)
+        resultados.append(schemas.ResultadoFolhaPresenca(
+            id_turma=folha.id_turma, data_aula=folha.data_aula, sucesso=True,
+            presencas=[gravadas[(id_matricula, folha.data_aula)] for id_matricula in itens]
+        ))
+    return schemas.ResultadoSincronizacao(
+        folhas=resultados,
+        total_gravadas=sum(len(r.presencas) for r in resultados),
+        total_com_erro=len(erros)
+    )
 
 def listar_presencas_turma_data(db: Session, id_turma: int, data_aula: date):
     matriculas = db.query(models.Matricula).filter(
@@ -58,4 +155,141 @@ def listar_presencas_turma_data(db: Session, id_turma: int, data_aula: date):
         models.Presenca.data_aula == data_aula
     ).all()
     
-    return presencas
\ No newline at end of file
+    return presencas
+
+def _contar_status(status: str):
+    return func.sum(case((models.Presenca.status == status, 1), else_=0))
+
+def _select_resumo_mensal():
+    # Contagens de presencas por matrícula e mês, no formato da tabela de resumo
+    ano = extract("year", models.Presenca.data_aula)
+    mes = extract("month", models.Presenca.data_aula)
+    return select(
+        models.Presenca.id_matricula, ano, mes,
+        _contar_status("Presente"), _contar_status("Ausente"), _contar_status("Justificado"),
+        func.count(models.Presenca.id_presenca)
+    ).group_by(models.Presenca.id_matricula, ano, mes)
+
+_COLUNAS_RESUMO = ["id_matricula", "ano", "mes", "presentes", "ausentes", "justificados", "total"]
+
+def atualizar_resumo_mensal(db: Session, ids_matriculas: set, datas: set):
+    # Recalcula, dentro da transação corrente, só os meses tocados pelas matrículas informadas.
+    # Recontar a partir das presenças (em vez de somar deltas) mantém o resumo correto quando
+    # uma chamada reenviada troca o status de registros já existentes.
+    if not ids_matriculas or not datas:
+        return
+    inicio = min(datas).replace(day=1)
+    ultima = max(datas)
+    fim = ultima.replace(day=calendar.monthrange(ultima.year, ultima.month)[1])
+
+    periodo = models.ResumoPresencaMensal.ano * 100 + models.ResumoPresencaMensal.mes
+    db.execute(delete(models.ResumoPresencaMensal).where(
+        models.ResumoPresencaMensal.id_matricula.in_(ids_matriculas),
+        periodo.between(inicio.year * 100 + inicio.month, fim.year * 100 + fim.month)
+    ))
+    db.execute(insert(models.ResumoPresencaMensal).from_select(_COLUNAS_RESUMO, _select_resumo_mensal().where(
+        models.Presenca.id_matricula.in_(ids_matriculas),
+        models.Presenca.data_aula.between(inicio, fim)
+    )))
+
+def remover_resumo_mensal(db: Session, ids_matriculas: list):
+    # Usado junto com a exclusão das presenças de matrículas removidas
+    db.query(models.ResumoPresencaMensal).filter(
+        models.ResumoPresencaMensal.id_matricula.in_(ids_matriculas)
+    ).delete(synchronize_session=False)
+
+def reconstruir_resumo_mensal(db: Session):
+    # Reconstrói o resumo inteiro a partir do histórico de presenças
+    db.execute(delete(models.ResumoPresencaMensal))
+    db.execute(insert(models.ResumoPresencaMensal).from_select(_COLUNAS_RESUMO, _select_resumo_mensal()))
+    db.commit()
+    return db.query(func.count()).select_from(models.ResumoPresencaMensal).scalar()
+
+# Colunas de cada agrupamento das estatísticas: (rótulo, expressão)
+def _colunas_agrupamento(agrupamento: str, ano, mes):
+    if agrupamento == "turma":
+        return [("id_turma", models.Turma.id_turma), ("turma", models.Turma.descricao), ("categoria_idade", models.Turma.categoria_idade)]
+    if agrupamento == "aluno":
+        return [("id_aluno", models.Aluno.id_aluno), ("aluno", models.Aluno.nome_completo)]
+    if agrupamento == "modalidade":
+        return [("id_modalidade", models.Modalidade.id_modalidade), ("modalidade", models.Modalidade.nome)]
+    if agrupamento == "mes":
+        return [("ano", ano), ("mes", mes)]
+    raise ValueError(f"Agrupamento inválido: {agrupamento}")
+
+def _periodo_em_meses_inteiros(data_inicio: date, data_fim: date):
+    if data_inicio and data_inicio.day != 1:
+        return False
+    if data_fim and data_fim.day != calendar.monthrange(data_fim.year, data_fim.month)[1]:
+        return False
+    return True
+
+def estatisticas_presencas(db: Session, agrupar_por: list, data_inicio: date = None, data_fim: date = None,
+                           id_turma: int = None, id_aluno: int = None, id_modalidade: int = None,
+                           usar_resumo: bool = True, lote: int = 1000):
+    if not agrupar_por:
+        raise ValueError("Informe ao menos um agrupamento.")
+    if data_inicio and data_fim and data_inicio > data_fim:
+        raise ValueError("A data inicial não pode ser posterior à data final.")
+
+    # 1. Escolher a fonte: o resumo mensal atende qualquer período formado por meses inteiros;
+    # recortes no meio do mês precisam das presenças
+    if usar_resumo and _periodo_em_meses_inteiros(data_inicio, data_fim):
+        resumo = models.ResumoPresencaMensal
+        ano, mes = resumo.ano, resumo.mes
+        contagens = [func.sum(resumo.total), func.sum(resumo.presentes), func.sum(resumo.ausentes), func.sum(resumo.justificados)]
+        id_matricula = resumo.id_matricula
+        periodo = resumo.ano * 100 + resumo.mes
+        filtro_inicio = (lambda d: periodo >= d.year * 100 + d.month)
+        filtro_fim = (lambda d: periodo <= d.year * 100 + d.month)
+    else:
+        ano, mes = extract("year", models.Presenca.data_aula), extract("month", models.Presenca.data_aula)
+        contagens = [func.count(models.Presenca.id_presenca), _contar_status("Presente"), _contar_status("Ausente"), _contar_status("Justificado")]
+        id_matricula = models.Presenca.id_matricula
+        filtro_inicio = (lambda d: models.Presenca.data_aula >= d)
+        filtro_fim = (lambda d: models.Presenca.data_aula <= d)
+
+    # 2. Montar as colunas de agrupamento (um único GROUP BY para qualquer combinação)
+    colunas = []
+    for agrupamento in dict.fromkeys(agrupar_por):
+        colunas.extend(_colunas_agrupamento(agrupamento, ano, mes))
+
+    query = db.query(
+        *[expr.label(rotulo) for rotulo, expr in colunas],
+        *[expr.label(rotulo) for rotulo, expr in zip(("total", "presentes", "ausentes", "justificados"), contagens)]
+    ).select_from(id_matricula.table).join(models.Matricula, id_matricula == models.Matricula.id_matricula)
+
+    # Os joins só entram quando o agrupamento ou o filtro precisa deles
+    if "turma" in agrupar_por or "modalidade" in agrupar_por or id_modalidade is not None:
+        query = query.join(models.Turma, models.Matricula.id_turma == models.Turma.id_turma)
+    if "aluno" in agrupar_por:
+        query = query.join(models.Aluno, models.Matricula.id_aluno == models.Aluno.id_aluno)
+    if "modalidade" in agrupar_por:
+        query = query.join(models.Modalidade, models.Turma.id_modalidade == models.Modalidade.id_modalidade)
+
+    # 3. Filtros
+    if data_inicio:
+        query = query.filter(filtro_inicio(data_inicio))
+    if data_fim:
+        query = query.filter(filtro_fim(data_fim))
+    if id_turma is not None:
+        query = query.filter(models.Matricula.id_turma == id_turma)
+    if id_aluno is not None:
+        query = query.filter(models.Matricula.id_aluno == id_aluno)
+    if id_modalidade is not None:
+        query = query.filter(models.Turma.id_modalidade == id_modalidade)
+
+    expressoes = [expr for _, expr in colunas]
+    query = query.group_by(*expressoes).order_by(*expressoes).execution_options(yield_per=lote)
+
+    # 4. Entregar linha a linha, com as taxas calculadas sobre o total do grupo
+    for linha in query:
+        item = linha._asdict()
+        for rotulo in ("ano", "mes"):
+            if rotulo in item:
+                item[rotulo] = int(item[rotulo])
+        total = item["total"] = int(item["total"] or 0)
+        for contagem, taxa in (("presentes", "taxa_presenca"), ("ausentes", "taxa_ausencia"), ("justificados", "taxa_justificada")):
+            item[contagem] = int(item[contagem] or 0)
+            item[taxa] = round(item[contagem] / total, 4) if total else 0.0
+        yield item
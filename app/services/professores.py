@@ -1,13 +1,14 @@
 from sqlalchemy.orm import Session
 import models
+import paginacao
 import schemas
 import security
 
 def listar_professor(db: Session, id_professor: int):
     return db.query(models.Professor).filter(models.Professor.id_professor == id_professor).first()
 
-def listar_professores(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(models.Professor).offset(skip).limit(limit).all()
+def listar_professores(db: Session, skip: int = 0, limit: int = 100, cursor: str = None, incluir_total: bool = False):
+    return paginacao.paginar(db.query(models.Professor), models.Professor.id_professor, skip, limit, cursor, incluir_total)
 
 def listar_professor_cpf(db: Session, cpf: str):
     return db.query(models.Professor).filter(models.Professor.cpf == cpf).first()
@@ -15,7 +16,7 @@ def listar_professor_cpf(db: Session, cpf: str):
 def criar_professor(db: Session, professor: schemas.ProfessorCreate):
     senha_plana = professor.password
     
-    senha_hash = security.get_password_hash(senha_plana)
+    senha_hash = security.executar_no_pool_bcrypt(security.get_password_hash, senha_plana)
 
     db_usuario = models.Usuario(
         username=professor.username,
@@ -61,6 +62,7 @@ def excluir_professor(db: Session, id_professor: int):
             raise ValueError("Não é possível excluir o professor pois ele está alocado em uma ou mais turmas.")
         
         id_usuario = db_professor.id_usuario
+        username = db_professor.usuario.username if db_professor.usuario else None
         db.delete(db_professor)
         
         db_user = db.query(models.Usuario).filter(models.Usuario.id_usuario == id_usuario).first()
@@ -68,5 +70,7 @@ def excluir_professor(db: Session, id_professor: int):
             db.delete(db_user)
             
         db.commit()
+        if username:
+            security.invalidar_principal(username)
         return True
     return False
@@ -1,6 +1,9 @@
 from sqlalchemy.orm import Session
+import escopo
 import models
+import paginacao
 import schemas
+from services import presencas as servico_presencas
 
 def dias_semana_str(dias_lista: list) -> str:
     if not dias_lista:
@@ -76,14 +79,20 @@ def criar_turma(db:Session, turma: schemas.TurmaCreate):
 def listar_turma_id(db: Session, id_turma: int):
     return db.query(models.Turma).filter(models.Turma.id_turma == id_turma).first()
 
-def listar_turmas(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(models.Turma).offset(skip).limit(limit).all()
+def listar_turmas(db: Session, skip: int = 0, limit: int = 100, cursor: str = None, incluir_total: bool = False, id_professor: int = None):
+    query = db.query(models.Turma)
+    if id_professor is not None:
+        query = escopo.turmas_do_professor(query, id_professor)
+    return paginacao.paginar(query, models.Turma.id_turma, skip, limit, cursor, incluir_total)
 
 def listar_turmas_professor(db: Session, id_professor: int):
     return db.query(models.Turma).filter(models.Turma.id_professor == id_professor).all()
 
-def listar_turmas_modalidade(db: Session, id_modalidade: int):
-    return db.query(models.Turma).filter(models.Turma.id_modalidade == id_modalidade).all()
+def listar_turmas_modalidade(db: Session, id_modalidade: int, id_professor: int = None):
+    query = db.query(models.Turma).filter(models.Turma.id_modalidade == id_modalidade)
+    if id_professor is not None:
+        query = escopo.turmas_do_professor(query, id_professor)
+    return query.all()
 
 def atualizar_turma(db: Session, id_turma: int, turma_atualizada: schemas.TurmaUpdate):
     db_turma = listar_turma_id(db, id_turma)
@@ -132,6 +141,7 @@ def excluir_turma(db: Session, id_turma: int):
 
         if ids_matriculas:
             db.query(models.Presenca).filter(models.Presenca.id_matricula.in_(ids_matriculas)).delete(synchronize_session=False)
+            servico_presencas.remover_resumo_mensal(db, ids_matriculas)
             
             db.query(models.Matricula).filter(models.Matricula.id_turma == id_turma).delete(synchronize_session=False)
         
@@ -1,4 +1,5 @@
 import re
+import unicodedata
 
 def validar_cpf(cpf: str) -> bool:
     # Remove caracteres não numéricos
@@ -33,3 +34,8 @@ def validar_cpf(cpf: str) -> bool:
         return False
 
     return True
+
+def normalizar_texto(texto: str) -> str:
+    # Minúsculas, sem acentos e só letras e números separados por um espaço: "João  D'Ávila" -> "joao d avila"
+    sem_acentos = unicodedata.normalize("NFKD", texto or "").encode("ascii", "ignore").decode()
+    return " ".join(re.sub(r"[^a-z0-9]+", " ", sem_acentos.lower()).split())
@@ -0,0 +1,94 @@
+import sys
+import os
+
+# Adiciona o diretório 'app' ao path do Python para permitir imports como se estivesse dentro dele
+sys.path.append(os.path.join(os.path.dirname(__file__), 'app'))
+
+from sqlalchemy import inspect, text
+from sqlalchemy.orm import Session
+from database import engine as engine_padrao
+import models
+from services import presencas as servico_presencas
+
+# Ajustes de esquema para bancos criados antes das mudanças nos modelos: o create_all cria as
+# tabelas novas, mas não altera as existentes (restrições, índices e colunas novas ficam de fora).
+# Cada passo confere o esquema antes de alterar, então o script pode ser executado mais de uma vez.
+
+# Colunas acrescentadas a tabelas existentes (todas anuláveis)
+COLUNAS_NOVAS = {
+    models.Partida: ("origem_casa_grupo", "origem_casa_posicao", "origem_visitante_grupo", "origem_visitante_posicao"),
+    models.DisciplinaParticipante: ("id_ultima_partida_cartao",),
+}
+
+def adicionar_colunas(engine=engine_padrao) -> list:
+    # Sem elas, toda consulta ao modelo falha com coluna desconhecida
+    inspetor = inspect(engine)
+    criadas = []
+    for modelo, nomes in COLUNAS_NOVAS.items():
+        tabela = modelo.__table__
+        existentes = {c["name"] for c in inspetor.get_columns(tabela.name)}
+        for nome in nomes:
+            if nome in existentes:
+                continue
+            tipo = tabela.c[nome].type.compile(dialect=engine.dialect)
+            with engine.begin() as conexao:
+                conexao.execute(text(f"ALTER TABLE {tabela.name} ADD COLUMN {nome} {tipo} NULL"))
+            criadas.append(f"{tabela.name}.{nome}")
+    return criadas
+
+def remover_presencas_duplicadas(conexao) -> int:
+    # Mantém a chamada mais recente (maior id) de cada matrícula e data. A subconsulta derivada
+    # é exigida pelo MySQL, que não aceita ler no DELETE a própria tabela
+    resultado = conexao.execute(text(
+        "DELETE FROM presencas WHERE id_presenca NOT IN ("
+        "SELECT id_presenca FROM (SELECT MAX(id_presenca) AS id_presenca FROM presencas "
+        "GROUP BY id_matricula, data_aula) AS manter)"
+    ))
+    return resultado.rowcount
+
+def adicionar_unicidade_presencas(engine=engine_padrao) -> int:
+    # Chave única em que o upsert da chamada se apoia (ON DUPLICATE KEY UPDATE no MySQL); sem ela
+    # cada chamada reenviada grava uma segunda linha. Devolve quantas duplicadas foram removidas
+    inspetor = inspect(engine)
+    nomes = {u["name"] for u in inspetor.get_unique_constraints("presencas")}
+    nomes |= {i["name"] for i in inspetor.get_indexes("presencas")}
+    if "uq_presencas_matricula_data" in nomes:
+        return 0
+    with engine.begin() as conexao:
+        removidas = remover_presencas_duplicadas(conexao)
+        conexao.execute(text("CREATE UNIQUE INDEX uq_presencas_matricula_data ON presencas (id_matricula, data_aula)"))
+    return removidas
+
+def criar_indices(engine=engine_padrao) -> list:
+    # Índices declarados nos modelos que ainda não existem no banco. Os que dependem de uma coluna
+    # ainda não criada ficam para depois do script que a cria (normalizar_nomes.py, por exemplo)
+    inspetor = inspect(engine)
+    criados = []
+    for tabela in models.Base.metadata.sorted_tables:
+        colunas = {c["name"] for c in inspetor.get_columns(tabela.name)}
+        existentes = {i["name"] for i in inspetor.get_indexes(tabela.name)}
+        for indice in tabela.indexes:
+            if indice.name in existentes or not {c.name for c in indice.columns} <= colunas:
+                continue
+            indice.create(bind=engine)
+            criados.append(indice.name)
+    return criados
+
+def atualizar(engine=engine_padrao):
+    print("--- Atualizar o esquema do banco ---")
+    for nome in adicionar_colunas(engine):
+        print(f"Coluna criada: {nome}")
+    removidas = adicionar_unicidade_presencas(engine)
+    if removidas:
+        # As duplicadas também estavam contadas no resumo mensal
+        with Session(bind=engine) as db:
+            servico_presencas.reconstruir_resumo_mensal(db)
+        print(f"presencas: {removidas} chamadas duplicadas removidas e resumo mensal reconstruído.")
+    for nome in criar_indices(engine):
+        print(f"Índice criado: {nome}")
+    print("Esquema atualizado.")
+
+if __name__ == "__main__":
+    # Garante que as tabelas existem
+    models.Base.metadata.create_all(bind=engine_padrao)
+    atualizar()
@@ -0,0 +1,36 @@
+import os
+import sys
+import time as relogio
+from datetime import date
+
+# Adiciona o diretório 'app' ao path do Python, como nos scripts da raiz do projeto
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'app'))
+
+from services import agendamento
+
+TOTAL_EQUIPES = int(os.getenv("BENCH_EQUIPES", "500"))
+TOTAL_RECURSOS = int(os.getenv("BENCH_RECURSOS", "10"))
+DATA = date(2026, 7, 1)
+
+def medir(nome, funcao):
+    inicio = relogio.perf_counter()
+    plano = funcao()
+    gerar = (relogio.perf_counter() - inicio) * 1000
+    inicio = relogio.perf_counter()
+    agendamento.validar_plano(plano)
+    validar = (relogio.perf_counter() - inicio) * 1000
+    print(f"{nome}: {len(plano)} partidas geradas em {gerar:.1f} ms, validadas em {validar:.1f} ms")
+
+if __name__ == "__main__":
+    ids = list(range(1, TOTAL_EQUIPES + 1))
+    medir(f"Pontos corridos ({TOTAL_EQUIPES} equipes)", lambda: agendamento.planejar_round_robin(ids, DATA))
+    medir("Mata-mata (16 equipes)", lambda: agendamento.planejar_mata_mata(ids[:16], "Oitavas", DATA))
+    grupos = {chr(ord("A") + g): ids[g::8] for g in range(8)}
+    medir(f"Grupos (8 grupos, {TOTAL_EQUIPES} equipes)", lambda: agendamento.planejar_grupos(grupos, DATA))
+
+    # Distribuição de locais, árbitros e horários (100 equipes = 4950 partidas, 50 por data)
+    ids_recursos = list(range(1, TOTAL_RECURSOS + 1))
+    medir(
+        f"Pontos corridos com recursos (100 equipes, {TOTAL_RECURSOS} locais/árbitros)",
+        lambda: agendamento.alocar_recursos(agendamento.planejar_round_robin(ids[:100], DATA), ids_recursos, ids_recursos, 90)
+    )
@@ -0,0 +1,81 @@
+import os
+import random
+import sys
+import time as relogio
+from datetime import date
+from statistics import median
+
+# Adiciona o diretório 'app' ao path do Python, como nos scripts da raiz do projeto
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'app'))
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+import models
+from services import alunos as servico_alunos
+from services import busca as servico_busca
+from utils import normalizar_texto
+
+TOTAL_PESSOAS = int(os.getenv("BENCH_PESSOAS", "200000"))
+REPETICOES = 20
+
+PRENOMES = ["João", "José", "Maria", "Ana", "Antônio", "Francisco", "Luís", "Paulo", "Lucas", "Gabriel",
+            "Júlia", "Letícia", "Beatriz", "Mariana", "Rafael", "Mateus", "Sofia", "Helena", "Cecília", "Otávio"]
+SOBRENOMES = ["Silva", "Santos", "Oliveira", "Souza", "Rodrigues", "Ferreira", "Alves", "Pereira", "Lima", "Gomes",
+              "Ribeiro", "Carvalho", "Araújo", "Conceição", "Simões", "Magalhães", "Assunção", "Brandão", "Falcão", "Guimarães"]
+
+def nome(aleatorio, i):
+    # Sufixo único no fim, para haver nomes raros além dos muito comuns
+    return f"{aleatorio.choice(PRENOMES)} {aleatorio.choice(SOBRENOMES)} {aleatorio.choice(SOBRENOMES)} Ref{i:06d}"
+
+def popular(db):
+    aleatorio = random.Random(42)
+    total_professores = TOTAL_PESSOAS // 50
+    total_atletas = TOTAL_PESSOAS // 4
+    total_alunos = TOTAL_PESSOAS - total_atletas - total_professores
+
+    db.execute(insert(models.Participante), [{"tipo": "aluno"} for _ in range(total_alunos)] + [{"tipo": "atleta"} for _ in range(total_atletas)])
+    nomes_alunos = [nome(aleatorio, i) for i in range(total_alunos)]
+    db.execute(insert(models.Aluno), [
+        {"id_participante": i + 1, "nome_completo": n, "nome_normalizado": normalizar_texto(n), "data_nascimento": date(2012, 1, 1),
+         "escola": "Escola", "serie_ano": "6", "telefone_1": "0", "endereco": "Rua"}
+        for i, n in enumerate(nomes_alunos)
+    ])
+    db.execute(insert(models.Atleta), [
+        {"id_participante": total_alunos + i + 1, "nome_completo": nome(aleatorio, total_alunos + i),
+         "data_nascimento": date(2000, 1, 1), "documento_pessoal": f"d{i}"}
+        for i in range(total_atletas)
+    ])
+    db.execute(insert(models.Usuario), [{"username": f"prof{i}", "password_hash": "x", "role": "professor"} for i in range(total_professores)])
+    db.execute(insert(models.Professor), [
+        {"id_usuario": i + 1, "nome": nome(aleatorio, total_alunos + total_atletas + i), "cpf": f"{i:011d}", "contato": "0"}
+        for i in range(total_professores)
+    ])
+    db.commit()
+    return servico_busca.reconstruir_indice(db)
+
+def medir(nome, funcao):
+    amostras = []
+    for _ in range(REPETICOES):
+        inicio = relogio.perf_counter()
+        resultado = funcao()
+        amostras.append((relogio.perf_counter() - inicio) * 1000)
+        db.expunge_all()
+    amostras.sort()
+    print(f"{nome}: mediana {median(amostras):.2f} ms, p95 {amostras[int(len(amostras) * 0.95) - 1]:.2f} ms ({len(resultado)} resultados)")
+
+if __name__ == "__main__":
+    engine = create_engine(os.environ["DATABASE_URL"])
+    models.Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    inicio = relogio.perf_counter()
+    termos = popular(db)
+    print(f"{TOTAL_PESSOAS} pessoas, {termos} termos indexados em {relogio.perf_counter() - inicio:.1f} s")
+
+    # LIKE '%termo%': rápido só quando os 20 primeiros aparecem logo; um nome raro lê a tabela inteira
+    medir("LIKE '%silva%' em alunos (limit 20)", lambda: servico_alunos.listar_alunos_nome(db, "silva", limit=20))
+    medir("LIKE '%ref123456%' em alunos (limit 20)", lambda: servico_alunos.listar_alunos_nome(db, "ref123456", limit=20))
+    for texto in ["jo", "joão", "maria silva", "conceicao sim", "ref123456", "ana ref19"]:
+        medir(f"/busca {texto!r}", lambda: servico_busca.buscar(db, texto))
+    # Pior caso: duas palavras comuns que quase nunca aparecem juntas no mesmo nome
+    medir("/busca 'otavio guimaraes falcao'", lambda: servico_busca.buscar(db, "otavio guimaraes falcao"))
@@ -0,0 +1,71 @@
+import os
+import sys
+import tempfile
+import time as relogio
+from datetime import date
+from statistics import median
+
+# Adiciona o diretório 'app' ao path do Python, como nos scripts da raiz do projeto
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'app'))
+_arquivo_db = os.path.join(tempfile.mkdtemp(), "bench_cache.db")
+os.environ["DATABASE_URL"] = os.getenv("BENCH_DATABASE_URL", f"sqlite:///{_arquivo_db}")
+os.environ.setdefault("SECRET_KEY", "chave_benchmark")
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+import models
+import security
+from database import SessionLocal, engine
+from main import app
+
+TOTAL_ALUNOS = int(os.getenv("BENCH_ALUNOS", "20"))
+REPETICOES = int(os.getenv("BENCH_REPETICOES", "500"))
+
+def popular():
+    db = SessionLocal()
+    db.add(models.Usuario(username="bench_admin", password_hash=security.get_password_hash("bench123"), role="admin", must_change_password=False))
+    for i in range(TOTAL_ALUNOS):
+        participante = models.Participante(tipo="aluno")
+        db.add(participante)
+        db.flush()
+        db.add(models.Aluno(
+            id_participante=participante.id_participante,
+            nome_completo=f"Aluno {i}",
+            data_nascimento=date(2012, 1, 1),
+            escola="Escola",
+            serie_ano="6",
+            telefone_1="0",
+            endereco="Rua"
+        ))
+    db.commit()
+    db.close()
+
+def medir(client, headers):
+    consultas = []
+    def contar(conn, cursor, statement, parameters, context, executemany):
+        consultas.append(statement)
+
+    amostras = []
+    event.listen(engine, "before_cursor_execute", contar)
+    try:
+        for _ in range(REPETICOES):
+            inicio = relogio.perf_counter()
+            assert client.get("/alunos/", headers=headers).status_code == 200
+            amostras.append((relogio.perf_counter() - inicio) * 1000)
+    finally:
+        event.remove(engine, "before_cursor_execute", contar)
+    amostras.sort()
+    return median(amostras), amostras[int(len(amostras) * 0.99) - 1], len(consultas) / REPETICOES
+
+if __name__ == "__main__":
+    popular()
+    with TestClient(app) as client:
+        token = client.post("/token", data={"username": "bench_admin", "password": "bench123"}).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+
+        ttl_original = security.PRINCIPAL_CACHE_TTL
+        for nome, ttl in (("sem cache", 0), ("com cache", ttl_original or 60)):
+            security.PRINCIPAL_CACHE_TTL = ttl
+            medir(client, headers)  # aquecimento
+            mediana, p99, consultas = medir(client, headers)
+            print(f"GET /alunos/ {nome}: mediana={mediana:.2f} ms p99={p99:.2f} ms consultas/requisição={consultas:.1f}")
@@ -0,0 +1,66 @@
+import asyncio
+import os
+import sys
+import tempfile
+import time as relogio
+from datetime import date, time
+
+# Adiciona o diretório 'app' ao path do Python, como nos scripts da raiz do projeto
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'app'))
+_arquivo_db = os.path.join(tempfile.mkdtemp(), "bench_publico.db")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_arquivo_db}")
+os.environ.setdefault("SECRET_KEY", "bench")
+
+import httpx
+from database import SessionLocal, engine
+import models
+from main import app
+from routers import publico
+
+TOTAL_EQUIPES = 16
+REQUISICOES = int(os.getenv("BENCH_REQUISICOES", "2000"))
+
+def popular(db):
+    db.add(models.Modalidade(nome="Futebol"))
+    db.add(models.Evento(even_nome="Copa"))
+    db.add(models.Local(loca_nome="Quadra"))
+    db.add(models.Arbitro(apito_nome="Juiz", apito_doc="1", apito_tel="0"))
+    db.flush()
+    db.add(models.Edicao(id_evento=1, edic_ano=2026, tipo_competicao="Pontos Corridos", data_inicio=date(2026, 1, 1), data_fim=date(2026, 12, 31)))
+    db.add_all([models.Equipe(nome=f"Equipe {i}", id_edicao=1) for i in range(TOTAL_EQUIPES)])
+    db.flush()
+    # Turno completo: todos contra todos
+    db.add_all([
+        models.Partida(id_edicao=1, id_local=1, id_arbitro=1, id_modalidade=1, id_equipe_casa=c + 1, id_equipe_visitante=v + 1,
+                       part_data=date(2026, 1, 1), part_hora=time(10, 0), status="Finalizada", placar_casa=c % 3, placar_visitante=v % 2)
+        for c in range(TOTAL_EQUIPES) for v in range(c + 1, TOTAL_EQUIPES)
+    ])
+    db.commit()
+
+async def medir(nome, client, url, cabecalhos=None):
+    # Requisições sequenciais direto na aplicação ASGI (sem rede), no mesmo event loop, como em um worker
+    await client.get(url, headers=cabecalhos)
+    inicio = relogio.perf_counter()
+    for _ in range(REQUISICOES):
+        resposta = await client.get(url, headers=cabecalhos)
+    duracao = relogio.perf_counter() - inicio
+    print(f"{nome}: {REQUISICOES / duracao:.0f} req/s ({resposta.status_code}, {len(resposta.content)} bytes)")
+
+async def main():
+    url = "/publico/edicoes/1/partidas"
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        ttl = publico.PUBLICO_CACHE_TTL
+        publico.PUBLICO_CACHE_TTL = 0
+        await medir("sem cache", client, url)
+        publico.PUBLICO_CACHE_TTL = ttl
+        await medir("com cache", client, url)
+        etag = (await client.get(url)).headers["ETag"]
+        await medir("com cache e If-None-Match (304)", client, url, {"If-None-Match": etag})
+
+if __name__ == "__main__":
+    models.Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    popular(db)
+    db.close()
+
+    asyncio.run(main())
@@ -0,0 +1,69 @@
+import os
+import sys
+import time as relogio
+from datetime import date, time
+from statistics import median
+
+# Adiciona o diretório 'app' ao path do Python, como nos scripts da raiz do projeto
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'app'))
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+import models
+from services import partidas as servico_partidas
+
+TOTAL_PARTIDAS = int(os.getenv("BENCH_PARTIDAS", "10000"))
+TOTAL_RECURSOS = 200
+REPETICOES = 200
+DATA = date(2026, 7, 1)
+
+def popular(db):
+    db.add_all([models.Modalidade(nome=f"Modalidade {i}", duracao_minutos=30 + 15 * i) for i in range(4)])
+    db.add(models.Evento(even_nome="Evento Benchmark"))
+    db.flush()
+    db.add(models.Edicao(id_evento=1, edic_ano=2026, data_inicio=DATA, data_fim=DATA))
+    db.add_all([models.Local(loca_nome=f"Local {i}", ativo=True) for i in range(TOTAL_RECURSOS)])
+    db.add_all([models.Arbitro(apito_nome=f"Árbitro {i}", apito_doc=f"doc-{i}", apito_tel="0") for i in range(TOTAL_RECURSOS)])
+    db.flush()
+    db.add_all([models.Equipe(nome=f"Equipe {i}", id_edicao=1) for i in range(2 * TOTAL_RECURSOS)])
+    db.flush()
+
+    linhas = []
+    for i in range(TOTAL_PARTIDAS):
+        recurso = i % TOTAL_RECURSOS
+        minuto = (i // TOTAL_RECURSOS) * 20 % (24 * 60)
+        linhas.append({
+            "id_edicao": 1,
+            "id_local": recurso + 1,
+            "id_arbitro": recurso + 1,
+            "id_modalidade": i % 4 + 1,
+            "id_equipe_casa": 2 * recurso + 1,
+            "id_equipe_visitante": 2 * recurso + 2,
+            "part_data": DATA,
+            "part_hora": time(minuto // 60, minuto % 60),
+            "status": "Agendada",
+        })
+    db.execute(insert(models.Partida), linhas)
+    db.commit()
+
+def medir(db):
+    amostras = []
+    for i in range(REPETICOES):
+        recurso = i % TOTAL_RECURSOS + 1
+        inicio = relogio.perf_counter()
+        servico_partidas.verificar_conflito_partida(
+            db, recurso, recurso, 1, DATA, time(12, 5),
+            id_equipe_casa=2 * recurso - 1, id_equipe_visitante=2 * recurso
+        )
+        amostras.append((relogio.perf_counter() - inicio) * 1000)
+    amostras.sort()
+    return median(amostras), amostras[int(len(amostras) * 0.99) - 1]
+
+if __name__ == "__main__":
+    engine = create_engine(os.getenv("BENCH_DATABASE_URL", "sqlite://"))
+    models.Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    popular(db)
+    mediana, p99 = medir(db)
+    print(f"{TOTAL_PARTIDAS} partidas em {DATA}: verificar_conflito_partida mediana={mediana:.2f} ms p99={p99:.2f} ms")
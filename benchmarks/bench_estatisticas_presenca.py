@@ -0,0 +1,97 @@
+import os
+import sys
+import tempfile
+import time as relogio
+from collections import Counter
+from datetime import date, time, timedelta
+
+# Adiciona o diretório 'app' ao path do Python, como nos scripts da raiz do projeto
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'app'))
+_arquivo_db = os.path.join(tempfile.mkdtemp(), "bench_presencas.db")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_arquivo_db}")
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+import models
+from services import presencas as servico_presencas
+
+TOTAL_PRESENCAS = int(os.getenv("BENCH_PRESENCAS", "1000000"))
+TOTAL_TURMAS = 50
+ALUNOS_POR_TURMA = 40
+STATUS = ["Presente", "Presente", "Presente", "Ausente", "Justificado"]
+DATA_INICIO = date(2024, 1, 1)
+
+def popular(db):
+    db.add(models.Usuario(username="prof_bench", password_hash="x", role="professor"))
+    db.add_all([models.Modalidade(nome=f"Modalidade {i}") for i in range(5)])
+    db.flush()
+    db.add(models.Professor(id_usuario=1, nome="Prof Bench", cpf="52998224725", contato="0"))
+    db.flush()
+    db.execute(insert(models.Turma), [
+        {"id_modalidade": i % 5 + 1, "id_professor": 1, "descricao": f"Turma {i}", "categoria_idade": "Sub 15",
+         "horario_inicio": time(8, 0), "horario_fim": time(9, 0)}
+        for i in range(TOTAL_TURMAS)
+    ])
+
+    total_alunos = TOTAL_TURMAS * ALUNOS_POR_TURMA
+    db.execute(insert(models.Participante), [{"tipo": "aluno"} for _ in range(total_alunos)])
+    db.execute(insert(models.Aluno), [
+        {"id_participante": i + 1, "nome_completo": f"Aluno {i}", "data_nascimento": date(2012, 1, 1), "escola": "E",
+         "serie_ano": "6", "telefone_1": "0", "endereco": "Rua"}
+        for i in range(total_alunos)
+    ])
+    db.execute(insert(models.Matricula), [
+        {"id_aluno": i + 1, "id_turma": i // ALUNOS_POR_TURMA + 1, "ativo": True} for i in range(total_alunos)
+    ])
+
+    # Uma aula por dia para todas as matrículas até completar o total de presenças
+    aulas = TOTAL_PRESENCAS // total_alunos
+    for dia in range(aulas):
+        data_aula = DATA_INICIO + timedelta(days=dia)
+        db.execute(insert(models.Presenca), [
+            {"id_matricula": m + 1, "data_aula": data_aula, "status": STATUS[(m + dia) % len(STATUS)], "observacao": None}
+            for m in range(total_alunos)
+        ])
+    db.commit()
+    return aulas
+
+def contar_no_cliente(db, aulas):
+    # Como o frontend faria hoje: uma chamada por turma e data, contando as linhas recebidas
+    contagem = Counter()
+    for id_turma in range(1, TOTAL_TURMAS + 1):
+        for dia in range(aulas):
+            for p in servico_presencas.listar_presencas_turma_data(db, id_turma, DATA_INICIO + timedelta(days=dia)):
+                contagem[(id_turma, p.status)] += 1
+        db.expunge_all()
+    return contagem
+
+def medir(nome, funcao):
+    inicio = relogio.perf_counter()
+    resultado = funcao()
+    print(f"{nome}: {(relogio.perf_counter() - inicio) * 1000:.0f} ms")
+    return resultado
+
+if __name__ == "__main__":
+    engine = create_engine(os.environ["DATABASE_URL"])
+    models.Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+
+    inicio = relogio.perf_counter()
+    aulas = popular(db)
+    print(f"{aulas * TOTAL_TURMAS * ALUNOS_POR_TURMA} presenças geradas em {relogio.perf_counter() - inicio:.1f} s")
+
+    total_resumo = medir("reconstrução do resumo mensal", lambda: servico_presencas.reconstruir_resumo_mensal(db))
+    print(f"  {total_resumo} linhas de resumo")
+
+    for usar_resumo, fonte in ((False, "presenças"), (True, "resumo mensal")):
+        print(f"--- fonte: {fonte} ---")
+        for agrupamento in (["turma"], ["modalidade"], ["mes"], ["turma", "mes"], ["aluno"]):
+            linhas = medir(f"GROUP BY {'+'.join(agrupamento)}", lambda: list(servico_presencas.estatisticas_presencas(db, agrupamento, usar_resumo=usar_resumo)))
+            print(f"  {len(linhas)} grupos")
+        medir("GROUP BY turma+mes em um trimestre", lambda: list(servico_presencas.estatisticas_presencas(
+            db, ["turma", "mes"], data_inicio=date(2024, 4, 1), data_fim=date(2024, 6, 30), usar_resumo=usar_resumo)))
+
+    if os.getenv("BENCH_CLIENTE", "1") == "1":
+        contagem = medir(f"contagem no cliente ({TOTAL_TURMAS * aulas} chamadas turma/data)", lambda: contar_no_cliente(db, aulas))
+        por_turma = {l["id_turma"]: l["presentes"] for l in servico_presencas.estatisticas_presencas(db, ["turma"])}
+        assert all(contagem[(t, "Presente")] == por_turma[t] for t in por_turma)
@@ -0,0 +1,74 @@
+import asyncio
+import os
+import sys
+import time as relogio
+import tracemalloc
+from datetime import date, time
+
+# Adiciona o diretório 'app' ao path do Python, como nos scripts da raiz do projeto
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'app'))
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+import models
+import planilhas
+from services import exportacao as servico_exportacao
+
+TOTAL_ALUNOS = int(os.getenv("BENCH_ALUNOS", "100000"))
+
+def popular(db):
+    db.add(models.Modalidade(nome="Futsal", duracao_minutos=60))
+    db.add(models.Usuario(username="prof", password_hash="x", role="professor"))
+    db.flush()
+    db.add(models.Professor(id_usuario=1, nome="Professor", cpf="00000000000", contato="0"))
+    db.add(models.Turma(id_modalidade=1, id_professor=1, descricao="Turma", categoria_idade="Sub-12", horario_inicio=time(8), horario_fim=time(9)))
+    db.flush()
+    db.execute(insert(models.Participante), [{"tipo": "aluno"} for _ in range(TOTAL_ALUNOS)])
+    db.execute(insert(models.Aluno), [
+        {"id_participante": i + 1, "nome_completo": f"Aluno {i:06d}", "data_nascimento": date(2012, 1, 1), "escola": "Escola Municipal",
+         "serie_ano": "6º ano", "telefone_1": "(83) 99999-0000", "endereco": f"Rua {i}, Centro"}
+        for i in range(TOTAL_ALUNOS)
+    ])
+    db.execute(insert(models.Matricula), [{"id_aluno": i + 1, "id_turma": 1} for i in range(TOTAL_ALUNOS)])
+    db.commit()
+
+def medir(nome, funcao):
+    tracemalloc.start()
+    inicio = relogio.perf_counter()
+    primeiro, tamanho = funcao()
+    duracao = relogio.perf_counter() - inicio
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{nome}: {tamanho / 1e6:.1f} MB em {duracao:.2f} s, primeiro bloco em {primeiro * 1000:.0f} ms, pico de memória {pico / 1e6:.1f} MB")
+
+def exportacao_em_fluxo():
+    inicio = relogio.perf_counter()
+    resposta = planilhas.resposta_planilha("alunos", servico_exportacao.CABECALHO_ALUNOS, servico_exportacao.exportar_alunos_turma(db, 1), "csv")
+
+    async def consumir():
+        primeiro = None
+        tamanho = 0
+        async for bloco in resposta.body_iterator:
+            primeiro = primeiro or relogio.perf_counter() - inicio
+            tamanho += len(bloco)
+        return primeiro, tamanho
+    return asyncio.run(consumir())
+
+def lista_materializada():
+    # Como hoje: todos os alunos carregados como objetos e só então convertidos
+    inicio = relogio.perf_counter()
+    alunos = db.query(models.Aluno).join(models.Matricula).filter(models.Matricula.id_turma == 1).order_by(models.Aluno.nome_completo).all()
+    corpo = "\n".join(f"{a.id_aluno};{a.nome_completo};{a.data_nascimento};{a.escola};{a.endereco}" for a in alunos).encode()
+    db.expunge_all()
+    return relogio.perf_counter() - inicio, len(corpo)
+
+if __name__ == "__main__":
+    # O StreamingResponse lê os blocos seguintes em outras threads do threadpool
+    engine = create_engine(os.environ["DATABASE_URL"], connect_args={"check_same_thread": False} if os.environ["DATABASE_URL"].startswith("sqlite") else {})
+    models.Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    popular(db)
+    print(f"{TOTAL_ALUNOS} alunos matriculados na mesma turma")
+    medir("Lista materializada (ORM + .all())", lista_materializada)
+    medir("Exportação CSV em fluxo (yield_per)", exportacao_em_fluxo)
@@ -0,0 +1,74 @@
+import io
+import os
+import random
+import sys
+import time as relogio
+from datetime import date, time
+
+# Adiciona o diretório 'app' ao path do Python, como nos scripts da raiz do projeto
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'app'))
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from sqlalchemy import create_engine, func
+from sqlalchemy.orm import sessionmaker
+import models
+import schemas
+from services import alunos as servico_alunos
+from services import importacao as servico_importacao
+
+TOTAL_LINHAS = int(os.getenv("BENCH_LINHAS", "10000"))
+# O cadastro um a um é medido numa amostra menor e extrapolado
+AMOSTRA_UM_A_UM = int(os.getenv("BENCH_AMOSTRA", "500"))
+TOTAL_TURMAS = 40
+
+PRENOMES = ["João", "José", "Maria", "Ana", "Antônio", "Francisco", "Luís", "Paulo", "Lucas", "Gabriel"]
+SOBRENOMES = ["Silva", "Santos", "Oliveira", "Souza", "Conceição", "Simões", "Magalhães", "Assunção", "Brandão", "Falcão"]
+DIAS = ["SEG", "TER", "QUA", "QUI", "SEX"]
+
+def popular_turmas(db):
+    db.add(models.Modalidade(nome="Futsal", duracao_minutos=60))
+    db.add(models.Usuario(username="prof", password_hash="x", role="professor"))
+    db.flush()
+    db.add(models.Professor(id_usuario=1, nome="Professor", cpf="00000000000", contato="0"))
+    db.flush()
+    for i in range(TOTAL_TURMAS):
+        # Turmas de uma hora em dias e horários distintos: pares de turmas do mesmo dia e hora conflitam
+        turma = models.Turma(id_modalidade=1, id_professor=1, descricao=f"Turma {i}", categoria_idade="Sub-12",
+                             horario_inicio=time(8 + i % 8), horario_fim=time(9 + i % 8))
+        turma.dias = [models.TurmaDia(dia_semana=DIAS[i // 8])]
+        db.add(turma)
+    db.commit()
+
+def planilha(total: int, deslocamento: int = 0) -> bytes:
+    aleatorio = random.Random(42 + deslocamento)
+    linhas = ["Nome Completo;Data de Nascimento;Escola;Série/Ano;Nome da Mãe;Telefone 1;Endereço;ids_turmas"]
+    for i in range(deslocamento, deslocamento + total):
+        nome = f"{aleatorio.choice(PRENOMES)} {aleatorio.choice(SOBRENOMES)} {i}"
+        turmas = ",".join(str(t) for t in aleatorio.sample(range(1, TOTAL_TURMAS + 1), 2))
+        linhas.append(f"{nome};{1 + i % 28:02d}/{1 + i % 12:02d}/2012;Escola Municipal;6º ano;Mãe {i};(83) 99999-0000;Rua {i};{turmas}")
+    return "\n".join(linhas).encode("utf-8")
+
+if __name__ == "__main__":
+    engine = create_engine(os.environ["DATABASE_URL"])
+    models.Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    popular_turmas(db)
+
+    # 1. Cadastro um a um pelo serviço de POST /alunos/ (validações e commit por aluno)
+    linhas = list(servico_importacao.ler_planilha(io.BytesIO(planilha(AMOSTRA_UM_A_UM, deslocamento=TOTAL_LINHAS)), "amostra.csv"))
+    inicio = relogio.perf_counter()
+    for _, dados in linhas:
+        try:
+            servico_alunos.cadastrar_aluno(db, servico_importacao._validar(dados))
+        except ValueError:
+            db.rollback()
+    duracao = relogio.perf_counter() - inicio
+    print(f"Um a um: {AMOSTRA_UM_A_UM} linhas em {duracao:.2f} s (~{duracao / AMOSTRA_UM_A_UM * TOTAL_LINHAS:.1f} s para {TOTAL_LINHAS})")
+
+    # 2. Importação em lotes
+    inicio = relogio.perf_counter()
+    resultado = servico_importacao.importar_alunos(db, servico_importacao.ler_planilha(io.BytesIO(planilha(TOTAL_LINHAS)), "alunos.csv"))
+    duracao = relogio.perf_counter() - inicio
+    print(f"Em lotes de {servico_importacao.TAMANHO_LOTE}: {resultado['total_linhas']} linhas em {duracao:.2f} s "
+          f"({resultado['importados']} importadas, {len(resultado['erros'])} com erro)")
+    print(f"Alunos: {db.query(func.count(models.Aluno.id_aluno)).scalar()}, matrículas: {db.query(func.count(models.Matricula.id_matricula)).scalar()}")
@@ -0,0 +1,86 @@
+import asyncio
+import math
+import os
+import sys
+import tempfile
+import time as relogio
+from statistics import median
+
+# Adiciona o diretório 'app' ao path do Python, como nos scripts da raiz do projeto
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'app'))
+_arquivo_db = os.path.join(tempfile.mkdtemp(), "bench_login.db")
+os.environ["DATABASE_URL"] = os.getenv("BENCH_DATABASE_URL", f"sqlite:///{_arquivo_db}")
+os.environ.setdefault("SECRET_KEY", "chave_benchmark")
+
+import httpx
+from fastapi import Depends, HTTPException
+from fastapi.security import OAuth2PasswordRequestForm
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import NullPool
+import database
+import models
+import security
+from database import SessionLocal, get_db
+from main import app
+
+LOGINS_CONCORRENTES = int(os.getenv("BENCH_LOGINS", "50"))
+INTERVALO_SONDA = 0.02
+
+async def login_anterior(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+    # Rota de login como era antes: async, com o bcrypt executado direto no event loop
+    user = db.query(models.Usuario).filter(models.Usuario.username == form_data.username).first()
+    if not user or not security.verify_password(form_data.password, user.password_hash):
+        raise HTTPException(status_code=401, detail="Usuário ou senha incorretos")
+    access_token = security.create_access_token(data={"sub": user.username})
+    refresh_token = security.create_refresh_token(db=db, id_usuario=user.id_usuario)
+    return {"access_token": access_token, "token_type": "bearer", "refresh_token": refresh_token}
+
+app.add_api_route("/token-anterior", login_anterior, methods=["POST"])
+
+async def medir_tempestade(rota_login: str):
+    transporte = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transporte, base_url="http://bench") as client:
+        latencias = []
+        terminou = asyncio.Event()
+
+        async def sondar():
+            # Endpoint sem relação com o login, chamado em intervalos fixos durante a tempestade.
+            # A latência conta a partir do horário planejado, então travamentos do event loop aparecem nela.
+            planejado = relogio.perf_counter()
+            while not terminou.is_set():
+                await asyncio.sleep(max(0, planejado - relogio.perf_counter()))
+                await client.get("/")
+                latencias.append((relogio.perf_counter() - planejado) * 1000)
+                planejado = max(planejado + INTERVALO_SONDA, relogio.perf_counter())
+
+        async def logar(i):
+            resposta = await client.post(rota_login, data={"username": f"bench_{i}", "password": "bench123"})
+            assert resposta.status_code == 200
+
+        sonda = asyncio.create_task(sondar())
+        inicio = relogio.perf_counter()
+        await asyncio.gather(*[logar(i) for i in range(LOGINS_CONCORRENTES)])
+        duracao = relogio.perf_counter() - inicio
+        terminou.set()
+        await sonda
+
+    latencias.sort()
+    p99 = latencias[math.ceil(len(latencias) * 0.99) - 1]
+    return median(latencias), p99, latencias[-1], len(latencias), duracao
+
+if __name__ == "__main__":
+    db = SessionLocal()
+    senha_hash = security.get_password_hash("bench123")
+    db.add_all([models.Usuario(username=f"bench_{i}", password_hash=senha_hash, role="professor", must_change_password=False)
+                for i in range(LOGINS_CONCORRENTES)])
+    db.commit()
+    db.close()
+
+    # Sem limite de conexões: na rota antiga, cada login segura a sua conexão até o fim da requisição
+    # e uma rajada esgota o QueuePool padrão (travando o event loop no checkout) antes de medir o bcrypt
+    database.engine.pool = NullPool(database.engine.pool._creator)
+
+    for nome, rota in (("rota async com bcrypt no event loop (anterior)", "/token-anterior"), (f"pool bcrypt com {security.BCRYPT_MAX_WORKERS} thread(s)", "/token")):
+        mediana, p99, maximo, amostras, duracao = asyncio.run(medir_tempestade(rota))
+        print(f"{nome}: {LOGINS_CONCORRENTES} logins em {duracao:.1f} s; "
+              f"GET / mediana={mediana:.1f} ms p99={p99:.1f} ms máx={maximo:.1f} ms ({amostras} amostras)")
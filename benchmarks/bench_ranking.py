@@ -0,0 +1,85 @@
+import os
+import sys
+import time as relogio
+from datetime import date, time, timedelta
+from statistics import median
+
+# Adiciona o diretório 'app' ao path do Python, como nos scripts da raiz do projeto
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'app'))
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+import models
+from routers import publico
+from services import estatisticas as servico_estatisticas
+
+TOTAL_PARTIDAS = int(os.getenv("BENCH_PARTIDAS", "2000"))
+JOGADORES_POR_EQUIPE = 10
+TOTAL_EQUIPES = 40
+REPETICOES = 20
+
+def popular(db):
+    db.add(models.Modalidade(nome="Futebol"))
+    db.add(models.Evento(even_nome="Evento Benchmark"))
+    db.add(models.Local(loca_nome="Local", ativo=True))
+    db.add(models.Arbitro(apito_nome="Árbitro", apito_doc="doc", apito_tel="0"))
+    db.flush()
+    db.add(models.Edicao(id_evento=1, edic_ano=2026, tipo_competicao="Pontos Corridos", data_inicio=date(2026, 1, 1), data_fim=date(2026, 12, 31)))
+    db.flush()
+    db.execute(insert(models.Equipe), [{"nome": f"Equipe {i}", "id_edicao": 1} for i in range(TOTAL_EQUIPES)])
+
+    total_jogadores = TOTAL_EQUIPES * JOGADORES_POR_EQUIPE
+    db.execute(insert(models.Participante), [{"tipo": "atleta"} for _ in range(total_jogadores)])
+    db.execute(insert(models.Atleta), [
+        {"id_participante": i + 1, "nome_completo": f"Atleta {i}", "data_nascimento": date(2000, 1, 1), "documento_pessoal": f"d{i}"}
+        for i in range(total_jogadores)
+    ])
+
+    db.execute(insert(models.Partida), [
+        {"id_edicao": 1, "id_local": 1, "id_arbitro": 1, "id_modalidade": 1,
+         "id_equipe_casa": i % TOTAL_EQUIPES + 1, "id_equipe_visitante": (i + 1) % TOTAL_EQUIPES + 1,
+         "part_data": date(2026, 1, 1) + timedelta(days=i % 365), "part_hora": time(10, 0), "status": "Finalizada"}
+        for i in range(TOTAL_PARTIDAS)
+    ])
+    linhas = []
+    for i in range(TOTAL_PARTIDAS):
+        for equipe in (i % TOTAL_EQUIPES, (i + 1) % TOTAL_EQUIPES):
+            for j in range(JOGADORES_POR_EQUIPE):
+                id_participante = equipe * JOGADORES_POR_EQUIPE + j + 1
+                linhas.append({"id_partida": i + 1, "id_participante": id_participante, "gols": (i + id_participante) % 3 // 2,
+                               "assistencias": (i * id_participante) % 4 // 3, "cartoes_amarelos": 0, "cartoes_vermelhos": 0})
+    db.execute(insert(models.EstatisticaPartida), linhas)
+    db.commit()
+    return len(linhas)
+
+def medir(nome, funcao):
+    amostras = []
+    for _ in range(REPETICOES):
+        inicio = relogio.perf_counter()
+        resultado = funcao()
+        amostras.append((relogio.perf_counter() - inicio) * 1000)
+    print(f"{nome}: mediana {median(amostras):.1f} ms")
+    return resultado
+
+if __name__ == "__main__":
+    engine = create_engine(os.environ["DATABASE_URL"])
+    models.Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    total = popular(db)
+    print(f"{total} estatísticas em {TOTAL_PARTIDAS} partidas")
+
+    def top10_no_cliente():
+        # Como os clientes fazem hoje: todas as linhas da edição, somadas e ordenadas fora do banco
+        linhas = publico.listar_estatisticas_edicao_publicas(1, db)
+        soma = {}
+        for linha in linhas:
+            soma[linha.id_participante] = soma.get(linha.id_participante, 0) + linha.gols
+        db.expunge_all()
+        return sorted(soma.items(), key=lambda x: (-x[1], x[0]))[:10]
+
+    antes = medir("endpoint de estatísticas + soma no cliente", top10_no_cliente)
+    depois = medir("ranking top-10 (GROUP BY ... LIMIT)", lambda: servico_estatisticas.ranking_edicao(db, 1, "gols"))
+    pagina = servico_estatisticas.ranking_edicao(db, 1, "gols")
+    medir("ranking, página seguinte por cursor", lambda: servico_estatisticas.ranking_edicao(db, 1, "gols", cursor=pagina["proximo_cursor"]))
+    assert [(i["id_participante"], i["total"]) for i in depois["itens"]] == antes
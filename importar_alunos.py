@@ -0,0 +1,35 @@
+import sys
+import os
+
+# Adiciona o diretório 'app' ao path do Python para permitir imports como se estivesse dentro dele
+sys.path.append(os.path.join(os.path.dirname(__file__), 'app'))
+
+from database import SessionLocal, engine
+import models
+from services import importacao as servico_importacao
+
+def importar(caminho: str, simular: bool = False):
+    db = SessionLocal()
+
+    print(f"--- Importar alunos de {caminho}{' (simulação)' if simular else ''} ---")
+    try:
+        with open(caminho, "rb") as arquivo:
+            linhas = servico_importacao.ler_planilha(arquivo, caminho)
+            resultado = servico_importacao.importar_alunos(db, linhas, simular=simular)
+        for erro in resultado["erros"]:
+            print(f"Linha {erro['linha']}: {erro['erro']}")
+        print(f"{resultado['importados']} de {resultado['total_linhas']} linhas {'válidas' if simular else 'importadas'}, {len(resultado['erros'])} com erro.")
+    except Exception as e:
+        db.rollback()
+        print(f"Erro ao importar alunos: {e}")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    argumentos = [a for a in sys.argv[1:] if a != "--simular"]
+    if len(argumentos) != 1:
+        print("Uso: python importar_alunos.py <planilha.csv|planilha.xlsx> [--simular]")
+        sys.exit(1)
+    # Garante que as tabelas existem
+    models.Base.metadata.create_all(bind=engine)
+    importar(argumentos[0], simular="--simular" in sys.argv[1:])
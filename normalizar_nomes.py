@@ -0,0 +1,54 @@
+import sys
+import os
+
+# Adiciona o diretório 'app' ao path do Python para permitir imports como se estivesse dentro dele
+sys.path.append(os.path.join(os.path.dirname(__file__), 'app'))
+
+from sqlalchemy import inspect, text, update
+from database import SessionLocal, engine
+import models
+from utils import normalizar_texto
+
+LOTE = 5000
+
+def adicionar_colunas():
+    # Bancos anteriores à coluna: o create_all cria tabelas novas, mas não altera as existentes
+    inspetor = inspect(engine)
+    for modelo in (models.Aluno, models.Atleta):
+        tabela = modelo.__table__
+        if "nome_normalizado" not in {c["name"] for c in inspetor.get_columns(tabela.name)}:
+            with engine.begin() as conexao:
+                conexao.execute(text(f"ALTER TABLE {tabela.name} ADD COLUMN nome_normalizado VARCHAR(500) NULL"))
+        indices = {i["name"] for i in inspetor.get_indexes(tabela.name)}
+        for indice in tabela.indexes:
+            if indice.name not in indices:
+                indice.create(bind=engine)
+
+def normalizar():
+    db = SessionLocal()
+
+    print("--- Preencher nome_normalizado de alunos e atletas ---")
+    try:
+        for modelo, chave in ((models.Aluno, models.Aluno.id_aluno), (models.Atleta, models.Atleta.id_atleta)):
+            total = 0
+            ultimo = 0
+            while True:
+                linhas = db.query(chave, modelo.nome_completo).filter(chave > ultimo).order_by(chave).limit(LOTE).all()
+                if not linhas:
+                    break
+                db.execute(update(modelo), [{chave.key: id_, "nome_normalizado": normalizar_texto(nome)} for id_, nome in linhas])
+                db.commit()
+                total += len(linhas)
+                ultimo = linhas[-1][0]
+            print(f"{modelo.__tablename__}: {total} nomes normalizados.")
+    except Exception as e:
+        db.rollback()
+        print(f"Erro ao normalizar os nomes: {e}")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    # Garante que as tabelas existem
+    models.Base.metadata.create_all(bind=engine)
+    adicionar_colunas()
+    normalizar()
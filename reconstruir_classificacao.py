@@ -0,0 +1,31 @@
+import sys
+import os
+
+# Adiciona o diretório 'app' ao path do Python para permitir imports como se estivesse dentro dele
+sys.path.append(os.path.join(os.path.dirname(__file__), 'app'))
+
+from database import SessionLocal, engine
+import models
+from services import classificacao as servico_classificacao
+from services import disciplina as servico_disciplina
+
+def reconstruir():
+    db = SessionLocal()
+
+    print("--- Reconstruir classificação e cartões acumulados das edições ---")
+    try:
+        for (id_edicao,) in db.query(models.Edicao.id_edicao).all():
+            linhas = servico_classificacao.recalcular_classificacao(db, id_edicao)
+            servico_disciplina.recalcular_disciplina(db, id_edicao)
+            db.commit()
+            print(f"Edição {id_edicao}: {linhas} linhas de classificação.")
+    except Exception as e:
+        db.rollback()
+        print(f"Erro ao reconstruir a classificação: {e}")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    # Garante que as tabelas existem (inclusive a de classificação, em bancos anteriores a ela)
+    models.Base.metadata.create_all(bind=engine)
+    reconstruir()
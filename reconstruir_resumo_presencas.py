@@ -0,0 +1,29 @@
+import sys
+import os
+import time
+
+# Adiciona o diretório 'app' ao path do Python para permitir imports como se estivesse dentro dele
+sys.path.append(os.path.join(os.path.dirname(__file__), 'app'))
+
+from database import SessionLocal, engine
+import models
+from services import presencas as servico_presencas
+
+def reconstruir():
+    db = SessionLocal()
+
+    print("--- Reconstruir resumo mensal de presenças ---")
+    inicio = time.perf_counter()
+    try:
+        total = servico_presencas.reconstruir_resumo_mensal(db)
+        print(f"Sucesso! {total} linhas de resumo geradas em {time.perf_counter() - inicio:.1f} s.")
+    except Exception as e:
+        db.rollback()
+        print(f"Erro ao reconstruir o resumo: {e}")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    # Garante que as tabelas existem (inclusive a de resumo, em bancos anteriores a ela)
+    models.Base.metadata.create_all(bind=engine)
+    reconstruir()
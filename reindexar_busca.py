@@ -0,0 +1,26 @@
+import sys
+import os
+
+# Adiciona o diretório 'app' ao path do Python para permitir imports como se estivesse dentro dele
+sys.path.append(os.path.join(os.path.dirname(__file__), 'app'))
+
+from database import SessionLocal, engine
+import models
+from services import busca as servico_busca
+
+def reindexar():
+    # Necessário uma vez para os cadastros anteriores à busca; depois o índice é mantido a cada gravação
+    db = SessionLocal()
+    try:
+        total = servico_busca.reconstruir_indice(db)
+        print(f"Sucesso! Índice de busca reconstruído com {total} termos.")
+    except Exception as e:
+        db.rollback()
+        print(f"Erro ao reconstruir o índice de busca: {e}")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    # Garante que as tabelas existem
+    models.Base.metadata.create_all(bind=engine)
+    reindexar()
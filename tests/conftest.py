@@ -607,3 +607,31 @@ def mock_client(mock_db):
         yield test_client
     app.dependency_overrides.clear()
 
+
+@pytest.fixture(autouse=True)
+def limpar_cache_principal():
+    # O cache de usuários autenticados sobrevive ao rollback do banco entre os testes
+    import cache
+    cache.backend.limpar()
+    yield
+    cache.backend.limpar()
+
+@pytest.fixture(scope="function")
+def orcamento_consultas(db):
+    # Uso: with orcamento_consultas(5) as consultas: client.get(...)
+    # Falha se o bloco executar mais SELECT/INSERT/... do que o orçamento, listando as consultas
+    from contextlib import contextmanager
+    from sqlalchemy import event
+
+    @contextmanager
+    def orcamento(maximo: int):
+        consultas = []
+        def contar(conn, cursor, statement, parameters, context, executemany):
+            consultas.append(statement)
+        event.listen(db.get_bind(), "before_cursor_execute", contar)
+        try:
+            yield consultas
+        finally:
+            event.remove(db.get_bind(), "before_cursor_execute", contar)
+        assert len(consultas) <= maximo, f"{len(consultas)} consultas (orçamento: {maximo}):\n" + "\n".join(consultas)
+    return orcamento
@@ -0,0 +1,129 @@
+import pytest
+from datetime import date, timedelta
+from services import agendamento
+
+DATA = date(2026, 7, 1)
+
+def test_round_robin_todos_contra_todos():
+    ids = list(range(1, 11))
+    plano = agendamento.planejar_round_robin(ids, DATA)
+
+    assert len(plano) == 45
+    assert {frozenset((p.id_equipe_casa, p.id_equipe_visitante)) for p in plano} == {
+        frozenset((a, b)) for a in ids for b in ids if a < b
+    }
+    assert plano[-1].rodada == 9
+    assert plano[-1].fase == "Rodada 9"
+    assert plano[-1].part_data == DATA + timedelta(weeks=8)
+    agendamento.validar_plano(plano)
+
+def test_round_robin_numero_impar_tem_folga():
+    plano = agendamento.planejar_round_robin([1, 2, 3, 4, 5], DATA)
+
+    assert len(plano) == 10
+    # Cada rodada tem uma equipe de folga
+    assert all(len([p for p in plano if p.rodada == r]) == 2 for r in range(1, 6))
+    agendamento.validar_plano(plano)
+
+def test_mata_mata_ligacoes_e_distribuicao():
+    plano = agendamento.planejar_mata_mata(list(range(1, 17)), "Oitavas", DATA)
+
+    assert [p.fase for p in plano].count("Oitavas") == 8
+    assert len(plano) == 15
+    assert plano[0].fase == "Final" and plano[0].proxima is None
+    for p in plano[1:]:
+        assert plano[p.proxima].rodada == p.rodada + 1
+    oitavas = plano[7:]
+    assert [(p.id_equipe_casa, p.id_equipe_visitante) for p in oitavas] == [(2 * i + 1, 2 * i + 2) for i in range(8)]
+    assert oitavas[0].proxima == oitavas[1].proxima
+    assert plano[0].part_data == DATA + timedelta(weeks=3)
+    agendamento.validar_plano(plano)
+
+def test_mata_mata_com_vagas_a_definir():
+    plano = agendamento.planejar_mata_mata([1, 2, 3], "Semifinal", DATA)
+
+    assert [(p.id_equipe_casa, p.id_equipe_visitante) for p in plano[1:]] == [(1, 2), (3, None)]
+
+def test_mata_mata_validacoes():
+    with pytest.raises(ValueError, match="Fase inicial inválida"):
+        agendamento.planejar_mata_mata([1, 2], "Invalida", DATA)
+    with pytest.raises(ValueError, match="excede o limite"):
+        agendamento.planejar_mata_mata([1, 2, 3, 4, 5], "Semifinal", DATA)
+
+def test_grupos_com_cruzamento():
+    plano = agendamento.planejar_grupos({"A": [1, 2, 3], "B": [4, 5, 6, 7]}, DATA)
+
+    fases = [p.fase for p in plano]
+    assert len([f for f in fases if f.startswith("Grupo A")]) == 3
+    assert len([f for f in fases if f.startswith("Grupo B")]) == 6
+    final, semi1, semi2 = plano[-3:]
+    assert final.fase == "Final"
+    assert semi1.proxima == semi2.proxima == len(plano) - 3
+    # O grupo ímpar de 3 equipes precisa de 3 semanas
+    assert semi1.part_data == DATA + timedelta(weeks=3)
+    assert final.part_data == DATA + timedelta(weeks=4)
+    # Vagas estruturadas: 1º A x 2º B e 1º B x 2º A
+    assert (semi1.origem_casa, semi1.origem_visitante) == (("A", 1), ("B", 2))
+    assert (semi2.origem_casa, semi2.origem_visitante) == (("B", 1), ("A", 2))
+    assert semi1.observacoes is None
+    agendamento.validar_plano(plano)
+
+def test_ordenar_grupo_desempata_por_confronto_direto():
+    from services import classificacao
+
+    # 4 soma 5 pontos; 1 e 2 terminam com 4 pontos e saldo 0. A equipe 1 marcou mais gols,
+    # mas a 2 venceu o confronto direto e fica à frente
+    jogos = [(1, 2, 0, 1), (1, 3, 1, 0), (1, 4, 3, 3), (2, 3, 0, 0), (2, 4, 2, 3), (3, 4, 0, 0)]
+    assert classificacao.ordenar_grupo([1, 2, 3, 4], jogos) == [4, 2, 1, 3]
+
+    # Equipes sem jogos ficam no fim
+    assert classificacao.ordenar_grupo([1, 2, 3], [(1, 2, 2, 0)]) == [1, 3, 2]
+
+def test_validar_plano_detecta_conflitos():
+    repetida = agendamento.PartidaPlanejada(1, 1, 2, DATA, "Rodada 1")
+    with pytest.raises(ValueError, match="duas vezes"):
+        agendamento.validar_plano([repetida, agendamento.PartidaPlanejada(1, 1, 3, DATA, "Rodada 1")])
+    with pytest.raises(ValueError, match="Confronto repetido"):
+        agendamento.validar_plano([repetida, agendamento.PartidaPlanejada(2, 2, 1, DATA + timedelta(weeks=1), "Rodada 2")])
+
+def test_agenda_recursos_funde_intervalos():
+    agenda = agendamento.AgendaRecursos()
+    agenda.reservar("local", 600, 690)
+    agenda.reservar("local", 0, 900)
+    agenda.reservar("local", 960, 1000)
+
+    assert not agenda.livre("local", 700, 710)
+    assert agenda.livre("local", 900, 960)
+    assert not agenda.livre("local", 950, 970)
+    assert agenda.livre("outro", 700, 710)
+
+def test_alocar_recursos_sem_conflitos():
+    from datetime import time
+
+    plano = agendamento.planejar_round_robin(list(range(1, 21)), DATA)
+    agenda = agendamento.AgendaRecursos()
+    # Local 1 já ocupado pela manhã da primeira rodada
+    agenda.reservar_partida(DATA, time(8, 0), 240, id_local=1)
+
+    agendamento.alocar_recursos(plano, [1, 2, 3], [10, 11], 90, agenda, hora_inicio=time(8, 0), hora_limite=time(22, 0))
+
+    ocupacoes = set()
+    for p in plano:
+        assert p.id_local in (1, 2, 3) and p.id_arbitro in (10, 11)
+        inicio = p.part_hora.hour * 60 + p.part_hora.minute
+        assert inicio + 90 <= 22 * 60
+        if p.part_data == DATA and p.id_local == 1:
+            assert inicio >= 12 * 60
+        for recurso in (("local", p.id_local), ("arbitro", p.id_arbitro)):
+            chave = (recurso, p.part_data, inicio)
+            assert chave not in ocupacoes
+            ocupacoes.add(chave)
+
+def test_alocar_recursos_sem_horarios_suficientes():
+    from datetime import time
+
+    plano = agendamento.planejar_round_robin(list(range(1, 11)), DATA)
+    with pytest.raises(ValueError, match="horários livres suficientes"):
+        agendamento.alocar_recursos(plano, [1], [1], 90, hora_inicio=time(8, 0), hora_limite=time(12, 0))
+    with pytest.raises(ValueError, match="locais ativos e árbitros"):
+        agendamento.alocar_recursos(plano, [], [1], 90)
@@ -101,3 +101,240 @@ def test_cadastro_aluno_conflito_horario_rollback(client, db):
     # 3. Certificar atomicidade: o aluno NÃO deve estar cadastrado no banco de dados!
     aluno_db = db.query(models.Aluno).filter(models.Aluno.nome_completo == "Aluno Conflitante Teste").first()
     assert aluno_db is None
+
+def test_cadastro_aluno_duplicado_ignora_acentos_e_maiusculas(client, db):
+    db.add(models.Usuario(username="coord_dup", password_hash=get_password_hash("coord123"), role="coordenador", must_change_password=False))
+    db.commit()
+    token = client.post("/token", data={"username": "coord_dup", "password": "coord123"}).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    turmaA, _ = setup_modalidade_professor_e_turmas(db)
+
+    form_data = {
+        "nome_completo": "José da Silva Conceição",
+        "data_nascimento": "2011-03-02",
+        "escola": "Escola Municipal",
+        "serie_ano": "8º ano",
+        "endereco": "Rua Teste, 123",
+        "telefone_1": "(11) 99999-9999",
+        "ids_turmas": str(turmaA.id_turma),
+    }
+    response = client.post("/alunos/", data=form_data, headers=headers)
+    assert response.status_code == 201
+    aluno = db.query(models.Aluno).filter(models.Aluno.id_aluno == response.json()["id_aluno"]).one()
+    assert aluno.nome_normalizado == "jose da silva conceicao"
+
+    # Mesmo nome grafado de outra forma e mesma data: duplicado
+    response = client.post("/alunos/", data={**form_data, "nome_completo": "  JOSE da  silva conceicao"}, headers=headers)
+    assert response.status_code == 400
+    assert "Já existe um aluno" in response.json()["detail"]
+
+    # Outra data de nascimento: homônimo permitido
+    response = client.post("/alunos/", data={**form_data, "data_nascimento": "2012-03-02"}, headers=headers)
+    assert response.status_code == 201
+
+    # A busca por nome também ignora os acentos
+    response = client.get("/alunos/buscar/nome/jose da SILVA", headers=headers)
+    assert len(response.json()) == 2
+
+    # A coluna acompanha a alteração do nome
+    aluno.nome_completo = "Joséfa Simões"
+    db.commit()
+    assert aluno.nome_normalizado == "josefa simoes"
+
+def test_importacao_de_alunos_por_csv_com_relatorio_de_erros(client, db):
+    db.add(models.Usuario(username="coord_imp", password_hash=get_password_hash("coord123"), role="coordenador", must_change_password=False))
+    db.commit()
+    token = client.post("/token", data={"username": "coord_imp", "password": "coord123"}).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    turmaA, turmaB = setup_modalidade_professor_e_turmas(db)
+    a, b = turmaA.id_turma, turmaB.id_turma
+
+    # Já cadastrado antes da importação
+    response = client.post("/alunos/", data={
+        "nome_completo": "Maria Antônia", "data_nascimento": "2012-05-10", "escola": "Escola", "serie_ano": "6º ano",
+        "endereco": "Rua A", "telefone_1": "1", "ids_turmas": str(a),
+    }, headers=headers)
+    assert response.status_code == 201
+
+    planilha = "\n".join([
+        "Nome Completo;Data de Nascimento;Escola;Série/Ano;Telefone 1;Endereço;ids_turmas",
+        f"Pedro Simões;02/03/2011;Escola Municipal;8º ano;(83) 9999-0000;Rua B;{a}",
+        f"Lúcia Brandão;2013-07-01;Escola Estadual;4º ano;(83) 9999-0001;Rua C;{b}",
+        f"MARIA ANTONIA;10/05/2012;Escola;6º ano;1;Rua A;{a}",
+        f"pedro simoes;02/03/2011;Escola Municipal;8º ano;2;Rua B;{b}",
+        f"Carlos Falcão;01/01/2012;Escola;5º ano;3;Rua D;{a},{b}",
+        "Rita Assunção;01/01/2012;Escola;5º ano;4;Rua E;9999",
+        f"Ana Sem Data;31/02/2012;Escola;5º ano;5;Rua F;{a}",
+        f"Ana Sem Escola;01/01/2012;;5º ano;6;Rua G;{a}",
+        "",
+    ]).encode("utf-8")
+
+    # Simulação: valida tudo sem gravar
+    response = client.post("/alunos/importar", files={"arquivo": ("alunos.csv", planilha, "text/csv")}, data={"simular": "true"}, headers=headers)
+    assert response.status_code == 200
+    assert response.json()["importados"] == 2
+    assert db.query(models.Aluno).count() == 1
+
+    response = client.post("/alunos/importar", files={"arquivo": ("alunos.csv", planilha, "text/csv")}, headers=headers)
+    assert response.status_code == 200
+    resultado = response.json()
+    assert resultado["total_linhas"] == 8
+    assert resultado["importados"] == 2
+    erros = {erro["linha"]: erro["erro"] for erro in resultado["erros"]}
+    assert "Já existe um aluno" in erros[4]
+    assert "repetido na planilha" in erros[5] and "linha 2" in erros[5]
+    assert "Conflito de horário" in erros[6]
+    assert "não encontrada" in erros[7]
+    assert "Data de nascimento inválida" in erros[8]
+    assert "escola" in erros[9]
+
+    # Participante, aluno, matrícula e índice de busca gravados para as linhas válidas
+    pedro = db.query(models.Aluno).filter(models.Aluno.nome_normalizado == "pedro simoes").one()
+    assert pedro.data_nascimento == date(2011, 3, 2)
+    assert pedro.participante.tipo == "aluno"
+    assert [m.id_turma for m in pedro.matriculas] == [a]
+    response = client.get("/busca/", params={"q": "lucia bran"}, headers=headers)
+    assert [r["nome"] for r in response.json()] == ["Lúcia Brandão"]
+
+    # Formato não suportado
+    response = client.post("/alunos/importar", files={"arquivo": ("alunos.txt", b"x", "text/plain")}, headers=headers)
+    assert response.status_code == 400
+
+
+def test_importacao_de_alunos_por_xlsx(client, db):
+    import io
+    from openpyxl import Workbook
+
+    db.add(models.Usuario(username="coord_xlsx", password_hash=get_password_hash("coord123"), role="coordenador", must_change_password=False))
+    db.commit()
+    token = client.post("/token", data={"username": "coord_xlsx", "password": "coord123"}).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    turmaA, _ = setup_modalidade_professor_e_turmas(db)
+
+    # Datas como células de data e telefones como números, como o Excel grava
+    pasta = Workbook()
+    planilha = pasta.active
+    planilha.append(["Nome Completo", "Data de Nascimento", "Escola", "Série/Ano", "Telefone 1", "Endereço", "Turmas"])
+    planilha.append(["Helena Xavier", date(2012, 4, 3), "Escola", "6º ano", 83999990000, "Rua X", str(turmaA.id_turma)])
+    planilha.append(["Sem Turma", date(2012, 4, 3), "Escola", "6º ano", 1, "Rua Y", None])
+    arquivo = io.BytesIO()
+    pasta.save(arquivo)
+
+    response = client.post("/alunos/importar", files={"arquivo": ("alunos.xlsx", arquivo.getvalue(), "application/octet-stream")}, headers=headers)
+    assert response.status_code == 200
+    resultado = response.json()
+    assert (resultado["total_linhas"], resultado["importados"]) == (2, 1)
+    assert [erro["linha"] for erro in resultado["erros"]] == [3]
+    helena = db.query(models.Aluno).filter(models.Aluno.nome_normalizado == "helena xavier").one()
+    assert (helena.data_nascimento, helena.telefone_1) == (date(2012, 4, 3), "83999990000")
+    assert [m.id_turma for m in helena.matriculas] == [turmaA.id_turma]
+
+def test_importacao_desfaz_o_lote_quando_os_participantes_nao_sao_identificados(db, monkeypatch):
+    from services import importacao as servico_importacao
+
+    turmaA, _ = setup_modalidade_professor_e_turmas(db)
+    db.commit()
+    participantes = db.query(models.Participante).count()
+
+    def inserir_incompleto(db, novos):
+        db.add(models.Participante(tipo="aluno"))
+        db.flush()
+        raise RuntimeError("Não foi possível identificar os participantes inseridos no lote.")
+    monkeypatch.setattr(servico_importacao, "_inserir", inserir_incompleto)
+
+    linhas = [(2, {"nome_completo": "Lote Falho", "data_nascimento": "2012-01-01", "escola": "E", "serie_ano": "5",
+                   "telefone_1": "1", "endereco": "Rua", "ids_turmas": str(turmaA.id_turma)})]
+    resultado = servico_importacao.importar_alunos(db, iter(linhas))
+    assert resultado["importados"] == 0
+    assert resultado["erros"] == [{"linha": 2, "erro": "Erro ao gravar o lote: Não foi possível identificar os participantes inseridos no lote."}]
+    assert db.query(models.Participante).count() == participantes
+
+def test_exportacao_csv_de_alunos_presencas_e_matriculas_da_turma(client, db):
+    import csv
+    db.add(models.Usuario(username="coord_exp", password_hash=get_password_hash("coord123"), role="coordenador", must_change_password=False))
+    db.commit()
+    token = client.post("/token", data={"username": "coord_exp", "password": "coord123"}).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    turmaA, turmaB = setup_modalidade_professor_e_turmas(db)
+
+    ids = {}
+    for nome, id_turma in [("Zé Conceição", turmaA.id_turma), ("Ana Simões", turmaA.id_turma), ("Bruno Outra Turma", turmaB.id_turma)]:
+        response = client.post("/alunos/", data={
+            "nome_completo": nome, "data_nascimento": "2012-05-10", "escola": "Escola", "serie_ano": "6º ano",
+            "endereco": "Rua A", "telefone_1": "1", "ids_turmas": str(id_turma),
+        }, headers=headers)
+        ids[nome] = response.json()["id_aluno"]
+    matricula_ze = db.query(models.Matricula).filter(models.Matricula.id_aluno == ids["Zé Conceição"]).one()
+    db.add_all([
+        models.Presenca(id_matricula=matricula_ze.id_matricula, data_aula=date(2026, 3, 2), status="Presente"),
+        models.Presenca(id_matricula=matricula_ze.id_matricula, data_aula=date(2026, 3, 9), status="Ausente", observacao="Doente"),
+    ])
+    db.commit()
+
+    def ler(response):
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/csv")
+        assert response.content.startswith("﻿".encode("utf-8"))
+        return list(csv.reader(response.content.decode("utf-8-sig").splitlines(), delimiter=";"))
+
+    # Alunos da turma em ordem alfabética, com os títulos aceitos pela importação
+    response = client.get(f"/exportacoes/turmas/{turmaA.id_turma}/alunos", headers=headers)
+    assert f'filename="alunos_turma_{turmaA.id_turma}.csv"' in response.headers["content-disposition"]
+    linhas = ler(response)
+    assert linhas[0][:3] == ["ID Aluno", "Nome Completo", "Data de Nascimento"]
+    assert [l[1] for l in linhas[1:]] == ["Ana Simões", "Zé Conceição"]
+    assert linhas[1][2] == "10/05/2012" and linhas[1][-1] == "Sim"
+
+    # A planilha exportada volta pela importação (aqui com nomes novos, para não repetir os alunos)
+    for linha in linhas[1:]:
+        linha[1] += " Reimportado"
+    planilha = "\n".join(";".join(linha) for linha in linhas).encode()
+    response = client.post("/alunos/importar", files={"arquivo": ("alunos.csv", planilha, "text/csv")}, data={"simular": "true"}, headers=headers)
+    assert (response.json()["importados"], response.json()["erros"]) == (2, [])
+
+    linhas = ler(client.get("/exportacoes/presencas", params={"id_turma": turmaA.id_turma, "data_inicio": "2026-03-05"}, headers=headers))
+    assert linhas[1:] == [["09/03/2026", str(turmaA.id_turma), turmaA.descricao, str(ids["Zé Conceição"]), "Zé Conceição", "Ausente", "Doente"]]
+
+    linhas = ler(client.get("/exportacoes/matriculas", headers=headers))
+    assert len(linhas) == 4 and linhas[3][4] == "Bruno Outra Turma" and linhas[3][7] == "Futsal"
+
+    # Sem linhas: só o cabeçalho
+    assert len(ler(client.get("/exportacoes/presencas", params={"id_turma": turmaB.id_turma}, headers=headers))) == 1
+
+    assert client.get("/exportacoes/turmas/9999/alunos", headers=headers).status_code == 404
+    response = client.get("/exportacoes/presencas", params={"data_inicio": "2026-04-01", "data_fim": "2026-03-01"}, headers=headers)
+    assert response.status_code == 400
+
+def test_exportacao_xlsx_de_alunos_da_turma(client, db):
+    import io
+    from openpyxl import load_workbook
+
+    db.add(models.Usuario(username="coord_expx", password_hash=get_password_hash("coord123"), role="coordenador", must_change_password=False))
+    db.commit()
+    token = client.post("/token", data={"username": "coord_expx", "password": "coord123"}).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    turmaA, _ = setup_modalidade_professor_e_turmas(db)
+    for nome in ["Zé Conceição", "Ana Simões"]:
+        client.post("/alunos/", data={
+            "nome_completo": nome, "data_nascimento": "2012-05-10", "escola": "Escola", "serie_ano": "6º ano",
+            "endereco": "Rua A", "telefone_1": "1", "ids_turmas": str(turmaA.id_turma),
+        }, headers=headers)
+
+    response = client.get(f"/exportacoes/turmas/{turmaA.id_turma}/alunos", params={"formato": "xlsx"}, headers=headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+    assert f'filename="alunos_turma_{turmaA.id_turma}.xlsx"' in response.headers["content-disposition"]
+
+    # Datas ficam como células de data, não como texto
+    planilha = load_workbook(io.BytesIO(response.content)).active
+    assert planilha.title == f"alunos_turma_{turmaA.id_turma}"
+    linhas = list(planilha.iter_rows(values_only=True))
+    assert linhas[0][:3] == ("ID Aluno", "Nome Completo", "Data de Nascimento")
+    assert [l[1] for l in linhas[1:]] == ["Ana Simões", "Zé Conceição"]
+    assert linhas[1][2].date() == date(2012, 5, 10)
+
+    # A planilha exportada volta pela importação em XLSX: nome e data lidos reconhecem os mesmos alunos
+    response = client.post("/alunos/importar", files={"arquivo": ("alunos.xlsx", response.content, "application/octet-stream")}, data={"simular": "true"}, headers=headers)
+    resultado = response.json()
+    assert (resultado["total_linhas"], resultado["importados"]) == (2, 0)
+    assert {erro["erro"] for erro in resultado["erros"]} == {"Já existe um aluno cadastrado com este nome e data de nascimento."}
@@ -0,0 +1,57 @@
+import os
+import sys
+from sqlalchemy import create_engine, inspect, text
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import models
+import atualizar_banco
+
+def _banco_antigo(tmp_path):
+    # Banco criado antes da chave única e dos índices das presenças e das colunas de origem das partidas
+    engine = create_engine(f"sqlite:///{tmp_path / 'antigo.db'}")
+    models.Base.metadata.create_all(bind=engine)
+    with engine.begin() as conexao:
+        conexao.execute(text("DROP TABLE presencas"))
+        conexao.execute(text(
+            "CREATE TABLE presencas (id_presenca INTEGER PRIMARY KEY, id_matricula INTEGER NOT NULL, "
+            "data_aula DATE NOT NULL, status VARCHAR(11), observacao TEXT)"
+        ))
+        for coluna in atualizar_banco.COLUNAS_NOVAS[models.Partida]:
+            conexao.execute(text(f"ALTER TABLE partidas DROP COLUMN {coluna}"))
+    return engine
+
+def test_atualizar_banco_remove_chamadas_duplicadas_e_cria_chave_e_indices(tmp_path):
+    engine = _banco_antigo(tmp_path)
+    with engine.begin() as conexao:
+        conexao.execute(text(
+            "INSERT INTO presencas (id_presenca, id_matricula, data_aula, status) VALUES "
+            "(1, 1, '2026-03-02', 'Ausente'), (2, 1, '2026-03-02', 'Presente'), (3, 2, '2026-03-02', 'Presente')"
+        ))
+        # Resumo contado com a chamada duplicada
+        conexao.execute(text(
+            "INSERT INTO resumo_presencas_mensal (id_matricula, ano, mes, presentes, ausentes, justificados, total) "
+            "VALUES (1, 2026, 3, 1, 1, 0, 2)"
+        ))
+
+    atualizar_banco.atualizar(engine)
+
+    with engine.connect() as conexao:
+        # Fica a chamada mais recente, e o resumo volta a contar uma aula
+        assert conexao.execute(text("SELECT id_presenca, status FROM presencas ORDER BY id_presenca")).all() == [
+            (2, "Presente"), (3, "Presente"),
+        ]
+        assert conexao.execute(text(
+            "SELECT presentes, ausentes, total FROM resumo_presencas_mensal WHERE id_matricula = 1"
+        )).one() == (1, 0, 1)
+    colunas = {c["name"] for c in inspect(engine).get_columns("partidas")}
+    assert set(atualizar_banco.COLUNAS_NOVAS[models.Partida]) <= colunas
+    indices = {i["name"]: i for i in inspect(engine).get_indexes("presencas")}
+    assert indices["uq_presencas_matricula_data"]["unique"]
+    assert "ix_presencas_data_matricula_status" in indices
+
+    # Uma segunda execução não encontra nada a fazer
+    assert atualizar_banco.adicionar_colunas(engine) == []
+    assert atualizar_banco.adicionar_unicidade_presencas(engine) == 0
+    assert atualizar_banco.criar_indices(engine) == []
+    engine.dispose()
@@ -56,3 +56,36 @@ def test_restricao_de_perfil_usuario(client, db):
     # Tentar acessar endpoint restrito a admin (/users)
     users_response = client.get("/users", headers=headers)
     assert users_response.status_code == 403
+
+def test_cache_de_usuario_invalidado_ao_alterar_papel_senha_e_excluir(client, db):
+    db.add(models.Usuario(username="coord_cache", password_hash=get_password_hash("coord123"), role="coordenador", must_change_password=False))
+    alvo = models.Usuario(username="alvo_cache", password_hash=get_password_hash("alvo123"), role="professor", must_change_password=True)
+    db.add(alvo)
+    db.commit()
+
+    coord_token = client.post("/token", data={"username": "coord_cache", "password": "coord123"}).json()["access_token"]
+    coord_headers = {"Authorization": f"Bearer {coord_token}"}
+    alvo_token = client.post("/token", data={"username": "alvo_cache", "password": "alvo123"}).json()["access_token"]
+    alvo_headers = {"Authorization": f"Bearer {alvo_token}"}
+
+    # Primeira chamada coloca o usuário no cache
+    assert client.get("/users/me", headers=alvo_headers).json()["role"] == "professor"
+
+    # 1. Alteração de papel
+    response = client.put("/users/alvo_cache/role", json={"role": "assistente"}, headers=coord_headers)
+    assert response.status_code == 200
+    assert client.get("/users/me", headers=alvo_headers).json()["role"] == "assistente"
+
+    # 2. Troca de senha
+    response = client.post(
+        "/change-password",
+        json={"old_password": "alvo123", "new_password": "nova123", "confirm_password": "nova123"},
+        headers=alvo_headers
+    )
+    assert response.status_code == 200
+    assert client.get("/users/me", headers=alvo_headers).json()["must_change_password"] is False
+
+    # 3. Exclusão: o token ainda válido deixa de autenticar
+    response = client.delete(f"/users/{alvo.id_usuario}", headers=coord_headers)
+    assert response.status_code == 204
+    assert client.get("/users/me", headers=alvo_headers).status_code == 401
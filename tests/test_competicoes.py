@@ -159,3 +159,696 @@ def test_promocao_e_bloqueio_retroativo_mata_mata(client, db):
     )
     assert res_bloqueio.status_code == 400
     assert "Não é possível alterar o vencedor" in res_bloqueio.json()["detail"]
+
+def _gerar_chaveamento_contando_sql(db, edicao, mod):
+    from sqlalchemy import event
+    from services import edicoes as edicao_service
+
+    comandos = []
+    def contar(conn, cursor, statement, parameters, context, executemany):
+        comandos.append(statement)
+
+    conexao = db.get_bind()
+    event.listen(conexao, "before_cursor_execute", contar)
+    try:
+        partidas = edicao_service.gerar_confrontos_mata_mata(
+            db, edicao.id_edicao, mod.id_modalidade, edicao.fase_inicial, edicao.data_inicio
+        )
+    finally:
+        event.remove(conexao, "before_cursor_execute", contar)
+    return partidas, comandos
+
+def test_chaveamento_mata_mata_inserido_em_lote(db):
+    edicao, mod, equipes = setup_edicao_locais_arbitros_e_equipes(db, num_equipes=16)
+    edicao.fase_inicial = "Oitavas"
+    db.commit()
+    partidas, comandos = _gerar_chaveamento_contando_sql(db, edicao, mod)
+
+    # 15 partidas gravadas com um único INSERT e ligadas com um único UPDATE em lote
+    assert len(partidas) == 15
+    assert len([c for c in comandos if c.startswith("INSERT")]) == 1
+    assert len([c for c in comandos if c.startswith("UPDATE")]) == 1
+
+    por_id = {p.id_partida: p for p in db.query(models.Partida).filter(models.Partida.id_edicao == edicao.id_edicao).all()}
+    assert len(por_id) == 15
+    ordem_fases = {"Oitavas": "Quartas", "Quartas": "Semifinal", "Semifinal": "Final"}
+    for p in por_id.values():
+        if p.fase == "Final":
+            assert p.id_proxima_partida is None
+        else:
+            assert por_id[p.id_proxima_partida].fase == ordem_fases[p.fase]
+
+    oitavas = sorted((p for p in por_id.values() if p.fase == "Oitavas"), key=lambda p: p.id_partida)
+    assert [(p.id_equipe_casa, p.id_equipe_visitante) for p in oitavas] == [
+        (equipes[2 * i].id_equipe, equipes[2 * i + 1].id_equipe) for i in range(8)
+    ]
+    # Duas partidas de oitavas consecutivas alimentam a mesma partida de quartas
+    assert oitavas[0].id_proxima_partida == oitavas[1].id_proxima_partida
+
+def test_gerar_confrontos_distribuindo_recursos(client, db):
+    from services import partidas as partida_service
+
+    db.add(models.Usuario(
+        username="coord_recursos",
+        password_hash=get_password_hash("coord123"),
+        role="coordenador",
+        must_change_password=False
+    ))
+    edicao, mod, equipes = setup_edicao_locais_arbitros_e_equipes(db, num_equipes=8)
+    edicao.tipo_competicao = "Pontos Corridos"
+    db.add(models.Local(loca_nome="Ginásio Secundário", ativo=True))
+    db.add(models.Arbitro(apito_nome="Árbitro Auxiliar", apito_doc="456", apito_tel="456"))
+    db.commit()
+
+    token = client.post("/token", data={"username": "coord_recursos", "password": "coord123"}).json()["access_token"]
+    response = client.post(
+        f"/edicoes/{edicao.id_edicao}/gerar-confrontos",
+        json={"id_modalidade": mod.id_modalidade, "part_hora": "09:00:00", "hora_limite": "18:00:00", "distribuir_recursos": True},
+        headers={"Authorization": f"Bearer {token}"}
+    )
+    assert response.status_code == 200
+
+    partidas = db.query(models.Partida).filter(models.Partida.id_edicao == edicao.id_edicao).all()
+    assert len(partidas) == 28
+    assert len({p.id_local for p in partidas}) == 2
+    assert len({p.part_hora for p in partidas}) > 1
+    for p in partidas:
+        assert time(9, 0) <= p.part_hora <= time(16, 30)
+        assert partida_service.verificar_conflito_partida(
+            db, p.id_local, p.id_arbitro, mod.id_modalidade, p.part_data, p.part_hora,
+            id_partida_ignorar=p.id_partida, id_equipe_casa=p.id_equipe_casa, id_equipe_visitante=p.id_equipe_visitante
+        ) is None
+
+def _finalizar(db, partida, placar_casa, placar_visitante, status="Finalizada"):
+    from services import partidas as partida_service
+    import schemas
+    return partida_service.atualizar_partida(db, partida.id_partida, schemas.PartidaUpdate(
+        placar_casa=placar_casa, placar_visitante=placar_visitante, status=status
+    ))
+
+def _tabela(db, id_edicao):
+    return {
+        (l.grupo, l.id_equipe): (l.jogos, l.vitorias, l.empates, l.derrotas, l.gols_pro, l.gols_contra, l.pontos)
+        for l in db.query(models.Classificacao).filter(models.Classificacao.id_edicao == id_edicao).all()
+    }
+
+def test_classificacao_pontos_corridos_mantida_pelas_partidas(client, db):
+    from services import classificacao as classificacao_service
+    from services import edicoes as edicao_service
+
+    edicao, mod, equipes = setup_edicao_locais_arbitros_e_equipes(db, num_equipes=4)
+    edicao.tipo_competicao = "Pontos Corridos"
+    db.commit()
+    edicao_service.gerar_confrontos_pontos_corridos(db, edicao.id_edicao, mod.id_modalidade, edicao.data_inicio)
+    e1, e2, e3, e4 = [eq.id_equipe for eq in equipes]
+
+    partidas = db.query(models.Partida).filter(models.Partida.id_edicao == edicao.id_edicao).order_by(models.Partida.id_partida).all()
+    confronto = {frozenset((p.id_equipe_casa, p.id_equipe_visitante)): p for p in partidas}
+    p12, p34, p13 = confronto[frozenset((e1, e2))], confronto[frozenset((e3, e4))], confronto[frozenset((e1, e3))]
+
+    def placar(partida, gols_e_menor, gols_e_maior):
+        # Placar informado do ponto de vista da equipe de menor id
+        if partida.id_equipe_casa < partida.id_equipe_visitante:
+            return _finalizar(db, partida, gols_e_menor, gols_e_maior)
+        return _finalizar(db, partida, gols_e_maior, gols_e_menor)
+
+    placar(p12, 2, 0)
+    placar(p34, 1, 1)
+    assert _tabela(db, edicao.id_edicao) == {
+        ("", e1): (1, 1, 0, 0, 2, 0, 3), ("", e2): (1, 0, 0, 1, 0, 2, 0),
+        ("", e3): (1, 0, 1, 0, 1, 1, 1), ("", e4): (1, 0, 1, 0, 1, 1, 1),
+    }
+
+    # Corrigir o placar de uma partida já finalizada troca o resultado em vez de somar outro jogo
+    placar(p12, 0, 3)
+    assert _tabela(db, edicao.id_edicao)[("", e1)] == (1, 0, 0, 1, 0, 3, 0)
+    assert _tabela(db, edicao.id_edicao)[("", e2)] == (1, 1, 0, 0, 3, 0, 3)
+
+    # Partidas que não estão finalizadas não contam
+    placar(p13, 4, 0)
+    _finalizar(db, p13, 4, 0, status="Em Andamento")
+    assert ("", e1) in _tabela(db, edicao.id_edicao)
+    assert _tabela(db, edicao.id_edicao)[("", e3)] == (1, 0, 1, 0, 1, 1, 1)
+
+    # A manutenção incremental bate com o recálculo completo
+    incremental = _tabela(db, edicao.id_edicao)
+    classificacao_service.recalcular_classificacao(db, edicao.id_edicao)
+    db.commit()
+    assert _tabela(db, edicao.id_edicao) == incremental
+
+    # Excluir uma partida finalizada retira o resultado
+    from services import partidas as partida_service
+    partida_service.excluir_partida(db, p34.id_partida)
+    assert ("", e3) not in _tabela(db, edicao.id_edicao)
+
+    response = client.get(f"/publico/edicoes/{edicao.id_edicao}/classificacao")
+    assert response.status_code == 200
+    tabela = response.json()
+    assert [(l["posicao"], l["id_equipe"], l["pontos"]) for l in tabela] == [(1, e2, 3), (2, e1, 0)]
+    assert tabela[0]["saldo"] == 3 and tabela[0]["grupo"] is None
+
+def test_classificacao_publica_usa_os_desempates_da_promocao(client, db):
+    from services import classificacao as classificacao_service
+    from services import edicoes as edicao_service
+
+    edicao, mod, equipes = setup_edicao_locais_arbitros_e_equipes(db, num_equipes=4)
+    edicao.tipo_competicao = "Pontos Corridos"
+    db.commit()
+    edicao_service.gerar_confrontos_pontos_corridos(db, edicao.id_edicao, mod.id_modalidade, edicao.data_inicio)
+    e1, e2, e3, e4 = [eq.id_equipe for eq in equipes]
+
+    # e1 e e2 terminam com 4 pontos, 1 vitória e saldo 0; e1 marcou mais gols, mas e2 venceu o confronto direto
+    placares = {(e1, e2): (0, 1), (e1, e3): (1, 0), (e1, e4): (3, 3), (e2, e3): (0, 0), (e2, e4): (2, 3), (e3, e4): (0, 0)}
+    jogos = []
+    for partida in db.query(models.Partida).filter(models.Partida.id_edicao == edicao.id_edicao).all():
+        casa, visitante = partida.id_equipe_casa, partida.id_equipe_visitante
+        gols = placares[(casa, visitante)] if (casa, visitante) in placares else placares[(visitante, casa)][::-1]
+        _finalizar(db, partida, *gols)
+        jogos.append((casa, visitante, *gols))
+
+    promocao = classificacao_service.ordenar_grupo([e1, e2, e3, e4], jogos)
+    assert promocao == [e4, e2, e1, e3]
+    response = client.get(f"/publico/edicoes/{edicao.id_edicao}/classificacao")
+    assert [l["id_equipe"] for l in response.json()] == promocao
+
+def test_classificacao_grupos_ignora_mata_mata(client, db):
+    from services import edicoes as edicao_service
+    from services import equipes as equipe_service
+    import schemas
+
+    edicao, mod, equipes = setup_edicao_locais_arbitros_e_equipes(db, num_equipes=4)
+    edicao.tipo_competicao = "Grupos"
+    db.commit()
+    edicao_service.gerar_confrontos_grupos(db, edicao.id_edicao, mod.id_modalidade)
+
+    partidas = db.query(models.Partida).filter(models.Partida.id_edicao == edicao.id_edicao).all()
+    jogo_grupo_a = next(p for p in partidas if p.fase.startswith("Grupo A"))
+    semifinal = next(p for p in partidas if p.fase == "Semifinal")
+    semifinal.id_equipe_casa, semifinal.id_equipe_visitante = equipes[0].id_equipe, equipes[2].id_equipe
+    db.commit()
+
+    _finalizar(db, jogo_grupo_a, 1, 0)
+    _finalizar(db, semifinal, 2, 1)
+    tabela = _tabela(db, edicao.id_edicao)
+    assert set(tabela) == {("A", jogo_grupo_a.id_equipe_casa), ("A", jogo_grupo_a.id_equipe_visitante)}
+    assert tabela[("A", jogo_grupo_a.id_equipe_casa)][-1] == 3
+
+    # Mudar a equipe de grupo move a sua linha na classificação
+    equipe_service.atualizar_equipe(db, jogo_grupo_a.id_equipe_casa, schemas.EquipeUpdate(grupo="B"))
+    assert ("B", jogo_grupo_a.id_equipe_casa) in _tabela(db, edicao.id_edicao)
+
+    response = client.get(f"/publico/edicoes/{edicao.id_edicao}/classificacao", params={"grupo": "A"})
+    assert [l["id_equipe"] for l in response.json()] == [jogo_grupo_a.id_equipe_visitante]
+
+def test_vagas_de_semifinal_preenchidas_ao_encerrar_grupo(db):
+    from services import edicoes as edicao_service
+
+    edicao, mod, equipes = setup_edicao_locais_arbitros_e_equipes(db, num_equipes=6)
+    edicao.tipo_competicao = "Grupos"
+    for eq, grupo in zip(equipes, "AAABBB"):
+        eq.grupo = grupo
+    db.commit()
+    edicao_service.gerar_confrontos_grupos(db, edicao.id_edicao, mod.id_modalidade)
+    a1, a2, a3 = [eq.id_equipe for eq in equipes[:3]]
+
+    partidas = db.query(models.Partida).filter(models.Partida.id_edicao == edicao.id_edicao).all()
+    semi1, semi2 = sorted((p for p in partidas if p.fase == "Semifinal"), key=lambda p: p.id_partida)
+    assert (semi1.origem_casa_grupo, semi1.origem_casa_posicao, semi1.origem_visitante_grupo, semi1.origem_visitante_posicao) == ("A", 1, "B", 2)
+    jogos_a = {frozenset((p.id_equipe_casa, p.id_equipe_visitante)): p for p in partidas if p.fase.startswith("Grupo A")}
+
+    def placar(x, y, gols_x, gols_y):
+        p = jogos_a[frozenset((x, y))]
+        if p.id_equipe_casa == x:
+            return _finalizar(db, p, gols_x, gols_y)
+        return _finalizar(db, p, gols_y, gols_x)
+
+    # A3 vence os dois jogos e A2 vence A1; as vagas só são preenchidas no último jogo do grupo
+    placar(a3, a1, 2, 0)
+    placar(a1, a2, 0, 1)
+    db.refresh(semi1)
+    assert semi1.id_equipe_casa is None
+    placar(a3, a2, 3, 1)
+
+    db.refresh(semi1)
+    db.refresh(semi2)
+    assert semi1.id_equipe_casa == a3
+    assert semi2.id_equipe_visitante == a2
+    assert semi1.id_equipe_visitante is None and semi2.id_equipe_casa is None
+
+    # Corrigir o placar de A1 x A2 troca o 2º colocado
+    placar(a1, a2, 1, 0)
+    db.refresh(semi2)
+    assert semi2.id_equipe_visitante == a1
+
+    # Reabrir um jogo esvazia as vagas do grupo
+    _finalizar(db, jogos_a[frozenset((a1, a2))], 1, 0, status="Em Andamento")
+    db.refresh(semi1)
+    db.refresh(semi2)
+    assert semi1.id_equipe_casa is None and semi2.id_equipe_visitante is None
+
+    # Com o mata-mata iniciado, a classificação do grupo não pode mais mudar
+    _finalizar(db, jogos_a[frozenset((a1, a2))], 1, 0)
+    semi1.status = "Em Andamento"
+    db.commit()
+    with pytest.raises(ValueError, match="mata-mata já foi iniciado"):
+        placar(a3, a1, 0, 5)
+
+def test_ranking_artilharia_top_k_com_cursor(client, db):
+    from sqlalchemy import event
+    from services import estatisticas as estatistica_service
+
+    edicao, mod, equipes = setup_edicao_locais_arbitros_e_equipes(db, num_equipes=2)
+    local = db.query(models.Local).first()
+    arbitro = db.query(models.Arbitro).first()
+    partidas = [models.Partida(id_edicao=edicao.id_edicao, id_local=local.id_local, id_arbitro=arbitro.id_arbitro,
+                               id_modalidade=mod.id_modalidade, id_equipe_casa=equipes[0].id_equipe,
+                               id_equipe_visitante=equipes[1].id_equipe, part_data=date(2026, 7, d), part_hora=time(10, 0))
+                for d in (1, 8)]
+    db.add_all(partidas)
+
+    # Cinco jogadores: quatro alunos e um atleta
+    participantes = []
+    for i in range(5):
+        participante = models.Participante(tipo="aluno" if i < 4 else "atleta")
+        db.add(participante)
+        db.flush()
+        if i < 4:
+            db.add(models.Aluno(id_participante=participante.id_participante, nome_completo=f"Aluno Ranking {i}",
+                                data_nascimento=date(2010, 1, 1), escola="E", serie_ano="9", telefone_1="1", endereco="Rua"))
+        else:
+            db.add(models.Atleta(id_participante=participante.id_participante, nome_completo="Atleta Ranking",
+                                 data_nascimento=date(2000, 1, 1), documento_pessoal="doc"))
+        participantes.append(participante.id_participante)
+    db.flush()
+
+    # Gols por jogador somando as duas partidas: 5, 3, 3, 0 e 4 (o atleta)
+    gols = [(2, 3), (3, 0), (1, 2), (0, 0), (4, 0)]
+    for id_participante, (g1, g2) in zip(participantes, gols):
+        for partida, g in zip(partidas, (g1, g2)):
+            db.add(models.EstatisticaPartida(id_partida=partida.id_partida, id_participante=id_participante, gols=g, cartoes_amarelos=1))
+    id_edicao = edicao.id_edicao
+    db.commit()
+
+    comandos = []
+    def contar(conn, cursor, statement, parameters, context, executemany):
+        comandos.append(statement)
+    event.listen(db.get_bind(), "before_cursor_execute", contar)
+    try:
+        pagina = estatistica_service.ranking_edicao(db, id_edicao, "gols", limite=2)
+    finally:
+        event.remove(db.get_bind(), "before_cursor_execute", contar)
+    assert len(comandos) == 1
+    assert [(i["nome_jogador"], i["total"], i["jogos"]) for i in pagina["itens"]] == [("Aluno Ranking 0", 5, 2), ("Atleta Ranking", 4, 2)]
+
+    # Segunda página pela API pública: empate em 3 gols resolvido pelo id, jogador sem gols fica de fora
+    response = client.get(f"/publico/edicoes/{edicao.id_edicao}/ranking/gols", params={"limite": 2, "cursor": pagina["proximo_cursor"]})
+    assert response.status_code == 200
+    assert [i["id_participante"] for i in response.json()["itens"]] == [participantes[1], participantes[2]]
+    assert response.json()["proximo_cursor"] is None
+
+    response = client.get(f"/publico/edicoes/{edicao.id_edicao}/ranking/cartoes_amarelos")
+    assert [i["total"] for i in response.json()["itens"]] == [2] * 5
+
+    assert client.get(f"/publico/edicoes/{edicao.id_edicao}/ranking/gols", params={"cursor": "abc"}).status_code == 400
+    assert client.get(f"/publico/edicoes/{edicao.id_edicao}/ranking/faltas").status_code == 422
+
+def test_suspensao_por_acumulo_de_cartoes(client, db):
+    db.add(models.Usuario(username="coord_disciplina", password_hash=get_password_hash("coord123"), role="coordenador", must_change_password=False))
+    edicao, mod, equipes = setup_edicao_locais_arbitros_e_equipes(db, num_equipes=2)
+    edicao.tipo_competicao = "Pontos Corridos"
+    local = db.query(models.Local).first()
+    arbitro = db.query(models.Arbitro).first()
+    partidas = [models.Partida(id_edicao=edicao.id_edicao, id_local=local.id_local, id_arbitro=arbitro.id_arbitro,
+                               id_modalidade=mod.id_modalidade, id_equipe_casa=equipes[0].id_equipe,
+                               id_equipe_visitante=equipes[1].id_equipe, part_data=date(2026, 7, d), part_hora=time(10, 0))
+                for d in (1, 8, 15)]
+    db.add_all(partidas)
+    participante = models.Participante(tipo="atleta")
+    db.add(participante)
+    db.flush()
+    db.add(models.Atleta(id_participante=participante.id_participante, nome_completo="Atleta Disciplina",
+                         data_nascimento=date(2000, 1, 1), documento_pessoal="doc"))
+    db.execute(models.equipes_participantes.insert().values(id_equipe=equipes[0].id_equipe, id_participante=participante.id_participante))
+    db.commit()
+    id_edicao, id_participante = edicao.id_edicao, participante.id_participante
+    p1, p2, p3 = [p.id_partida for p in partidas]
+
+    token = client.post("/token", data={"username": "coord_disciplina", "password": "coord123"}).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    def situacao():
+        return client.get(f"/edicoes/{id_edicao}/disciplina/{id_participante}", headers=headers).json()
+
+    res = client.post(f"/partidas/{p1}/estatisticas", json={"id_participante": id_participante, "cartoes_amarelos": 2}, headers=headers)
+    assert res.status_code == 201
+    assert situacao()["suspenso"] is False
+    res = client.post(f"/partidas/{p2}/estatisticas", json={"id_participante": id_participante, "cartoes_amarelos": 1}, headers=headers)
+    id_estatistica_p2 = res.json()["id_estatistica"]
+    assert (situacao()["cartoes_amarelos"], situacao()["jogos_a_cumprir"]) == (3, 1)
+
+    # Suspenso: não pode ser escalado na próxima partida
+    res = client.post(f"/partidas/{p3}/estatisticas", json={"id_participante": id_participante, "gols": 1}, headers=headers)
+    assert res.status_code == 400
+    assert "suspenso" in res.json()["detail"]
+    listagem = client.get(f"/edicoes/{id_edicao}/disciplina", params={"apenas_suspensos": True}, headers=headers).json()
+    assert [s["id_participante"] for s in listagem] == [id_participante]
+
+    # Corrigir ou remover a estatística ajusta o acumulador
+    client.put(f"/partidas/{p2}/estatisticas/{id_estatistica_p2}", json={"id_participante": id_participante, "cartoes_amarelos": 0}, headers=headers)
+    assert situacao()["suspenso"] is False
+    client.put(f"/partidas/{p2}/estatisticas/{id_estatistica_p2}", json={"id_participante": id_participante, "cartoes_vermelhos": 1}, headers=headers)
+    assert (situacao()["cartoes_amarelos"], situacao()["cartoes_vermelhos"], situacao()["jogos_a_cumprir"]) == (2, 1, 1)
+
+    # Finalizar a partida seguinte sem o jogador cumpre a suspensão
+    assert client.put(f"/partidas/{p3}", json={"status": "Finalizada", "placar_casa": 1, "placar_visitante": 0}, headers=headers).status_code == 200
+    assert (situacao()["suspensoes_cumpridas"], situacao()["suspenso"]) == (1, False)
+
+    assert client.delete(f"/partidas/{p2}/estatisticas/{id_estatistica_p2}", headers=headers).status_code == 204
+    assert situacao()["cartoes_vermelhos"] == 0
+
+    # Jogador sem cartões na edição
+    assert client.get(f"/edicoes/{id_edicao}/disciplina/99999", headers=headers).json()["suspenso"] is False
+
+def test_suspensao_com_estatisticas_lancadas_depois_da_finalizacao(client, db):
+    db.add(models.Usuario(username="coord_sumula", password_hash=get_password_hash("coord123"), role="coordenador", must_change_password=False))
+    edicao, mod, equipes = setup_edicao_locais_arbitros_e_equipes(db, num_equipes=2)
+    edicao.tipo_competicao = "Pontos Corridos"
+    local = db.query(models.Local).first()
+    arbitro = db.query(models.Arbitro).first()
+    partidas = [models.Partida(id_edicao=edicao.id_edicao, id_local=local.id_local, id_arbitro=arbitro.id_arbitro,
+                               id_modalidade=mod.id_modalidade, id_equipe_casa=equipes[0].id_equipe,
+                               id_equipe_visitante=equipes[1].id_equipe, part_data=date(2026, 7, d), part_hora=time(10, 0))
+                for d in (1, 8, 15)]
+    db.add_all(partidas)
+    participante, adversario = models.Participante(tipo="atleta"), models.Participante(tipo="atleta")
+    db.add_all([participante, adversario])
+    db.flush()
+    for atleta, equipe in ((participante, equipes[0]), (adversario, equipes[1])):
+        db.add(models.Atleta(id_participante=atleta.id_participante, nome_completo=f"Atleta Sumula {atleta.id_participante}",
+                             data_nascimento=date(2000, 1, 1), documento_pessoal="doc"))
+        db.execute(models.equipes_participantes.insert().values(id_equipe=equipe.id_equipe, id_participante=atleta.id_participante))
+    db.commit()
+    id_edicao, id_participante, id_adversario = edicao.id_edicao, participante.id_participante, adversario.id_participante
+    p1, p2, p3 = [p.id_partida for p in partidas]
+
+    token = client.post("/token", data={"username": "coord_sumula", "password": "coord123"}).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    def situacao():
+        return client.get(f"/edicoes/{id_edicao}/disciplina/{id_participante}", headers=headers).json()
+    def finalizar(id_partida, status="Finalizada"):
+        res = client.put(f"/partidas/{id_partida}", json={"status": status, "placar_casa": 1, "placar_visitante": 0}, headers=headers)
+        assert res.status_code == 200
+
+    # As duas primeiras partidas são finalizadas antes de a súmula da primeira ser lançada
+    finalizar(p1)
+    finalizar(p2)
+    res = client.post(f"/partidas/{p1}/estatisticas", json={"id_participante": id_participante, "cartoes_amarelos": 3}, headers=headers)
+    assert res.status_code == 201
+
+    # A suspensão gerada em p1 foi cumprida em p2, em que o jogador não atuou
+    assert (situacao()["suspensoes"], situacao()["suspensoes_cumpridas"], situacao()["suspenso"]) == (1, 1, False)
+    assert client.post(f"/partidas/{p3}/estatisticas", json={"id_participante": id_participante, "gols": 1}, headers=headers).status_code == 201
+
+    # Reabrir p2 desfaz o cumprimento
+    finalizar(p2, status="Em Andamento")
+    assert (situacao()["suspensoes_cumpridas"], situacao()["suspenso"]) == (0, True)
+
+    # A súmula de p3 chega antes da de p2: a suspensão atual não impede lançar o jogo anterior
+    res = client.post(f"/partidas/{p3}/estatisticas", json={"id_participante": id_adversario, "cartoes_vermelhos": 1}, headers=headers)
+    assert res.status_code == 201
+    assert client.get(f"/edicoes/{id_edicao}/disciplina/{id_adversario}", headers=headers).json()["suspenso"] is True
+    res = client.post(f"/partidas/{p2}/estatisticas", json={"id_participante": id_adversario, "gols": 1}, headers=headers)
+    assert res.status_code == 201
+
+def test_suspensao_em_ordem_usa_so_os_acumuladores(client, db, monkeypatch):
+    from services import disciplina as disciplina_service
+
+    db.add(models.Usuario(username="coord_acumulador", password_hash=get_password_hash("coord123"), role="coordenador", must_change_password=False))
+    edicao, mod, equipes = setup_edicao_locais_arbitros_e_equipes(db, num_equipes=2)
+    edicao.tipo_competicao = "Pontos Corridos"
+    local = db.query(models.Local).first()
+    arbitro = db.query(models.Arbitro).first()
+    partidas = [models.Partida(id_edicao=edicao.id_edicao, id_local=local.id_local, id_arbitro=arbitro.id_arbitro,
+                               id_modalidade=mod.id_modalidade, id_equipe_casa=equipes[0].id_equipe,
+                               id_equipe_visitante=equipes[1].id_equipe, part_data=date(2026, 7, d), part_hora=time(10, 0))
+                for d in (1, 8, 15, 22)]
+    db.add_all(partidas)
+    participante, adversario = models.Participante(tipo="atleta"), models.Participante(tipo="atleta")
+    db.add_all([participante, adversario])
+    db.flush()
+    for atleta, equipe in ((participante, equipes[0]), (adversario, equipes[1])):
+        db.add(models.Atleta(id_participante=atleta.id_participante, nome_completo=f"Atleta Acumulador {atleta.id_participante}",
+                             data_nascimento=date(2000, 1, 1), documento_pessoal="doc"))
+        db.execute(models.equipes_participantes.insert().values(id_equipe=equipe.id_equipe, id_participante=atleta.id_participante))
+    db.commit()
+    id_edicao, id_participante, id_adversario = edicao.id_edicao, participante.id_participante, adversario.id_participante
+    p1, p2, p3, p4 = [p.id_partida for p in partidas]
+
+    token = client.post("/token", data={"username": "coord_acumulador", "password": "coord123"}).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    def situacao():
+        return client.get(f"/edicoes/{id_edicao}/disciplina/{id_participante}", headers=headers).json()
+    def estatistica(id_partida, **dados):
+        return client.post(f"/partidas/{id_partida}/estatisticas", json=dados, headers=headers)
+    def finalizar(id_partida):
+        assert client.put(f"/partidas/{id_partida}", json={"status": "Finalizada", "placar_casa": 1, "placar_visitante": 0}, headers=headers).status_code == 200
+
+    replays = []
+    dados_replay = disciplina_service._dados_replay
+    monkeypatch.setattr(disciplina_service, "_dados_replay", lambda *args: replays.append(args) or dados_replay(*args))
+
+    # Súmulas lançadas em ordem: consulta e atualização só pelos acumuladores
+    assert estatistica(p1, id_participante=id_participante, cartoes_amarelos=3).status_code == 201
+    finalizar(p1)
+    assert estatistica(p2, id_participante=id_participante, gols=1).status_code == 400
+    finalizar(p2)
+    assert (situacao()["suspensoes_cumpridas"], situacao()["suspenso"]) == (1, False)
+    assert estatistica(p3, id_participante=id_participante, cartoes_vermelhos=1).status_code == 201
+    assert replays == []
+
+    # Súmula de uma partida anterior à última suspensão cumprida: refaz o histórico (suspenso em p2)
+    assert estatistica(p2, id_participante=id_participante, gols=1).status_code == 400
+    assert replays
+
+    # Passar a estatística para um participante suspenso também é recusado
+    res = estatistica(p4, id_participante=id_adversario, gols=1)
+    assert res.status_code == 201
+    res = client.put(f"/partidas/{p4}/estatisticas/{res.json()['id_estatistica']}", json={"id_participante": id_participante, "gols": 1}, headers=headers)
+    assert res.status_code == 400
+    assert "suspenso" in res.json()["detail"]
+
+    # Os acumuladores mantidos aos poucos batem com o histórico refeito
+    incremental = situacao()
+    disciplina_service.recalcular_disciplina(db, id_edicao)
+    db.commit()
+    assert situacao() == incremental
+
+def test_cache_publico_etag_e_invalidacao_por_edicao(client, db):
+    from sqlalchemy import event
+    from services import partidas as partida_service
+    import schemas
+
+    edicao, mod, equipes = setup_edicao_locais_arbitros_e_equipes(db, num_equipes=2)
+    outra = models.Edicao(id_evento=edicao.id_evento, edic_ano=2027, tipo_competicao="Pontos Corridos",
+                          data_inicio=date(2027, 7, 1), data_fim=date(2027, 7, 15))
+    db.add(outra)
+    local = db.query(models.Local).first()
+    arbitro = db.query(models.Arbitro).first()
+    partida = models.Partida(id_edicao=edicao.id_edicao, id_local=local.id_local, id_arbitro=arbitro.id_arbitro,
+                             id_modalidade=mod.id_modalidade, id_equipe_casa=equipes[0].id_equipe,
+                             id_equipe_visitante=equipes[1].id_equipe, part_data=date(2026, 7, 1), part_hora=time(10, 0))
+    db.add(partida)
+    db.commit()
+    id_edicao, id_outra, id_partida = edicao.id_edicao, outra.id_edicao, partida.id_partida
+    url = f"/publico/edicoes/{id_edicao}/partidas"
+
+    consultas = []
+    contar = lambda *args: consultas.append(args[2])
+    event.listen(db.get_bind(), "before_cursor_execute", contar)
+    try:
+        primeira = client.get(url)
+        assert primeira.status_code == 200 and consultas
+        assert primeira.headers["Cache-Control"].startswith("public, max-age=")
+        etag = primeira.headers["ETag"]
+
+        # Segunda chamada sai do cache, sem tocar no banco (e ainda passa pelo CORS)
+        consultas.clear()
+        segunda = client.get(url, headers={"Origin": "http://localhost:3000"})
+        assert segunda.json() == primeira.json() and segunda.headers["ETag"] == etag
+        assert segunda.headers["access-control-allow-origin"] == "http://localhost:3000"
+        assert consultas == []
+
+        # Cliente com a mesma versão recebe 304 sem corpo
+        nao_modificada = client.get(url, headers={"If-None-Match": etag})
+        assert nao_modificada.status_code == 304 and nao_modificada.content == b""
+        client.get(f"/publico/edicoes/{id_outra}/partidas")
+    finally:
+        event.remove(db.get_bind(), "before_cursor_execute", contar)
+
+    # Alterar a partida invalida só a edição dela
+    partida_service.atualizar_partida(db, id_partida, schemas.PartidaUpdate(placar_casa=2))
+    atualizada = client.get(url, headers={"If-None-Match": etag})
+    assert atualizada.status_code == 200 and atualizada.headers["ETag"] != etag
+    assert atualizada.json()[0]["placar_casa"] == 2
+
+    consultas.clear()
+    event.listen(db.get_bind(), "before_cursor_execute", contar)
+    try:
+        assert client.get(f"/publico/edicoes/{id_outra}/partidas").status_code == 200
+        assert consultas == []
+    finally:
+        event.remove(db.get_bind(), "before_cursor_execute", contar)
+
+def test_placar_ao_vivo_websocket_recebe_delta_da_partida(client, db):
+    from services import partidas as partida_service
+    import schemas
+
+    edicao, mod, equipes = setup_edicao_locais_arbitros_e_equipes(db, num_equipes=2)
+    local = db.query(models.Local).first()
+    arbitro = db.query(models.Arbitro).first()
+    partida = models.Partida(id_edicao=edicao.id_edicao, id_local=local.id_local, id_arbitro=arbitro.id_arbitro,
+                             id_modalidade=mod.id_modalidade, id_equipe_casa=equipes[0].id_equipe,
+                             id_equipe_visitante=equipes[1].id_equipe, part_data=date(2026, 7, 1), part_hora=time(10, 0))
+    db.add(partida)
+    db.commit()
+    id_edicao, id_partida = edicao.id_edicao, partida.id_partida
+
+    with client.websocket_connect(f"/publico/edicoes/{id_edicao}/ao-vivo/ws") as ws:
+        assert ws.receive_json() == {"tipo": "conectado", "id_edicao": id_edicao}
+        partida_service.atualizar_partida(db, id_partida, schemas.PartidaUpdate(status="Em Andamento", placar_casa=1))
+        delta = ws.receive_json()
+        assert delta["tipo"] == "partida" and delta["id_partida"] == id_partida
+        assert (delta["status"], delta["placar_casa"], delta["placar_visitante"]) == ("Em Andamento", 1, 0)
+
+        partida_service.excluir_partida(db, id_partida)
+        assert ws.receive_json() == {"tipo": "partida_removida", "id_partida": id_partida}
+
+def test_placar_ao_vivo_publica_partida_finalizada_e_vencedor_promovido(db, monkeypatch):
+    # Finalizar passa pela classificação, que faz flush: os deltas não podem depender do db.dirty
+    from services import edicoes as edicao_service
+    import ao_vivo
+
+    publicados = []
+    monkeypatch.setattr(ao_vivo, "publicar", lambda id_edicao, *deltas: publicados.extend(deltas))
+
+    edicao, mod, equipes = setup_edicao_locais_arbitros_e_equipes(db, num_equipes=4)
+    pontos = models.Edicao(id_evento=edicao.id_evento, edic_ano=2027, tipo_competicao="Pontos Corridos",
+                           data_inicio=date(2027, 7, 1), data_fim=date(2027, 7, 15))
+    db.add(pontos)
+    db.flush()
+    db.add_all([models.Equipe(nome=f"Equipe PC {i}", id_edicao=pontos.id_edicao) for i in range(2)])
+    db.commit()
+    edicao_service.gerar_confrontos_pontos_corridos(db, pontos.id_edicao, mod.id_modalidade, pontos.data_inicio)
+    partida = db.query(models.Partida).filter(models.Partida.id_edicao == pontos.id_edicao).one()
+    publicados.clear()
+    _finalizar(db, partida, 2, 1)
+    assert [(d["id_partida"], d["status"], d["placar_casa"], d["placar_visitante"]) for d in publicados] == [
+        (partida.id_partida, "Finalizada", 2, 1)
+    ]
+
+    # Mata-mata: a final recebe o vencedor da semifinal
+    edicao_service.gerar_confrontos_mata_mata(db, edicao.id_edicao, mod.id_modalidade, "Semifinal", edicao.data_inicio)
+    semi = db.query(models.Partida).filter(models.Partida.id_edicao == edicao.id_edicao, models.Partida.fase == "Semifinal").first()
+    publicados.clear()
+    _finalizar(db, semi, 3, 0)
+    assert [d["id_partida"] for d in publicados] == [semi.id_partida, semi.id_proxima_partida]
+    assert publicados[0]["status"] == "Finalizada"
+    assert semi.id_equipe_casa in (publicados[1]["id_equipe_casa"], publicados[1]["id_equipe_visitante"])
+
+def test_placar_ao_vivo_sse_e_pubsub_redis():
+    import asyncio
+    import json
+    import ao_vivo
+
+    async def cenario():
+        fluxo = ao_vivo.fluxo_sse(777, intervalo_keepalive=0.01)
+        assert await fluxo.__anext__() == "retry: 3000\n\n"
+        assert await fluxo.__anext__() == ": keepalive\n\n"
+        assert ao_vivo.hub.total_assinantes(777) == 1
+
+        ao_vivo.publicar(777, {"tipo": "partida", "id_partida": 1, "placar_casa": 2})
+        evento = await fluxo.__anext__()
+        assert evento.startswith("event: partida\ndata: ")
+        assert json.loads(evento.split("data: ", 1)[1]) == {"tipo": "partida", "id_partida": 1, "placar_casa": 2}
+
+        # Mensagem que chega de outro worker pelo canal do Redis
+        redis = ao_vivo.PubSubRedis(cliente=None, hub=ao_vivo.hub)
+        redis.despachar(b"gerencia:ao_vivo:777", json.dumps({"tipo": "partida_removida", "id_partida": 1}))
+        assert await fluxo.__anext__() == 'event: partida_removida\ndata: {"tipo": "partida_removida", "id_partida": 1}\n\n'
+
+        await fluxo.aclose()
+        assert ao_vivo.hub.total_assinantes(777) == 0
+
+    asyncio.run(cenario())
+
+def test_placar_ao_vivo_reconecta_ao_redis_quando_a_conexao_cai(monkeypatch):
+    import json
+    import threading
+    import ao_vivo
+
+    monkeypatch.setattr(ao_vivo, "ESPERA_RECONEXAO", 0)
+    entregues = []
+    entregue = threading.Event()
+
+    class HubFalso:
+        def entregar(self, id_edicao, mensagem):
+            entregues.append((id_edicao, mensagem))
+            entregue.set()
+
+    class AssinaturaFalsa:
+        def __init__(self, cliente):
+            self.cliente = cliente
+        def psubscribe(self, padrao):
+            self.cliente.assinaturas.append(padrao)
+        def listen(self):
+            # A primeira conexão cai; a segunda recebe a mensagem e fica aberta
+            if len(self.cliente.assinaturas) == 1:
+                raise ConnectionError("Connection closed by server.")
+            yield {"type": "psubscribe", "channel": b"gerencia:ao_vivo:*", "data": 1}
+            yield {"type": "pmessage", "channel": b"gerencia:ao_vivo:5", "data": json.dumps({"tipo": "partida"})}
+            threading.Event().wait()
+        def close(self):
+            pass
+
+    class ClienteFalso:
+        def __init__(self):
+            self.assinaturas = []
+        def pubsub(self):
+            return AssinaturaFalsa(self)
+
+    cliente = ClienteFalso()
+    redis = ao_vivo.PubSubRedis(cliente, HubFalso())
+    redis.iniciar()
+    assert entregue.wait(timeout=5)
+    assert entregues == [(5, {"tipo": "partida"})]
+    assert cliente.assinaturas == ["gerencia:ao_vivo:*", "gerencia:ao_vivo:*"]
+    assert redis._ouvinte.is_alive()
+
+def test_exportacao_csv_de_partidas_e_classificacao_da_edicao(client, db):
+    import csv
+    from services import edicoes as edicao_service
+
+    db.add(models.Usuario(username="coord_exp_ed", password_hash=get_password_hash("123"), role="coordenador", must_change_password=False))
+    db.commit()
+    token = client.post("/token", data={"username": "coord_exp_ed", "password": "123"}).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+
+    edicao, mod, equipes = setup_edicao_locais_arbitros_e_equipes(db, num_equipes=2)
+    edicao.tipo_competicao = "Pontos Corridos"
+    db.commit()
+    edicao_service.gerar_confrontos_pontos_corridos(db, edicao.id_edicao, mod.id_modalidade, edicao.data_inicio)
+    partida = db.query(models.Partida).filter(models.Partida.id_edicao == edicao.id_edicao).one()
+    _finalizar(db, partida, 3, 1)
+
+    def ler(response):
+        assert response.status_code == 200
+        return list(csv.reader(response.content.decode("utf-8-sig").splitlines(), delimiter=";"))
+
+    linhas = ler(client.get(f"/exportacoes/edicoes/{edicao.id_edicao}/partidas", headers=headers))
+    assert linhas[1][1] == "Futebol" and linhas[1][5] == "Estádio Principal"
+    assert linhas[1][7:9] == ["3", "1"] and linhas[1][10] == "Finalizada"
+
+    linhas = ler(client.get(f"/exportacoes/edicoes/{edicao.id_edicao}/classificacao", headers=headers))
+    vencedora = partida.equipe_casa.nome
+    assert [(l[2], l[3], l[-1]) for l in linhas[1:]][0] == ("1", vencedora, "3")
+
+    assert client.get("/exportacoes/edicoes/9999/partidas", headers=headers).status_code == 404
@@ -0,0 +1,232 @@
+import pytest
+from datetime import date, time, timedelta
+from security import get_password_hash
+import models
+
+# Orçamento de consultas por endpoint: o número de SELECTs não pode crescer com o número de
+# partidas/equipes/jogadores. A edição abaixo tem mais partidas do que qualquer orçamento.
+NUM_EQUIPES = 9
+JOGADORES_POR_EQUIPE = 3
+
+def popular_edicao(db):
+    usuario = models.Usuario(username="prof_orcamento", password_hash="x", role="professor")
+    modalidade = models.Modalidade(nome="Futsal Orçamento")
+    evento = models.Evento(even_nome="Copa Orçamento")
+    evento.modalidades.append(modalidade)
+    db.add_all([usuario, modalidade, evento])
+    db.flush()
+    professor = models.Professor(id_usuario=usuario.id_usuario, nome="Prof", cpf="52998224725", contato="0")
+    db.add(professor)
+    db.flush()
+    turma = models.Turma(id_modalidade=modalidade.id_modalidade, id_professor=professor.id_professor, descricao="T",
+                         categoria_idade="Sub 15", horario_inicio=time(8, 0), horario_fim=time(9, 0))
+    edicao = models.Edicao(id_evento=evento.id_evento, edic_ano=2026, tipo_competicao="Pontos Corridos",
+                           data_inicio=date(2026, 1, 1), data_fim=date(2026, 12, 31))
+    db.add_all([turma, edicao])
+    db.flush()
+
+    equipes = []
+    for e in range(NUM_EQUIPES):
+        equipe = models.Equipe(nome=f"Equipe {e}", id_edicao=edicao.id_edicao)
+        for j in range(JOGADORES_POR_EQUIPE):
+            participante = models.Participante(tipo="aluno" if j % 2 == 0 else "atleta")
+            if participante.tipo == "aluno":
+                aluno = models.Aluno(nome_completo=f"Aluno {e}-{j}", data_nascimento=date(2012, 1, 1), escola="E",
+                                     serie_ano="6", telefone_1="0", endereco="Rua")
+                aluno.matriculas.append(models.Matricula(id_turma=turma.id_turma, ativo=True))
+                participante.aluno = aluno
+            else:
+                participante.atleta = models.Atleta(nome_completo=f"Atleta {e}-{j}", data_nascimento=date(2000, 1, 1),
+                                                    documento_pessoal=f"doc-{e}-{j}")
+            equipe.participantes.append(participante)
+        equipes.append(equipe)
+    db.add_all(equipes)
+    db.flush()
+
+    # Turno completo, cada partida com o seu próprio local e árbitro
+    partidas = []
+    for c in range(NUM_EQUIPES):
+        for v in range(c + 1, NUM_EQUIPES):
+            n = len(partidas)
+            partida = models.Partida(
+                id_edicao=edicao.id_edicao, id_modalidade=modalidade.id_modalidade,
+                local=models.Local(loca_nome=f"Local {n}"), arbitro=models.Arbitro(apito_nome=f"Árbitro {n}", apito_doc=f"a{n}", apito_tel="0"),
+                id_equipe_casa=equipes[c].id_equipe, id_equipe_visitante=equipes[v].id_equipe,
+                part_data=date(2026, 1, 1) + timedelta(days=n), part_hora=time(10, 0), status="Finalizada", placar_casa=1, placar_visitante=0
+            )
+            for equipe in (equipes[c], equipes[v]):
+                for participante in equipe.participantes:
+                    partida.estatisticas.append(models.EstatisticaPartida(id_participante=participante.id_participante, gols=1))
+            partidas.append(partida)
+    db.add_all(partidas)
+    db.commit()
+    return edicao.id_edicao, partidas[0].id_partida
+
+@pytest.fixture
+def edicao_populada(db):
+    return popular_edicao(db)
+
+@pytest.fixture
+def headers_coordenador(client, db):
+    db.add(models.Usuario(username="coord_orcamento", password_hash=get_password_hash("coord123"), role="coordenador", must_change_password=False))
+    db.commit()
+    token = client.post("/token", data={"username": "coord_orcamento", "password": "coord123"}).json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+@pytest.mark.parametrize("rota, orcamento", [
+    ("/publico/edicoes/{id_edicao}/partidas", 5),
+    ("/publico/edicoes/{id_edicao}/equipes", 4),
+    ("/publico/edicoes/{id_edicao}/estatisticas", 4),
+    ("/publico/partidas/{id_partida}/estatisticas", 4),
+])
+def test_orcamento_rotas_publicas(client, edicao_populada, orcamento_consultas, rota, orcamento):
+    id_edicao, id_partida = edicao_populada
+    with orcamento_consultas(orcamento):
+        resposta = client.get(rota.format(id_edicao=id_edicao, id_partida=id_partida))
+    assert resposta.status_code == 200 and len(resposta.json()) > orcamento
+
+# Inclui as consultas da autenticação; schemas.Partida serializa a árvore completa das duas equipes
+@pytest.mark.parametrize("rota, orcamento", [
+    ("/partidas/edicao/{id_edicao}", 29),
+    ("/partidas/{id_partida}/estatisticas", 10),
+    ("/equipes/edicao/{id_edicao}", 12),
+])
+def test_orcamento_rotas_autenticadas(client, edicao_populada, headers_coordenador, orcamento_consultas, rota, orcamento):
+    id_edicao, id_partida = edicao_populada
+    with orcamento_consultas(orcamento):
+        resposta = client.get(rota.format(id_edicao=id_edicao, id_partida=id_partida), headers=headers_coordenador)
+    assert resposta.status_code == 200 and len(resposta.json()) > 1
+
+def test_server_timing_metricas_e_log_de_consultas_lentas(client, edicao_populada, monkeypatch, caplog):
+    import logging
+    import metricas
+
+    id_edicao, _ = edicao_populada
+    metricas.registro.limpar()
+
+    resposta = client.get(f"/publico/edicoes/{id_edicao}/partidas")
+    server_timing = resposta.headers["Server-Timing"]
+    assert 'desc="5 consultas"' in server_timing
+    assert "db;dur=" in server_timing and "serializacao;dur=" in server_timing and "total;dur=" in server_timing
+
+    # A segunda chamada sai do cache público, antes do roteamento
+    assert 'desc="0 consultas"' in client.get(f"/publico/edicoes/{id_edicao}/partidas").headers["Server-Timing"]
+
+    texto = client.get("/metrics").text
+    rotulos = 'metodo="GET",rota="/publico/edicoes/{id_edicao}/partidas"'
+    assert f'http_requisicoes_total{{{rotulos},status="200"}} 1' in texto
+    assert f'http_requisicao_consultas_sql_sum{{{rotulos}}} 5' in texto
+    assert f'http_requisicao_consultas_sql_bucket{{{rotulos},le="5"}} 1' in texto
+    assert f'http_requisicao_duracao_segundos_count{{{rotulos}}} 1' in texto
+    assert 'http_requisicoes_total{metodo="GET",rota="/publico (cache)",status="200"} 1' in texto
+
+    # Log de consultas lentas (opt-in), com a rota de origem
+    monkeypatch.setattr(metricas, "SLOW_QUERY_MS", 1e-6)
+    with caplog.at_level(logging.WARNING, logger="gerencia.consultas_lentas"):
+        client.get(f"/publico/edicoes/{id_edicao}/equipes")
+    assert any("GET /publico/edicoes/{id_edicao}/equipes" in r.getMessage() for r in caplog.records)
+
+def test_busca_de_alunos_do_professor_filtrada_e_paginada_no_sql(client, db, edicao_populada, orcamento_consultas):
+    professor = db.query(models.Professor).join(models.Usuario).filter(models.Usuario.username == "prof_orcamento").one()
+    professor.usuario.password_hash = get_password_hash("prof123")
+    professor.usuario.must_change_password = False
+
+    # Alunos de outro professor, com o mesmo nome: não podem aparecer na busca
+    outro_usuario = models.Usuario(username="outro_prof_orcamento", password_hash="x", role="professor")
+    db.add(outro_usuario)
+    db.flush()
+    outro = models.Professor(id_usuario=outro_usuario.id_usuario, nome="Outro", cpf="11144477735", contato="0")
+    db.add(outro)
+    db.flush()
+    turma_outro = models.Turma(id_modalidade=professor.turmas[0].id_modalidade, id_professor=outro.id_professor,
+                               categoria_idade="Sub 17", horario_inicio=time(10, 0), horario_fim=time(11, 0))
+    for n in range(10):
+        aluno = models.Aluno(nome_completo=f"Aluno Outro {n}", data_nascimento=date(2011, 1, 1), escola="E",
+                             serie_ano="7", telefone_1="0", endereco="Rua")
+        aluno.matriculas.append(models.Matricula(turma=turma_outro, ativo=True))
+        aluno.participante = models.Participante(tipo="aluno")
+        db.add(aluno)
+    db.commit()
+
+    esperados = sorted(
+        a.id_aluno for a in db.query(models.Aluno).join(models.Matricula).join(models.Turma)
+        .filter(models.Turma.id_professor == professor.id_professor)
+    )
+    token = client.post("/token", data={"username": "prof_orcamento", "password": "prof123"}).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+
+    # Escopo e paginação no SQL: o número de consultas não depende de quantos alunos existem
+    vistos = []
+    params = {"limit": 4}
+    while True:
+        with orcamento_consultas(6):
+            resp = client.get("/alunos/buscar/nome/Aluno", params=params, headers=headers)
+        assert resp.status_code == 200
+        assert len(resp.json()) <= 4
+        vistos += [a["id_aluno"] for a in resp.json()]
+        if "X-Next-Cursor" not in resp.headers:
+            break
+        params["cursor"] = resp.headers["X-Next-Cursor"]
+    assert vistos == esperados
+
+    with orcamento_consultas(6):
+        resp = client.get("/alunos/?incluir_total=true", headers=headers)
+    assert [a["id_aluno"] for a in resp.json()] == esperados
+    assert resp.headers["X-Total-Count"] == str(len(esperados))
+
+def test_busca_por_prefixo_sem_acento_com_escopo_do_professor(client, db, edicao_populada, headers_coordenador):
+    from services import busca as servico_busca
+    professor = db.query(models.Professor).join(models.Usuario).filter(models.Usuario.username == "prof_orcamento").one()
+    professor.nome = "José Ângelo Prado"
+    aluno = db.query(models.Aluno).filter(models.Aluno.nome_completo == "Aluno 0-0").one()
+    aluno.nome_completo = "João Ângelo da Silva"
+    sem_turma = models.Aluno(nome_completo="Joana Angélica", data_nascimento=date(2011, 1, 1), escola="E",
+                             serie_ano="7", telefone_1="0", endereco="Rua", participante=models.Participante(tipo="aluno"))
+    db.add(sem_turma)
+    db.commit()
+
+    # Prefixo, sem acento e em qualquer ordem; a palavra exata vem antes das que só começam com ela
+    resp = client.get("/busca/", params={"q": "ANGEL"}, headers=headers_coordenador)
+    assert resp.status_code == 200
+    assert [(r["tipo"], r["nome"]) for r in resp.json()] == [
+        ("aluno", "Joana Angélica"), ("aluno", "João Ângelo da Silva"), ("professor", "José Ângelo Prado"),
+    ]
+    resp = client.get("/busca/", params={"q": "silva jo", "tipo": "aluno"}, headers=headers_coordenador)
+    assert [r["id"] for r in resp.json()] == [aluno.id_aluno]
+
+    # O índice acompanha as alterações e exclusões
+    aluno.nome_completo = "Mário Souza"
+    db.delete(sem_turma)
+    db.commit()
+    resp = client.get("/busca/", params={"q": "angel"}, headers=headers_coordenador)
+    assert [r["tipo"] for r in resp.json()] == ["professor"]
+    assert [r["id"] for r in client.get("/busca/", params={"q": "mario"}, headers=headers_coordenador).json()] == [aluno.id_aluno]
+
+    # Professor: não vê professores e só vê os alunos das suas turmas
+    db.add(models.Aluno(nome_completo="Mário Fora", data_nascimento=date(2011, 1, 1), escola="E", serie_ano="7",
+                        telefone_1="0", endereco="Rua", participante=models.Participante(tipo="aluno")))
+    professor.usuario.password_hash = get_password_hash("prof123")
+    professor.usuario.must_change_password = False
+    db.commit()
+    token = client.post("/token", data={"username": "prof_orcamento", "password": "prof123"}).json()["access_token"]
+    resp = client.get("/busca/", params={"q": "mario prado"}, headers={"Authorization": f"Bearer {token}"})
+    assert resp.json() == []
+    resp = client.get("/busca/", params={"q": "mário"}, headers={"Authorization": f"Bearer {token}"})
+    assert [r["id"] for r in resp.json()] == [aluno.id_aluno]
+
+    # Reconstrução a partir das tabelas
+    assert servico_busca.reconstruir_indice(db) == db.query(models.TermoBusca).count() > 0
+    assert [r["nome"] for r in servico_busca.buscar(db, "souza")] == ["Mário Souza"]
+
+    # Várias palavras do mesmo nome casando com a busca não tomam o lugar das outras entidades,
+    # e palavras maiores que o termo indexado continuam casando
+    longa = "x" * (servico_busca.TAMANHO_TERMO + 10)
+    db.add_all([
+        models.Atleta(nome_completo="Bia Biab Biac Biad", data_nascimento=date(2000, 1, 1), documento_pessoal="doc",
+                      participante=models.Participante(tipo="atleta")),
+        models.Atleta(nome_completo=f"Biaz {longa}", data_nascimento=date(2000, 1, 1), documento_pessoal="doc",
+                      participante=models.Participante(tipo="atleta")),
+    ])
+    db.commit()
+    assert [r["nome"] for r in servico_busca.buscar(db, "bia", limite=2)] == ["Bia Biab Biac Biad", f"Biaz {longa}"]
+    assert [r["nome"] for r in servico_busca.buscar(db, f"{longa} bia")] == [f"Biaz {longa}"]
@@ -1,3 +1,4 @@
+import json
 import pytest
 from datetime import date, time, timedelta
 import models
@@ -241,6 +242,48 @@ def test_locais_arbitros_eventos_modalidades(client, db):
     assert client.delete(f"/arbitros/{id_arbitro}", headers=coord_headers).status_code == 204
     assert client.delete(f"/locais/{id_local}", headers=coord_headers).status_code == 204
 
+def test_paginacao_por_cursor(client, db):
+    headers = get_auth_headers(client, db, "coordenador", "coord_cursor")
+    db.add_all([models.Local(loca_nome=f"Quadra Cursor {n}") for n in range(5)])
+    db.commit()
+    ids = [l.id_local for l in db.query(models.Local).order_by(models.Local.id_local)]
+
+    # Primeira página por skip/limit: mesmo corpo de antes, com o cursor e o total nos cabeçalhos
+    resp = client.get("/locais/?limit=2&incluir_total=true", headers=headers)
+    assert resp.status_code == 200
+    assert [l["id_local"] for l in resp.json()] == ids[:2]
+    assert resp.headers["X-Total-Count"] == str(len(ids))
+
+    vistos = [l["id_local"] for l in resp.json()]
+    cursor = resp.headers["X-Next-Cursor"]
+    while cursor:
+        resp = client.get(f"/locais/?limit=2&cursor={cursor}", headers=headers)
+        assert resp.status_code == 200
+        assert "X-Total-Count" not in resp.headers
+        vistos += [l["id_local"] for l in resp.json()]
+        cursor = resp.headers.get("X-Next-Cursor")
+    assert vistos == ids
+
+    # Itens inseridos antes da posição do cursor não deslocam as páginas seguintes
+    resp = client.get("/locais/?limit=2", headers=headers)
+    cursor = resp.headers["X-Next-Cursor"]
+    db.query(models.Local).filter(models.Local.id_local == ids[0]).delete()
+    db.commit()
+    resp = client.get(f"/locais/?limit=2&cursor={cursor}", headers=headers)
+    assert [l["id_local"] for l in resp.json()] == ids[2:4]
+
+    resp = client.get("/locais/?cursor=invalido", headers=headers)
+    assert resp.status_code == 400
+    assert resp.json()["detail"] == "Cursor de paginação inválido."
+
+    resp = client.get("/locais/?limit=0&incluir_total=true", headers=headers)
+    assert resp.json() == [] and "X-Next-Cursor" not in resp.headers
+    assert resp.headers["X-Total-Count"] == str(len(ids) - 1)
+
+    resp = client.get("/users?limit=1", headers=get_auth_headers(client, db, "admin", "admin_cursor"))
+    assert resp.status_code == 200
+    assert len(resp.json()) == 1 and "X-Next-Cursor" in resp.headers
+
 # ==================== TESTS: EDICOES, EQUIPES ====================
 
 def test_edicoes_equipes(client, db):
@@ -400,8 +443,32 @@ def test_professores_turmas_matriculas_presencas(client, db):
     )
     assert res.status_code == 201
     
+    # Sincronização de várias chamadas (uma folha inválida não impede as demais)
+    res = client.post(
+        "/presencas/sincronizar",
+        json={"folhas": [
+            {"data_aula": "2026-06-22", "id_turma": id_turma, "presencas": [{"id_matricula": id_matricula, "status": "Ausente"}]},
+            {"data_aula": "2026-06-24", "id_turma": id_turma, "presencas": [{"id_matricula": id_matricula, "status": "Presente"}]},
+            {"data_aula": "2026-06-24", "id_turma": 99999, "presencas": [{"id_matricula": id_matricula, "status": "Presente"}]}
+        ]},
+        headers=coord_headers
+    )
+    assert res.status_code == 200
+    assert [f["sucesso"] for f in res.json()["folhas"]] == [True, True, False]
+    assert res.json()["total_gravadas"] == 2
+    assert res.json()["folhas"][0]["presencas"][0]["status"] == "Ausente"
+
     # Buscar presenças
     assert client.get(f"/presencas/turma/{id_turma}/data/2026-06-22", headers=coord_headers).status_code == 200
+
+    # Estatísticas de frequência (NDJSON)
+    res = client.get("/presencas/estatisticas", params={"agrupar_por": ["turma", "mes"], "id_turma": id_turma}, headers=coord_headers)
+    assert res.status_code == 200
+    assert res.headers["content-type"].startswith("application/x-ndjson")
+    linhas = [json.loads(l) for l in res.text.splitlines()]
+    assert [(l["mes"], l["total"], l["ausentes"]) for l in linhas] == [(6, 2, 1)]
+    res = client.get("/presencas/estatisticas", params={"data_inicio": "2026-07-01", "data_fim": "2026-06-01"}, headers=coord_headers)
+    assert res.status_code == 400
     
     # 404s
     assert client.get("/professores/99999", headers=coord_headers).status_code == 404
@@ -455,9 +522,9 @@ def test_alunos_atletas_and_files(client, db):
             "serie_ano": "9", "telefone_1": "123", "endereco": "Rua F", "ids_turmas": str(id_turma)
         },
         files={
-            "foto": ("foto.png", io.BytesIO(b"fake png"), "image/png"),
-            "documento": ("doc.pdf", io.BytesIO(b"fake pdf"), "application/pdf"),
-            "atestado": ("ate.jpg", io.BytesIO(b"fake jpg"), "image/jpeg")
+            "foto": ("foto.png", io.BytesIO(b"\x89PNG\r\n\x1a\nfake png"), "image/png"),
+            "documento": ("doc.pdf", io.BytesIO(b"%PDF-1.4 fake pdf"), "application/pdf"),
+            "atestado": ("ate.jpg", io.BytesIO(b"\xff\xd8\xff fake jpg"), "image/jpeg")
         },
         headers=coord_headers
     )
@@ -469,7 +536,7 @@ def test_alunos_atletas_and_files(client, db):
         f"/alunos/{id_aluno}",
         data={"nome_completo": "Aluno F Updated"},
         files={
-            "foto": ("foto2.png", io.BytesIO(b"fake png"), "image/png")
+            "foto": ("foto2.png", io.BytesIO(b"\x89PNG\r\n\x1a\nfake png"), "image/png")
         },
         headers=coord_headers
     )
@@ -489,7 +556,7 @@ def test_alunos_atletas_and_files(client, db):
     res = client.post(
         "/alunos/",
         data={"nome_completo": "Aluno Err MIME", "data_nascimento": "2010-01-01", "telefone_1": "123", "endereco": "Rua Err", "ids_turmas": str(id_turma)},
-        files={"foto": ("foto.png", io.BytesIO(b"fake png"), "text/plain")},
+        files={"foto": ("foto.png", io.BytesIO(b"\x89PNG\r\n\x1a\nfake png"), "text/plain")},
         headers=coord_headers
     )
     assert res.status_code == 400
@@ -516,7 +583,7 @@ def test_alunos_atletas_and_files(client, db):
             "contato": "123", "endereco": "R"
         },
         files={
-            "foto": ("atleta.png", io.BytesIO(b"fake png"), "image/png")
+            "foto": ("atleta.png", io.BytesIO(b"\x89PNG\r\n\x1a\nfake png"), "image/png")
         },
         headers=coord_headers
     )
@@ -539,7 +606,7 @@ def test_alunos_atletas_and_files(client, db):
     res = client.post(
         f"/atletas/equipe/{id_eq}",
         data={"nome_completo": "Atleta Err", "data_nascimento": "2005-01-01", "documento_pessoal": "1234"},
-        files={"foto": ("foto.png", io.BytesIO(b"fake png"), "text/plain")},
+        files={"foto": ("foto.png", io.BytesIO(b"\x89PNG\r\n\x1a\nfake png"), "text/plain")},
         headers=coord_headers
     )
     assert res.status_code == 400
@@ -622,7 +689,7 @@ def test_partidas_and_public(client, db):
     # 4. Upload súmula
     res = client.post(
         f"/partidas/{id_partida}/sumula",
-        files={"file": ("sumula.png", io.BytesIO(b"fake png"), "image/png")},
+        files={"file": ("sumula.png", io.BytesIO(b"\x89PNG\r\n\x1a\nfake png"), "image/png")},
         headers=coord_headers
     )
     assert res.status_code == 200
@@ -634,6 +701,15 @@ def test_partidas_and_public(client, db):
         headers=coord_headers
     )
     assert res.status_code == 400
+
+    # Upload sumula com conteúdo que não é PNG (só a extensão e o MIME-type são de PNG)
+    res = client.post(
+        f"/partidas/{id_partida}/sumula",
+        files={"file": ("sumula.png", io.BytesIO(b"<html>fake</html>"), "image/png")},
+        headers=coord_headers
+    )
+    assert res.status_code == 400
+    assert "não corresponde" in res.json()["detail"]
     
     # 5. Registrar estatísticas
     # Criar um participante/aluno para ter estatísticas
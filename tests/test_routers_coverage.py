@@ -506,7 +506,7 @@ def test_equipes_partidas_presencas_coverage(client, db):
     # Upload sumula non-existent match
     res = client.post(
         "/partidas/99999/sumula",
-        files={"file": ("sumula.png", io.BytesIO(b"fake png"), "image/png")},
+        files={"file": ("sumula.png", io.BytesIO(b"\x89PNG\r\n\x1a\nfake png"), "image/png")},
         headers=coord_headers
     )
     assert res.status_code == 404
@@ -820,7 +820,7 @@ def test_extra_routers_coverage(client, db):
     # - sumula upload invalid MIME type
     res = client.post(
         f"/partidas/{id_partida}/sumula",
-        files={"file": ("sumula.png", io.BytesIO(b"fake png"), "text/plain")},
+        files={"file": ("sumula.png", io.BytesIO(b"\x89PNG\r\n\x1a\nfake png"), "text/plain")},
         headers=coord_headers
     )
     assert res.status_code == 400
@@ -829,7 +829,7 @@ def test_extra_routers_coverage(client, db):
     with patch("builtins.open", side_effect=Exception("Mock open exception")):
         res = client.post(
             f"/partidas/{id_partida}/sumula",
-            files={"file": ("sumula.png", io.BytesIO(b"fake png"), "image/png")},
+            files={"file": ("sumula.png", io.BytesIO(b"\x89PNG\r\n\x1a\nfake png"), "image/png")},
             headers=coord_headers
         )
         assert res.status_code == 500
@@ -924,3 +924,44 @@ def test_extra_routers_coverage(client, db):
     with patch("routers.turmas.servico_turmas.excluir_turma", side_effect=IntegrityError("mock", "mock", "mock")):
         res = client.delete(f"/turmas/{id_turma}", headers=coord_headers)
         assert res.status_code == 400
+
+def test_armazenamento_em_blocos_com_limite_e_assinatura(tmp_path, monkeypatch):
+    import asyncio
+    import armazenamento
+    from starlette.datastructures import UploadFile as StarletteUploadFile
+
+    png = b"\x89PNG\r\n\x1a\n" + b"x" * (3 * armazenamento.TAMANHO_BLOCO)
+
+    def upload(conteudo, nome="foto.png"):
+        return StarletteUploadFile(io.BytesIO(conteudo), filename=nome)
+
+    monkeypatch.setattr(armazenamento, "backend", armazenamento.ArmazenamentoLocal(tmp_path))
+
+    # Gravado em blocos com o conteúdo íntegro
+    caminho = asyncio.run(armazenamento.salvar(upload(png), "fotos", "png"))
+    assert caminho.startswith("uploads/fotos/") and caminho.endswith(".png")
+    assert (tmp_path / caminho.removeprefix("uploads/")).read_bytes() == png
+
+    # Extensão e Content-Type de PNG, conteúdo de PDF
+    with pytest.raises(ValueError) as exc:
+        asyncio.run(armazenamento.salvar(upload(b"%PDF-1.4 ..."), "fotos", "png"))
+    assert "não corresponde" in str(exc.value)
+
+    # Limite conferido durante a cópia, sem deixar o arquivo parcial
+    with pytest.raises(armazenamento.ArquivoMuitoGrande):
+        asyncio.run(armazenamento.salvar(upload(png), "fotos", "png", tamanho_maximo=2 * armazenamento.TAMANHO_BLOCO))
+    assert len(list((tmp_path / "fotos").iterdir())) == 1
+
+    # Backend S3: qualquer cliente com o upload_fileobj do boto3
+    class ClienteS3Memoria:
+        def __init__(self):
+            self.objetos = {}
+
+        def upload_fileobj(self, arquivo, bucket, chave, ExtraArgs=None):
+            self.objetos[(bucket, chave)] = (arquivo.read(), ExtraArgs["ContentType"])
+
+    cliente = ClienteS3Memoria()
+    monkeypatch.setattr(armazenamento, "backend", armazenamento.ArmazenamentoS3(cliente, "gerencia", "http://minio:9000/gerencia/"))
+    url = asyncio.run(armazenamento.salvar(upload(b"\xff\xd8\xff\xe0 jpg", "sumula.jpeg"), "sumulas", "jpeg"))
+    assert url.startswith("http://minio:9000/gerencia/sumulas/") and url.endswith(".jpeg")
+    assert list(cliente.objetos.values()) == [(b"\xff\xd8\xff\xe0 jpg", "image/jpeg")]
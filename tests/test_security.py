@@ -159,3 +159,120 @@ def test_security_production_secret_key_check():
     import importlib
     import security
     importlib.reload(security)
+
+@pytest.mark.asyncio
+async def test_get_current_user_usa_cache_de_principal(db):
+    from sqlalchemy import event
+
+    user = models.Usuario(username="cacheado", password_hash="hash", role="professor")
+    db.add(user)
+    db.commit()
+    db.add(models.Professor(id_usuario=user.id_usuario, nome="Prof Cache", cpf="52998224725", contato="1"))
+    db.commit()
+
+    consultas = []
+    def contar(conn, cursor, statement, parameters, context, executemany):
+        consultas.append(statement)
+
+    token = create_access_token({"sub": "cacheado"})
+    event.listen(db.get_bind(), "before_cursor_execute", contar)
+    try:
+        primeiro = await get_current_user(token, db)
+        consultas_primeiro = len(consultas)
+        segundo = await get_current_user(token, db)
+    finally:
+        event.remove(db.get_bind(), "before_cursor_execute", contar)
+
+    assert consultas_primeiro > 0
+    assert len(consultas) == consultas_primeiro
+    assert segundo.id_usuario == user.id_usuario
+    assert segundo.role == "professor"
+    assert segundo.professores.id_professor == primeiro.professores.id_professor
+
+def test_cache_memoria_ttl_e_lru():
+    from cache import CacheMemoria
+
+    c = CacheMemoria(max_itens=2)
+    c.gravar("a", {"v": 1}, 60)
+    c.gravar("b", {"v": 2}, 60)
+    assert c.obter("a") == {"v": 1}
+    # "b" é o menos usado recentemente e sai quando "c" entra
+    c.gravar("c", {"v": 3}, 60)
+    assert c.obter("b") is None
+    assert c.obter("a") == {"v": 1}
+
+    c.gravar("expirado", {"v": 4}, -1)
+    assert c.obter("expirado") is None
+    c.remover("a")
+    assert c.obter("a") is None
+
+def test_cache_redis_com_cliente_compativel():
+    from cache import CacheRedis
+
+    class ClienteRedisLocal:
+        # Subconjunto da API do redis-py usado pelo backend
+        def __init__(self):
+            self.dados = {}
+        def get(self, chave):
+            return self.dados.get(chave)
+        def set(self, chave, valor, ex=None):
+            self.dados[chave] = valor.encode()
+        def delete(self, chave):
+            self.dados.pop(chave, None)
+        def scan_iter(self, match):
+            return [k for k in list(self.dados) if k.startswith(match.rstrip("*"))]
+
+    cliente = ClienteRedisLocal()
+    c = CacheRedis(cliente)
+    c.gravar("principal:ana", {"role": "admin"}, 60)
+    assert cliente.dados["gerencia:principal:ana"] == b'{"role": "admin"}'
+    assert c.obter("principal:ana") == {"role": "admin"}
+    c.limpar()
+    assert c.obter("principal:ana") is None
+
+def test_ttl_padrao_do_principal_curto_sem_cache_compartilhado(monkeypatch):
+    import importlib
+    import cache
+    import security
+
+    # Sem Redis a invalidação não chega aos outros workers: o cache do usuário dura poucos segundos
+    monkeypatch.delenv("PRINCIPAL_CACHE_TTL", raising=False)
+    try:
+        assert importlib.reload(security).PRINCIPAL_CACHE_TTL == 5
+        monkeypatch.setattr(cache, "backend", cache.CacheRedis(cliente=None))
+        assert importlib.reload(security).PRINCIPAL_CACHE_TTL == 60
+    finally:
+        monkeypatch.undo()
+        importlib.reload(security)
+
+def test_bcrypt_executado_no_pool_dedicado():
+    import threading
+    import security
+
+    senha_hash = security.executar_no_pool_bcrypt(get_password_hash, "senha123")
+    assert security.executar_no_pool_bcrypt(verify_password, "senha123", senha_hash)
+    assert security.executar_no_pool_bcrypt(lambda: threading.current_thread().name).startswith("bcrypt")
+
+@pytest.mark.asyncio
+async def test_bcrypt_aguardado_no_pool_dedicado_pelas_rotas_async():
+    import threading
+    import security
+
+    senha_hash = await security.aguardar_pool_bcrypt(get_password_hash, "senha123")
+    assert await security.aguardar_pool_bcrypt(verify_password, "senha123", senha_hash)
+    assert (await security.aguardar_pool_bcrypt(lambda: threading.current_thread().name)).startswith("bcrypt")
+
+def test_metricas_pool_bcrypt_contam_fila():
+    import threading
+    import security
+
+    liberar = threading.Event()
+    futuros = [security._submeter_bcrypt(liberar.wait) for _ in range(security.BCRYPT_MAX_WORKERS + 2)]
+    metricas = security.metricas_pool_bcrypt()
+    assert metricas["pendentes"] == security.BCRYPT_MAX_WORKERS + 2
+    assert metricas["na_fila"] == 2
+
+    liberar.set()
+    for f in futuros:
+        f.result()
+    assert security.metricas_pool_bcrypt()["pendentes"] == 0
@@ -56,7 +56,7 @@ def test_listar_professor_unitario():
 def test_listar_professores_unitario():
     db = MagicMock()
     profs = [create_mock_model(models.Professor, id_professor=1), create_mock_model(models.Professor, id_professor=2)]
-    db.query().offset().limit().all.return_value = profs
+    db.query().order_by().offset().limit().all.return_value = profs
     
     res = serv_prof.listar_professores(db)
     assert res == profs
@@ -152,7 +152,7 @@ def test_listar_turmas_unitario():
     db = MagicMock()
     t = create_mock_model(models.Turma, id_turma=1)
     db.query().filter().first.return_value = t
-    db.query().offset().limit().all.return_value = [t]
+    db.query().order_by().offset().limit().all.return_value = [t]
     
     assert serv_turmas.listar_turma_id(db, 1) == t
     assert serv_turmas.listar_turmas(db) == [t]
@@ -237,13 +237,13 @@ def test_listar_alunos_unitario():
     db.query().filter().first.return_value = al
     assert serv_alunos.listar_aluno(db, 1) == al
     
-    db.query().offset().limit().all.return_value = [al]
+    db.query().options().order_by().offset().limit().all.return_value = [al]
     assert serv_alunos.listar_alunos(db) == [al]
     
     db.query().join().filter().all.return_value = [al]
     assert serv_alunos.listar_alunos_por_turma(db, 5) == [al]
 
-    db.query().filter().all.return_value = [al]
+    db.query().filter().options().order_by().offset().limit().all.return_value = [al]
     assert serv_alunos.listar_alunos_nome(db, "Aluno") == [al]
     assert serv_alunos.listar_alunos_escola(db, "Esc") == [al]
     assert serv_alunos.listar_alunos_serie(db, "9") == [al]
@@ -357,7 +357,7 @@ def test_matriculas_listar_e_cancelar_unitario():
     db = MagicMock()
     m = create_mock_model(models.Matricula, id_matricula=1)
     
-    db.query().offset().limit().all.return_value = [m]
+    db.query().order_by().offset().limit().all.return_value = [m]
     assert serv_matriculas.listar_matriculas(db) == [m]
     
     db.query().filter().all.return_value = [m]
@@ -385,7 +385,7 @@ def test_arbitros_crud_unitario():
     db.add.assert_called()
     
     # Listar
-    db.query().offset().limit().all.return_value = [arb]
+    db.query().order_by().offset().limit().all.return_value = [arb]
     assert serv_arbitros.listar_arbitros(db) == [arb]
     
     db.query().filter().first.return_value = arb
@@ -419,7 +419,7 @@ def test_atletas_crud_unitario():
     db.add.assert_called()
     
     # Listar
-    db.query().offset().limit().all.return_value = [atl]
+    db.query().order_by().offset().limit().all.return_value = [atl]
     assert serv_atletas.listar_atletas(db) == [atl]
     
     db.query().filter().first.return_value = atl
@@ -462,10 +462,10 @@ def test_equipes_crud_unitario():
     db.add.assert_called()
     
     # Listar
-    db.query().offset().limit().all.return_value = [eq_mock]
+    db.query().options().order_by().offset().limit().all.return_value = [eq_mock]
     assert serv_equipes.listar_equipes(db) == [eq_mock]
     
-    db.query().filter().all.return_value = [eq_mock]
+    db.query().filter().options().all.return_value = [eq_mock]
     assert serv_equipes.listar_equipes_edicao(db, 1) == [eq_mock]
     
     db.query().filter().first.return_value = eq_mock
@@ -521,7 +521,7 @@ def test_eventos_crud_unitario():
     db.add.assert_called()
     
     # Listar
-    db.query().offset().limit().all.return_value = [evt]
+    db.query().order_by().offset().limit().all.return_value = [evt]
     assert serv_eventos.listar_eventos(db) == [evt]
     
     db.query().filter().first.return_value = evt
@@ -552,7 +552,7 @@ def test_locais_crud_unitario():
     assert loc.loca_nome == "Local 1"
     
     # Listar
-    db.query().offset().limit().all.return_value = [loc]
+    db.query().order_by().offset().limit().all.return_value = [loc]
     assert serv_locais.listar_locais(db) == [loc]
     
     db.query().filter().first.return_value = loc
@@ -583,7 +583,7 @@ def test_modalidades_crud_unitario():
     assert m.nome == "Mod 1"
     
     # Listar
-    db.query().offset().limit().all.return_value = [m]
+    db.query().order_by().offset().limit().all.return_value = [m]
     assert serv_mod.listar_modalidades(db) == [m]
     
     db.query().filter().first.return_value = m
@@ -619,22 +619,47 @@ def test_excluir_modalidade_conflito_unitario():
 
 # ==================== 11. PRESENCAS SERVICE ====================
 
-def test_registrar_presenca_lote_unitario():
-    db = MagicMock()
-    
-    m = create_mock_model(models.Matricula, id_matricula=1, ativo=True)
-    db.query().filter().all.return_value = [m]
-    db.query().filter().first.return_value = None # no existing presenca
-    
+def _setup_chamada(db, num_alunos):
+    usuario = models.Usuario(username="prof_chamada", password_hash="hash", role="professor")
+    mod = models.Modalidade(nome="Futsal Chamada")
+    db.add_all([usuario, mod])
+    db.flush()
+    prof = models.Professor(id_usuario=usuario.id_usuario, nome="Prof Chamada", cpf="52998224725", contato="1")
+    db.add(prof)
+    db.flush()
+    turma = models.Turma(id_modalidade=mod.id_modalidade, id_professor=prof.id_professor, categoria_idade="Sub 15",
+                         horario_inicio=time(10, 0), horario_fim=time(11, 0))
+    db.add(turma)
+    db.flush()
+
+    matriculas = []
+    for i in range(num_alunos):
+        participante = models.Participante(tipo="aluno")
+        db.add(participante)
+        db.flush()
+        aluno = models.Aluno(id_participante=participante.id_participante, nome_completo=f"Aluno Chamada {i}",
+                             data_nascimento=date(2012, 1, 1), escola="E", serie_ano="6", telefone_1="1", endereco="Rua")
+        db.add(aluno)
+        db.flush()
+        matricula = models.Matricula(id_aluno=aluno.id_aluno, id_turma=turma.id_turma, ativo=True)
+        db.add(matricula)
+        matriculas.append(matricula)
+    db.commit()
+    return turma, matriculas
+
+def test_registrar_presenca_lote_unitario(db):
+    turma, matriculas = _setup_chamada(db, 1)
+
     lote = schemas.ListaPresenca(
-        id_turma=5,
+        id_turma=turma.id_turma,
         data_aula=date.today(),
-        presencas=[schemas.PresencaItem(id_matricula=1, status="Presente", observacao="")]
+        presencas=[schemas.PresencaItem(id_matricula=matriculas[0].id_matricula, status="Presente", observacao="")]
     )
     
     res = serv_pres.registrar_presenca_lote(db, lote)
     assert len(res) == 1
     assert res[0].status == "Presente"
+    assert res[0].id_presenca is not None
 
 def test_registrar_presenca_lote_invalido_unitario():
     db = MagicMock()
@@ -679,7 +704,7 @@ def test_edicoes_crud_unitario():
     assert ed.edic_ano == 2026
     
     # Listar
-    db.query().offset().limit().all.return_value = [ed]
+    db.query().order_by().offset().limit().all.return_value = [ed]
     assert serv_edic.listar_edicoes(db) == [ed]
     
     db.query().filter().first.return_value = ed
@@ -846,21 +871,48 @@ def test_gerar_confrontos_edicao_wrapper_unitario():
 
 # ==================== 13. PARTIDAS SERVICE ====================
 
-def test_verificar_conflito_partida_unitario():
-    db = MagicMock()
-    mod = create_mock_model(models.Modalidade, id_modalidade=1, duracao_minutos=60)
-    db.query().filter().first.side_effect = [mod, mod]
-    
-    # Mocking day matches -> no overlaps
-    db.query().filter().all.return_value = []
-    assert serv_partidas.verificar_conflito_partida(db, 1, 1, 1, date.today(), time(14,0)) is None
-    
-    # Overlap conflict on local
-    db.query().filter().first.side_effect = [mod, mod]
-    p_existente = create_mock_model(models.Partida, id_partida=10, id_local=1, id_arbitro=2, id_modalidade=1, part_data=date.today(), part_hora=time(14,30), id_equipe_casa=1, id_equipe_visitante=2)
-    db.query().filter().all.return_value = [p_existente]
-    res = serv_partidas.verificar_conflito_partida(db, 1, 1, 1, date.today(), time(14,0), id_equipe_casa=3, id_equipe_visitante=4)
-    assert "local já possui" in res
+def _setup_conflito_partida(db):
+    mod_longa = models.Modalidade(nome="Futebol Conflito", duracao_minutos=90)
+    mod_curta = models.Modalidade(nome="Futsal Conflito", duracao_minutos=40)
+    evt = models.Evento(even_nome="Evento Conflito")
+    locais = [models.Local(loca_nome=f"Local Conflito {i}", ativo=True) for i in range(2)]
+    arbitros = [models.Arbitro(apito_nome=f"Arb {i}", apito_doc=f"doc-conf-{i}", apito_tel="1") for i in range(2)]
+    db.add_all([mod_longa, mod_curta, evt, *locais, *arbitros])
+    db.flush()
+    ed = models.Edicao(id_evento=evt.id_evento, edic_ano=2023, data_inicio=date(2023,1,1), data_fim=date(2023,2,1))
+    db.add(ed)
+    db.flush()
+    eqs = [models.Equipe(nome=f"Eq Conflito {i}", id_edicao=ed.id_edicao) for i in range(4)]
+    db.add_all(eqs)
+    db.flush()
+    existente = models.Partida(
+        id_edicao=ed.id_edicao, id_local=locais[0].id_local, id_arbitro=arbitros[0].id_arbitro,
+        id_modalidade=mod_longa.id_modalidade, id_equipe_casa=eqs[0].id_equipe, id_equipe_visitante=eqs[1].id_equipe,
+        part_data=date(2023,1,1), part_hora=time(10,0), status="Agendada"
+    )
+    db.add(existente)
+    db.flush()
+    return mod_longa, mod_curta, locais, arbitros, eqs, existente
+
+def test_verificar_conflito_partida_unitario(db):
+    mod_longa, mod_curta, locais, arbitros, eqs, existente = _setup_conflito_partida(db)
+    outro_local, outro_arbitro = locais[1].id_local, arbitros[1].id_arbitro
+
+    # Sem sobreposição: a partida existente (90 min) termina às 11:30
+    assert serv_partidas.verificar_conflito_partida(db, locais[0].id_local, arbitros[0].id_arbitro, mod_curta.id_modalidade, date(2023,1,1), time(11,30)) is None
+    # A duração da nova partida (40 min) é respeitada: 09:20 + 40 = 10:00
+    assert serv_partidas.verificar_conflito_partida(db, locais[0].id_local, arbitros[0].id_arbitro, mod_curta.id_modalidade, date(2023,1,1), time(9,20)) is None
+    assert "local já possui" in serv_partidas.verificar_conflito_partida(db, locais[0].id_local, outro_arbitro, mod_curta.id_modalidade, date(2023,1,1), time(9,21))
+    # Outra data não conflita
+    assert serv_partidas.verificar_conflito_partida(db, locais[0].id_local, arbitros[0].id_arbitro, mod_longa.id_modalidade, date(2023,1,2), time(10,0)) is None
+    # Recursos diferentes não conflitam
+    assert serv_partidas.verificar_conflito_partida(db, outro_local, outro_arbitro, mod_longa.id_modalidade, date(2023,1,1), time(10,0), id_equipe_casa=eqs[2].id_equipe, id_equipe_visitante=eqs[3].id_equipe) is None
+
+    # Partidas canceladas ou ignoradas não contam
+    assert serv_partidas.verificar_conflito_partida(db, locais[0].id_local, arbitros[0].id_arbitro, mod_longa.id_modalidade, date(2023,1,1), time(10,0), id_partida_ignorar=existente.id_partida) is None
+    existente.status = "Cancelada"
+    db.flush()
+    assert serv_partidas.verificar_conflito_partida(db, locais[0].id_local, arbitros[0].id_arbitro, mod_longa.id_modalidade, date(2023,1,1), time(10,0)) is None
 
 def test_criar_partida_unitario():
     db = MagicMock()
@@ -890,7 +942,7 @@ def test_partidas_listar_unitario():
     db.query().filter().first.return_value = p
     assert serv_partidas.listar_partida(db, 1) == p
     
-    db.query().filter().all.return_value = [p]
+    db.query().filter().options().all.return_value = [p]
     assert serv_partidas.listar_partidas_edicao(db, 1) == [p]
 
 def test_partidas_atualizar_empate_mata_mata_unitario():
@@ -973,25 +1025,158 @@ def test_verificar_conflito_aluno_turma_nao_encontrada_unitario():
         res = serv_matriculas.verificar_conflito_aluno(db, 1, 99)
         assert res is False
 
-def test_registrar_presenca_lote_unitario():
-    db = MagicMock()
-    mat_valida = create_mock_model(models.Matricula, id_matricula=1)
-    pres_exist = create_mock_model(models.Presenca, id_presenca=1, status='Falta')
-    
-    def mock_filter_pres(*args, **kwargs):
-        q = MagicMock()
-        if 'id_matricula' in str(args[0]):
-            q.first.return_value = pres_exist
-        else:
-            q.all.return_value = [mat_valida]
-        return q
-    db.query().filter.side_effect = mock_filter_pres
-    
-    lista = schemas.ListaPresenca(id_turma=1, data_aula=date(2023,1,1), presencas=[schemas.PresencaItem(id_matricula=1, status='Presente')])
+def test_registrar_presenca_lote_atualiza_existente_unitario(db):
+    turma, matriculas = _setup_chamada(db, 2)
+    existente = models.Presenca(id_matricula=matriculas[0].id_matricula, data_aula=date(2023, 1, 1), status="Ausente")
+    db.add(existente)
+    db.commit()
+    id_existente = existente.id_presenca
+
+    lista = schemas.ListaPresenca(id_turma=turma.id_turma, data_aula=date(2023, 1, 1), presencas=[
+        schemas.PresencaItem(id_matricula=matriculas[1].id_matricula, status='Ausente'),
+        schemas.PresencaItem(id_matricula=matriculas[0].id_matricula, status='Justificado', observacao="Atestado")
+    ])
     res = serv_pres.registrar_presenca_lote(db, lista)
     
-    assert res[0].status == 'Presente'
-    assert db.commit.called
+    # A resposta segue a ordem da chamada e reaproveita o registro já existente
+    assert [p.id_matricula for p in res] == [matriculas[1].id_matricula, matriculas[0].id_matricula]
+    assert res[1].id_presenca == id_existente
+    assert res[1].status == 'Justificado'
+    assert res[1].observacao == "Atestado"
+    assert db.query(models.Presenca).count() == 2
+
+def test_registrar_presenca_lote_quantidade_de_consultas_constante(db):
+    from sqlalchemy import event
+
+    turma, matriculas = _setup_chamada(db, 40)
+    id_turma = turma.id_turma
+    ids_matriculas = [m.id_matricula for m in matriculas]
+    comandos = []
+    def contar(conn, cursor, statement, parameters, context, executemany):
+        comandos.append(statement)
+
+    event.listen(db.get_bind(), "before_cursor_execute", contar)
+    try:
+        for status in ("Presente", "Ausente"):
+            lista = schemas.ListaPresenca(id_turma=id_turma, data_aula=date(2023, 1, 2), presencas=[
+                schemas.PresencaItem(id_matricula=id_matricula, status=status) for id_matricula in ids_matriculas
+            ])
+            res = serv_pres.registrar_presenca_lote(db, lista)
+    finally:
+        event.remove(db.get_bind(), "before_cursor_execute", contar)
+
+    # Por chamada: matrículas válidas + upsert + resumo mensal (DELETE e INSERT ... SELECT) + resposta
+    assert len(comandos) == 10
+    assert len(res) == 40
+    assert all(p.status == "Ausente" for p in res)
+    assert db.query(models.Presenca).count() == 40
+
+def test_sincronizar_presencas_varias_folhas_unitario(db):
+    from sqlalchemy import event
+
+    turma, matriculas = _setup_chamada(db, 5)
+    id_turma = turma.id_turma
+    ids_matriculas = [m.id_matricula for m in matriculas]
+    folhas = [
+        schemas.ListaPresenca(id_turma=id_turma, data_aula=date(2023, 3, dia), presencas=[
+            schemas.PresencaItem(id_matricula=id_matricula, status="Presente") for id_matricula in ids_matriculas
+        ]) for dia in range(1, 6)
+    ]
+    folhas.append(schemas.ListaPresenca(id_turma=id_turma, data_aula=date(2023, 3, 6), presencas=[
+        schemas.PresencaItem(id_matricula=99999, status="Presente")
+    ]))
+
+    comandos = []
+    def contar(conn, cursor, statement, parameters, context, executemany):
+        comandos.append(statement)
+    event.listen(db.get_bind(), "before_cursor_execute", contar)
+    try:
+        res = serv_pres.sincronizar_presencas(db, schemas.SincronizacaoPresencas(folhas=folhas))
+    finally:
+        event.remove(db.get_bind(), "before_cursor_execute", contar)
+
+    # Validação, upsert, resumo mensal e resposta: o número de comandos não depende da quantidade de folhas
+    assert len(comandos) == 5
+    assert res.total_gravadas == 25
+    assert res.total_com_erro == 1
+    assert [f.sucesso for f in res.folhas] == [True] * 5 + [False]
+    assert "99999" in res.folhas[5].erro
+    assert res.folhas[2].data_aula == date(2023, 3, 3)
+    assert [p.id_matricula for p in res.folhas[2].presencas] == ids_matriculas
+    assert db.query(models.Presenca).count() == 25
+
+def test_estatisticas_presencas_agrupadas_unitario(db):
+    turma, matriculas = _setup_chamada(db, 2)
+    id_turma = turma.id_turma
+    ids = [m.id_matricula for m in matriculas]
+    registros = [
+        (ids[0], date(2023, 4, 3), "Presente"), (ids[0], date(2023, 4, 5), "Ausente"),
+        (ids[0], date(2023, 5, 2), "Presente"), (ids[1], date(2023, 4, 3), "Justificado"),
+        (ids[1], date(2023, 5, 2), "Presente"), (ids[1], date(2023, 6, 1), "Presente"),
+    ]
+    db.add_all([models.Presenca(id_matricula=i, data_aula=d, status=st) for i, d, st in registros])
+    db.commit()
+    assert serv_pres.reconstruir_resumo_mensal(db) == 5
+
+    # Resumo mensal e presenças brutas devem concordar
+    for agrupamento in (["turma"], ["aluno", "mes"], ["modalidade"]):
+        assert list(serv_pres.estatisticas_presencas(db, agrupamento)) == list(serv_pres.estatisticas_presencas(db, agrupamento, usar_resumo=False))
+
+    por_turma = list(serv_pres.estatisticas_presencas(db, ["turma"]))
+    assert len(por_turma) == 1
+    assert por_turma[0]["id_turma"] == id_turma
+    assert (por_turma[0]["total"], por_turma[0]["presentes"], por_turma[0]["ausentes"], por_turma[0]["justificados"]) == (6, 4, 1, 1)
+    assert por_turma[0]["taxa_presenca"] == round(4 / 6, 4)
+
+    por_mes = list(serv_pres.estatisticas_presencas(db, ["mes"], data_inicio=date(2023, 4, 1), data_fim=date(2023, 5, 31)))
+    assert [(l["ano"], l["mes"], l["total"]) for l in por_mes] == [(2023, 4, 3), (2023, 5, 2)]
+
+    por_aluno_mes = list(serv_pres.estatisticas_presencas(db, ["aluno", "mes"], id_turma=id_turma))
+    assert [(l["aluno"], l["mes"], l["presentes"]) for l in por_aluno_mes] == [
+        ("Aluno Chamada 0", 4, 1), ("Aluno Chamada 0", 5, 1),
+        ("Aluno Chamada 1", 4, 0), ("Aluno Chamada 1", 5, 1), ("Aluno Chamada 1", 6, 1),
+    ]
+
+    por_modalidade = list(serv_pres.estatisticas_presencas(db, ["modalidade"], data_inicio=date(2023, 6, 1)))
+    assert por_modalidade[0]["modalidade"] == "Futsal Chamada"
+    assert por_modalidade[0]["taxa_presenca"] == 1.0
+
+    with pytest.raises(ValueError):
+        list(serv_pres.estatisticas_presencas(db, ["mes"], data_inicio=date(2023, 6, 1), data_fim=date(2023, 5, 1)))
+
+def test_resumo_mensal_atualizado_pela_chamada_unitario(db):
+    turma, matriculas = _setup_chamada(db, 2)
+    id_turma = turma.id_turma
+    ids = [m.id_matricula for m in matriculas]
+
+    def chamada(data_aula, status):
+        serv_pres.registrar_presenca_lote(db, schemas.ListaPresenca(id_turma=id_turma, data_aula=data_aula, presencas=[
+            schemas.PresencaItem(id_matricula=id_matricula, status=status) for id_matricula in ids
+        ]))
+
+    def resumo():
+        return {(r.id_matricula, r.ano, r.mes): (r.presentes, r.ausentes, r.justificados, r.total)
+                for r in db.query(models.ResumoPresencaMensal).all()}
+
+    chamada(date(2023, 8, 1), "Presente")
+    chamada(date(2023, 8, 3), "Presente")
+    chamada(date(2023, 9, 5), "Ausente")
+    assert resumo()[(ids[0], 2023, 8)] == (2, 0, 0, 2)
+    assert resumo()[(ids[1], 2023, 9)] == (0, 1, 0, 1)
+
+    # Reenviar uma chamada troca o status sem contar a aula duas vezes
+    chamada(date(2023, 8, 3), "Justificado")
+    assert resumo()[(ids[0], 2023, 8)] == (1, 0, 1, 2)
+
+    incremental = resumo()
+    serv_pres.reconstruir_resumo_mensal(db)
+    assert resumo() == incremental
+
+    # Recortes no meio do mês usam as presenças; meses inteiros usam o resumo
+    parcial = list(serv_pres.estatisticas_presencas(db, ["turma"], data_inicio=date(2023, 8, 2), data_fim=date(2023, 8, 31)))
+    assert parcial[0]["total"] == 2
+    agosto = list(serv_pres.estatisticas_presencas(db, ["turma"], data_inicio=date(2023, 8, 1), data_fim=date(2023, 8, 31)))
+    assert (agosto[0]["total"], agosto[0]["justificados"]) == (4, 2)
 
 def test_listar_presencas_sem_alunos_unitario():
     db = MagicMock()
@@ -1017,46 +1202,17 @@ import schemas
 from services import edicoes as serv_edic
 from services import partidas as serv_partidas
 
-def test_verificar_conflito_partida_local():
-    db = MagicMock()
-    mod = MagicMock()
-    mod.duracao_minutos = 60
-    
-    q = MagicMock()
-    db.query.return_value = q
-    q.filter.return_value = q
-    q.first.return_value = mod
-    
-    p1 = MagicMock(part_data=date(2023,1,1), part_hora=time(10,0), id_local=1, id_arbitro=99, id_equipe_casa=99, id_equipe_visitante=100)
-    q.all.return_value = [p1]
-    
-    assert serv_partidas.verificar_conflito_partida(db, 1, 99, 1, date(2023,1,1), time(10,0), id_partida_ignorar=1) == "O local já possui uma partida agendada com sobreposição de horário."
+def test_verificar_conflito_partida_local(db):
+    mod_longa, _, locais, arbitros, eqs, existente = _setup_conflito_partida(db)
+    assert serv_partidas.verificar_conflito_partida(db, locais[0].id_local, arbitros[1].id_arbitro, mod_longa.id_modalidade, date(2023,1,1), time(10,0)) == "O local já possui uma partida agendada com sobreposição de horário."
 
-def test_verificar_conflito_partida_arbitro():
-    db = MagicMock()
-    mod = MagicMock(duracao_minutos=60)
-    q = MagicMock()
-    db.query.return_value = q
-    q.filter.return_value = q
-    q.first.return_value = mod
-    
-    p1 = MagicMock(part_data=date(2023,1,1), part_hora=time(10,0), id_local=99, id_arbitro=1, id_equipe_casa=99, id_equipe_visitante=100)
-    q.all.return_value = [p1]
-    
-    assert serv_partidas.verificar_conflito_partida(db, 1, 1, 1, date(2023,1,1), time(10,0)) == "O árbitro já possui uma partida agendada com sobreposição de horário."
+def test_verificar_conflito_partida_arbitro(db):
+    mod_longa, _, locais, arbitros, eqs, existente = _setup_conflito_partida(db)
+    assert serv_partidas.verificar_conflito_partida(db, locais[1].id_local, arbitros[0].id_arbitro, mod_longa.id_modalidade, date(2023,1,1), time(11,0)) == "O árbitro já possui uma partida agendada com sobreposição de horário."
 
-def test_verificar_conflito_partida_equipes():
-    db = MagicMock()
-    mod = MagicMock(duracao_minutos=60)
-    q = MagicMock()
-    db.query.return_value = q
-    q.filter.return_value = q
-    q.first.return_value = mod
-    
-    p1 = MagicMock(part_data=date(2023,1,1), part_hora=time(10,0), id_local=99, id_arbitro=99, id_equipe_casa=1, id_equipe_visitante=100)
-    q.all.return_value = [p1]
-    
-    assert serv_partidas.verificar_conflito_partida(db, 1, 1, 1, date(2023,1,1), time(10,0), id_equipe_casa=1, id_equipe_visitante=2) == "Uma das equipes participantes já possui uma partida agendada com sobreposição de horário."
+def test_verificar_conflito_partida_equipes(db):
+    mod_longa, _, locais, arbitros, eqs, existente = _setup_conflito_partida(db)
+    assert serv_partidas.verificar_conflito_partida(db, locais[1].id_local, arbitros[1].id_arbitro, mod_longa.id_modalidade, date(2023,1,1), time(9,0), id_equipe_casa=eqs[2].id_equipe, id_equipe_visitante=eqs[1].id_equipe) == "Uma das equipes participantes já possui uma partida agendada com sobreposição de horário."
 
 def test_criar_partida_inline():
     db = MagicMock()
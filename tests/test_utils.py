@@ -1,5 +1,5 @@
 import pytest
-from utils import validar_cpf
+from utils import validar_cpf, normalizar_texto
 
 def test_validar_cpf_valido():
     # CPFs válidos conhecidos
@@ -25,3 +25,8 @@ def test_validar_cpf_primeiro_digito_invalido():
 def test_validar_cpf_segundo_digito_invalido():
     # "12345678908" tem o segundo dígito verificador incorreto (deveria ser 9)
     assert validar_cpf("12345678908") is False
+
+def test_normalizar_texto():
+    assert normalizar_texto("  João  D'Ávila-Conceição 3º ") == "joao d avila conceicao 3o"
+    assert normalizar_texto("") == ""
+    assert normalizar_texto(None) == ""